@@ -19,9 +19,42 @@ class Settings(BaseSettings):
     portal_transparencia_api_key: str = ""
     dadosjusbr_base_url: str = "https://api.dadosjusbr.org"
 
+    # PostgreSQL (camadas Silver/Gold). Formato SQLAlchemy: postgresql+asyncpg://...
+    database_url: str = ""  # Vazio = dados estáticos de salary_data
+    database_pool_min_size: int = 1
+    database_pool_max_size: int = 5
+    database_statement_cache_size: int = 100  # 0 se houver PgBouncer em modo transaction
+    database_command_timeout_seconds: float = 10.0
+    database_sync_interval_seconds: float = 30.0  # Checagem da versão do dataset no banco
+
+    # Diretório de dados locais (snapshots, caches em disco) — compartilhado entre workers
+    data_dir: str = "data"
+
+    # Cliente HTTP compartilhado (pool de conexões)
+    http_timeout_seconds: float = 5.0
+    http_connect_timeout_seconds: float = 2.0
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+
+    # Câmbio (stale-while-revalidate)
+    exchange_rate_ttl_seconds: int = 3600
+    exchange_rate_deadline_seconds: float = 4.0  # Orçamento da cascata inteira
+    exchange_rate_source_timeout_seconds: float = 2.5  # Limite por fonte
+    circuit_failure_threshold: int = 3
+    circuit_reset_seconds: float = 60.0
+
     # Cache
     cache_ttl_seconds: int = 3600
     cache_max_size: int = 1000
+    cache_l2_enabled: bool = True  # L2 em SQLite compartilhado entre workers
+    cache_l2_file: str = "cache.sqlite3"  # Dentro de DATA_DIR
+    cache_sync_interval_seconds: float = 1.0  # Checagem de invalidação entre workers
+    cache_l2_purge_interval_seconds: float = 300.0  # Limpeza das entradas expiradas do L2
+
+    # Rotas internas (purge de cache) e integração com o proxy_cache do nginx
+    internal_api_token: str = ""  # Vazio = rotas /internal desativadas
+    nginx_refresh_url: str = ""  # Ex.: "http://nginx:8080" (listener interno)
+    internal_api_url: str = "http://localhost:8000"  # App visto pelo ETL (purge após refresh)
 
     # Teto constitucional (atualizar quando mudar)
     teto_constitucional: float = 46366.19
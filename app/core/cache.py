@@ -1,54 +1,712 @@
-"""Sistema de cache em memória para fragmentos HTMX e dados de API."""
+"""Sistema de cache em dois níveis para fragmentos HTMX e dados de API.
 
+- L1: `TTLCache` em memória, por processo (acesso em nanossegundos).
+- L2: SQLite em `DATA_DIR/cache.sqlite3`, compartilhado por todos os workers
+  do host (modo WAL: leitores não bloqueiam o escritor).
+
+Leitura: L1 → L2 → origem. Um valor lido do L2 é promovido ao L1, então um
+fragmento renderizado por um worker serve os demais sem nova renderização.
+
+Invalidação: `invalidate_cache()` limpa o L2 e incrementa um contador de
+geração no próprio SQLite. Cada worker confere esse contador no máximo a cada
+`cache_sync_interval_seconds` e, se mudou, descarta o próprio L1 — assim a
+invalidação chega a todos os workers, não só a quem a chamou.
+
+Versões por namespace: cada fragmento declara de quais dados depende
+("salary", "rates"...). A versão atual de cada namespace entra na chave, então
+publicar uma nova versão (refresh de câmbio, fim de ETL) invalida só os
+fragmentos dependentes, em todos os workers, sem apagar o restante.
+
+As chaves incluem a versão do build (hash dos templates), para que um L2
+persistido em disco não sirva HTML de um deploy anterior.
+
+O L2 nunca trava o event loop: leituras de `kv` rodam numa thread
+(`asyncio.to_thread`) e gravações vão, sem espera, para uma thread de escrita
+única por processo — só a escrita disputa o lock do SQLite com outros
+workers. Versões de namespace e a limpeza total valem na hora no próprio
+worker e são gravadas pela mesma thread; a sincronização com os demais
+workers também é lida lá e aplicada na chamada seguinte. Como a fila é uma
+só, uma leitura enfileirada depois de uma gravação já a enxerga. A mesma
+thread apaga, a cada `cache_l2_purge_interval_seconds`, as entradas
+expiradas (inclusive as de versões de namespace já substituídas, que
+ninguém mais lê).
+"""
+
+import asyncio
+import gzip
 import hashlib
 import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from functools import wraps
+from pathlib import Path
 from typing import Any, Callable
 
 from cachetools import TTLCache
+from fastapi.responses import Response
 
 from app.config import get_settings
+from app.core.storage import data_path
+
+try:
+    import brotli
+except ImportError:  # Ambiente sem brotli instalado: páginas saem só com gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-_cache: TTLCache = TTLCache(
-    maxsize=settings.cache_max_size,
-    ttl=settings.cache_ttl_seconds,
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+
+def _compute_build_version() -> str:
+    """Hash dos templates: muda a cada deploy que altera o HTML."""
+    digest = hashlib.sha1(b"octowage-0.1.0")
+    for path in sorted(TEMPLATES_DIR.rglob("*.html")):
+        digest.update(path.relative_to(TEMPLATES_DIR).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:10]
+
+
+BUILD_VERSION = _compute_build_version()
+
+# Data da última alteração de template (Last-Modified de páginas sem dados)
+BUILD_TIMESTAMP: float = max(
+    (p.stat().st_mtime for p in TEMPLATES_DIR.rglob("*.html")),
+    default=time.time(),
 )
 
 
-def cached_fragment(ttl: int | None = None) -> Callable:
-    """Decorator para cachear fragmentos HTML renderizados.
+class SQLiteStore:
+    """L2: armazenamento chave-valor em SQLite compartilhado entre processos.
 
-    Args:
-        ttl: Tempo de vida do cache em segundos. Se None, usa o padrão.
+    As operações são síncronas e locais (microssegundos em disco/page cache).
+    Uma conexão por thread: em WAL, leitores não esperam o escritor, então só
+    quem grava pode esbarrar no lock de escrita de outro worker.
     """
-    cache_store = _cache if ttl is None else TTLCache(maxsize=500, ttl=ttl)
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Conexões SQLite não sobrevivem a fork: reabre em cada processo
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=0.5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS namespaces ("
+                " name TEXT PRIMARY KEY, token TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS surrogate_urls ("
+                " key TEXT NOT NULL, url TEXT NOT NULL, seen_at REAL NOT NULL,"
+                " PRIMARY KEY (key, url))"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> bytes | None:
+        """Retorna o valor se existir e não tiver expirado."""
+        sql = "SELECT value, expires_at FROM kv WHERE key = ?"
+        row = self._connect().execute(sql, (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Grava (ou substitui) um valor com TTL em segundos."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl),
+        )
+
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        self._connect().execute("DELETE FROM kv")
+
+    def purge_expired(self) -> int:
+        """Remove entradas expiradas. Retorna quantas."""
+        cur = self._connect().execute("DELETE FROM kv WHERE expires_at < ?", (time.time(),))
+        return cur.rowcount
+
+    def get_meta(self, name: str) -> int:
+        """Lê um contador compartilhado (0 se não existir)."""
+        sql = "SELECT value FROM meta WHERE name = ?"
+        row = self._connect().execute(sql, (name,)).fetchone()
+        return row[0] if row else 0
+
+    def incr_meta(self, name: str) -> int:
+        """Incrementa atomicamente um contador compartilhado e retorna o novo valor."""
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO meta (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+        return conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()[0]
+
+    def get_namespaces(self) -> dict[str, tuple[str, float]]:
+        """Todas as versões de namespace: {nome: (token, atualizado_em)}."""
+        sql = "SELECT name, token, updated_at FROM namespaces"
+        rows = self._connect().execute(sql).fetchall()
+        return {name: (token, updated_at) for name, token, updated_at in rows}
+
+    def set_namespace(self, name: str, token: str) -> bool:
+        """Define o token de um namespace. Retorna True se ele mudou."""
+        cur = self._connect().execute(
+            "INSERT INTO namespaces (name, token, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET token = excluded.token, "
+            "updated_at = excluded.updated_at "
+            "WHERE namespaces.token != excluded.token",
+            (name, token, time.time()),
+        )
+        return cur.rowcount > 0
+
+    def add_surrogate_urls(self, keys: list[str], url: str) -> None:
+        """Registra que `url` depende de cada surrogate key."""
+        now = time.time()
+        self._connect().executemany(
+            "INSERT OR REPLACE INTO surrogate_urls (key, url, seen_at) VALUES (?, ?, ?)",
+            [(key, url, now) for key in keys],
+        )
+
+    def urls_for_keys(self, keys: list[str]) -> list[str]:
+        """URLs já servidas que dependem de qualquer uma das keys."""
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        sql = f"SELECT DISTINCT url FROM surrogate_urls WHERE key IN ({placeholders})"
+        rows = self._connect().execute(sql, keys).fetchall()
+        return [row[0] for row in rows]
+
+    def prune_surrogate_urls(self) -> int:
+        """Remove registros de keys `<ns>-<token>` de versões já substituídas.
+
+        Cada nova versão de namespace cria uma key nova; as antigas nunca
+        mais são consultadas (o purge busca pelo nome do namespace).
+        """
+        cur = self._connect().execute(
+            "DELETE FROM surrogate_urls WHERE key NOT IN (SELECT name FROM namespaces) "
+            "AND EXISTS (SELECT 1 FROM namespaces n WHERE surrogate_urls.key GLOB n.name || '-*' "
+            "AND surrogate_urls.key != n.name || '-' || n.token)"
+        )
+        return cur.rowcount
+
+
+class TwoTierCache:
+    """Cache L1 (memória do processo) + L2 (SQLite compartilhado no host)."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        l2: SQLiteStore | None = None,
+        sync_interval: float = 1.0,
+        purge_interval: float = 300.0,
+    ) -> None:
+        self.ttl = ttl
+        self.l1: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.l2 = l2
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self._generation = 0
+        self._last_sync = 0.0
+        self._last_purge = time.monotonic()
+        self._writer: ThreadPoolExecutor | None = None
+        self._writer_pid: int | None = None
+        self._namespaces: dict[str, tuple[str, float]] = {}
+        # Tarefas enfileiradas na thread do L2 (ordem FIFO)
+        self._queued = 0
+        # Leitura de sincronização em andamento e a posição dela na fila
+        self._sync_future: Future | None = None
+        self._sync_seq = 0
+        # Versões publicadas aqui cuja gravação pode não ter chegado ao L2
+        self._pending_namespaces: dict[str, tuple[str, float, int]] = {}
+        # Limpeza total feita aqui: posição na fila e a geração resultante
+        self._clear_future: Future | None = None
+        self._clear_seq = 0
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "l2_errors": 0}
+
+    def _key(self, key: str) -> str:
+        return f"{BUILD_VERSION}:{key}"
+
+    def _l2_call(self, fn: Callable, *args: Any) -> Any:
+        """Executa uma operação no L2; em erro, degrada para somente L1."""
+        if self.l2 is None:
+            return None
+        try:
+            return fn(*args)
+        except sqlite3.Error as e:
+            self.stats["l2_errors"] += 1
+            logger.warning("Cache L2 indisponível: %s", e)
+            return None
+
+    def write(self, fn: Callable, *args: Any) -> Future | None:
+        """Agenda uma gravação no L2 na thread de escrita, sem esperar.
+
+        Uma thread só por processo: as gravações saem em ordem e a espera
+        pelo lock de escrita (outro worker gravando) nunca cai no event loop.
+        """
+        if self.l2 is None:
+            return None
+        # Threads não sobrevivem a fork: recria o executor em cada processo
+        if self._writer is None or self._writer_pid != os.getpid():
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-l2")
+            self._writer_pid = os.getpid()
+        self._queued += 1
+        return self._writer.submit(self._l2_call, fn, *args)
+
+    def _maybe_purge(self) -> None:
+        """Agenda a limpeza das entradas expiradas a cada `purge_interval`.
+
+        Entradas de versões de namespace substituídas nunca mais são lidas;
+        sem isto, só sairiam do `kv` no próximo restart.
+        """
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        self.write(self.l2.purge_expired)
+
+    def _read_sync_state(self) -> tuple[int | None, dict[str, tuple[str, float]] | None]:
+        """Geração e versões de namespace no L2 (roda na thread do L2)."""
+        return (
+            self._l2_call(self.l2.get_meta, "generation"),
+            self._l2_call(self.l2.get_namespaces),
+        )
+
+    def _apply_sync(
+        self,
+        generation: int | None,
+        namespaces: dict[str, tuple[str, float]] | None,
+        seq: int,
+    ) -> None:
+        """Aplica uma leitura do L2 feita na posição `seq` da fila."""
+        clear = self._clear_future
+        if clear is not None and clear.done():
+            # Nossa própria limpeza: já descartamos o L1, só anota a geração
+            if clear.result() is not None:
+                self._generation = clear.result()
+            self._clear_future = None
+        # Leituras anteriores à nossa última limpeza trazem a geração antiga
+        if generation is not None and generation != self._generation and seq > self._clear_seq:
+            if self._generation:
+                logger.info("Cache invalidado por outro worker (geração %d)", generation)
+            self.l1.clear()
+            self._generation = generation
+        if namespaces is not None:
+            # Versões publicadas aqui depois da leitura ainda não estão nela
+            for name, (token, updated_at, queued_at) in list(self._pending_namespaces.items()):
+                if queued_at < seq:
+                    del self._pending_namespaces[name]
+                else:
+                    namespaces[name] = (token, updated_at)
+            self._namespaces = namespaces
+
+    def _sync(self) -> None:
+        """Sincroniza com os demais workers (no máximo a cada `sync_interval`).
+
+        Descarta o L1 se outro worker invalidou tudo e recarrega as versões de
+        namespace (uma tabela pequena). A leitura roda na thread do L2 e é
+        aplicada na chamada seguinte; só a primeira do processo (no startup)
+        é feita aqui mesmo, para não servir chaves sem versão.
+        """
+        if self.l2 is None:
+            return
+        pending = self._sync_future
+        if pending is not None and pending.done():
+            self._sync_future = None
+            self._apply_sync(*pending.result(), self._sync_seq)
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        if self._sync_future is not None:
+            return
+        first = not self._last_sync
+        self._last_sync = now
+        future = self.write(self._read_sync_state)
+        self._sync_seq = self._queued
+        if first:
+            # Uma vez por processo: espera a leitura (fila vazia no startup)
+            self._apply_sync(*future.result(), self._sync_seq)
+        else:
+            self._sync_future = future
+
+    def namespace_token(self, name: str) -> str:
+        """Versão atual de um namespace de dados ("" se nunca definida)."""
+        self._sync()
+        return self._namespaces.get(name, ("", 0.0))[0]
+
+    def namespace_updated_at(self, name: str) -> float:
+        """Momento (epoch) da última mudança de versão do namespace."""
+        self._sync()
+        return self._namespaces.get(name, ("", 0.0))[1]
+
+    def set_namespace(self, name: str, token: str) -> bool:
+        """Define a versão de um namespace. Retorna True se ela mudou.
+
+        Idempotente: vários workers publicando o mesmo token (ex.: hash das
+        mesmas cotações) não geram invalidações repetidas. Vale na hora neste
+        worker; a gravação no L2 vai para a thread de escrita.
+        """
+        self._sync()
+        current = self._namespaces.get(name)
+        if current is not None and current[0] == token:
+            return False
+        updated_at = time.time()
+        self._namespaces[name] = (token, updated_at)
+        if self.l2 is not None:
+            self.write(self.l2.set_namespace, name, token)
+            self._pending_namespaces[name] = (token, updated_at, self._queued)
+        return True
+
+    async def get(self, key: str) -> Any | None:
+        """Busca no L1 e depois no L2 (numa thread). Retorna None em caso de miss."""
+        self._sync()
+        full_key = self._key(key)
+
+        entry = self.l1.get(full_key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self.stats["l1_hits"] += 1
+                return value
+            self.l1.pop(full_key, None)
+
+        raw = await asyncio.to_thread(self._l2_call, self.l2.get, full_key) if self.l2 else None
+        if raw is not None:
+            try:
+                expires_at, value = pickle.loads(raw)
+            except Exception:
+                value = None
+            else:
+                self.stats["l2_hits"] += 1
+                self.l1[full_key] = (expires_at, value)
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Grava no L1 e agenda a gravação no L2 (se o valor for serializável)."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl
+        full_key = self._key(key)
+        self.l1[full_key] = (expires_at, value)
+
+        if self.l2 is None:
+            return
+        try:
+            raw = pickle.dumps((expires_at, value), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Objetos não serializáveis ficam apenas no L1 deste processo
+            return
+        self.write(self.l2.set, full_key, raw, ttl)
+        self._maybe_purge()
+
+    def _clear_l2(self) -> int | None:
+        """Limpa o L2 e incrementa a geração (roda na thread do L2)."""
+        self.l2.clear()
+        return self.l2.incr_meta("generation")
+
+    def clear(self) -> None:
+        """Limpa L1 e L2 e avisa os demais workers (nova geração).
+
+        O L1 é limpo na hora; o L2 e a geração, na thread do L2.
+        """
+        self.l1.clear()
+        if self.l2 is None:
+            return
+        self._clear_future = self.write(self._clear_l2)
+        self._clear_seq = self._queued
+
+
+def _build_cache() -> TwoTierCache:
+    l2 = SQLiteStore(data_path(settings.cache_l2_file)) if settings.cache_l2_enabled else None
+    return TwoTierCache(
+        maxsize=settings.cache_max_size,
+        ttl=settings.cache_ttl_seconds,
+        l2=l2,
+        sync_interval=settings.cache_sync_interval_seconds,
+        purge_interval=settings.cache_l2_purge_interval_seconds,
+    )
+
+
+_cache: TwoTierCache = _build_cache()
+
+
+def get_shared_store() -> SQLiteStore | None:
+    """Store SQLite compartilhado entre workers (None se o L2 estiver desligado)."""
+    return _cache.l2
+
+
+def schedule_shared_write(fn: Callable, *args: Any) -> Future | None:
+    """Agenda uma gravação no store compartilhado, fora do event loop.
+
+    Roda depois de tudo o que o cache já enfileirou (ex.: versões de
+    namespace recém-publicadas).
+    """
+    return _cache.write(fn, *args)
+
+
+@dataclass
+class CachedResponse:
+    """Resposta HTML já renderizada, pronta para ser servida do cache.
+
+    Páginas completas guardam também as variantes pré-comprimidas (gzip e,
+    se disponível, brotli), escolhidas por `Accept-Encoding` ao servir.
+    """
+
+    body: bytes
+    status_code: int
+    media_type: str | None
+    headers: dict[str, str]
+    version: str = ""  # Versão do conteúdo (build + namespaces)
+    gzip_body: bytes | None = None
+    br_body: bytes | None = None
+
+    def to_response(self, accept_encoding: str = "") -> Response:
+        headers = dict(self.headers)
+        body = self.body
+        if self.gzip_body is not None or self.br_body is not None:
+            headers["vary"] = "Accept-Encoding"
+            encoding = negotiate_encoding(accept_encoding)
+            if encoding == "br" and self.br_body is not None:
+                body = self.br_body
+                headers["content-encoding"] = "br"
+            elif encoding == "gzip" and self.gzip_body is not None:
+                body = self.gzip_body
+                headers["content-encoding"] = "gzip"
+        return Response(
+            content=body,
+            status_code=self.status_code,
+            media_type=self.media_type,
+            headers=headers,
+        )
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Codificação servida para um `Accept-Encoding`: "br", "gzip" ou "".
+
+    Ignora codificações marcadas com q=0. Brotli só é escolhido se instalado.
+    """
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if coding:
+            accepted.add(coding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+
+# Cabeçalhos da resposta original preservados no cache
+_KEPT_HEADERS = ("content-type", "hx-trigger", "hx-push-url", "hx-reswap", "hx-retarget")
+
+# Renderizações em andamento por chave (coalescência dentro do processo)
+_inflight: dict[str, asyncio.Future] = {}
+
+# Contadores por fragmento/página: {nome: {"hits", "misses", "coalesced"}}
+_fragment_stats: dict[str, dict[str, int]] = {}
+
+# Ganchos chamados antes de ler a versão de um namespace (ex.: agendar refresh)
+_namespace_hooks: dict[str, Callable[[], None]] = {}
+
+
+def register_namespace_hook(name: str, hook: Callable[[], None]) -> None:
+    """Registra um gancho barato executado sempre que a versão do namespace é lida.
+
+    Usado pelo câmbio: mesmo quando a página sai do cache, o refresh
+    stale-while-revalidate continua sendo agendado.
+    """
+    _namespace_hooks[name] = hook
+
+
+def namespace_token(name: str) -> str:
+    """Versão atual de um namespace de dados (ex.: "salary", "rates")."""
+    hook = _namespace_hooks.get(name)
+    if hook is not None:
+        hook()
+    return _cache.namespace_token(name)
+
+
+def namespace_updated_at(name: str) -> float:
+    """Momento (epoch) da última mudança de versão do namespace."""
+    return _cache.namespace_updated_at(name)
+
+
+def set_namespace_version(name: str, token: str) -> bool:
+    """Publica a versão de um namespace; fragmentos dependentes passam a errar o cache."""
+    changed = _cache.set_namespace(name, token)
+    if changed:
+        logger.info("Namespace de cache %s → %s", name, token)
+    return changed
+
+
+def bump_namespace(name: str) -> str:
+    """Gera uma nova versão para o namespace (invalida só quem depende dele)."""
+    token = uuid.uuid4().hex[:12]
+    set_namespace_version(name, token)
+    return token
+
+
+def content_version(namespaces: tuple[str, ...]) -> str:
+    """Versão do conteúdo: build + versões atuais dos namespaces."""
+    tokens = ",".join(f"{ns}={namespace_token(ns)}" for ns in sorted(namespaces))
+    return hashlib.sha1(f"{BUILD_VERSION}|{tokens}".encode()).hexdigest()[:16]
+
+
+def fragment_cache_key(func: Callable, params: dict[str, Any], version: str) -> str:
+    """Chave: função qualificada + parâmetros + versão do conteúdo."""
+    payload = json.dumps(
+        {k: v for k, v in params.items() if k != "request"},
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha1(f"{version}|{payload}".encode()).hexdigest()
+    return f"frag:{func.__module__}.{func.__qualname__}:{digest}"
+
+
+def _compress(entry: CachedResponse) -> None:
+    """Gera as variantes gzip/brotli do corpo (uma vez, no miss)."""
+    entry.gzip_body = gzip.compress(entry.body, compresslevel=6)
+    if brotli is not None:
+        entry.br_body = brotli.compress(entry.body, quality=9)
+
+
+def _cached_render(ttl: int | None, namespaces: tuple[str, ...], compress: bool) -> Callable:
+    """Implementação comum de `cached_fragment` e `cached_page`."""
 
     def decorator(func: Callable) -> Callable:
+        name = f"{func.__module__}.{func.__qualname__}"
+        stats = _fragment_stats.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0})
+
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            # Gera chave baseada nos parâmetros
-            key = hashlib.md5(
-                json.dumps(
-                    {"fn": func.__name__, "kwargs": {k: v for k, v in kwargs.items() if k != "request"}},
-                    sort_keys=True,
-                    default=str,
-                ).encode()
-            ).hexdigest()
-
-            if key in cache_store:
-                return cache_store[key]
-
-            result = await func(*args, **kwargs)
-            cache_store[key] = result
-            return result
+            request = kwargs.get("request")
+            accept_encoding = (
+                request.headers.get("accept-encoding", "") if compress and request else ""
+            )
+            version = content_version(namespaces)
+            key = fragment_cache_key(func, kwargs, version)
+
+            cached = await _cache.get(key)
+            if cached is not None:
+                stats["hits"] += 1
+                return cached.to_response(accept_encoding)
+
+            pending = _inflight.get(key)
+            if pending is not None:
+                stats["coalesced"] += 1
+                entry = await asyncio.shield(pending)
+                if entry is not None:
+                    return entry.to_response(accept_encoding)
+                # A renderização original não era cacheável: renderiza a própria
+                return await func(*args, **kwargs)
+
+            stats["misses"] += 1
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            _inflight[key] = future
+            try:
+                response = await func(*args, **kwargs)
+                entry = None
+                if 200 <= response.status_code < 300:
+                    entry = CachedResponse(
+                        body=bytes(response.body),
+                        status_code=response.status_code,
+                        media_type=response.media_type,
+                        headers={k: v for k, v in response.headers.items() if k in _KEPT_HEADERS},
+                        version=version,
+                    )
+                    if compress:
+                        _compress(entry)
+                    _cache.set(key, entry, ttl)
+                future.set_result(entry)
+                return entry.to_response(accept_encoding) if entry is not None else response
+            except asyncio.CancelledError:
+                # Requisição cancelada: quem aguardava renderiza por conta própria
+                future.set_result(None)
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # Evita "exception was never retrieved" quando ninguém aguardava
+                future.exception()
+                raise
+            finally:
+                _inflight.pop(key, None)
 
         return wrapper
 
     return decorator
 
 
+def cached_fragment(ttl: int | None = None, namespaces: tuple[str, ...] = ()) -> Callable:
+    """Decorator para cachear fragmentos HTML renderizados.
+
+    Guarda o corpo renderizado (bytes) no cache de dois níveis. Misses
+    concorrentes para a mesma chave são unidos em uma única renderização.
+    Apenas respostas 2xx são cacheadas.
+
+    Args:
+        ttl: Tempo de vida do cache em segundos. Se None, usa o padrão.
+        namespaces: Namespaces de dados dos quais o fragmento depende. Quando a
+            versão de um deles muda (`set_namespace_version`/`bump_namespace`),
+            a chave muda e o fragmento é renderizado de novo.
+    """
+    return _cached_render(ttl, namespaces, compress=False)
+
+
+def cached_page(ttl: int | None = None, namespaces: tuple[str, ...] = ()) -> Callable:
+    """Decorator para cachear páginas SSR completas, já comprimidas.
+
+    Igual a `cached_fragment`, mas guarda também as variantes gzip/brotli do
+    HTML: no hit, a rota não renderiza Jinja nem comprime — só escolhe os
+    bytes pela `Accept-Encoding` e escreve no socket. A rota precisa receber
+    `request` como argumento nomeado.
+    """
+    return _cached_render(ttl, namespaces, compress=True)
+
+
+def cache_stats() -> dict:
+    """Contadores do cache (L1/L2) e de cada fragmento decorado."""
+    fragments = {k: dict(v) for k, v in _fragment_stats.items()}
+    return {"cache": dict(_cache.stats), "fragments": fragments}
+
+
+def purge_expired_cache() -> None:
+    """Remove entradas expiradas do L2. Chamado no startup do lifespan."""
+    if _cache.l2 is not None:
+        _cache._l2_call(_cache.l2.purge_expired)
+
+
 def invalidate_cache() -> None:
-    """Limpa todo o cache. Chamar após ETL completar."""
+    """Limpa todo o cache, em todos os workers.
+
+    Não use após ETL: `etl.orchestrator` invalida só os namespaces e
+    surrogate keys alimentados pelas views Gold atualizadas (via /internal/purge).
+    """
     _cache.clear()
@@ -0,0 +1,77 @@
+"""Pool de conexões PostgreSQL (asyncpg) compartilhado pelo processo.
+
+Um único `asyncpg.Pool` por worker, aberto e fechado pelo lifespan da
+aplicação, como o cliente HTTP (`app.core.http`). Sem `DATABASE_URL` o banco
+fica desativado e o app serve os dados estáticos de `salary_data`.
+
+Consultas preparadas: o asyncpg prepara cada SQL na primeira execução em uma
+conexão e guarda o plano no cache de statements dela
+(`database_statement_cache_size`). Como as consultas do app são constantes de
+módulo, a partir da segunda chamada numa conexão não há parse nem plan.
+"""
+
+import logging
+
+from app.config import get_settings
+
+try:
+    import asyncpg
+except ImportError:  # Extra "db" não instalado: app roda só com dados estáticos
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+_pool: "asyncpg.Pool | None" = None
+
+
+def asyncpg_dsn(url: str) -> str:
+    """`postgresql+asyncpg://...` (formato SQLAlchemy) → DSN do asyncpg."""
+    scheme, sep, rest = url.partition("://")
+    return f"{scheme.split('+')[0]}{sep}{rest}"
+
+
+def database_enabled() -> bool:
+    """Se há banco configurado (e o driver instalado)."""
+    return bool(settings.database_url) and asyncpg is not None
+
+
+async def start_database() -> bool:
+    """Abre o pool. Chamado no startup do lifespan; False se não houver banco."""
+    global _pool
+    if not settings.database_url:
+        return False
+    if asyncpg is None:
+        logger.warning("DATABASE_URL definida, mas asyncpg não está instalado (extra \"db\")")
+        return False
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            asyncpg_dsn(settings.database_url),
+            min_size=settings.database_pool_min_size,
+            max_size=settings.database_pool_max_size,
+            statement_cache_size=settings.database_statement_cache_size,
+            command_timeout=settings.database_command_timeout_seconds,
+        )
+        logger.info(
+            "Pool PostgreSQL iniciado (%d–%d conexões)",
+            settings.database_pool_min_size,
+            settings.database_pool_max_size,
+        )
+    return True
+
+
+async def close_database() -> None:
+    """Fecha o pool. Chamado no shutdown do lifespan."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        logger.info("Pool PostgreSQL encerrado")
+    _pool = None
+
+
+def get_pool() -> "asyncpg.Pool":
+    """Retorna o pool aberto pelo lifespan."""
+    if _pool is None:
+        raise RuntimeError("Pool PostgreSQL não iniciado (start_database)")
+    return _pool
@@ -0,0 +1,64 @@
+"""Cliente HTTP compartilhado (pool de conexões) para chamadas a APIs externas.
+
+Um único `httpx.AsyncClient` por processo, aberto e fechado pelo lifespan da
+aplicação. Reaproveita conexões TCP/TLS entre chamadas em vez de abrir um
+cliente novo a cada requisição.
+"""
+
+import logging
+
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+_client: httpx.AsyncClient | None = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    """Cria o cliente com limites de pool e timeouts configurados."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            settings.http_timeout_seconds,
+            connect=settings.http_connect_timeout_seconds,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=30.0,
+        ),
+        headers={"User-Agent": f"{settings.app_title}/0.1 (+https://octowage.com.br)"},
+        follow_redirects=True,
+    )
+
+
+async def start_http_client() -> None:
+    """Abre o cliente compartilhado. Chamado no startup do lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+        logger.info("Cliente HTTP compartilhado iniciado")
+
+
+async def close_http_client() -> None:
+    """Fecha o cliente compartilhado. Chamado no shutdown do lifespan."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Cliente HTTP compartilhado encerrado")
+    _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Retorna o cliente compartilhado, criando-o sob demanda.
+
+    Fora do lifespan (scripts, shell) o cliente é criado na primeira chamada;
+    nesse caso quem chamou é responsável por `close_http_client()`.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,52 @@
+"""Downsampling Largest-Triangle-Three-Buckets (LTTB) para séries de gráfico.
+
+Reduz uma série a `threshold` pontos preservando a forma visual: o primeiro
+e o último ponto ficam; o miolo é dividido em `threshold - 2` baldes e, de
+cada um, fica o ponto que forma o maior triângulo com o ponto escolhido no
+balde anterior e a média do balde seguinte. Picos e vales isolados (13º,
+abonos, retroativos) sobrevivem, ao contrário da média por balde ou da
+amostragem a passo fixo.
+
+As médias dos baldes saem de uma vez (`np.add.reduceat`); só a escolha, que
+depende do ponto anterior, é sequencial — um laço por balde, nunca por ponto.
+"""
+
+import numpy as np
+
+MIN_THRESHOLD = 3
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Índices (crescentes) dos pontos mantidos de (x, y), com x crescente.
+
+    Com `threshold` maior ou igual ao tamanho da série, mantém todos.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if len(y) != n:
+        raise ValueError(f"x e y com tamanhos diferentes ({n} e {len(y)})")
+    if threshold < MIN_THRESHOLD:
+        raise ValueError(f"threshold deve ser pelo menos {MIN_THRESHOLD}")
+    if threshold >= n:
+        return np.arange(n)
+
+    # Baldes [edges[i], edges[i + 1]) cobrem os pontos 1 … n-2; o "balde" final
+    # [n-1, n) é só o último ponto, usado como vizinho do último balde
+    edges = np.append(np.linspace(1, n - 1, threshold - 1).astype(np.int64), n)
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x, edges[:-1]) / sizes
+    avg_y = np.add.reduceat(y, edges[:-1]) / sizes
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Dobro da área do triângulo (a, candidato, média do próximo balde)
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
@@ -0,0 +1,108 @@
+"""Primitivas de resiliência para chamadas a fontes externas.
+
+- `CircuitBreaker`: depois de N falhas seguidas a fonte é pulada por um tempo
+  (aberto). Passado o tempo, uma única chamada de teste é liberada
+  (semiaberto): sucesso fecha o circuito, falha o reabre; teste cancelado
+  libera a vaga (`release`) para o próximo.
+- `Deadline`: orçamento de tempo total para uma cascata de chamadas.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitBreaker:
+    """Circuit breaker por fonte (fechado → aberto → semiaberto → fechado)."""
+
+    name: str
+    failure_threshold: int = 3  # Falhas seguidas para abrir
+    reset_timeout: float = 60.0  # Segundos em aberto antes do teste
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float | None = None
+    _probe_in_flight: bool = field(default=False, repr=False)
+
+    def allow(self) -> bool:
+        """Indica se a chamada pode ser feita agora."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if (
+                self.opened_at is not None
+                and time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            else:
+                return False
+        # Semiaberto: apenas uma chamada de teste por vez
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Registra sucesso: fecha o circuito e zera o contador."""
+        if self.state != CLOSED:
+            logger.info("Circuit breaker %s fechado", self.name)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Registra falha: abre o circuito ao atingir o limite (ou no teste)."""
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(
+                    "Circuit breaker %s aberto por %.0f s após %d falha(s)",
+                    self.name,
+                    self.reset_timeout,
+                    self.failures,
+                )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Libera a chamada de teste sem veredito (ex.: cancelada no meio).
+
+        Sem isso, um teste cancelado deixaria o semiaberto esperando para
+        sempre por um resultado que não vem.
+        """
+        self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        """Estado atual para métricas."""
+        return {"state": self.state, "failures": self.failures}
+
+
+@dataclass
+class Deadline:
+    """Orçamento de tempo (em segundos) compartilhado por várias chamadas."""
+
+    budget: float
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def remaining(self) -> float:
+        """Segundos restantes (nunca negativo)."""
+        return max(0.0, self.budget - (time.monotonic() - self.started))
+
+    @property
+    def expired(self) -> bool:
+        """Indica se o orçamento acabou."""
+        return self.remaining <= 0.0
+
+    def timeout_for(self, limit: float) -> float:
+        """Timeout de uma chamada: o menor entre o limite dela e o restante."""
+        return min(limit, self.remaining)
@@ -0,0 +1,81 @@
+"""Persistência local em disco: diretório de dados e escrita atômica.
+
+Arquivos compartilhados entre workers (snapshots, índices) são sempre escritos
+em um arquivo temporário no mesmo diretório e publicados com `os.replace`,
+que é atômico no mesmo sistema de arquivos: um leitor vê o arquivo antigo
+inteiro ou o novo inteiro, nunca um arquivo pela metade.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+def data_path(*parts: str) -> Path:
+    """Caminho dentro do diretório de dados (`DATA_DIR`), criando-o se preciso."""
+    base = Path(settings.data_dir)
+    base.mkdir(parents=True, exist_ok=True)
+    return base.joinpath(*parts)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Escreve `data` em `path` de forma atômica (tmp + fsync + rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@contextmanager
+def atomic_open(path: Path) -> Iterator[BinaryIO]:
+    """Arquivo binário para escrita incremental, publicado atomicamente no fim.
+
+    Para conteúdo grande gerado aos pedaços (ex.: download em streaming). Se o
+    bloco levantar exceção, o temporário é apagado e `path` fica intacto.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write_json(path: Path, payload: Any) -> None:
+    """Serializa `payload` como JSON UTF-8 e escreve de forma atômica."""
+    atomic_write_bytes(path, json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+def read_json(path: Path) -> Any | None:
+    """Lê um JSON do disco. Retorna None se não existir ou estiver corrompido."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        return None
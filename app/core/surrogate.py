@@ -0,0 +1,146 @@
+"""Surrogate keys e purge seletivo do cache do nginx.
+
+Cada resposta cacheável sai com `Surrogate-Key` listando suas dependências de
+dados: o nome do namespace ("salary", "rates"), a versão atual dele
+("rates-3f9a…") e as carreiras envolvidas ("career-juiz_tjsp"). O app guarda
+no L2 compartilhado quais URLs já foram servidas para cada key; a cada purge,
+os registros das keys de versões substituídas são apagados.
+
+Purge: o nginx OSS não apaga entradas por tag. Então, para cada URL afetada,
+o app pede ao nginx (listener interno, fora da internet) uma busca com o
+cabeçalho `X-Cache-Refresh`. O nginx ignora a cópia em cache
+(`proxy_cache_bypass`), busca no app e grava a resposta nova por cima. Só as
+URLs das keys afetadas são renovadas; o resto do cache continua quente.
+"""
+
+import asyncio
+import logging
+from typing import Any
+
+from app.config import get_settings
+from app.core.cache import (
+    bump_namespace,
+    get_shared_store,
+    namespace_token,
+    schedule_shared_write,
+)
+from app.core.http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Variantes que o nginx guarda separadamente (ver deploy/nginx-proxy.inc)
+_ENCODING_VARIANTS = ("br", "gzip", "")
+_HX_VARIANTS = ("", "true")
+
+# Limite de requisições de refresh simultâneas ao nginx
+_REFRESH_CONCURRENCY = 8
+
+# (key, url) já registrados neste processo — evita escrita no SQLite a cada hit.
+# Cada versão de namespace traz keys novas; acima do limite, recomeça do zero
+# (no pior caso, regrava registros que já existiam)
+_recorded: set[tuple[str, str]] = set()
+_RECORDED_MAX = 50_000
+
+# Purges agendados em segundo plano (referência forte até terminarem)
+_background: set[asyncio.Task] = set()
+
+
+def surrogate_keys(namespaces: tuple[str, ...], path_params: dict[str, Any]) -> list[str]:
+    """Keys de uma resposta: namespaces, versões dos namespaces e carreiras."""
+    keys: list[str] = []
+    for ns in namespaces:
+        keys.append(ns)
+        token = namespace_token(ns)
+        if token:
+            keys.append(f"{ns}-{token}")
+    for name, value in path_params.items():
+        if "career" in name and value:
+            keys.append(f"career-{value}")
+    return keys
+
+
+def record_response(keys: list[str], url: str) -> None:
+    """Registra no L2 que `url` depende de `keys` (uma vez por processo)."""
+    new = [key for key in keys if (key, url) not in _recorded]
+    if not new:
+        return
+    store = get_shared_store()
+    if store is None:
+        return
+    schedule_shared_write(store.add_surrogate_urls, new, url)
+    if len(_recorded) + len(new) > _RECORDED_MAX:
+        _recorded.clear()
+    _recorded.update((key, url) for key in new)
+
+
+async def _refresh_url(url: str, semaphore: asyncio.Semaphore) -> int:
+    """Pede ao nginx para renovar todas as variantes em cache de uma URL."""
+    client = get_http_client()
+    variants = _HX_VARIANTS if url.startswith("/api/fragment/") else ("",)
+    refreshed = 0
+    for encoding in _ENCODING_VARIANTS:
+        for hx in variants:
+            headers = {"X-Cache-Refresh": "1", "Accept-Encoding": encoding or "identity"}
+            if hx:
+                headers["HX-Request"] = hx
+            async with semaphore:
+                try:
+                    resp = await client.get(f"{settings.nginx_refresh_url}{url}", headers=headers)
+                except Exception as e:
+                    logger.warning("Falha ao renovar %s no nginx: %s", url, e)
+                    return refreshed
+            if resp.status_code < 500:
+                refreshed += 1
+    return refreshed
+
+
+async def purge(keys: list[str], namespaces: list[str] | None = None) -> dict:
+    """Invalida dependências: nova versão dos namespaces + refresh no nginx.
+
+    Args:
+        keys: Surrogate keys cujas URLs devem ser renovadas no nginx.
+        namespaces: Namespaces de dados com nova versão (cache da aplicação e
+            ETags mudam em todos os workers). Também entram como keys.
+    """
+    namespaces = namespaces or []
+    versions = {ns: bump_namespace(ns) for ns in namespaces}
+    all_keys = list(dict.fromkeys([*keys, *namespaces]))
+
+    store = get_shared_store()
+    urls = await asyncio.to_thread(store.urls_for_keys, all_keys) if store is not None else []
+
+    refreshed = 0
+    if urls and settings.nginx_refresh_url:
+        semaphore = asyncio.Semaphore(_REFRESH_CONCURRENCY)
+        results = await asyncio.gather(*(_refresh_url(url, semaphore) for url in urls))
+        refreshed = sum(results)
+
+    # As URLs continuam registradas pelo nome do namespace e pela versão nova.
+    # Vai pela fila de escrita do cache: roda depois das versões publicadas acima.
+    pruned = 0
+    future = schedule_shared_write(store.prune_surrogate_urls) if store is not None else None
+    if future is not None:
+        pruned = await asyncio.wrap_future(future) or 0
+
+    logger.info(
+        "Purge: keys=%s namespaces=%s → %d URL(s), %d variante(s) renovada(s) no nginx, "
+        "%d registro(s) de versões antigas removido(s)",
+        all_keys,
+        namespaces,
+        len(urls),
+        refreshed,
+        pruned,
+    )
+    return {"keys": all_keys, "namespaces": versions, "urls": urls, "nginx_refreshed": refreshed}
+
+
+def schedule_purge(keys: list[str], namespaces: list[str] | None = None) -> None:
+    """Dispara `purge` em segundo plano (usado pelo refresh de câmbio)."""
+    try:
+        task = asyncio.get_running_loop().create_task(purge(keys, namespaces))
+    except RuntimeError:
+        return
+    _background.add(task)
+    task.add_done_callback(_background.discard)
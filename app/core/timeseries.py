@@ -0,0 +1,205 @@
+"""Séries temporais compactas em arquivo binário, lidas via mmap.
+
+Formato (little-endian), pensado para ser mapeado em memória sem cópia:
+
+    b"OWTS" | u32 tamanho do cabeçalho | cabeçalho JSON (alinhado a 8 bytes)
+    Para cada série: int32 dias[n] (alinhado a 8) | float64 coluna[n] ...
+
+O cabeçalho guarda as colunas e, por série (ex.: moeda), o offset e o número
+de pontos. Os dias são contados desde 1970-01-01 e estão em ordem crescente.
+
+Na leitura nada é copiado: cada coluna é um `memoryview` sobre o mmap, então
+abrir um arquivo de anos de cotações diárias custa só o parse do cabeçalho e
+as páginas são carregadas sob demanda pelo sistema operacional (e
+compartilhadas entre workers). Com NumPy, `np.frombuffer(series.days, "<i4")`
+vira array sem cópia.
+"""
+
+import bisect
+import json
+import mmap
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Mapping, Sequence
+
+from app.core.storage import atomic_write_bytes
+
+MAGIC = b"OWTS"
+FORMAT_VERSION = 1
+EPOCH = date(1970, 1, 1)
+
+_PREFIX = struct.Struct("<4sI")
+
+
+def to_day(d: date) -> int:
+    """Data → dias desde 1970-01-01."""
+    return (d - EPOCH).days
+
+
+def from_day(day: int) -> date:
+    """Dias desde 1970-01-01 → data."""
+    return EPOCH + timedelta(days=day)
+
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+
+def _le(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+@dataclass(frozen=True)
+class Series:
+    """Uma série (ex.: uma moeda): dias crescentes + colunas float64."""
+
+    name: str
+    days: Sequence[int]
+    columns: Mapping[str, Sequence[float]]
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def first_day(self) -> date | None:
+        return from_day(self.days[0]) if len(self.days) else None
+
+    @property
+    def last_day(self) -> date | None:
+        return from_day(self.days[-1]) if len(self.days) else None
+
+    def index_asof(self, d: date) -> int | None:
+        """Índice do último ponto com data <= `d` (None se não houver)."""
+        i = bisect.bisect_right(self.days, to_day(d)) - 1
+        return i if i >= 0 else None
+
+    def asof(self, d: date, column: str = "rate") -> float | None:
+        """Valor de `column` vigente em `d` (último ponto até a data)."""
+        i = self.index_asof(d)
+        return None if i is None else self.columns[column][i]
+
+    def between(
+        self, start: date, end: date, column: str = "rate"
+    ) -> tuple[list[date], list[float]]:
+        """Pontos com `start <= data <= end`."""
+        lo = bisect.bisect_left(self.days, to_day(start))
+        hi = bisect.bisect_right(self.days, to_day(end))
+        values = self.columns[column]
+        return [from_day(day) for day in self.days[lo:hi]], list(values[lo:hi])
+
+
+def write_timeseries(
+    path: Path,
+    columns: Sequence[str],
+    series: Mapping[str, tuple[Sequence[int], Mapping[str, Sequence[float]]]],
+) -> int:
+    """Grava as séries no formato binário (atomicamente). Retorna o tamanho.
+
+    Args:
+        path: Arquivo de destino.
+        columns: Nomes das colunas float64, na ordem de gravação.
+        series: nome → (dias crescentes, {coluna: valores}).
+    """
+    blocks: list[bytes] = []
+    index: dict[str, dict[str, int]] = {}
+    offset = 0  # Relativo ao início da área de dados
+    for name, (days, values) in sorted(series.items()):
+        n = len(days)
+        if any(b <= a for a, b in zip(days, days[1:])):
+            raise ValueError(f"Série {name}: dias devem ser estritamente crescentes")
+        block = bytearray(_le(array("i", days)))
+        block += b"\0" * _pad(len(block))
+        for column in columns:
+            col = values[column]
+            if len(col) != n:
+                raise ValueError(
+                    f"Série {name}: coluna {column} com {len(col)} pontos, esperado {n}"
+                )
+            block += _le(array("d", col))
+        index[name] = {"offset": offset, "length": n}
+        blocks.append(bytes(block))
+        offset += len(block)
+
+    header = json.dumps(
+        {"version": FORMAT_VERSION, "columns": list(columns), "series": index},
+        separators=(",", ":"),
+    ).encode()
+    header += b" " * _pad(_PREFIX.size + len(header))
+    data = _PREFIX.pack(MAGIC, len(header)) + header + b"".join(blocks)
+    atomic_write_bytes(path, data)
+    return len(data)
+
+
+class TimeSeriesFile:
+    """Arquivo de séries mapeado em memória (somente leitura)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._series = self._parse()
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _parse(self) -> dict[str, Series]:
+        if len(self._mmap) < _PREFIX.size:
+            raise ValueError(f"{self.path}: arquivo truncado")
+        magic, header_len = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: não é um arquivo de séries")
+        header = json.loads(self._mmap[_PREFIX.size : _PREFIX.size + header_len])
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: versão {header.get('version')} não suportada")
+        if sys.byteorder != "little":
+            raise ValueError("Leitura via mmap requer plataforma little-endian")
+
+        self.columns: tuple[str, ...] = tuple(header["columns"])
+        base = _PREFIX.size + header_len
+        view = self._view = memoryview(self._mmap)
+        series: dict[str, Series] = {}
+        for name, meta in header["series"].items():
+            n = meta["length"]
+            pos = base + meta["offset"]
+            days = view[pos : pos + 4 * n].cast("i")
+            pos += 4 * n + _pad(4 * n)
+            cols = {}
+            for column in self.columns:
+                cols[column] = view[pos : pos + 8 * n].cast("d")
+                pos += 8 * n
+            if pos > len(self._mmap):
+                raise ValueError(f"{self.path}: série {name} truncada")
+            series[name] = Series(name=name, days=days, columns=cols)
+        return series
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._series
+
+    def __getitem__(self, name: str) -> Series:
+        return self._series[name]
+
+    def get(self, name: str) -> Series | None:
+        return self._series.get(name)
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self._series)
+
+    def close(self) -> None:
+        """Libera o mmap (as views das séries deixam de ser válidas)."""
+        for s in self._series.values():
+            for col in (s.days, *s.columns.values()):
+                if isinstance(col, memoryview):
+                    col.release()
+        self._series = {}
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+        self._mmap.close()
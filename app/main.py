@@ -1,14 +1,59 @@
 """OctoWage — Ponto de entrada da aplicação FastAPI."""
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from app.config import get_settings
-from app.routes import fragments, pages
+from app.core.cache import purge_expired_cache, set_namespace_version
+from app.core.database import close_database, start_database
+from app.core.http import close_http_client, start_http_client
+from app.middleware.cache_headers import CacheHeaderMiddleware
+from app.routes import api, fragments, internal, pages
+from app.services.analytics import sync_salary_cube
+from app.services.exchange_rate import (
+    close_rate_history,
+    load_rate_history,
+    load_rate_snapshot,
+    shutdown_exchange_rates,
+)
+from app.services.payslips import sync_payslip_store
+from app.services.price_index import sync_price_indices
+from app.services.salary_data import get_career_index
+from app.services.salary_repository import shutdown_salary_sync, start_salary_sync
 
 settings = get_settings()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Recursos de longa duração: cliente HTTP, pool do banco e tarefas de refresh."""
+    await start_http_client()
+    # Com banco configurado, o dataset salarial vem dele (senão, o estático)
+    if await start_database():
+        await start_salary_sync()
+    # Começa aquecido com a última cotação boa gravada em disco
+    load_rate_snapshot()
+    load_rate_history()
+    # Snapshot do motor analítico, sketches de contracheques e índices de preço
+    # (se o ETL já gerou)
+    sync_salary_cube()
+    sync_payslip_store()
+    sync_price_indices()
+    purge_expired_cache()
+    set_namespace_version("salary", get_career_index().version)
+    try:
+        yield
+    finally:
+        await shutdown_exchange_rates()
+        await shutdown_salary_sync()
+        await close_database()
+        close_rate_history()
+        await close_http_client()
+
+
 def format_brl(value: float, decimals: int = 2) -> str:
     """Formata número no padrão brasileiro: 1.234,56"""
     if decimals == 0:
@@ -33,8 +78,12 @@ def create_app() -> FastAPI:
         version="0.1.0",
         docs_url="/docs" if settings.app_debug else None,
         redoc_url=None,
+        lifespan=lifespan,
     )
 
+    # Cache HTTP condicional (ETag/304, Cache-Control, Vary)
+    app.add_middleware(CacheHeaderMiddleware)
+
     # Static files
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -47,6 +96,8 @@ def create_app() -> FastAPI:
     # Rotas
     app.include_router(pages.router)
     app.include_router(fragments.router)
+    app.include_router(api.router)
+    app.include_router(internal.router)
 
     return app
 
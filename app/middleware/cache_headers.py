@@ -0,0 +1,225 @@
+"""Cache HTTP condicional: ETag/Last-Modified, 304 e políticas de Cache-Control.
+
+O ETag é derivado da versão de conteúdo do cache de renderização (build +
+versões dos namespaces de dados) e da URL, então pode ser calculado antes de
+renderizar: um `If-None-Match` que confere é respondido com 304 sem chamar a
+rota. Navegador, nginx e CDN revalidam em vez de baixar o HTML de novo.
+
+Respostas com dependência de dados levam também `Surrogate-Key` (ver
+`app.core.surrogate`), usado pelo purge seletivo do nginx.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.cache import (
+    BUILD_TIMESTAMP,
+    content_version,
+    namespace_updated_at,
+    negotiate_encoding,
+)
+from app.core.surrogate import record_response, surrogate_keys
+from app.services.analytics import NAMESPACE as ANALYTICS_NAMESPACE
+from app.services.payslips import NAMESPACE as PAYSLIPS_NAMESPACE
+from app.services.price_index import NAMESPACE as PRICES_NAMESPACE
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Política de cache HTTP de um grupo de rotas."""
+
+    prefix: str  # Prefixo do path (ou path exato, se `exact`)
+    cache_control: str
+    namespaces: tuple[str, ...] = ()  # Dados dos quais a resposta depende
+    exact: bool = False
+    etag: bool = True
+    compressed: bool = False  # Páginas servidas em gzip/brotli (ETag por codificação)
+    vary: tuple[str, ...] = ()
+
+    def matches(self, path: str) -> bool:
+        return path == self.prefix if self.exact else path.startswith(self.prefix)
+
+
+# Primeira política que casar vence
+POLICIES: tuple[CachePolicy, ...] = (
+    # Assets estáticos: cache longo (StaticFiles já emite ETag/Last-Modified)
+    CachePolicy("/static/", "public, max-age=2592000", etag=False),
+    # Percentis do motor analítico: dependem do snapshot Gold, não do dataset de carreiras
+    CachePolicy(
+        "/api/fragment/salary-percentiles",
+        "public, max-age=300, s-maxage=3600",
+        namespaces=(ANALYTICS_NAMESPACE, PRICES_NAMESPACE),
+        exact=True,
+        vary=("HX-Request",),
+    ),
+    CachePolicy(
+        "/api/fragment/inequality",
+        "public, max-age=300, s-maxage=3600",
+        namespaces=(ANALYTICS_NAMESPACE, PRICES_NAMESPACE),
+        exact=True,
+        vary=("HX-Request",),
+    ),
+    CachePolicy(
+        "/api/fragment/payslip-distribution",
+        "public, max-age=300, s-maxage=3600",
+        namespaces=(PAYSLIPS_NAMESPACE, PRICES_NAMESPACE),
+        exact=True,
+        vary=("HX-Request",),
+    ),
+    CachePolicy(
+        "/api/v1/payslips/",
+        "public, max-age=300, s-maxage=3600",
+        namespaces=(PAYSLIPS_NAMESPACE, PRICES_NAMESPACE),
+    ),
+    CachePolicy(
+        "/api/v1/salaries/",
+        "public, max-age=300, s-maxage=3600",
+        namespaces=(ANALYTICS_NAMESPACE, PRICES_NAMESPACE),
+    ),
+    # Séries para gráficos: mudam só com o ETL mensal; cache longo com revalidação
+    # (nginx/CDN são purgados por Surrogate-Key; o navegador aceita até um dia)
+    CachePolicy(
+        "/api/v1/history/",
+        "public, max-age=86400, s-maxage=604800, stale-while-revalidate=86400",
+        namespaces=("salary", PAYSLIPS_NAMESPACE, PRICES_NAMESPACE),
+    ),
+    CachePolicy(
+        "/api/fragment/salary-history/",
+        "public, max-age=86400, s-maxage=604800, stale-while-revalidate=86400",
+        namespaces=("salary", PAYSLIPS_NAMESPACE, PRICES_NAMESPACE),
+        vary=("HX-Request",),
+    ),
+    # Calculadora: custo anual medido nos contracheques (sketches de contracheques)
+    CachePolicy(
+        "/api/fragment/cost-calculator",
+        "public, max-age=300, s-maxage=3600",
+        namespaces=("salary", PAYSLIPS_NAMESPACE),
+        exact=True,
+        vary=("HX-Request",),
+    ),
+    # Fragmentos HTMX: cache médio com revalidação (`?real=` depende dos índices de preço)
+    CachePolicy(
+        "/api/fragment/",
+        "public, max-age=300, s-maxage=3600",
+        namespaces=("salary", PRICES_NAMESPACE),
+        vary=("HX-Request",),
+    ),
+    # Home: depende do câmbio e dos números medidos, cache curto
+    CachePolicy(
+        "/",
+        "public, max-age=60, s-maxage=300",
+        namespaces=("salary", "rates", PAYSLIPS_NAMESPACE, PRICES_NAMESPACE),
+        exact=True,
+        compressed=True,
+    ),
+    CachePolicy(
+        "/comparar/",
+        "public, max-age=300, s-maxage=3600",
+        namespaces=("salary", PRICES_NAMESPACE),
+        compressed=True,
+    ),
+    # Páginas institucionais: só mudam com deploy
+    CachePolicy("/sobre", "public, max-age=3600, s-maxage=86400", exact=True, compressed=True),
+    CachePolicy("/termos", "public, max-age=3600, s-maxage=86400", exact=True, compressed=True),
+    CachePolicy(
+        "/privacidade", "public, max-age=3600, s-maxage=86400", exact=True, compressed=True
+    ),
+)
+
+
+def match_policy(path: str) -> CachePolicy | None:
+    """Política aplicável ao path, ou None."""
+    for policy in POLICIES:
+        if policy.matches(path):
+            return policy
+    return None
+
+
+def compute_etag(request: Request, policy: CachePolicy) -> str:
+    """ETag forte: versão do conteúdo + URL (+ codificação, para páginas)."""
+    version = content_version(policy.namespaces)
+    variant = "|".join(request.headers.get(h, "") for h in policy.vary)
+    url = f"{request.url.path}?{request.url.query}|{variant}"
+    url_hash = hashlib.sha1(url.encode()).hexdigest()[:10]
+    etag = f"{version}-{url_hash}"
+    if policy.compressed:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            etag = f"{etag}-{encoding}"
+    return f'"{etag}"'
+
+
+def last_modified(policy: CachePolicy) -> float:
+    """Última mudança dos dados da resposta (ou dos templates)."""
+    return max([BUILD_TIMESTAMP, *(namespace_updated_at(ns) for ns in policy.namespaces)])
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def _not_modified_since(if_modified_since: str, modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(modified) <= since
+
+
+class CacheHeaderMiddleware(BaseHTTPMiddleware):
+    """Emite Cache-Control/ETag/Last-Modified/Vary e responde 304 sem renderizar."""
+
+    async def dispatch(self, request: Request, call_next):
+        policy = match_policy(request.url.path)
+        if policy is None or request.method not in ("GET", "HEAD"):
+            return await call_next(request)
+
+        headers = {"Cache-Control": policy.cache_control}
+        vary = list(policy.vary)
+        if policy.compressed:
+            vary.append("Accept-Encoding")
+        if vary:
+            headers["Vary"] = ", ".join(vary)
+
+        if policy.etag:
+            etag = compute_etag(request, policy)
+            modified = last_modified(policy)
+            headers["ETag"] = etag
+            headers["Last-Modified"] = formatdate(modified, usegmt=True)
+
+            if_none_match = request.headers.get("if-none-match")
+            if_modified_since = request.headers.get("if-modified-since")
+            if if_none_match is not None:
+                not_modified = _etag_matches(if_none_match, etag)
+            elif if_modified_since is not None:
+                not_modified = _not_modified_since(if_modified_since, modified)
+            else:
+                not_modified = False
+            if not_modified:
+                return Response(status_code=304, headers=headers)
+
+        response = await call_next(request)
+
+        if response.status_code == 200:
+            for name, value in headers.items():
+                if name == "Vary" and "vary" in response.headers:
+                    existing = [v.strip() for v in response.headers["vary"].split(",")]
+                    value = ", ".join(dict.fromkeys(existing + vary))
+                response.headers[name] = value
+
+            if policy.etag:
+                # path_params é preenchido no scope compartilhado pelo roteador
+                keys = surrogate_keys(policy.namespaces, request.scope.get("path_params", {}))
+                if keys:
+                    response.headers["Surrogate-Key"] = " ".join(keys)
+                    url = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+                    record_response(keys, url)
+        return response
@@ -0,0 +1,273 @@
+"""API JSON — dados para gráficos e integrações, respondidos em memória.
+
+As consultas aos motores em memória (NumPy, mescla de sketches) são
+CPU-bound: rodam numa thread (`asyncio.to_thread`) para que um miss de cache
+não trave as demais requisições do worker.
+"""
+
+import asyncio
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import JSONResponse
+
+from app.core.cache import cached_fragment
+from app.services.analytics import (
+    NAMESPACE,
+    QueryError,
+    get_salary_cube,
+    run_inequality,
+    run_query,
+    split_csv,
+)
+from app.services.payslips import NAMESPACE as PAYSLIPS_NAMESPACE
+from app.services.payslips import (
+    DistributionError,
+    get_payslip_store,
+    parse_period,
+    run_distribution,
+)
+from app.services.price_index import NAMESPACE as PRICES_NAMESPACE
+from app.services.salary_data import teto_vigente
+from app.services.salary_history import (
+    DEFAULT_WIDTH,
+    MAX_WIDTH,
+    HistoryError,
+    SeriesNotFound,
+    run_history,
+)
+
+router = APIRouter(prefix="/api/v1")
+
+
+@router.get("/salaries/percentiles")
+@cached_fragment(namespaces=(NAMESPACE, PRICES_NAMESPACE))
+async def salary_percentiles(
+    request: Request,
+    occupation: str | None = None,
+    region: str | None = None,
+    year_from: int | None = Query(None, ge=1900, le=2100),
+    year_to: int | None = Query(None, ge=1900, le=2100),
+    group_by: str = "year",
+    p: str = "10,25,50,75,90",
+    real: str | None = None,
+):
+    """Contagem, média e percentis salariais por ocupação × região × ano.
+
+    Filtros e dimensões são listas separadas por vírgula
+    (`?occupation=252210,212405&region=SP&group_by=region,year&p=50,90`).
+    Resposta colunar: `columns[nome][i]` é o valor do i-ésimo grupo.
+    `real=AAAA-MM` devolve valores em reais do mês (IPCA).
+    """
+    try:
+        result = await asyncio.to_thread(
+            run_query, occupation, region, year_from, year_to, group_by, p, real
+        )
+    except QueryError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    return JSONResponse(
+        {
+            "version": get_salary_cube().version,
+            "real": real or None,
+            "group_by": list(result.group_by),
+            "groups": len(result),
+            "columns": result.columns(),
+        }
+    )
+
+
+@router.get("/salaries/inequality")
+@cached_fragment(namespaces=(NAMESPACE, PRICES_NAMESPACE))
+async def salary_inequality(
+    request: Request,
+    occupation: str | None = None,
+    region: str | None = None,
+    year_from: int | None = Query(None, ge=1900, le=2100),
+    year_to: int | None = Query(None, ge=1900, le=2100),
+    group_by: str = "year",
+    real: str | None = None,
+):
+    """Gini, Theil-T e razões P90/P10, P90/P50 e P50/P10 por grupo.
+
+    Mesmos filtros, agrupamento e `real` de `/salaries/percentiles`; resposta colunar.
+    """
+    try:
+        result = await asyncio.to_thread(
+            run_inequality, occupation, region, year_from, year_to, group_by, real
+        )
+    except QueryError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    return JSONResponse(
+        {
+            "version": get_salary_cube().version,
+            "real": real or None,
+            "group_by": list(result.group_by),
+            "groups": len(result),
+            "columns": result.columns(),
+        }
+    )
+
+
+@router.get("/payslips/percentiles")
+@cached_fragment(namespaces=(PAYSLIPS_NAMESPACE, PRICES_NAMESPACE))
+async def payslip_percentiles(
+    request: Request,
+    orgao: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    component: str | None = None,
+    p: str = "50,90,99",
+    real: str | None = None,
+):
+    """Percentis dos contracheques do sistema de justiça, por componente.
+
+    `orgao` e `component` são listas separadas por vírgula (vazio = todos);
+    `start`/`end` no formato AAAA-MM (`?orgao=tjsp,tjrj&start=2024-01&end=2024-12`);
+    `real=AAAA-MM` devolve valores em reais do mês (IPCA).
+    """
+    try:
+        result = await asyncio.to_thread(run_distribution, orgao, start, end, component, p, real)
+    except DistributionError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    return JSONResponse(
+        {
+            "version": get_payslip_store().version(),
+            "real": real or None,
+            "sketches": result.sketches,
+            "columns": result.columns(),
+        }
+    )
+
+
+@router.get("/payslips/above-teto")
+@cached_fragment(namespaces=(PAYSLIPS_NAMESPACE,))
+async def payslips_above_teto(
+    request: Request,
+    orgao: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+):
+    """Série mensal de contracheques acima do teto vigente e excedente pago.
+
+    `orgao` é uma lista separada por vírgula (vazio = todos, lido dos totais
+    mantidos); `start`/`end` no formato AAAA-MM.
+    """
+    store = get_payslip_store()
+    if store is None:
+        return JSONResponse(
+            {"error": "Sketches de contracheques ainda não disponíveis"}, status_code=503
+        )
+    try:
+        rows = await asyncio.to_thread(
+            store.above_teto_monthly,
+            split_csv(orgao),
+            parse_period(start) if start else None,
+            parse_period(end) if end else None,
+        )
+    except DistributionError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse(
+        {
+            "version": store.version(),
+            "columns": {
+                "period": [f"{key // 100}-{key % 100:02d}" for key, *_ in rows],
+                "teto": [teto_vigente(key // 100, key % 100) for key, *_ in rows],
+                "payslips": [r[1] for r in rows],
+                "above": [r[2] for r in rows],
+                "excess": [r[3] / 100 for r in rows],
+            },
+        }
+    )
+
+
+async def _history_response(
+    kind: str,
+    ident: str,
+    component: str,
+    metric: str,
+    width: int,
+    start: str | None,
+    end: str | None,
+    real: str | None,
+    encoding: str,
+) -> JSONResponse:
+    if encoding not in ("json", "base64"):
+        return JSONResponse({"error": "encoding deve ser json ou base64"}, status_code=400)
+    try:
+        history = await asyncio.to_thread(
+            run_history, kind, ident, component, metric, width, start, end, real
+        )
+    except HistoryError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except SeriesNotFound as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    return JSONResponse(
+        {
+            "version": history.version,
+            "series": history.series,
+            "label": history.label,
+            "component": history.component,
+            "metric": history.metric,
+            "real": history.real,
+            "points": len(history),
+            "source_points": history.source_points,
+            "encoding": encoding,
+            "columns": history.packed() if encoding == "base64" else history.columns(),
+        }
+    )
+
+
+@router.get("/history/career/{career_id}")
+@cached_fragment(namespaces=("salary", PAYSLIPS_NAMESPACE, PRICES_NAMESPACE))
+async def career_history(
+    request: Request,
+    career_id: str,
+    component: str = "bruto",
+    metric: str = "mean",
+    width: int = Query(DEFAULT_WIDTH, ge=3, le=MAX_WIDTH),
+    start: str | None = None,
+    end: str | None = None,
+    real: str | None = None,
+    encoding: str = "json",
+):
+    """Série mensal dos contracheques de uma carreira, para gráficos.
+
+    Uma carreira (id de `salary_data`) é o grupo de órgãos que a paga; só as
+    do sistema de justiça têm contracheques medidos (404 para as demais).
+    `metric` é `mean` ou um percentil (`p50`, `p90`…); `width` é a largura do
+    gráfico em pixels: a série é reduzida por LTTB a no máximo um ponto por
+    pixel. `encoding=base64` devolve arrays tipados little-endian (`t` em dias
+    desde 1970-01-01) em vez de listas JSON.
+    """
+    return await _history_response(
+        "career", career_id, component, metric, width, start, end, real, encoding
+    )
+
+
+@router.get("/history/orgao/{orgao}")
+@cached_fragment(namespaces=(PAYSLIPS_NAMESPACE, PRICES_NAMESPACE))
+async def orgao_history(
+    request: Request,
+    orgao: str,
+    component: str = "bruto",
+    metric: str = "mean",
+    width: int = Query(DEFAULT_WIDTH, ge=3, le=MAX_WIDTH),
+    start: str | None = None,
+    end: str | None = None,
+    real: str | None = None,
+    encoding: str = "json",
+):
+    """Série mensal dos contracheques de um órgão (ou vários: `tjsp,tjrj`).
+
+    Mesmos parâmetros de `/history/career/{career_id}`.
+    """
+    return await _history_response(
+        "orgao", orgao, component, metric, width, start, end, real, encoding
+    )
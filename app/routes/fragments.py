@@ -1,75 +1,299 @@
-"""Rotas de fragmentos HTMX — retornam pedaços de HTML, não páginas completas."""
+"""Rotas de fragmentos HTMX — retornam pedaços de HTML, não páginas completas.
 
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+Consultas CPU-bound (motor analítico, sketches, séries) rodam numa thread,
+como na API JSON.
+"""
+
+import asyncio
+from html import escape
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 
-from app.services.salary_data import (
-    CAREERS,
-    CUSTO_SOCIAL,
-    CUSTO_SUPERSALARIOS_ANUAL,
-    TETO_CONSTITUCIONAL,
-    get_all_careers_sorted,
-    get_career,
-    get_careers_by_category,
+from app.core.cache import cached_fragment
+from app.services.analytics import NAMESPACE as ANALYTICS_NAMESPACE
+from app.services.analytics import QueryError, run_inequality, run_query
+from app.services.payslips import COMPONENTS, DistributionError, run_distribution
+from app.services.payslips import NAMESPACE as PAYSLIPS_NAMESPACE
+from app.services.price_index import NAMESPACE as PRICES_NAMESPACE
+from app.services.price_index import RealModeError, career_index_for
+from app.services.salary_data import get_salary_facts
+from app.services.salary_history import (
+    CAREER_ORGAOS,
+    DEFAULT_WIDTH,
+    MAX_WIDTH,
+    METRICS,
+    HistoryError,
+    run_history,
 )
 
 router = APIRouter(prefix="/api/fragment")
 templates = Jinja2Templates(directory="app/templates")
 
 
+def _real_mode_error(e: Exception) -> HTMLResponse:
+    """Resposta para `?real=` inválido (400) ou sem índices de preço (503)."""
+    if isinstance(e, RealModeError):
+        return HTMLResponse(f"<p class='error'>{escape(str(e))}</p>", status_code=400)
+    return HTMLResponse(
+        "<p class='error'>Índices de preço ainda não disponíveis.</p>", status_code=503
+    )
+
+
+# Ordenação → sentido (salário crescente; penduricalhos e risco, maiores primeiro)
+BAR_SORTS = {"salary": False, "gap": True, "risk": True}
+
+BARS_PAGE_SIZE = 25
+BARS_MAX_PAGE_SIZE = 100
+
+
 @router.get("/comparison-bars", response_class=HTMLResponse)
-async def comparison_bars(request: Request, sort: str = "salary"):
-    """Fragmento: barras de comparação salarial."""
-    if sort == "salary":
-        careers = get_all_careers_sorted()
-    elif sort == "gap":
-        careers = sorted(CAREERS, key=lambda c: c.penduricalhos, reverse=True)
-    else:
-        careers = get_all_careers_sorted()
+@cached_fragment(namespaces=("salary", PRICES_NAMESPACE))
+async def comparison_bars(
+    request: Request,
+    sort: str = "salary",
+    category: str | None = None,
+    risk: str | None = None,
+    above_teto: bool | None = None,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(BARS_PAGE_SIZE, ge=1, le=BARS_MAX_PAGE_SIZE),
+    real: str | None = None,
+):
+    """Fragmento: barras de comparação salarial, paginadas (scroll infinito).
+
+    Renderiza só a página pedida; se houver mais, termina com um sentinela
+    `hx-trigger="revealed"` que busca a próxima a partir de `cursor`. A escala
+    das barras usa o maior salário do dataset inteiro, igual em toda página.
+    `real=AAAA-MM` mostra os valores em reais do mês (IPCA).
+    """
+    if sort not in BAR_SORTS:
+        sort = "salary"
+    try:
+        index = career_index_for(real)
+    except (RealModeError, LookupError) as e:
+        return _real_mode_error(e)
+    view = index.query(
+        sort, BAR_SORTS[sort], category=category, risk_level=risk, above_teto=above_teto
+    )
+    careers = view[cursor : cursor + limit]
+
+    next_url = None
+    if cursor + limit < len(view):
+        params = {
+            "sort": sort,
+            "category": category,
+            "risk": risk,
+            "above_teto": above_teto,
+            "real": real,
+        }
+        query = {
+            k: str(v).lower() if isinstance(v, bool) else v
+            for k, v in params.items()
+            if v is not None
+        }
+        query.update(cursor=cursor + limit, limit=limit)
+        next_url = f"{request.url.path}?{urlencode(query)}"
 
     return templates.TemplateResponse(
         "fragments/comparison_bars.html",
         {
             "request": request,
             "careers": careers,
-            "teto": TETO_CONSTITUCIONAL,
-            "max_salary": max(c.salary_real for c in careers),
+            "teto": index.facts.teto,
+            "max_salary": index.max_salary,
+            "first_page": cursor == 0,
+            "total": len(view),
+            "next_url": next_url,
+            "real": real,
         },
     )
 
 
 @router.get("/career-detail/{career_id}", response_class=HTMLResponse)
-async def career_detail(request: Request, career_id: str):
+@cached_fragment(namespaces=("salary", PRICES_NAMESPACE))
+async def career_detail(request: Request, career_id: str, real: str | None = None):
     """Fragmento: detalhamento de uma carreira (raio-x do contracheque)."""
-    career = get_career(career_id)
+    try:
+        index = career_index_for(real)
+    except (RealModeError, LookupError) as e:
+        return _real_mode_error(e)
+    career = index.get(career_id)
     if not career:
         return HTMLResponse("<p class='error'>Carreira não encontrada.</p>", status_code=404)
 
+    teto = index.facts.teto
     return templates.TemplateResponse(
         "fragments/career_detail.html",
         {
             "request": request,
             "career": career,
-            "teto": TETO_CONSTITUCIONAL,
-            "above_teto": max(0, career.salary_real - TETO_CONSTITUCIONAL),
+            "teto": teto,
+            "above_teto": max(0, career.salary_real - teto),
             "pct_above": (
-                ((career.salary_real - TETO_CONSTITUCIONAL) / TETO_CONSTITUCIONAL * 100)
-                if career.salary_real > TETO_CONSTITUCIONAL
-                else 0
+                (career.salary_real - teto) / teto * 100 if career.salary_real > teto else 0
             ),
+            "has_history": career_id in CAREER_ORGAOS,
+            "real": real,
         },
     )
 
 
 @router.get("/cost-calculator", response_class=HTMLResponse)
+@cached_fragment(namespaces=("salary", PAYSLIPS_NAMESPACE))
 async def cost_calculator(request: Request):
     """Fragmento: calculadora 'O Custo da Desigualdade'."""
+    facts = get_salary_facts()
     return templates.TemplateResponse(
         "fragments/cost_calculator.html",
         {
             "request": request,
-            "custo_anual": CUSTO_SUPERSALARIOS_ANUAL,
-            "custo_social": CUSTO_SOCIAL,
+            "custo_anual": facts.custo_anual,
+            "custo_social": facts.custo_social,
+            "periodo": facts.periodo,
+            "medido": facts.medido,
+        },
+    )
+
+
+@router.get("/salary-percentiles", response_class=HTMLResponse)
+@cached_fragment(namespaces=(ANALYTICS_NAMESPACE, PRICES_NAMESPACE))
+async def salary_percentiles(
+    request: Request,
+    occupation: str | None = None,
+    region: str | None = None,
+    year_from: int | None = Query(None, ge=1900, le=2100),
+    year_to: int | None = Query(None, ge=1900, le=2100),
+    group_by: str = "year",
+    p: str = "25,50,75",
+    real: str | None = None,
+):
+    """Fragmento: tabela de percentis salariais por ocupação × região × ano.
+
+    Mesmos parâmetros de `GET /api/v1/salaries/percentiles`.
+    """
+    try:
+        result = await asyncio.to_thread(
+            run_query, occupation, region, year_from, year_to, group_by, p, real
+        )
+    except QueryError as e:
+        return HTMLResponse(f"<p class='error'>{escape(str(e))}</p>", status_code=400)
+    except LookupError:
+        return HTMLResponse("<p class='error'>Dados ainda não disponíveis.</p>", status_code=503)
+
+    return templates.TemplateResponse(
+        "fragments/salary_percentiles.html",
+        {
+            "request": request,
+            "group_by": result.group_by,
+            "percentiles": [f"p{q:g}" for q in result.percentiles],
+            "rows": result.rows(),
+            "real": real,
+        },
+    )
+
+
+@router.get("/inequality", response_class=HTMLResponse)
+@cached_fragment(namespaces=(ANALYTICS_NAMESPACE, PRICES_NAMESPACE))
+async def inequality(
+    request: Request,
+    occupation: str | None = None,
+    region: str | None = None,
+    year_from: int | None = Query(None, ge=1900, le=2100),
+    year_to: int | None = Query(None, ge=1900, le=2100),
+    group_by: str = "year",
+    real: str | None = None,
+):
+    """Fragmento: Gini, Theil-T e P90/P10 por ocupação × região × ano.
+
+    Mesmos parâmetros de `GET /api/v1/salaries/inequality`.
+    """
+    try:
+        result = await asyncio.to_thread(
+            run_inequality, occupation, region, year_from, year_to, group_by, real
+        )
+    except QueryError as e:
+        return HTMLResponse(f"<p class='error'>{escape(str(e))}</p>", status_code=400)
+    except LookupError:
+        return HTMLResponse("<p class='error'>Dados ainda não disponíveis.</p>", status_code=503)
+
+    return templates.TemplateResponse(
+        "fragments/inequality.html",
+        {"request": request, "group_by": result.group_by, "rows": result.rows()},
+    )
+
+
+@router.get("/payslip-distribution", response_class=HTMLResponse)
+@cached_fragment(namespaces=(PAYSLIPS_NAMESPACE, PRICES_NAMESPACE))
+async def payslip_distribution(
+    request: Request,
+    orgao: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    p: str = "50,90,99",
+    real: str | None = None,
+):
+    """Fragmento: mediana, p90 e p99 de cada componente do contracheque real.
+
+    Mesmos parâmetros de `GET /api/v1/payslips/percentiles`.
+    """
+    try:
+        result = await asyncio.to_thread(run_distribution, orgao, start, end, None, p, real)
+    except DistributionError as e:
+        return HTMLResponse(f"<p class='error'>{escape(str(e))}</p>", status_code=400)
+    except LookupError:
+        return HTMLResponse("<p class='error'>Dados ainda não disponíveis.</p>", status_code=503)
+
+    return templates.TemplateResponse(
+        "fragments/payslip_distribution.html",
+        {
+            "request": request,
+            "percentiles": [f"p{q:g}" for q in result.percentiles],
+            "rows": result.rows(),
+            # Mesma base dos valores: teto em reais do mês-base no modo real
+            "teto": career_index_for(real).facts.teto,
+            "real": real,
+        },
+    )
+
+
+HISTORY_HEIGHT = 160
+
+
+@router.get("/salary-history/{career_id}", response_class=HTMLResponse)
+@cached_fragment(namespaces=("salary", PAYSLIPS_NAMESPACE, PRICES_NAMESPACE))
+async def salary_history(
+    request: Request,
+    career_id: str,
+    component: str = "bruto",
+    metric: str = "mean",
+    width: int = Query(DEFAULT_WIDTH, ge=3, le=MAX_WIDTH),
+    real: str | None = None,
+):
+    """Fragmento: gráfico SVG da série mensal de uma carreira, reduzida por LTTB.
+
+    Mesmos parâmetros de `GET /api/v1/history/career/{career_id}`. Carreira sem
+    contracheques medidos responde 204 (o HTMX mantém o placeholder).
+    """
+    try:
+        history = await asyncio.to_thread(
+            run_history, "career", career_id, component, metric, width, real=real
+        )
+    except HistoryError as e:
+        return HTMLResponse(f"<p class='error'>{escape(str(e))}</p>", status_code=400)
+    except LookupError:
+        return Response(status_code=204)
+
+    return templates.TemplateResponse(
+        "fragments/salary_history.html",
+        {
+            "request": request,
+            "history": history,
+            "metric_label": METRICS.get(metric, metric),
+            "component_label": COMPONENTS[component],
+            "chart": history.polylines(width, HISTORY_HEIGHT),
+            "width": width,
+            "height": HISTORY_HEIGHT,
         },
     )
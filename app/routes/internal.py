@@ -0,0 +1,86 @@
+"""Rotas internas (ETL, refresh de dados) — protegidas por token, fora do nginx público."""
+
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel, Field
+
+from app.config import get_settings
+from app.core.cache import cache_stats
+from app.core.surrogate import purge
+from app.services.analytics import NAMESPACE as ANALYTICS_NAMESPACE
+from app.services.analytics import get_analytics_status, sync_salary_cube
+from app.services.exchange_rate import get_exchange_rate_status
+from app.services.payslips import NAMESPACE as PAYSLIPS_NAMESPACE
+from app.services.payslips import get_payslip_status, sync_payslip_store
+from app.services.price_index import NAMESPACE as PRICES_NAMESPACE
+from app.services.price_index import get_price_index_status, sync_price_indices
+from app.services.salary_repository import (
+    get_salary_sync_status,
+    salary_sync_enabled,
+    sync_salary_data,
+)
+
+settings = get_settings()
+
+router = APIRouter(prefix="/internal", include_in_schema=False)
+
+# Namespaces cuja versão é a do próprio conteúdo em disco: no purge, relê em
+# vez de sortear versão (True se há conteúdo carregado)
+CONTENT_SYNCS = {
+    ANALYTICS_NAMESPACE: lambda: sync_salary_cube(force=True),
+    PAYSLIPS_NAMESPACE: sync_payslip_store,
+    PRICES_NAMESPACE: lambda: sync_price_indices(force=True),
+}
+
+
+def require_internal_token(authorization: str = Header(default="")) -> None:
+    """Exige `Authorization: Bearer <INTERNAL_API_TOKEN>`.
+
+    Sem token configurado as rotas internas ficam desativadas (404).
+    """
+    if not settings.internal_api_token:
+        raise HTTPException(status_code=404)
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.internal_api_token):
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+
+class PurgeRequest(BaseModel):
+    """Corpo do purge: surrogate keys e/ou namespaces de dados a invalidar."""
+
+    keys: list[str] = Field(default_factory=list)  # Ex.: ["career-juiz_tjsp"]
+    namespaces: list[str] = Field(default_factory=list)  # Ex.: ["salary"]
+
+
+@router.post("/purge", dependencies=[Depends(require_internal_token)])
+async def purge_cache(body: PurgeRequest):
+    """Invalida seletivamente o cache da aplicação e do nginx.
+
+    Com banco, o namespace "salary" não ganha versão aleatória: o dataset é
+    relido e a versão dele vira a do namespace (ver `salary_repository`).
+    O mesmo vale para os namespaces de `CONTENT_SYNCS`.
+    """
+    keys, namespaces = body.keys, body.namespaces
+    if "salary" in namespaces and salary_sync_enabled():
+        await sync_salary_data()
+        keys = [*keys, "salary"]
+        namespaces = [ns for ns in namespaces if ns != "salary"]
+    for name, sync in CONTENT_SYNCS.items():
+        if name in namespaces and sync():
+            keys = [*keys, name]
+            namespaces = [ns for ns in namespaces if ns != name]
+    return await purge(keys, namespaces)
+
+
+@router.get("/status", dependencies=[Depends(require_internal_token)])
+async def status():
+    """Métricas de cache, câmbio, dataset salarial e dados analíticos."""
+    return {
+        "cache": cache_stats(),
+        "exchange_rates": get_exchange_rate_status(),
+        "salary_data": get_salary_sync_status(),
+        "analytics": get_analytics_status(),
+        "payslips": get_payslip_status(),
+        "prices": get_price_index_status(),
+    }
@@ -4,37 +4,59 @@ from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
-from app.services.exchange_rate import get_international_with_live_rates
-from app.services.salary_data import (
-    CAREERS,
-    CUSTO_SOCIAL,
-    CUSTO_SUPERSALARIOS_ANUAL,
-    SERVIDORES_ACIMA_TETO,
-    TETO_CONSTITUCIONAL,
-    get_all_careers_sorted,
-    get_career,
-)
+from app.core.cache import cached_page
+from app.services.international import get_international_with_live_rates
+from app.services.price_index import NAMESPACE as PRICES_NAMESPACE
+from app.services.price_index import RealModeError, career_index_for, real_base
+from app.services.salary_data import get_salary_facts
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 
+def _real_mode_error(request: Request, e: Exception) -> HTMLResponse:
+    """Página de erro para `?real=` inválido (400) ou sem índices de preço (503)."""
+    if isinstance(e, RealModeError):
+        return templates.TemplateResponse(
+            "pages/404.html", {"request": request, "message": str(e)}, status_code=400
+        )
+    return templates.TemplateResponse(
+        "pages/404.html",
+        {"request": request, "message": "Índices de preço ainda não disponíveis."},
+        status_code=503,
+    )
+
+
 @router.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    """Página inicial com visão geral da desigualdade."""
-    careers = get_all_careers_sorted()
-    international, exchange_rates = await get_international_with_live_rates()
+@cached_page(namespaces=("salary", "rates", "payslips", PRICES_NAMESPACE))
+async def home(request: Request, real: str | None = None):
+    """Página inicial com visão geral da desigualdade.
+
+    `real=AAAA-MM` mostra carreiras, teto e comparação internacional em
+    valores do mês (IPCA/CPI); os números medidos seguem nominais.
+    """
+    try:
+        base = real_base(real)
+        index = career_index_for(real)
+    except (RealModeError, LookupError) as e:
+        return _real_mode_error(request, e)
+    careers = list(index.sorted_by())
+    facts = get_salary_facts()
+    international, exchange_rates = await get_international_with_live_rates(base)
     return templates.TemplateResponse(
         "pages/home.html",
         {
             "request": request,
             "careers": careers,
-            "teto": TETO_CONSTITUCIONAL,
-            "custo_anual": CUSTO_SUPERSALARIOS_ANUAL,
-            "servidores_acima": SERVIDORES_ACIMA_TETO,
-            "custo_social": CUSTO_SOCIAL,
+            "teto": index.facts.teto,
+            "custo_anual": facts.custo_anual,
+            "servidores_acima": facts.servidores_acima,
+            "custo_social": facts.custo_social,
+            "periodo": facts.periodo,
+            "medido": facts.medido,
             "international": international,
             "exchange_rates": exchange_rates,
+            "real": real,
             "page_title": "OctoWage — Transparência Salarial",
             "page_description": "Visualize a desigualdade salarial no setor público brasileiro. Compare supersalários com pisos de professores, enfermeiros e policiais.",
         },
@@ -42,10 +64,15 @@ async def home(request: Request):
 
 
 @router.get("/comparar/{career1_id}-vs-{career2_id}", response_class=HTMLResponse)
-async def compare(request: Request, career1_id: str, career2_id: str):
-    """Página de comparação entre duas carreiras."""
-    c1 = get_career(career1_id)
-    c2 = get_career(career2_id)
+@cached_page(namespaces=("salary", PRICES_NAMESPACE))
+async def compare(request: Request, career1_id: str, career2_id: str, real: str | None = None):
+    """Página de comparação entre duas carreiras (`real=AAAA-MM`: valores do mês)."""
+    try:
+        index = career_index_for(real)
+    except (RealModeError, LookupError) as e:
+        return _real_mode_error(request, e)
+    c1 = index.get(career1_id)
+    c2 = index.get(career2_id)
 
     if not c1 or not c2:
         return templates.TemplateResponse(
@@ -54,7 +81,7 @@ async def compare(request: Request, career1_id: str, career2_id: str):
             status_code=404,
         )
 
-    careers = get_all_careers_sorted()
+    careers = list(index.sorted_by())
     return templates.TemplateResponse(
         "pages/compare.html",
         {
@@ -62,7 +89,8 @@ async def compare(request: Request, career1_id: str, career2_id: str):
             "career1": c1,
             "career2": c2,
             "careers": careers,
-            "teto": TETO_CONSTITUCIONAL,
+            "teto": index.facts.teto,
+            "real": real,
             "page_title": f"{c1.name} vs {c2.name} — OctoWage",
             "page_description": f"Compare salários: {c1.name} (R$ {c1.salary_real:,.0f}) vs {c2.name} (R$ {c2.salary_real:,.0f})",
         },
@@ -70,6 +98,7 @@ async def compare(request: Request, career1_id: str, career2_id: str):
 
 
 @router.get("/sobre", response_class=HTMLResponse)
+@cached_page()
 async def about(request: Request):
     """Página sobre o projeto e metodologia."""
     return templates.TemplateResponse(
@@ -83,6 +112,7 @@ async def about(request: Request):
 
 
 @router.get("/termos", response_class=HTMLResponse)
+@cached_page()
 async def terms(request: Request):
     """Termos de uso da plataforma."""
     return templates.TemplateResponse(
@@ -96,6 +126,7 @@ async def terms(request: Request):
 
 
 @router.get("/privacidade", response_class=HTMLResponse)
+@cached_page()
 async def privacy(request: Request):
     """Política de privacidade LGPD-compliant."""
     return templates.TemplateResponse(
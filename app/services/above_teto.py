@@ -0,0 +1,172 @@
+"""Contracheques acima do teto: agregados por órgão × mês, mantidos por delta.
+
+Substitui os números de manchete digitados à mão (53 mil servidores,
+R$ 20 bi/ano) por contas sobre os contracheques do DadosJusBr. Vive no mesmo
+store SQLite dos sketches (`app.services.payslips`) e é gravado na mesma
+transação, pela mesma ingestão (`etl.payslip_sketches`):
+
+- `above_teto`: por órgão × mês, contracheques, quantos passam do teto, o
+  excedente somado e o teto usado.
+- `above_teto_totals`: por mês, a soma de todos os órgãos. Não é recalculada:
+  ao (re)gravar um órgão × mês, aplica-se só a diferença para a linha
+  anterior dele. Um mês novo de um órgão toca duas linhas, nunca o histórico.
+
+Reprodutível: cada mês usa o teto vigente nele (`salary_data.teto_vigente`) e
+o excedente é somado em centavos inteiros — recalcular dá exatamente o mesmo
+total, em qualquer ordem de carga. Se o histórico do teto for corrigido, os
+meses afetados aparecem em `stale_months` e a ingestão reprocessa só eles.
+
+Conta por contracheque: excedente = bruto − teto, quando positivo.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+
+from app.services.salary_data import teto_vigente
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS above_teto (
+    orgao TEXT NOT NULL,
+    period INTEGER NOT NULL,  -- AAAAMM
+    payslips INTEGER NOT NULL,
+    above INTEGER NOT NULL,
+    excess_cents INTEGER NOT NULL,
+    teto REAL NOT NULL,  -- Teto vigente usado no cálculo
+    PRIMARY KEY (orgao, period)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS above_teto_totals (
+    period INTEGER PRIMARY KEY,
+    orgaos INTEGER NOT NULL,
+    payslips INTEGER NOT NULL,
+    above INTEGER NOT NULL,
+    excess_cents INTEGER NOT NULL
+);
+"""
+
+# Janela dos números de manchete (meses mais recentes com dados)
+HEADLINE_MONTHS = 12
+
+_MONTHS = ("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez")
+
+
+@dataclass(frozen=True)
+class MonthAboveTeto:
+    """Contas de um órgão num mês."""
+
+    payslips: int
+    above: int
+    excess_cents: int
+    teto: float
+
+
+@dataclass(frozen=True)
+class AboveTetoSummary:
+    """Números de manchete de uma janela de meses."""
+
+    start: int  # AAAAMM
+    end: int
+    months: int
+    above_per_month: int  # Média mensal de contracheques acima do teto
+    excess: float  # Excedente somado na janela (R$)
+
+    @property
+    def annual_excess(self) -> float:
+        """Excedente anualizado (janela com menos de 12 meses é extrapolada)."""
+        return self.excess * 12 / self.months
+
+    @property
+    def periodo(self) -> str:
+        def label(key: int) -> str:
+            return f"{_MONTHS[key % 100 - 1]}/{key // 100}"
+
+        return f"{label(self.start)} a {label(self.end)}"
+
+
+def apply_month(conn: sqlite3.Connection, orgao: str, period: int, month: MonthAboveTeto) -> None:
+    """Grava as contas de um órgão × mês e aplica a diferença no total do mês.
+
+    Deve rodar dentro da transação que grava o mês (ver `payslips.write_month`).
+    """
+    old = conn.execute(
+        "SELECT payslips, above, excess_cents FROM above_teto WHERE orgao = ? AND period = ?",
+        (orgao, period),
+    ).fetchone()
+    new_orgao = 0 if old else 1
+    old = old or (0, 0, 0)
+    conn.execute(
+        "INSERT OR REPLACE INTO above_teto (orgao, period, payslips, above, excess_cents, teto) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (orgao, period, month.payslips, month.above, month.excess_cents, month.teto),
+    )
+    conn.execute(
+        """
+        INSERT INTO above_teto_totals (period, orgaos, payslips, above, excess_cents)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (period) DO UPDATE SET
+            orgaos = orgaos + excluded.orgaos,
+            payslips = payslips + excluded.payslips,
+            above = above + excluded.above,
+            excess_cents = excess_cents + excluded.excess_cents
+        """,
+        (
+            period,
+            new_orgao,
+            month.payslips - old[0],
+            month.above - old[1],
+            month.excess_cents - old[2],
+        ),
+    )
+
+
+def stale_months(conn: sqlite3.Connection) -> set[tuple[str, int]]:
+    """(órgão, AAAAMM) calculados com um teto diferente do vigente no histórico atual."""
+    return {
+        (orgao, key)
+        for orgao, key, teto in conn.execute("SELECT orgao, period, teto FROM above_teto")
+        if teto != teto_vigente(key // 100, key % 100)
+    }
+
+
+def summary(conn: sqlite3.Connection, months: int = HEADLINE_MONTHS) -> AboveTetoSummary | None:
+    """Manchete dos `months` meses mais recentes com contracheques."""
+    rows = conn.execute(
+        "SELECT period, above, excess_cents FROM above_teto_totals "
+        "WHERE payslips > 0 ORDER BY period DESC LIMIT ?",
+        (months,),
+    ).fetchall()
+    if not rows:
+        return None
+    return AboveTetoSummary(
+        start=rows[-1][0],
+        end=rows[0][0],
+        months=len(rows),
+        above_per_month=round(sum(r[1] for r in rows) / len(rows)),
+        excess=sum(r[2] for r in rows) / 100,
+    )
+
+
+def monthly(
+    conn: sqlite3.Connection,
+    orgaos: list[str] | None = None,
+    start: int | None = None,
+    end: int | None = None,
+) -> list[tuple[int, int, int, int]]:
+    """Série mensal (AAAAMM, contracheques, acima do teto, excedente em centavos).
+
+    Sem filtro de órgão lê os totais mantidos; com filtro, soma as linhas
+    dos órgãos pedidos.
+    """
+    params: list = [start or 0, end or 999999]
+    if not orgaos:
+        sql = (
+            "SELECT period, payslips, above, excess_cents FROM above_teto_totals "
+            "WHERE period BETWEEN ? AND ? ORDER BY period"
+        )
+    else:
+        sql = (
+            "SELECT period, SUM(payslips), SUM(above), SUM(excess_cents) FROM above_teto "
+            f"WHERE period BETWEEN ? AND ? AND orgao IN ({','.join('?' * len(orgaos))}) "
+            "GROUP BY period ORDER BY period"
+        )
+        params.extend(orgaos)
+    return conn.execute(sql, params).fetchall()
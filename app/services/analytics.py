@@ -0,0 +1,742 @@
+"""Motor analítico colunar: percentis, média e contagem por ocupação × região × ano.
+
+O snapshot Gold (gerado por `etl.gold_snapshot`) fica em disco como arrays
+NumPy mapeados em memória — nada é copiado para o heap ao carregar:
+
+- Ocupações e regiões são codificadas em dicionário (índice int32 → código
+  CBO/UF guardado uma vez em `meta.json`); o ano vira deslocamento do
+  primeiro ano.
+- Os salários (float32) são gravados ordenados por célula (ocupação, região,
+  ano) e, dentro da célula, por valor. A célula de cada linha não precisa ser
+  guardada: cada célula é uma fatia contígua `[start, end)` do array.
+- Além das células finas há agregados prontos por (ocupação, ano),
+  (região, ano) e (ano), cada um com seus salários já ordenados.
+
+Consulta: escolhe o nível mais grosso que cobre as dimensões agrupadas e
+filtradas e seleciona as células com máscaras vetorizadas. Quando cada grupo
+é exatamente uma célula (o caso comum: "ocupação X por ano", "por UF em
+2024"), percentil é aritmética de índices sobre fatias já ordenadas —
+microssegundos, sem ordenar nada. Quando um grupo junta várias células
+(filtro com vários valores numa dimensão não agrupada), as linhas delas são
+reunidas e ordenadas numa única chamada (`np.sort` sobre chave
+grupo<<32 | bits do salário), limitado a `MAX_MERGE_ROWS`.
+
+Média e contagem saem das somas por célula (`np.bincount`), sem tocar nas
+linhas. Percentis usam interpolação linear (igual a `percentile_cont`).
+
+Desigualdade (`SalaryCube.inequality`): Gini, Theil-T e P90/P10 por grupo,
+sobre as mesmas fatias ordenadas (`app.core.inequality`).
+
+Valores reais (`year_factors`): cada célula é de um ano só, então deflacionar
+é multiplicar pela média anual do IPCA daquele ano (`app.services.price_index`)
+— percentis e somas por célula escalam sem reordenar nada.
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from app.core.cache import register_namespace_hook, set_namespace_version
+from app.core.inequality import segment_inequality
+from app.core.storage import atomic_write_json, data_path, read_json
+from app.services.price_index import RealModeError, get_price_indices, real_base
+
+logger = logging.getLogger(__name__)
+
+CUBE_SCHEMA = 1
+
+# Ponteiro para o snapshot atual (DATA_DIR/gold/salary_cube.json)
+CUBE_DIR = "gold"
+POINTER_FILE = "salary_cube.json"
+
+# Namespace de cache das respostas do motor
+NAMESPACE = "occupations"
+
+DIMENSIONS = ("occupation", "region", "year")
+
+# Níveis de agregação, do mais grosso ao mais fino (dimensões em ordem de chave)
+LEVELS: dict[str, tuple[str, ...]] = {
+    "year": ("year",),
+    "region_year": ("region", "year"),
+    "occupation_year": ("occupation", "year"),
+    "occupation_region_year": ("occupation", "region", "year"),
+}
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Linhas reunidas e ordenadas por consulta no caminho sem agregado pronto
+MAX_MERGE_ROWS = 2_000_000
+
+# Intervalo mínimo entre checagens do ponteiro do snapshot (por worker)
+SYNC_INTERVAL_SECONDS = 5.0
+
+
+class QueryError(ValueError):
+    """Consulta inválida ou ampla demais para o motor."""
+
+
+@dataclass(frozen=True)
+class Level:
+    """Um nível de agregação: células ordenadas e salários ordenados por célula."""
+
+    dims: tuple[str, ...]
+    codes: dict[str, np.ndarray]  # Dimensão → código (int32) de cada célula
+    start: np.ndarray  # int64, len = células + 1
+    sums: np.ndarray  # float64, soma dos salários de cada célula
+    salary: np.ndarray  # float32, ordenado dentro de cada célula
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.start)
+
+    def __len__(self) -> int:
+        return len(self.sums)
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    """Resultado colunar: uma posição por grupo em todos os arrays."""
+
+    group_by: tuple[str, ...]
+    keys: dict[str, list]  # Dimensão → rótulo (código CBO/UF ou ano) de cada grupo
+    names: dict[str, list]  # Dimensão → nome legível (ocupação/região)
+    count: np.ndarray
+    mean: np.ndarray
+    percentiles: dict[float, np.ndarray]
+    elapsed_ms: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+    def columns(self) -> dict[str, list]:
+        """Colunas prontas para JSON (valores arredondados em centavos)."""
+        columns: dict[str, list] = {}
+        for dim in self.group_by:
+            columns[dim] = self.keys[dim]
+            if dim in self.names:
+                columns[f"{dim}_name"] = self.names[dim]
+        columns["count"] = self.count.tolist()
+        columns["mean"] = np.round(self.mean, 2).tolist()
+        for q, values in self.percentiles.items():
+            columns[f"p{q:g}"] = np.round(values, 2).tolist()
+        return columns
+
+    def rows(self) -> list[dict]:
+        """Uma linha (dict) por grupo, para templates."""
+        columns = self.columns()
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+# Razões entre percentis da consulta de desigualdade: nome → (numerador, denominador)
+RATIOS: dict[str, tuple[float, float]] = {
+    "p90_p10": (90, 10),
+    "p90_p50": (90, 50),
+    "p50_p10": (50, 10),
+}
+
+
+@dataclass(frozen=True)
+class InequalityResult:
+    """Gini, Theil-T e razões entre percentis por grupo (colunar, como `QueryResult`)."""
+
+    group_by: tuple[str, ...]
+    keys: dict[str, list]
+    names: dict[str, list]
+    count: np.ndarray
+    mean: np.ndarray
+    gini: np.ndarray
+    theil: np.ndarray
+    ratios: dict[str, np.ndarray]
+    elapsed_ms: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+    def columns(self) -> dict[str, list]:
+        """Colunas prontas para JSON (índices com 4 casas; NaN vira None)."""
+
+        def clean(values: np.ndarray, digits: int) -> list[float | None]:
+            return [None if np.isnan(v) else v for v in np.round(values, digits).tolist()]
+
+        columns: dict[str, list] = {}
+        for dim in self.group_by:
+            columns[dim] = self.keys[dim]
+            if dim in self.names:
+                columns[f"{dim}_name"] = self.names[dim]
+        columns["count"] = self.count.tolist()
+        columns["mean"] = np.round(self.mean, 2).tolist()
+        columns["gini"] = clean(self.gini, 4)
+        columns["theil"] = clean(self.theil, 4)
+        for name, values in self.ratios.items():
+            columns[name] = clean(values, 2)
+        return columns
+
+    def rows(self) -> list[dict]:
+        """Uma linha (dict) por grupo, para templates."""
+        columns = self.columns()
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+@dataclass(frozen=True)
+class _Selection:
+    """Células selecionadas por uma consulta e o grupo de cada uma."""
+
+    level: Level
+    selected: np.ndarray  # Índices das células no nível
+    gid: np.ndarray  # Grupo de cada célula selecionada
+    group_keys: np.ndarray  # Chave composta de cada grupo (ordem de group_by)
+    starts: np.ndarray  # Primeira linha de cada célula
+    lens: np.ndarray  # Linhas de cada célula
+    count: np.ndarray  # Linhas de cada grupo
+    mean: np.ndarray  # Média de cada grupo
+    scale: np.ndarray | None = None  # Deflator de cada célula (modo real)
+
+    @property
+    def single_cell(self) -> bool:
+        """Cada grupo é exatamente uma célula (fatias já ordenadas)."""
+        return len(self.group_keys) == len(self.selected)
+
+
+def _check_percentiles(percentiles: Iterable[float]) -> tuple[float, ...]:
+    percentiles = tuple(float(q) for q in percentiles)
+    if any(not 0 <= q <= 100 for q in percentiles):
+        raise QueryError("Percentis devem estar entre 0 e 100")
+    return percentiles
+
+
+def _segment_percentiles(
+    values: np.ndarray, starts: np.ndarray, counts: np.ndarray, percentiles: Iterable[float]
+) -> dict[float, np.ndarray]:
+    """Percentis (interpolação linear) de segmentos já ordenados de `values`."""
+    last = counts - 1
+    result = {}
+    for q in percentiles:
+        pos = starts + last * (q / 100.0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, starts + last)
+        low = values[lo].astype(np.float64)
+        result[q] = low + (values[hi] - low) * (pos - lo)
+    return result
+
+
+def _pack(group: np.ndarray, salary: np.ndarray) -> np.ndarray:
+    """Chave uint64 grupo<<32 | bits do salário: ordenar a chave ordena por (grupo, salário).
+
+    Vale para float32 positivo, cujos bits crescem com o valor.
+    """
+    return (group.astype(np.uint64) << np.uint64(32)) | salary.view(np.uint32).astype(np.uint64)
+
+
+def _unpack_salary(keys: np.ndarray) -> np.ndarray:
+    return (keys & np.uint64(0xFFFFFFFF)).astype(np.uint32).view(np.float32)
+
+
+class SalaryCube:
+    """Snapshot Gold em memória (mmap), com consultas agrupadas vetorizadas."""
+
+    def __init__(self, meta: dict, levels: dict[str, Level]):
+        self.meta = meta
+        self.version: str = meta["version"]
+        self.levels = levels
+        self.labels = {
+            "occupation": np.asarray(meta["occupations"], dtype=object),
+            "region": np.asarray(meta["regions"], dtype=object),
+        }
+        self.names = {
+            "occupation": np.asarray(meta["occupation_names"], dtype=object),
+            "region": np.asarray(meta["region_names"], dtype=object),
+        }
+        self._index = {
+            dim: {code: i for i, code in enumerate(labels)} for dim, labels in self.labels.items()
+        }
+        self.year_min: int = meta["year_min"]
+        self.year_max: int = meta["year_max"]
+
+    @property
+    def rows(self) -> int:
+        return self.meta["rows"]
+
+    @classmethod
+    def load(cls, path: Path) -> "SalaryCube":
+        """Abre um snapshot gravado por `write_salary_cube` (arrays em mmap)."""
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("schema") != CUBE_SCHEMA:
+            raise ValueError(
+                f"Snapshot {path}: schema {meta.get('schema')}, esperado {CUBE_SCHEMA}"
+            )
+
+        def array(level: str, name: str) -> np.ndarray:
+            # Vista ndarray comum sobre o mmap: `np.memmap` encarece cada indexação
+            return np.load(path / f"{level}.{name}.npy", mmap_mode="r").view(np.ndarray)
+
+        levels = {
+            name: Level(
+                dims=dims,
+                codes={dim: array(name, dim) for dim in dims},
+                start=array(name, "start"),
+                sums=array(name, "sum"),
+                salary=array(name, "salary"),
+            )
+            for name, dims in LEVELS.items()
+        }
+        return cls(meta, levels)
+
+    def _filter_codes(self, dim: str, values: Iterable[str] | None) -> np.ndarray | None:
+        if values is None:
+            return None
+        index = self._index[dim]
+        return np.array(sorted({index[v] for v in values if v in index}), dtype=np.int32)
+
+    def _level_for(self, dims: set[str]) -> Level:
+        for name, level_dims in LEVELS.items():
+            if dims.issubset(level_dims):
+                return self.levels[name]
+        raise QueryError(f"Dimensões desconhecidas: {sorted(dims - set(DIMENSIONS))}")
+
+    def query(
+        self,
+        occupations: Iterable[str] | None = None,
+        regions: Iterable[str] | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        group_by: Iterable[str] = ("year",),
+        percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+        year_factors: np.ndarray | None = None,
+    ) -> QueryResult:
+        """Contagem, média e percentis por grupo.
+
+        Args:
+            occupations: Códigos CBO aceitos (None = todos).
+            regions: Códigos de região/UF aceitos (None = todas).
+            year_from, year_to: Faixa de anos, inclusiva.
+            group_by: Dimensões do agrupamento (subconjunto de DIMENSIONS).
+            percentiles: Percentis de 0 a 100.
+            year_factors: Deflator de cada ano (posição = ano − `year_min`) para
+                valores reais (ver `real_year_factors`); None = nominal.
+        """
+        started = time.perf_counter()
+        group_by = tuple(dict.fromkeys(group_by))
+        percentiles = _check_percentiles(percentiles)
+        sel = self._select(occupations, regions, year_from, year_to, group_by, year_factors)
+
+        if sel.single_cell:
+            # Cada grupo é uma célula: percentis direto nas fatias ordenadas
+            cell_pcts = _segment_percentiles(sel.level.salary, sel.starts, sel.lens, percentiles)
+            pcts = {q: np.empty(len(sel.gid)) for q in percentiles}
+            for q in percentiles:
+                # Deflator positivo não muda a ordem: escala o percentil da célula
+                pcts[q][sel.gid] = cell_pcts[q] if sel.scale is None else cell_pcts[q] * sel.scale
+        else:
+            values = self._sorted_rows(sel)
+            group_starts = np.cumsum(sel.count) - sel.count
+            pcts = _segment_percentiles(values, group_starts, sel.count, percentiles)
+
+        keys, names = self._decode(sel.group_keys, group_by)
+        return QueryResult(
+            group_by=group_by,
+            keys=keys,
+            names=names,
+            count=sel.count,
+            mean=sel.mean,
+            percentiles=pcts,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def inequality(
+        self,
+        occupations: Iterable[str] | None = None,
+        regions: Iterable[str] | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        group_by: Iterable[str] = ("year",),
+        year_factors: np.ndarray | None = None,
+    ) -> InequalityResult:
+        """Gini, Theil-T e P90/P10 (e P90/P50, P50/P10) por grupo.
+
+        Mesmos filtros e agrupamento de `query`. As linhas de cada grupo são
+        lidas já ordenadas (ou ordenadas uma vez, se o grupo junta células) e
+        as medidas saem de somas por segmento (`app.core.inequality`).
+        """
+        started = time.perf_counter()
+        group_by = tuple(dict.fromkeys(group_by))
+        sel = self._select(occupations, regions, year_from, year_to, group_by, year_factors)
+        values = self._sorted_rows(sel)
+        group_starts = np.cumsum(sel.count) - sel.count
+        measures = segment_inequality(values, group_starts, sel.count)
+        pcts = _segment_percentiles(
+            values, group_starts, sel.count, sorted({q for pair in RATIOS.values() for q in pair})
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = {name: pcts[num] / pcts[den] for name, (num, den) in RATIOS.items()}
+
+        keys, names = self._decode(sel.group_keys, group_by)
+        return InequalityResult(
+            group_by=group_by,
+            keys=keys,
+            names=names,
+            count=sel.count,
+            mean=sel.mean,
+            gini=measures["gini"],
+            theil=measures["theil"],
+            ratios=ratios,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def _select(
+        self,
+        occupations: Iterable[str] | None,
+        regions: Iterable[str] | None,
+        year_from: int | None,
+        year_to: int | None,
+        group_by: tuple[str, ...],
+        year_factors: np.ndarray | None = None,
+    ) -> _Selection:
+        """Escolhe o nível, filtra as células e agrupa (contagem e média por grupo)."""
+        unknown = [d for d in group_by if d not in DIMENSIONS]
+        if unknown:
+            raise QueryError(f"Dimensões desconhecidas: {unknown}")
+
+        filters: dict[str, np.ndarray] = {}
+        for dim, values in (("occupation", occupations), ("region", regions)):
+            codes = self._filter_codes(dim, values)
+            if codes is not None:
+                filters[dim] = codes
+        lo = self.year_min if year_from is None else max(year_from, self.year_min)
+        hi = self.year_max if year_to is None else min(year_to, self.year_max)
+        if year_from is not None or year_to is not None:
+            filters["year"] = np.arange(lo - self.year_min, hi - self.year_min + 1, dtype=np.int32)
+
+        level = self._level_for(set(group_by) | set(filters))
+        selected = self._select_cells(level, filters)
+
+        # Grupo de cada célula selecionada (ordem lexicográfica de group_by)
+        composite = np.zeros(len(selected), dtype=np.int64)
+        for dim in group_by:
+            composite = composite * self._cardinality(dim) + level.codes[dim][selected]
+        group_keys, gid = np.unique(composite, return_inverse=True)
+        n_groups = len(group_keys)
+
+        starts = level.start[selected]
+        lens = level.start[selected + 1] - starts
+        count = np.bincount(gid, weights=lens, minlength=n_groups).astype(np.int64)
+        # Todo nível tem a dimensão ano: o deflator de cada célula é o do ano dela
+        scale = None if year_factors is None else year_factors[level.codes["year"][selected]]
+        cell_sums = level.sums[selected] if scale is None else level.sums[selected] * scale
+        sums = np.bincount(gid, weights=cell_sums, minlength=n_groups)
+        mean = np.divide(sums, count, out=np.zeros(n_groups), where=count > 0)
+        return _Selection(level, selected, gid, group_keys, starts, lens, count, mean, scale)
+
+    def _cardinality(self, dim: str) -> int:
+        if dim == "year":
+            return self.year_max - self.year_min + 1
+        return len(self.labels[dim])
+
+    def _select_cells(self, level: Level, filters: dict[str, np.ndarray]) -> np.ndarray:
+        """Índices das células que passam nos filtros."""
+        first = level.dims[0]
+        if first in filters and len(level.dims) > 1:
+            # Primeira dimensão da chave é ordenada: cada valor é uma faixa contígua
+            codes = level.codes[first]
+            lo = np.searchsorted(codes, filters[first], side="left")
+            hi = np.searchsorted(codes, filters[first], side="right")
+            ranges = [np.arange(a, b) for a, b in zip(lo, hi)]
+            candidates = np.concatenate(ranges) if ranges else np.empty(0, np.int64)
+        else:
+            candidates = np.arange(len(level))
+        mask = np.ones(len(candidates), dtype=bool)
+        for dim, values in filters.items():
+            if dim == first and len(level.dims) > 1:
+                continue
+            mask &= np.isin(level.codes[dim][candidates], values)
+        return candidates[mask].astype(np.int64)
+
+    def _sorted_rows(self, sel: _Selection) -> np.ndarray:
+        """Salários das células selecionadas, ordenados por (grupo, salário).
+
+        Com uma célula por grupo basta copiar as fatias na ordem dos grupos;
+        senão as linhas são reunidas e ordenadas numa única chamada.
+        """
+        total = int(sel.lens.sum())
+        order = np.argsort(sel.gid, kind="stable")
+        starts, lens = sel.starts[order], sel.lens[order]
+        if not sel.single_cell and total > MAX_MERGE_ROWS:
+            raise QueryError(
+                f"Consulta cobre {total} registros sem agregado pronto; "
+                "filtre por ocupação, região ou ano"
+            )
+        # Índices das linhas de cada célula, em sequência (sem laço Python)
+        offsets = np.cumsum(lens) - lens
+        rows = np.arange(total, dtype=np.int64) - np.repeat(offsets - starts, lens)
+        values = sel.level.salary[rows]
+        if sel.scale is not None:
+            values = (values * np.repeat(sel.scale[order], lens)).astype(np.float32)
+        if sel.single_cell:
+            return values
+        keys = _pack(np.repeat(sel.gid[order], lens), values)
+        keys.sort()
+        return _unpack_salary(keys)
+
+    def _decode(self, group_keys: np.ndarray, group_by: tuple[str, ...]) -> tuple[dict, dict]:
+        keys: dict[str, list] = {}
+        names: dict[str, list] = {}
+        remaining = group_keys.copy()
+        for dim in reversed(group_by):
+            size = self._cardinality(dim)
+            codes = remaining % size
+            remaining //= size
+            if dim == "year":
+                keys[dim] = (codes + self.year_min).tolist()
+            else:
+                keys[dim] = self.labels[dim][codes].tolist()
+                names[dim] = self.names[dim][codes].tolist()
+        return {d: keys[d] for d in group_by}, {d: names[d] for d in group_by if d in names}
+
+
+def _build_level(
+    dims: tuple[str, ...], codes: dict[str, np.ndarray], sizes: dict[str, int], salary: np.ndarray
+) -> dict[str, np.ndarray]:
+    """Ordena as linhas por (célula, salário) e calcula limites e somas das células."""
+    cell = np.zeros(len(salary), dtype=np.int64)
+    for dim in dims:
+        cell = cell * sizes[dim] + codes[dim]
+    if len(cell) and cell.max() >= 2**32:
+        raise ValueError(f"Nível {dims}: células demais para a chave de 32 bits")
+    keys = _pack(cell, salary)
+    keys.sort()
+    cell_sorted = (keys >> np.uint64(32)).astype(np.int64)
+    ordered = _unpack_salary(keys)
+    cells, first = np.unique(cell_sorted, return_index=True)
+    arrays = {
+        "start": np.append(first, len(ordered)).astype(np.int64),
+        "sum": np.add.reduceat(ordered.astype(np.float64), first) if len(first) else np.zeros(0),
+        "salary": ordered,
+    }
+    for dim in reversed(dims):
+        arrays[dim] = (cells % sizes[dim]).astype(np.int32)
+        cells = cells // sizes[dim]
+    return arrays
+
+
+def write_salary_cube(
+    path: Path,
+    version: str,
+    occupation: np.ndarray,
+    region: np.ndarray,
+    year: np.ndarray,
+    salary: np.ndarray,
+    occupations: list[str],
+    occupation_names: list[str],
+    regions: list[str],
+    region_names: list[str],
+) -> dict:
+    """Grava um snapshot a partir de linhas já codificadas em dicionário.
+
+    `occupation`/`region` são índices em `occupations`/`regions`; `year` é o
+    ano; `salary` é convertido para float32 (valores não positivos ou não
+    finitos são descartados). Devolve o `meta.json` gravado.
+    """
+    salary = np.asarray(salary, dtype=np.float32)
+    keep = np.isfinite(salary) & (salary > 0)
+    year = np.asarray(year, dtype=np.int32)[keep]
+    year_min = int(year.min()) if len(year) else 0
+    year_max = int(year.max()) if len(year) else 0
+    codes = {
+        "occupation": np.asarray(occupation, dtype=np.int32)[keep],
+        "region": np.asarray(region, dtype=np.int32)[keep],
+        "year": year - year_min,
+    }
+    sizes = {
+        "occupation": len(occupations),
+        "region": len(regions),
+        "year": year_max - year_min + 1,
+    }
+    salary = salary[keep]
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, dims in LEVELS.items():
+        for array_name, array in _build_level(dims, codes, sizes, salary).items():
+            np.save(path / f"{name}.{array_name}.npy", array)
+    meta = {
+        "schema": CUBE_SCHEMA,
+        "version": version,
+        "rows": int(len(salary)),
+        "year_min": year_min,
+        "year_max": year_max,
+        "occupations": list(occupations),
+        "occupation_names": list(occupation_names),
+        "regions": list(regions),
+        "region_names": list(region_names),
+    }
+    (path / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    return meta
+
+
+def publish_salary_cube(path: Path, version: str) -> None:
+    """Aponta o ponteiro do snapshot para `path` (troca atômica)."""
+    atomic_write_json(
+        data_path(CUBE_DIR, POINTER_FILE), {"version": version, "path": Path(path).name}
+    )
+
+
+@dataclass
+class _CubeState:
+    cube: SalaryCube | None = None
+    pointer_mtime: float | None = None
+    last_check: float = 0.0
+
+
+_state = _CubeState()
+
+
+def sync_salary_cube(force: bool = False) -> bool:
+    """Carrega o snapshot apontado pelo ponteiro se ele mudou; True se há snapshot.
+
+    Barato: um `stat` do ponteiro; abrir um snapshot novo só mapeia os arquivos.
+    """
+    _state.last_check = time.monotonic()
+    pointer = data_path(CUBE_DIR, POINTER_FILE)
+    try:
+        mtime = os.stat(pointer).st_mtime
+    except FileNotFoundError:
+        return _state.cube is not None
+    if not force and mtime == _state.pointer_mtime:
+        return _state.cube is not None
+
+    info = read_json(pointer) or {}
+    version = info.get("version")
+    if version and (_state.cube is None or _state.cube.version != version):
+        try:
+            cube = SalaryCube.load(pointer.parent / info["path"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Snapshot analítico %s inválido: %s", info.get("path"), e)
+            return _state.cube is not None
+        _state.cube = cube
+        logger.info("Snapshot analítico %s carregado (%d registros)", cube.version, cube.rows)
+    _state.pointer_mtime = mtime
+    if _state.cube is not None:
+        set_namespace_version(NAMESPACE, _state.cube.version)
+    return _state.cube is not None
+
+
+def _kick_sync() -> None:
+    """Gancho do namespace: confere o ponteiro no máximo a cada `SYNC_INTERVAL_SECONDS`."""
+    if time.monotonic() - _state.last_check >= SYNC_INTERVAL_SECONDS:
+        sync_salary_cube()
+
+
+register_namespace_hook(NAMESPACE, _kick_sync)
+
+
+def get_salary_cube() -> SalaryCube | None:
+    """Snapshot atual (None antes da primeira exportação do ETL)."""
+    return _state.cube
+
+
+def get_analytics_status() -> dict:
+    """Snapshot carregado (para `/internal/status`)."""
+    cube = _state.cube
+    if cube is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "version": cube.version,
+        "rows": cube.rows,
+        "occupations": len(cube.labels["occupation"]),
+        "regions": len(cube.labels["region"]),
+        "years": [cube.year_min, cube.year_max],
+    }
+
+
+def real_year_factors(cube: SalaryCube, real: str | None) -> np.ndarray | None:
+    """Deflator (IPCA, média anual) de cada ano do snapshot para reais do mês `real`."""
+    try:
+        base = real_base(real)
+    except RealModeError as e:
+        raise QueryError(str(e)) from None
+    if base is None:
+        return None
+    years = np.arange(cube.year_min, cube.year_max + 1)
+    try:
+        factors = get_price_indices().factors("BRA", base, years, np.ones(len(years), dtype=bool))
+    except RealModeError as e:
+        raise QueryError(str(e)) from None
+    if np.isnan(factors).any():
+        raise QueryError(
+            f"Sem IPCA para todos os anos do snapshot ({cube.year_min}–{cube.year_max})"
+        )
+    return factors
+
+
+def split_csv(value: str | None) -> list[str] | None:
+    """Parâmetro de query separado por vírgulas → lista (None se vazio)."""
+    if not value:
+        return None
+    items = [v.strip() for v in value.split(",") if v.strip()]
+    return items or None
+
+
+def run_query(
+    occupation: str | None,
+    region: str | None,
+    year_from: int | None,
+    year_to: int | None,
+    group_by: str,
+    p: str,
+    real: str | None = None,
+) -> QueryResult:
+    """Consulta a partir dos parâmetros de URL (listas separadas por vírgula).
+
+    `real` ("AAAA-MM") pede valores em reais do mês, corrigidos pelo IPCA.
+    Levanta `QueryError` para parâmetros inválidos e `LookupError` se ainda
+    não há snapshot (ou índices de preço, em modo real) carregado.
+    """
+    cube = get_salary_cube()
+    if cube is None:
+        raise LookupError("Snapshot analítico ainda não disponível")
+    year_factors = real_year_factors(cube, real)
+    try:
+        percentiles = [float(q) for q in split_csv(p) or DEFAULT_PERCENTILES]
+    except ValueError:
+        raise QueryError(f"Percentis inválidos: {p}") from None
+    return cube.query(
+        occupations=split_csv(occupation),
+        regions=split_csv(region),
+        year_from=year_from,
+        year_to=year_to,
+        group_by=split_csv(group_by) or (),
+        percentiles=percentiles,
+        year_factors=year_factors,
+    )
+
+
+def run_inequality(
+    occupation: str | None,
+    region: str | None,
+    year_from: int | None,
+    year_to: int | None,
+    group_by: str,
+    real: str | None = None,
+) -> InequalityResult:
+    """Gini, Theil-T e razões entre percentis a partir dos parâmetros de URL.
+
+    Mesmos parâmetros e erros de `run_query`.
+    """
+    cube = get_salary_cube()
+    if cube is None:
+        raise LookupError("Snapshot analítico ainda não disponível")
+    return cube.inequality(
+        occupations=split_csv(occupation),
+        regions=split_csv(region),
+        year_from=year_from,
+        year_to=year_to,
+        group_by=split_csv(group_by) or (),
+        year_factors=real_year_factors(cube, real),
+    )
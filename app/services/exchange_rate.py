@@ -4,20 +4,54 @@ Fonte primária: AwesomeAPI (economia.awesomeapi.com.br) — gratuita, sem chave
 Fonte secundária: Banco Central do Brasil (BCB PTAX) — dados oficiais.
 Fallback: Valores estáticos atualizados manualmente.
 
-Cache: 1 hora (cotações não mudam a cada segundo para nosso caso de uso).
+Cache: 1 hora, com stale-while-revalidate. Depois de expirar, a cotação antiga
+continua sendo servida imediatamente enquanto uma única tarefa em segundo plano
+busca a nova (chamadas concorrentes compartilham a mesma tarefa). Só o primeiro
+acesso do processo, com cache vazio, aguarda a busca.
+
+Resiliência: cada fonte tem seu circuit breaker e a cascata inteira tem um
+orçamento de tempo (padrão 4 s). Fonte fora do ar custa milissegundos, não 10 s.
+
+Snapshot: cada busca bem-sucedida é gravada atomicamente em
+`DATA_DIR/exchange_rates.json`. No startup o worker carrega esse snapshot antes
+de servir tráfego, então começa aquecido e sem chamada de rede no caminho
+crítico. Um worker que encontra no disco um snapshot ainda válido gravado por
+outro worker (ou réplica) o adota em vez de chamar as APIs.
 
 Moedas suportadas: USD, EUR, CLP, JPY, CNY, INR, RUB, ZAR
 """
 
 import asyncio
+import hashlib
+import json
 import logging
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-
-import httpx
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable
+
+from app.config import get_settings
+from app.core.cache import register_namespace_hook, set_namespace_version
+from app.core.http import get_http_client
+from app.core.resilience import CircuitBreaker, Deadline
+from app.core.storage import atomic_write_json, data_path, read_json
+from app.core.surrogate import schedule_purge
+from app.core.timeseries import Series, TimeSeriesFile
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
+# Intervalo entre novas tentativas quando todas as fontes falham
+RETRY_AFTER_FAILURE = timedelta(minutes=1)
+
+# Snapshot em disco da última cotação boa (compartilhado entre workers)
+SNAPSHOT_FILE = "exchange_rates.json"
+SNAPSHOT_SCHEMA = 1
+
+# Histórico diário PTAX (gerado por `etl.sources.bcb_ptax`), mapeado em memória
+RATE_HISTORY_FILE = "ptax_history.bin"
+
 
 @dataclass
 class ExchangeRate:
@@ -35,11 +69,18 @@ class ExchangeRate:
 
 @dataclass
 class ExchangeRateCache:
-    """Cache de cotações com TTL de 1 hora."""
+    """Cache de cotações com TTL de 1 hora e refresh em segundo plano."""
 
     rates: dict[str, ExchangeRate] = field(default_factory=dict)
-    last_fetch: datetime | None = None
-    ttl: timedelta = field(default_factory=lambda: timedelta(hours=1))
+    last_fetch: datetime | None = None  # Quando os dados atuais foram obtidos
+    next_refresh: datetime | None = None  # A partir de quando buscar de novo
+    ttl: timedelta = field(
+        default_factory=lambda: timedelta(seconds=settings.exchange_rate_ttl_seconds)
+    )
+    refresh_task: asyncio.Task | None = None  # Busca em andamento (única por processo)
+    last_refresh_ms: float | None = None  # Latência da última busca
+    last_refresh_ok: bool = False  # Se a última busca obteve dados de alguma API
+    version: str = ""  # Hash do conteúdo das cotações (muda quando elas mudam)
 
     @property
     def is_valid(self) -> bool:
@@ -48,6 +89,20 @@ class ExchangeRateCache:
             return False
         return datetime.now() - self.last_fetch < self.ttl
 
+    @property
+    def needs_refresh(self) -> bool:
+        """Indica se já passou da hora de buscar novas cotações."""
+        if not self.rates or self.next_refresh is None:
+            return True
+        return datetime.now() >= self.next_refresh
+
+    @property
+    def age_seconds(self) -> float | None:
+        """Idade dos dados em cache, em segundos."""
+        if not self.last_fetch:
+            return None
+        return (datetime.now() - self.last_fetch).total_seconds()
+
 
 # Cache global
 _cache = ExchangeRateCache()
@@ -125,10 +180,9 @@ async def _fetch_awesome_api() -> dict[str, ExchangeRate] | None:
     pairs = ",".join(f"{c}-BRL" for c, _ in SUPPORTED_CURRENCIES)
     url = f"https://economia.awesomeapi.com.br/last/{pairs}"
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(url)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await get_http_client().get(url)
+        resp.raise_for_status()
+        data = resp.json()
 
         rates: dict[str, ExchangeRate] = {}
 
@@ -152,7 +206,11 @@ async def _fetch_awesome_api() -> dict[str, ExchangeRate] | None:
             )
 
         if "USD" in rates:
-            logger.info("Cotações obtidas via AwesomeAPI: %d moedas, USD=%.4f", len(rates), rates["USD"].rate)
+            logger.info(
+                "Cotações obtidas via AwesomeAPI: %d moedas, USD=%.4f",
+                len(rates),
+                rates["USD"].rate,
+            )
             return rates
 
         logger.warning("AwesomeAPI: USD não retornado, descartando resultado")
@@ -163,302 +221,398 @@ async def _fetch_awesome_api() -> dict[str, ExchangeRate] | None:
         return None
 
 
+# Moedas cobertas pelo BCB PTAX neste fallback
+BCB_CURRENCIES: list[tuple[str, str]] = [("USD", "🇺🇸"), ("EUR", "🇪🇺")]
+
+BCB_PTAX_PERIOD_URL = (
+    "https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata/"
+    "CotacaoMoedaPeriodo(moeda=@moeda,dataInicial=@dataInicial,dataFinalCotacao=@dataFinalCotacao)"
+)
+
+# Janela de busca do PTAX: cobre fins de semana e feriados prolongados
+BCB_LOOKBACK_DAYS = 5
+
+
+async def _fetch_bcb_currency(currency: str, flag: str) -> ExchangeRate | None:
+    """Busca a cotação PTAX mais recente de uma moeda (uma única chamada).
+
+    Consulta o período [hoje - 5 dias, hoje] ordenado da mais recente para a
+    mais antiga, o que substitui a antiga tentativa "hoje, depois ontem".
+    """
+    today = datetime.now()
+    start = (today - timedelta(days=BCB_LOOKBACK_DAYS)).strftime("%m-%d-%Y")
+    end = today.strftime("%m-%d-%Y")
+    url = (
+        f"{BCB_PTAX_PERIOD_URL}?@moeda='{currency}'&@dataInicial='{start}'"
+        f"&@dataFinalCotacao='{end}'&$format=json&$top=1&$orderby=dataHoraCotacao%20desc"
+    )
+    resp = await get_http_client().get(url)
+    resp.raise_for_status()
+    items = resp.json().get("value", [])
+
+    if not items:
+        logger.warning("BCB PTAX: sem cotação disponível para %s", currency)
+        return None
+
+    item = items[0]
+    buy = float(item["cotacaoCompra"])
+    sell = float(item["cotacaoVenda"])
+    return ExchangeRate(
+        currency=currency,
+        buy=buy,
+        sell=sell,
+        rate=round((buy + sell) / 2, 4),
+        source="BCB PTAX (oficial)",
+        source_url="https://dadosabertos.bcb.gov.br",
+        updated_at=item.get("dataHoraCotacao", datetime.now().isoformat()),
+        flag=flag,
+    )
+
+
 async def _fetch_bcb_ptax() -> dict[str, ExchangeRate] | None:
     """Busca cotações no Banco Central do Brasil (PTAX) — apenas USD e EUR.
 
     O BCB PTAX é usado como fallback da AwesomeAPI e suporta apenas as moedas
     principais (USD, EUR). Para as demais, usamos valores estáticos.
+    As moedas são consultadas em paralelo.
 
     Endpoint: Olinda API (OData)
     https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata/
-    CotacaoMoedaDia(moeda=@moeda,dataCotacao=@dataCotacao)?
-    @moeda='USD'&@dataCotacao='MM-DD-YYYY'&$format=json
+    CotacaoMoedaPeriodo(moeda=@moeda,dataInicial=@dataInicial,dataFinalCotacao=@dataFinalCotacao)?
+    @moeda='USD'&@dataInicial='MM-DD-YYYY'&@dataFinalCotacao='MM-DD-YYYY'&$format=json
     """
-    today = datetime.now().strftime("%m-%d-%Y")
-    base_url = (
-        "https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata/"
-        "CotacaoMoedaDia(moeda=@moeda,dataCotacao=@dataCotacao)"
+    try:
+        results = await asyncio.gather(
+            *(_fetch_bcb_currency(currency, flag) for currency, flag in BCB_CURRENCIES)
+        )
+    except Exception as e:
+        logger.warning("Falha no BCB PTAX: %s", e)
+        return None
+
+    if any(r is None for r in results):
+        return None
+
+    rates: dict[str, ExchangeRate] = {r.currency: r for r in results}
+
+    # Complementar com estáticos para moedas que o BCB não cobre facilmente
+    for currency, flag in SUPPORTED_CURRENCIES:
+        if currency not in rates and currency in STATIC_RATES:
+            rates[currency] = STATIC_RATES[currency]
+
+    logger.info(
+        "Cotações obtidas via BCB PTAX: USD=%.4f, EUR=%.4f (+%d estáticas)",
+        rates["USD"].rate,
+        rates["EUR"].rate,
+        len(rates) - 2,
     )
+    return rates
 
-    rates: dict[str, ExchangeRate] = {}
+
+# Circuit breakers por fonte (estado por processo)
+_breakers: dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(
+        name=name,
+        failure_threshold=settings.circuit_failure_threshold,
+        reset_timeout=settings.circuit_reset_seconds,
+    )
+    for name in ("awesomeapi", "bcb_ptax")
+}
+
+
+async def _call_source(
+    name: str,
+    fetch: Callable[[], Awaitable[dict[str, ExchangeRate] | None]],
+    deadline: Deadline,
+) -> dict[str, ExchangeRate] | None:
+    """Chama uma fonte respeitando o circuit breaker e o orçamento restante."""
+    breaker = _breakers[name]
+    if deadline.expired:
+        logger.warning("Câmbio: orçamento esgotado antes de %s", name)
+        return None
+    if not breaker.allow():
+        logger.debug("Câmbio: %s pulada (circuito %s)", name, breaker.state)
+        return None
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            for currency, flag in [("USD", "🇺🇸"), ("EUR", "🇪🇺")]:
-                url = f"{base_url}?@moeda='{currency}'&@dataCotacao='{today}'&$format=json&$top=1&$orderby=dataHoraCotacao%20desc"
-                resp = await client.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-
-                items = data.get("value", [])
-                if not items:
-                    yesterday = (datetime.now() - timedelta(days=1)).strftime("%m-%d-%Y")
-                    url = url.replace(today, yesterday)
-                    resp = await client.get(url)
-                    resp.raise_for_status()
-                    data = resp.json()
-                    items = data.get("value", [])
-
-                if not items:
-                    logger.warning("BCB PTAX: sem cotação disponível para %s", currency)
-                    return None
-
-                item = items[0]
-                buy = float(item["cotacaoCompra"])
-                sell = float(item["cotacaoVenda"])
-
-                rates[currency] = ExchangeRate(
-                    currency=currency,
-                    buy=buy,
-                    sell=sell,
-                    rate=round((buy + sell) / 2, 4),
-                    source="BCB PTAX (oficial)",
-                    source_url="https://dadosabertos.bcb.gov.br",
-                    updated_at=item.get("dataHoraCotacao", datetime.now().isoformat()),
-                    flag=flag,
-                )
-
-        # Complementar com estáticos para moedas que o BCB não cobre facilmente
-        for currency, flag in SUPPORTED_CURRENCIES:
-            if currency not in rates and currency in STATIC_RATES:
-                rates[currency] = STATIC_RATES[currency]
+        timeout = deadline.timeout_for(settings.exchange_rate_source_timeout_seconds)
+        async with asyncio.timeout(timeout):
+            rates = await fetch()
+    except TimeoutError:
+        logger.warning("Câmbio: %s excedeu o tempo limite", name)
+        rates = None
+    except BaseException:
+        # Cancelada (deadline da requisição) ou erro inesperado: sem veredito,
+        # mas o teste do semiaberto não pode ficar preso como "em andamento"
+        breaker.release()
+        raise
+
+    if rates is None:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return rates
 
-        logger.info("Cotações obtidas via BCB PTAX: USD=%.4f, EUR=%.4f (+%d estáticas)", rates["USD"].rate, rates["EUR"].rate, len(rates) - 2)
-        return rates
 
-    except Exception as e:
-        logger.warning("Falha no BCB PTAX: %s", e)
+async def _fetch_rates_cascade() -> tuple[dict[str, ExchangeRate], bool]:
+    """Executa a cascata de fontes. Retorna (cotações, obtidas_de_api).
+
+    Toda a cascata cabe em `exchange_rate_deadline_seconds`; fontes com
+    circuito aberto são puladas sem custo de rede.
+    """
+    deadline = Deadline(settings.exchange_rate_deadline_seconds)
+
+    # Tenta AwesomeAPI primeiro
+    rates = await _call_source("awesomeapi", _fetch_awesome_api, deadline)
+
+    # Se falhou, tenta BCB
+    if rates is None:
+        rates = await _call_source("bcb_ptax", _fetch_bcb_ptax, deadline)
+
+    if rates is None:
+        return STATIC_RATES.copy(), False
+    return rates, True
+
+
+def _rates_version(rates: dict[str, ExchangeRate]) -> str:
+    """Hash curto e determinístico do conteúdo das cotações."""
+    payload = sorted((c, r.rate, r.source, r.updated_at) for c, r in rates.items())
+    return hashlib.sha1(json.dumps(payload).encode()).hexdigest()[:12]
+
+
+def _install_rates(
+    rates: dict[str, ExchangeRate], fetched_at: datetime, next_refresh: datetime
+) -> bool:
+    """Substitui as cotações do cache e recalcula a versão.
+
+    Retorna True se este worker foi o primeiro a publicar a nova versão.
+    """
+    _cache.rates = rates
+    _cache.last_fetch = fetched_at
+    _cache.next_refresh = next_refresh
+    _cache.version = _rates_version(rates)
+    # Fragmentos/páginas que dependem do câmbio passam a errar o cache
+    return set_namespace_version("rates", _cache.version)
+
+
+def _read_snapshot() -> tuple[dict[str, ExchangeRate], datetime] | None:
+    """Lê e valida o snapshot em disco. Retorna None se ausente ou inválido."""
+    payload = read_json(data_path(SNAPSHOT_FILE))
+    if not isinstance(payload, dict) or payload.get("schema") != SNAPSHOT_SCHEMA:
+        return None
+    try:
+        fetched_at = datetime.fromisoformat(payload["fetched_at"])
+        rates = {c: ExchangeRate(**r) for c, r in payload["rates"].items()}
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning("Snapshot de câmbio inválido, ignorando: %s", e)
         return None
+    if "USD" not in rates:
+        return None
+    return rates, fetched_at
+
+
+def _write_snapshot(rates: dict[str, ExchangeRate], fetched_at: datetime) -> None:
+    """Grava o snapshot da última cotação boa (escrita atômica)."""
+    atomic_write_json(
+        data_path(SNAPSHOT_FILE),
+        {
+            "schema": SNAPSHOT_SCHEMA,
+            "version": _rates_version(rates),
+            "fetched_at": fetched_at.isoformat(),
+            "rates": {c: asdict(r) for c, r in rates.items()},
+        },
+    )
+
+
+def load_rate_snapshot() -> bool:
+    """Carrega o snapshot em disco no cache. Chamado no startup do lifespan.
+
+    Snapshot expirado também é carregado: é servido de imediato e o primeiro
+    acesso agenda o refresh em segundo plano. Retorna True se carregou.
+    """
+    snapshot = _read_snapshot()
+    if snapshot is None:
+        return False
+    rates, fetched_at = snapshot
+    if _cache.last_fetch and _cache.last_fetch >= fetched_at:
+        return False
+    _install_rates(rates, fetched_at, fetched_at + _cache.ttl)
+    logger.info(
+        "Snapshot de câmbio carregado (%s, %.0f s de idade)",
+        _cache.version,
+        _cache.age_seconds or 0,
+    )
+    return True
+
+
+async def _refresh_rates() -> dict[str, ExchangeRate]:
+    """Busca novas cotações e atualiza o cache. Executada como tarefa única."""
+    # Outro worker pode já ter renovado: adota o snapshot se ainda válido
+    snapshot = await asyncio.to_thread(_read_snapshot)
+    if snapshot is not None:
+        rates, fetched_at = snapshot
+        fresh = datetime.now() - fetched_at < _cache.ttl
+        if fresh and (not _cache.last_fetch or fetched_at > _cache.last_fetch):
+            _install_rates(rates, fetched_at, fetched_at + _cache.ttl)
+            logger.info("Câmbio adotado do snapshot de outro worker (%s)", _cache.version)
+            return _cache.rates
+
+    started = time.perf_counter()
+    rates, ok = await _fetch_rates_cascade()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    now = datetime.now()
+    _cache.last_refresh_ms = elapsed_ms
+    _cache.last_refresh_ok = ok
+
+    if ok:
+        if _install_rates(rates, now, now + _cache.ttl):
+            # Renova no nginx só as URLs que dependem do câmbio
+            schedule_purge(["rates"])
+        logger.info("Câmbio atualizado em %.0f ms (%s)", elapsed_ms, _cache.version)
+        try:
+            await asyncio.to_thread(_write_snapshot, rates, now)
+        except OSError as e:
+            logger.warning("Não foi possível gravar o snapshot de câmbio: %s", e)
+    elif _cache.rates:
+        # Mantém a última cotação boa (stale) e tenta de novo em breve
+        _cache.next_refresh = now + RETRY_AFTER_FAILURE
+        logger.warning(
+            "Todas as APIs de câmbio falharam em %.0f ms. Mantendo cotações de %.0f s atrás.",
+            elapsed_ms,
+            _cache.age_seconds or 0,
+        )
+    else:
+        logger.warning("Todas as APIs de câmbio falharam. Usando valores estáticos.")
+        _install_rates(rates, now, now + RETRY_AFTER_FAILURE)
+
+    return _cache.rates
+
+
+def _on_refresh_done(task: asyncio.Task) -> None:
+    """Libera o slot de refresh e registra falhas inesperadas."""
+    if _cache.refresh_task is task:
+        _cache.refresh_task = None
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Erro inesperado no refresh de câmbio: %s", task.exception())
+
+
+def _ensure_refresh() -> asyncio.Task:
+    """Dispara o refresh em segundo plano, coalescendo chamadas concorrentes."""
+    task = _cache.refresh_task
+    if task is None or task.done():
+        task = asyncio.create_task(_refresh_rates(), name="exchange-rate-refresh")
+        task.add_done_callback(_on_refresh_done)
+        _cache.refresh_task = task
+    return task
+
+
+def _kick_refresh() -> None:
+    """Agenda o refresh se as cotações expiraram, sem aguardar.
+
+    Registrado como gancho do namespace "rates": páginas servidas do cache
+    continuam disparando o stale-while-revalidate.
+    """
+    if _cache.rates and _cache.needs_refresh:
+        try:
+            _ensure_refresh()
+        except RuntimeError:
+            # Fora de um event loop (scripts): nada a agendar
+            pass
+
+
+register_namespace_hook("rates", _kick_refresh)
 
 
 async def get_exchange_rates() -> dict[str, ExchangeRate]:
-    """Retorna cotações USD/BRL e EUR/BRL com cache de 1 hora.
+    """Retorna cotações das moedas suportadas com cache de 1 hora.
 
     Cascata de fontes:
     1. AwesomeAPI (rápida, tempo real)
     2. BCB PTAX (oficial, pode ter delay)
     3. Valores estáticos (fallback seguro)
-    """
-    global _cache
 
-    if _cache.is_valid:
+    Com cache preenchido nunca bloqueia: se expirado, devolve o valor atual e
+    agenda o refresh. Com cache vazio, aguarda o refresh em andamento.
+    """
+    if _cache.rates:
+        if _cache.needs_refresh:
+            _ensure_refresh()
         return _cache.rates
 
-    # Tenta AwesomeAPI primeiro
-    rates = await _fetch_awesome_api()
+    # shield: o cancelamento de uma requisição não derruba a busca compartilhada
+    return await asyncio.shield(_ensure_refresh())
 
-    # Se falhou, tenta BCB
-    if rates is None:
-        rates = await _fetch_bcb_ptax()
 
-    # Se tudo falhou, usa estático
-    if rates is None:
-        logger.warning("Todas as APIs de câmbio falharam. Usando valores estáticos.")
-        rates = STATIC_RATES.copy()
+def get_rates_version() -> str:
+    """Versão (hash do conteúdo) das cotações em cache; vazia antes da 1ª carga."""
+    return _cache.version
 
-    # Atualiza cache
-    _cache.rates = rates
-    _cache.last_fetch = datetime.now()
 
-    return rates
+def get_exchange_rate_status() -> dict:
+    """Métricas do cache de câmbio: idade dos dados e latência do último refresh."""
+    any_rate = next(iter(_cache.rates.values()), None)
+    return {
+        "version": _cache.version,
+        "source": any_rate.source if any_rate else None,
+        "currencies": len(_cache.rates),
+        "age_seconds": _cache.age_seconds,
+        "stale": bool(_cache.rates) and not _cache.is_valid,
+        "last_refresh_ms": _cache.last_refresh_ms,
+        "last_refresh_ok": _cache.last_refresh_ok,
+        "refreshing": _cache.refresh_task is not None and not _cache.refresh_task.done(),
+        "breakers": {name: b.snapshot() for name, b in _breakers.items()},
+    }
 
 
-def convert_to_brl(amount_foreign: float, currency: str, rates: dict[str, ExchangeRate]) -> float:
-    """Converte valor em moeda estrangeira para BRL."""
-    rate = rates.get(currency)
-    if not rate:
-        raise ValueError(f"Moeda não suportada: {currency}")
-    return round(amount_foreign * rate.rate, 2)
+async def shutdown_exchange_rates() -> None:
+    """Cancela o refresh em andamento. Chamado no shutdown do lifespan."""
+    task = _cache.refresh_task
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _cache.refresh_task = None
 
 
-def _rate(rates: dict[str, ExchangeRate], currency: str) -> float:
-    """Retorna a taxa de câmbio para uma moeda, com fallback estático."""
-    if currency in rates:
-        return rates[currency].rate
-    if currency in STATIC_RATES:
-        return STATIC_RATES[currency].rate
-    return 1.0
+_history: TimeSeriesFile | None = None
 
 
-async def get_international_with_live_rates() -> tuple[list[dict], dict[str, ExchangeRate]]:
-    """Retorna dados internacionais recalculados com câmbio atualizado.
+def load_rate_history() -> bool:
+    """Mapeia em memória o histórico PTAX, se existir. Chamado no startup."""
+    global _history
+    path = data_path(RATE_HISTORY_FILE)
+    if not path.exists():
+        return False
+    try:
+        history = TimeSeriesFile(path)
+    except (OSError, ValueError) as e:
+        logger.warning("Histórico de câmbio ignorado: %s", e)
+        return False
+    close_rate_history()
+    _history = history
+    logger.info("Histórico de câmbio mapeado: %s", ", ".join(history.names))
+    return True
+
+
+def close_rate_history() -> None:
+    """Libera o mmap do histórico. Chamado no shutdown."""
+    global _history
+    if _history is not None:
+        _history.close()
+        _history = None
+
+
+def get_rate_series(currency: str) -> Series | None:
+    """Série diária (compra, venda, taxa) de uma moeda, se houver histórico."""
+    return _history.get(currency) if _history is not None else None
 
-    12 países: Brasil + 11 internacionais.
-    Salários originais em moeda local, convertidos para BRL em tempo real.
-    Fontes: OECD Government at a Glance, judiciary.gov, portais oficiais.
-    """
-    rates = await get_exchange_rates()
-
-    usd = _rate(rates, "USD")
-    eur = _rate(rates, "EUR")
-    clp = _rate(rates, "CLP")
-    jpy = _rate(rates, "JPY")
-    cny = _rate(rates, "CNY")
-    inr = _rate(rates, "INR")
-    rub = _rate(rates, "RUB")
-    zar = _rate(rates, "ZAR")
-    mxn = _rate(rates, "MXN")
-
-    international = [
-        {
-            "country": "Brasil",
-            "flag": "🇧🇷",
-            "judge_salary_brl": 81500.00,
-            "judge_salary_note": "Média nacional com penduricalhos (DadosJusBr 2025)",
-            "teacher_salary_brl": 5130.63,
-            "teacher_salary_note": "Piso nacional (Portaria MEC 82/2026)",
-            "ratio": 15.9,
-            "source": "DadosJusBr + MEC",
-            "original_currency": "BRL",
-            "judge_original": 81500.00,
-            "teacher_original": 5130.63,
-        },
-        {
-            "country": "EUA",
-            "flag": "🇺🇸",
-            "judge_salary_brl": round(26300 * usd, 2),
-            "judge_salary_note": "Federal Judge: ~US$26.300/mês (judiciary.gov 2025)",
-            "teacher_salary_brl": round(6900 * usd, 2),
-            "teacher_salary_note": "Public school teacher: ~US$6.900/mês (BLS 2024)",
-            "ratio": round(26300 / 6900, 1),
-            "source": "US Courts / BLS",
-            "original_currency": "USD",
-            "judge_original": 26300,
-            "teacher_original": 6900,
-        },
-        {
-            "country": "Alemanha",
-            "flag": "🇩🇪",
-            "judge_salary_brl": round(8500 * eur, 2),
-            "judge_salary_note": "Richter R3: ~€8.500/mês (Bundesbesoldung 2025)",
-            "teacher_salary_brl": round(6400 * eur, 2),
-            "teacher_salary_note": "Gymnasiallehrer: ~€6.400/mês (OECD 2023)",
-            "ratio": round(8500 / 6400, 1),
-            "source": "OECD Government at a Glance 2023",
-            "original_currency": "EUR",
-            "judge_original": 8500,
-            "teacher_original": 6400,
-        },
-        {
-            "country": "Portugal",
-            "flag": "🇵🇹",
-            "judge_salary_brl": round(6000 * eur, 2),
-            "judge_salary_note": "Juiz de Direito: ~€6.000/mês (CSTJ 2025)",
-            "teacher_salary_brl": round(2800 * eur, 2),
-            "teacher_salary_note": "Professor QZP: ~€2.800/mês (DGAE 2025)",
-            "ratio": round(6000 / 2800, 1),
-            "source": "CSTJ / DGAE Portugal",
-            "original_currency": "EUR",
-            "judge_original": 6000,
-            "teacher_original": 2800,
-        },
-        {
-            "country": "Chile",
-            "flag": "🇨🇱",
-            "judge_salary_brl": round(6500000 * clp, 2),
-            "judge_salary_note": "Ministro Corte: ~CLP 6.500.000/mês (Poder Judicial 2025)",
-            "teacher_salary_brl": round(1100000 * clp, 2),
-            "teacher_salary_note": "Profesor básica: ~CLP 1.100.000/mês (MINEDUC 2025)",
-            "ratio": round(6500000 / 1100000, 1),
-            "source": "Poder Judicial / MINEDUC Chile",
-            "original_currency": "CLP",
-            "judge_original": 6500000,
-            "teacher_original": 1100000,
-        },
-        {
-            "country": "Japão",
-            "flag": "🇯🇵",
-            "judge_salary_brl": round(1200000 * jpy, 2),
-            "judge_salary_note": "裁判官: ~¥1.200.000/mês (Courts of Japan 2025)",
-            "teacher_salary_brl": round(450000 * jpy, 2),
-            "teacher_salary_note": "教員: ~¥450.000/mês (MEXT 2024)",
-            "ratio": round(1200000 / 450000, 1),
-            "source": "Courts of Japan / MEXT",
-            "original_currency": "JPY",
-            "judge_original": 1200000,
-            "teacher_original": 450000,
-        },
-        {
-            "country": "China",
-            "flag": "🇨🇳",
-            "judge_salary_brl": round(22000 * cny, 2),
-            "judge_salary_note": "法官: ~¥22.000/mês (Supreme People's Court 2024)",
-            "teacher_salary_brl": round(9000 * cny, 2),
-            "teacher_salary_note": "教师: ~¥9.000/mês (Ministry of Education 2024)",
-            "ratio": round(22000 / 9000, 1),
-            "source": "SPC / MoE China",
-            "original_currency": "CNY",
-            "judge_original": 22000,
-            "teacher_original": 9000,
-        },
-        {
-            "country": "Índia",
-            "flag": "🇮🇳",
-            "judge_salary_brl": round(250000 * inr, 2),
-            "judge_salary_note": "High Court Judge: ~₹250.000/mês (Dept of Justice 2024)",
-            "teacher_salary_brl": round(45000 * inr, 2),
-            "teacher_salary_note": "Govt School Teacher: ~₹45.000/mês (7th Pay Commission)",
-            "ratio": round(250000 / 45000, 1),
-            "source": "Dept of Justice / 7th Pay Commission India",
-            "original_currency": "INR",
-            "judge_original": 250000,
-            "teacher_original": 45000,
-        },
-        {
-            "country": "Rússia",
-            "flag": "🇷🇺",
-            "judge_salary_brl": round(180000 * rub, 2),
-            "judge_salary_note": "Судья: ~₽180.000/mês (Judicial Department 2024)",
-            "teacher_salary_brl": round(45000 * rub, 2),
-            "teacher_salary_note": "Учитель: ~₽45.000/mês (Rosstat 2024)",
-            "ratio": round(180000 / 45000, 1),
-            "source": "Judicial Department / Rosstat Russia",
-            "original_currency": "RUB",
-            "judge_original": 180000,
-            "teacher_original": 45000,
-        },
-        {
-            "country": "África do Sul",
-            "flag": "🇿🇦",
-            "judge_salary_brl": round(280000 * zar, 2),
-            "judge_salary_note": "Judge: ~R280.000/mês (JSC 2024)",
-            "teacher_salary_brl": round(28000 * zar, 2),
-            "teacher_salary_note": "Teacher: ~R28.000/mês (SACE 2024)",
-            "ratio": round(280000 / 28000, 1),
-            "source": "JSC / SACE South Africa",
-            "original_currency": "ZAR",
-            "judge_original": 280000,
-            "teacher_original": 28000,
-        },
-        {
-            "country": "México",
-            "flag": "🇲🇽",
-            "judge_salary_brl": round(120000 * mxn, 2),
-            "judge_salary_note": "Juez de Distrito: ~MXN 120.000/mês (CJF 2024)",
-            "teacher_salary_brl": round(24000 * mxn, 2),
-            "teacher_salary_note": "Maestro básica: ~MXN 24.000/mês (SEP 2024)",
-            "ratio": round(120000 / 24000, 1),
-            "source": "CJF / SEP México",
-            "original_currency": "MXN",
-            "judge_original": 120000,
-            "teacher_original": 24000,
-        },
-        {
-            "country": "França",
-            "flag": "🇫🇷",
-            "judge_salary_brl": round(5800 * eur, 2),
-            "judge_salary_note": "Magistrat: ~€5.800/mês (Ministère de la Justice 2024)",
-            "teacher_salary_brl": round(3200 * eur, 2),
-            "teacher_salary_note": "Professeur certifié: ~€3.200/mês (Éducation Nationale 2024)",
-            "ratio": round(5800 / 3200, 1),
-            "source": "Ministère de la Justice / Éducation Nationale France",
-            "original_currency": "EUR",
-            "judge_original": 5800,
-            "teacher_original": 3200,
-        },
-    ]
 
-    # Ordenar do maior para o menor ratio (desigualdade)
-    international.sort(key=lambda c: c["ratio"], reverse=True)
+def get_historical_rate(currency: str, on: date) -> float | None:
+    """Taxa PTAX vigente em `on` (último boletim até a data), ou None."""
+    if currency == "BRL":
+        return 1.0
+    series = get_rate_series(currency)
+    return series.asof(on) if series is not None else None
 
-    return international, rates
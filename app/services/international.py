@@ -0,0 +1,232 @@
+"""Comparação internacional juiz × professor, convertida com o câmbio vigente.
+
+Os dados ficam em `app/data/international.json` (salários mensais em moeda
+local) e são validados no import: país novo é uma entrada no JSON, não código.
+Fontes: OECD Government at a Glance, judiciary.gov, portais oficiais.
+
+A tabela convertida só muda quando as cotações mudam. Ela é calculada em
+arrays (uma operação por coluna, não por país) e memoizada pela versão das
+cotações (`get_rates_version`): as requisições seguintes recebem a mesma
+tupla imutável, já ordenada.
+
+Em modo real (`?real=AAAA-MM`), cada salário é primeiro levado ao mês-base
+pelo índice de preços do próprio país (`app.services.price_index`), a partir
+do período de referência do dado, e só então convertido. Países sem série de
+preços ficam nominais (`real=False` na linha).
+"""
+
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from pydantic import BaseModel, Field, field_validator
+
+from app.services.exchange_rate import (
+    STATIC_RATES,
+    ExchangeRate,
+    get_exchange_rates,
+    get_rates_version,
+)
+from app.services.price_index import (
+    CURRENCY_COUNTRY,
+    PriceIndexTable,
+    get_price_indices,
+    reference_months,
+)
+
+DATA_FILE = Path(__file__).resolve().parent.parent / "data" / "international.json"
+DATA_SCHEMA = 1
+
+
+class SalaryEntry(BaseModel):
+    """Salário mensal em moeda local, com a nota de origem."""
+
+    amount: float = Field(gt=0)
+    note: str
+    # Período do valor: AAAA ou AAAA-MM
+    reference: str = Field(pattern=r"^\d{4}(-(0[1-9]|1[0-2]))?$")
+
+
+class CountryEntry(BaseModel):
+    """Um país do dataset internacional."""
+
+    country: str = Field(min_length=1)
+    flag: str
+    currency: str  # ISO 4217; "BRL" dispensa conversão
+    judge: SalaryEntry
+    teacher: SalaryEntry
+    source: str
+
+    @field_validator("currency")
+    @classmethod
+    def _known_currency(cls, value: str) -> str:
+        if value != "BRL" and value not in STATIC_RATES:
+            raise ValueError(f"Moeda sem cotação (nem estática): {value}")
+        return value
+
+
+class InternationalDataset(BaseModel):
+    """Arquivo `international.json` inteiro."""
+
+    schema_: int = Field(alias="schema")
+    countries: list[CountryEntry] = Field(min_length=1)
+
+    @field_validator("schema_")
+    @classmethod
+    def _supported_schema(cls, value: int) -> int:
+        if value != DATA_SCHEMA:
+            raise ValueError(f"Schema {value} não suportado (esperado {DATA_SCHEMA})")
+        return value
+
+    @field_validator("countries")
+    @classmethod
+    def _unique_countries(cls, value: list[CountryEntry]) -> list[CountryEntry]:
+        names = [c.country for c in value]
+        if len(names) != len(set(names)):
+            raise ValueError("País duplicado no dataset internacional")
+        return value
+
+
+@dataclass(frozen=True)
+class CountryComparison:
+    """Linha pronta para o template (valores em BRL já convertidos)."""
+
+    country: str
+    flag: str
+    judge_salary_brl: float
+    judge_salary_note: str
+    teacher_salary_brl: float
+    teacher_salary_note: str
+    ratio: float
+    source: str
+    original_currency: str
+    judge_original: float
+    teacher_original: float
+    judge_reference: str
+    teacher_reference: str
+    real: bool = False  # Valores em reais do mês-base (modo real)
+
+
+def load_dataset(path: Path = DATA_FILE) -> tuple[CountryEntry, ...]:
+    """Lê e valida o dataset (erro de validação impede o startup)."""
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    return tuple(InternationalDataset.model_validate(raw).countries)
+
+
+COUNTRIES: tuple[CountryEntry, ...] = load_dataset()
+
+# (versão das cotações, tabela convertida)
+_memo: tuple[str, tuple[CountryComparison, ...]] | None = None
+
+# (versão das cotações, versão dos índices, mês-base) → tabela em modo real
+_real_memo: OrderedDict[tuple[str, str, int], tuple[CountryComparison, ...]] = OrderedDict()
+REAL_MEMO_SIZE = 32
+
+
+def real_factors(
+    countries: tuple[CountryEntry, ...], prices: PriceIndexTable, base: int
+) -> np.ndarray:
+    """Fatores (juiz, professor) de cada país para reais do mês-base; NaN sem série.
+
+    Uma chamada vetorizada por série de preços, com todas as referências dela.
+    """
+    factors = np.full((len(countries), 2), np.nan)
+    by_country: dict[str, list[int]] = {}
+    for i, c in enumerate(countries):
+        country = CURRENCY_COUNTRY.get(c.currency)
+        if country in prices.series:
+            by_country.setdefault(country, []).append(i)
+    for country, rows in by_country.items():
+        refs = [
+            r for i in rows for r in (countries[i].judge.reference, countries[i].teacher.reference)
+        ]
+        months, annual = reference_months(refs)
+        factors[rows] = prices.factors(country, base, months, annual).reshape(-1, 2)
+    return factors
+
+
+def build_comparison(
+    countries: tuple[CountryEntry, ...],
+    rates: dict[str, ExchangeRate],
+    prices: PriceIndexTable | None = None,
+    base: int | None = None,
+) -> tuple[CountryComparison, ...]:
+    """Converte em arrays e ordena do maior para o menor ratio.
+
+    Com `prices` e `base`, os valores em moeda local são antes deflacionados.
+    """
+    # Uma taxa por moeda distinta, com fallback estático
+    rate_by_currency = {"BRL": 1.0}
+    for currency in {c.currency for c in countries} - rate_by_currency.keys():
+        rate = rates.get(currency) or STATIC_RATES[currency]
+        rate_by_currency[currency] = rate.rate
+
+    deflators = np.full((len(countries), 2), np.nan)
+    if prices is not None and base is not None:
+        deflators = real_factors(countries, prices, base)
+    real = ~np.isnan(deflators).any(axis=1)
+    deflators[~real] = 1.0
+
+    # Colunas (juiz, professor) em moeda local → deflacionadas → BRL
+    local = np.array([(c.judge.amount, c.teacher.amount) for c in countries]).reshape(-1, 2)
+    local = local * deflators
+    brl = local * np.array([rate_by_currency[c.currency] for c in countries])[:, None]
+    ratio = local[:, 0] / local[:, 1]
+    # Do maior para o menor ratio (desigualdade); estável, como o sort anterior
+    order = np.argsort(-np.round(ratio, 1), kind="stable")
+
+    return tuple(
+        CountryComparison(
+            country=c.country,
+            flag=c.flag,
+            judge_salary_brl=round(float(brl[i, 0]), 2),
+            judge_salary_note=c.judge.note,
+            teacher_salary_brl=round(float(brl[i, 1]), 2),
+            teacher_salary_note=c.teacher.note,
+            ratio=round(float(ratio[i]), 1),
+            source=c.source,
+            original_currency=c.currency,
+            judge_original=round(float(local[i, 0]), 2),
+            teacher_original=round(float(local[i, 1]), 2),
+            judge_reference=c.judge.reference,
+            teacher_reference=c.teacher.reference,
+            real=bool(real[i]),
+        )
+        for i, c in ((int(i), countries[i]) for i in order)
+    )
+
+
+async def get_international_with_live_rates(
+    base: int | None = None,
+) -> tuple[tuple[CountryComparison, ...], dict[str, ExchangeRate]]:
+    """Retorna a comparação internacional convertida com o câmbio atual.
+
+    Recalcula só quando a versão das cotações muda; senão devolve a tabela
+    memoizada. Com `base` (meses desde 1970-01, ver `price_index.real_base`),
+    devolve a tabela em reais do mês-base, memoizada também pela versão dos
+    índices de preço.
+    """
+    global _memo
+    rates = await get_exchange_rates()
+    version = get_rates_version()
+    prices = get_price_indices() if base is not None else None
+    if prices is not None:
+        key = (version, prices.version, base)
+        table = _real_memo.get(key)
+        if table is None:
+            table = build_comparison(COUNTRIES, rates, prices, base)
+            if version:
+                _real_memo[key] = table
+                while len(_real_memo) > REAL_MEMO_SIZE:
+                    _real_memo.popitem(last=False)
+        return table, rates
+
+    if _memo is not None and version and _memo[0] == version:
+        return _memo[1], rates
+
+    table = build_comparison(COUNTRIES, rates)
+    if version:
+        _memo = (version, table)
+    return table, rates
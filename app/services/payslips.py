@@ -0,0 +1,414 @@
+"""Distribuição dos contracheques do sistema de justiça (DadosJusBr) por sketches.
+
+Os valores de `CAREERS` são médias digitadas à mão; os contracheques reais
+somam milhões de linhas por ano. A ingestão (`etl.payslip_sketches`) resume
+cada órgão × mês × componente do contracheque num t-digest
+(`app.core.sketch`) e grava os blobs num SQLite em
+`DATA_DIR/gold/payslip_sketches.sqlite3`. Aqui eles são mesclados sob
+demanda para qualquer conjunto de órgãos e faixa de meses: mediana, p90 e p99
+sem reler uma linha bruta. Gini e Theil-T saem dos centroides mesclados.
+
+A chave primária (componente, período, órgão) deixa a faixa de meses de um
+componente contígua no B-tree: a consulta é uma varredura por faixa.
+
+O mesmo store guarda as contas de contracheques acima do teto
+(`app.services.above_teto`); ao carregar uma versão nova, elas passam a
+alimentar os números de manchete (`salary_data.install_measured_facts`).
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from app.core.cache import register_namespace_hook, set_namespace_version
+from app.core.inequality import weighted_inequality
+from app.core.sketch import TDigest
+from app.core.storage import data_path
+from app.services import above_teto
+from app.services.analytics import split_csv
+from app.services.price_index import RealModeError, get_price_indices, real_base
+from app.services.salary_data import install_measured_facts
+
+logger = logging.getLogger(__name__)
+
+STORE_FILE = ("gold", "payslip_sketches.sqlite3")
+
+# Namespace de cache das respostas de distribuição
+NAMESPACE = "payslips"
+
+# Componentes do contracheque (ordem de exibição) e rótulos
+COMPONENTS: dict[str, str] = {
+    "base": "Remuneração base (subsídio)",
+    "outras": "Outras verbas (penduricalhos)",
+    "bruto": "Total bruto",
+    "descontos": "Descontos",
+    "liquido": "Líquido",
+}
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+# Intervalo mínimo entre checagens da versão do store (por worker)
+SYNC_INTERVAL_SECONDS = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sketches (
+    component TEXT NOT NULL,
+    period INTEGER NOT NULL,  -- AAAAMM
+    orgao TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    PRIMARY KEY (component, period, orgao)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sources (
+    orgao TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,  -- Do arquivo Bronze resumido
+    members INTEGER NOT NULL,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (orgao, period)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class DistributionError(ValueError):
+    """Parâmetros inválidos para a consulta de distribuição."""
+
+
+def period(year: int, month: int) -> int:
+    return year * 100 + month
+
+
+def parse_period(value: str) -> int:
+    """"AAAA-MM" → AAAAMM."""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+    except ValueError:
+        raise DistributionError(f"Mês inválido: {value!r} (use AAAA-MM)") from None
+    if not 1 <= month <= 12:
+        raise DistributionError(f"Mês inválido: {value!r} (use AAAA-MM)")
+    return period(year, month)
+
+
+def open_store(path: Path | None = None, readonly: bool = False) -> sqlite3.Connection:
+    """Conexão com o store de sketches (criado se faltar, exceto em `readonly`)."""
+    path = Path(path or data_path(*STORE_FILE))
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    conn.executescript(above_teto.SCHEMA)
+    return conn
+
+
+def write_month(
+    conn: sqlite3.Connection,
+    orgao: str,
+    year: int,
+    month: int,
+    sha256: str,
+    members: int,
+    digests: dict[str, bytes],
+    above: above_teto.MonthAboveTeto | None = None,
+) -> None:
+    """Substitui os sketches (e as contas acima do teto) de um órgão num mês.
+
+    `digests`: componente → `TDigest.to_bytes()`. Tudo numa transação.
+    """
+    key = period(year, month)
+    with conn:
+        if above is not None:
+            above_teto.apply_month(conn, orgao, key, above)
+        conn.execute("DELETE FROM sketches WHERE orgao = ? AND period = ?", (orgao, key))
+        conn.executemany(
+            "INSERT INTO sketches (component, period, orgao, digest) VALUES (?, ?, ?, ?)",
+            [(component, key, orgao, digest) for component, digest in digests.items()],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO sources (orgao, period, sha256, members, ingested_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (orgao, key, sha256, members, time.time()),
+        )
+
+
+def ingested_sources(conn: sqlite3.Connection) -> dict[tuple[str, int], str]:
+    """(órgão, AAAAMM) → SHA-256 do arquivo Bronze já resumido."""
+    return {(o, p): sha for o, p, sha in conn.execute("SELECT orgao, period, sha256 FROM sources")}
+
+
+def publish_version(conn: sqlite3.Connection, version: str) -> None:
+    """Grava a versão do conteúdo, lida pelos workers para trocar o namespace."""
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (version,))
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """Percentis mesclados de cada componente do contracheque."""
+
+    components: list[str]
+    count: list[int]
+    mean: list[float]
+    percentiles: dict[float, list[float]]
+    gini: list[float | None]  # Dos centroides mesclados (ver `weighted_inequality`)
+    theil: list[float | None]
+    sketches: int  # Sketches (órgão × mês × componente) mesclados
+    elapsed_ms: float = 0.0
+
+    def columns(self) -> dict[str, list]:
+        columns: dict[str, list] = {
+            "component": self.components,
+            "label": [COMPONENTS[c] for c in self.components],
+            "count": self.count,
+            "mean": self.mean,
+        }
+        for q, values in self.percentiles.items():
+            columns[f"p{q:g}"] = values
+        columns["gini"] = self.gini
+        columns["theil"] = self.theil
+        return columns
+
+    def rows(self) -> list[dict]:
+        columns = self.columns()
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _round(values: Iterable[float], digits: int = 2) -> list[float | None]:
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+class PayslipStore:
+    """Leitura dos sketches (uma conexão somente leitura por thread).
+
+    As consultas rodam em threads (rotas) e no event loop (sincronização da
+    versão); com uma conexão por thread nenhuma espera a outra.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_store(self.path, readonly=True)
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+        return self._connection().execute(sql, params).fetchall()
+
+    def above_teto_summary(self) -> above_teto.AboveTetoSummary | None:
+        return above_teto.summary(self._connection())
+
+    def above_teto_monthly(
+        self, orgaos: list[str] | None = None, start: int | None = None, end: int | None = None
+    ) -> list[tuple[int, int, int, int]]:
+        return above_teto.monthly(self._connection(), orgaos, start, end)
+
+    def version(self) -> str | None:
+        row = self._execute("SELECT value FROM meta WHERE name = 'version'")
+        return row[0][0] if row else None
+
+    def orgaos(self) -> list[str]:
+        return [r[0] for r in self._execute("SELECT DISTINCT orgao FROM sources ORDER BY orgao")]
+
+    def distribution(
+        self,
+        orgaos: list[str] | None = None,
+        start: int | None = None,
+        end: int | None = None,
+        components: list[str] | None = None,
+        percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+        real: int | None = None,
+    ) -> Distribution:
+        """Mescla os sketches dos órgãos/meses pedidos, por componente.
+
+        Com `real` (mês-base, ver `price_index.real_base`), cada sketch é
+        escalado pelo deflator do seu mês na própria mescla.
+        """
+        started = time.perf_counter()
+        components = components or list(COMPONENTS)
+        unknown = [c for c in components if c not in COMPONENTS]
+        if unknown:
+            raise DistributionError(f"Componentes desconhecidos: {unknown}")
+        percentiles = tuple(float(q) for q in percentiles)
+        if any(not 0 <= q <= 100 for q in percentiles):
+            raise DistributionError("Percentis devem estar entre 0 e 100")
+
+        sql = "SELECT component, period, digest FROM sketches WHERE period BETWEEN ? AND ?"
+        params: list = [start or 0, end or 999999]
+        sql += f" AND component IN ({','.join('?' * len(components))})"
+        params.extend(components)
+        if orgaos:
+            sql += f" AND orgao IN ({','.join('?' * len(orgaos))})"
+            params.extend(orgaos)
+        blobs: dict[str, list[bytes]] = {c: [] for c in components}
+        periods: dict[str, list[int]] = {c: [] for c in components}
+        for component, key, digest in self._execute(sql, tuple(params)):
+            blobs[component].append(digest)
+            periods[component].append(key)
+
+        scales: dict[str, np.ndarray | None] = dict.fromkeys(components)
+        if real is not None:
+            prices = get_price_indices()
+            for c in components:
+                keys = np.asarray(periods[c], dtype=np.int64)
+                months = (keys // 100 - 1970) * 12 + keys % 100 - 1
+                factors = prices.factors("BRA", real, months)
+                scales[c] = np.where(np.isnan(factors), 1.0, factors)
+        merged = {c: TDigest.merge_bytes(blobs[c], scales=scales[c]) for c in components}
+        quantiles = {c: merged[c].quantile(q / 100 for q in percentiles) for c in components}
+        measures = {c: weighted_inequality(merged[c].means, merged[c].weights) for c in components}
+        return Distribution(
+            components=components,
+            count=[merged[c].count for c in components],
+            mean=_round(merged[c].mean for c in components),
+            percentiles={
+                q: _round(quantiles[c][i] for c in components) for i, q in enumerate(percentiles)
+            },
+            gini=_round((measures[c]["gini"] for c in components), 4),
+            theil=_round((measures[c]["theil"] for c in components), 4),
+            sketches=sum(len(b) for b in blobs.values()),
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def monthly(
+        self,
+        orgaos: list[str] | None,
+        component: str,
+        percentiles: Iterable[float] = (),
+        start: int | None = None,
+        end: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Uma mescla por mês: (períodos AAAAMM, contagens, médias, percentis[q, mês]).
+
+        A chave (componente, período, órgão) entrega os sketches já agrupados
+        por mês; cada grupo vira um `merge_bytes`.
+        """
+        if component not in COMPONENTS:
+            raise DistributionError(f"Componente desconhecido: {component}")
+        percentiles = tuple(float(q) for q in percentiles)
+        sql = "SELECT period, digest FROM sketches WHERE component = ? AND period BETWEEN ? AND ?"
+        params: list = [component, start or 0, end or 999999]
+        if orgaos:
+            sql += f" AND orgao IN ({','.join('?' * len(orgaos))})"
+            params.extend(orgaos)
+        sql += " ORDER BY period"
+        periods, counts, means, quantiles = [], [], [], []
+        for key, rows in groupby(self._execute(sql, tuple(params)), key=itemgetter(0)):
+            merged = TDigest.merge_bytes(digest for _, digest in rows)
+            if not merged.count:
+                continue
+            periods.append(key)
+            counts.append(merged.count)
+            means.append(merged.mean)
+            quantiles.append(merged.quantile(q / 100 for q in percentiles))
+        return (
+            np.asarray(periods, dtype=np.int64),
+            np.asarray(counts, dtype=np.int64),
+            np.asarray(means, dtype=np.float64),
+            np.asarray(quantiles, dtype=np.float64).reshape(len(periods), len(percentiles)).T,
+        )
+
+
+@dataclass
+class _StoreState:
+    store: PayslipStore | None = None
+    version: str | None = None
+    last_check: float = 0.0
+
+
+_state = _StoreState()
+
+
+def sync_payslip_store() -> bool:
+    """Abre o store se existir e adota a versão dele no namespace; True se há dados."""
+    _state.last_check = time.monotonic()
+    path = data_path(*STORE_FILE)
+    if _state.store is None:
+        if not path.exists():
+            return False
+        _state.store = PayslipStore(path)
+    try:
+        version = _state.store.version()
+    except sqlite3.Error as e:
+        logger.warning("Store de contracheques ilegível: %s", e)
+        return _state.version is not None
+    if version and version != _state.version:
+        summary = _state.store.above_teto_summary()
+        if summary is not None:
+            install_measured_facts(
+                summary.annual_excess, summary.above_per_month, summary.periodo
+            )
+        _state.version = version
+        set_namespace_version(NAMESPACE, version)
+        logger.info("Sketches de contracheques na versão %s", version)
+    return _state.version is not None
+
+
+def _kick_sync() -> None:
+    if time.monotonic() - _state.last_check >= SYNC_INTERVAL_SECONDS:
+        sync_payslip_store()
+
+
+register_namespace_hook(NAMESPACE, _kick_sync)
+
+
+def get_payslip_store() -> PayslipStore | None:
+    """Store aberto (None antes da primeira ingestão)."""
+    return _state.store if _state.version is not None else None
+
+
+def get_payslip_status() -> dict:
+    """Versão dos sketches carregados (para `/internal/status`)."""
+    store = get_payslip_store()
+    if store is None:
+        return {"loaded": False}
+    return {"loaded": True, "version": _state.version, "orgaos": len(store.orgaos())}
+
+
+def run_distribution(
+    orgao: str | None,
+    start: str | None,
+    end: str | None,
+    component: str | None,
+    p: str,
+    real: str | None = None,
+) -> Distribution:
+    """Consulta a partir dos parâmetros de URL (listas separadas por vírgula).
+
+    `real` ("AAAA-MM") pede valores em reais do mês, corrigidos pelo IPCA.
+    Levanta `DistributionError` para parâmetros inválidos e `LookupError` se
+    ainda não há sketches (ou índices de preço, em modo real).
+    """
+    store = get_payslip_store()
+    if store is None:
+        raise LookupError("Sketches de contracheques ainda não disponíveis")
+
+    try:
+        percentiles = [float(q) for q in split_csv(p) or DEFAULT_PERCENTILES]
+    except ValueError:
+        raise DistributionError(f"Percentis inválidos: {p}") from None
+    try:
+        base = real_base(real)
+        if base is not None:
+            get_price_indices().deflators("BRA", base)
+    except RealModeError as e:
+        raise DistributionError(str(e)) from None
+    return store.distribution(
+        orgaos=split_csv(orgao),
+        start=parse_period(start) if start else None,
+        end=parse_period(end) if end else None,
+        components=split_csv(component),
+        percentiles=percentiles,
+        real=base,
+    )
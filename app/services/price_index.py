@@ -0,0 +1,358 @@
+"""Índices de preço (IPCA, CPI) e deflação vetorizada para valores reais.
+
+Cada fonte publica valores nominais de um período diferente (piso MEC de
+2026, DadosJusBr de 2025, BLS de 2024). Para comparar, os valores são
+levados a um mês-base comum: `valor × índice(base) / índice(referência)`.
+
+As séries mensais ficam em `DATA_DIR/price_indices.bin` (formato de
+`app.core.timeseries`, coluna "index", uma série por país em ISO 3166
+alfa-3), gerado por `etl.sources.price_indices` e mapeado em memória. Aqui
+elas viram arrays indexados por mês (meses desde 1970-01, como
+`datetime64[M]`):
+
+- Converter uma coluna inteira é um `np.searchsorted` + uma multiplicação.
+- O vetor de deflatores de cada (país, mês-base) é calculado uma vez e
+  memoizado na tabela (sob um lock: as consultas rodam em threads); a tabela
+  é trocada inteira quando o arquivo muda.
+- Referência anual ("2025") usa a média do índice no ano; mês de referência
+  depois do último índice publicado usa o último (o IPCA sai com atraso).
+
+A versão do arquivo é a do namespace de cache "prices": respostas em modo
+real (`?real=AAAA-MM`) são cacheadas como as nominais.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from app.core.cache import register_namespace_hook, set_namespace_version
+from app.core.storage import data_path
+from app.core.timeseries import TimeSeriesFile
+from app.services.salary_data import (
+    TETO_HISTORICO,
+    CareerIndex,
+    build_career_index,
+    get_career_index,
+)
+
+logger = logging.getLogger(__name__)
+
+PRICE_INDEX_FILE = "price_indices.bin"
+COLUMN = "index"
+
+# Namespace de cache das respostas em modo real
+NAMESPACE = "prices"
+
+# Índice de cada série (país ISO 3166 alfa-3)
+INDEX_TYPES: dict[str, str] = {"BRA": "ipca", "USA": "cpi"}
+
+# País da série usada para cada moeda (ver `international.json`)
+CURRENCY_COUNTRY: dict[str, str] = {"BRL": "BRA", "USD": "USA"}
+
+# Mês-base aceito em `?real=`
+MIN_BASE, MAX_BASE = "1994-07", "2100-12"  # Desde o Plano Real
+
+# Intervalo mínimo entre checagens do arquivo (por worker)
+SYNC_INTERVAL_SECONDS = 5.0
+
+# Vetores de deflatores memoizados por tabela (país × mês-base)
+MAX_MEMO = 256
+
+
+class RealModeError(ValueError):
+    """Mês-base inválido ou sem índice de preços."""
+
+
+def parse_month(value: str) -> int:
+    """"AAAA-MM" → meses desde 1970-01."""
+    try:
+        month = np.datetime64(value, "M")
+    except ValueError:
+        raise RealModeError(f"Mês inválido: {value!r} (use AAAA-MM)") from None
+    if len(value) != 7 or not MIN_BASE <= value <= MAX_BASE:
+        raise RealModeError(f"Mês inválido: {value!r} (use AAAA-MM, a partir de {MIN_BASE})")
+    return int(month.astype(np.int64))
+
+
+def month_label(month: int) -> str:
+    """Meses desde 1970-01 → "AAAA-MM"."""
+    return str(np.datetime64(month, "M"))
+
+
+def reference_months(references: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Referências "AAAA" ou "AAAA-MM" → (mês ou ano, é anual?), vetorizado.
+
+    Para referência anual, o primeiro array traz o ano.
+    """
+    references = list(references)
+    annual = np.array([len(r) == 4 for r in references], dtype=bool)
+    months = np.array(
+        [int(r) if len(r) == 4 else parse_month(r) for r in references], dtype=np.int64
+    )
+    return months, annual
+
+
+@dataclass(frozen=True)
+class PriceIndex:
+    """Série mensal de um país: meses crescentes e nível do índice."""
+
+    country: str
+    months: np.ndarray  # int64, meses desde 1970-01
+    values: np.ndarray  # float64
+
+    @property
+    def first(self) -> int:
+        return int(self.months[0])
+
+    @property
+    def last(self) -> int:
+        return int(self.months[-1])
+
+    def positions(self, months: np.ndarray) -> np.ndarray:
+        """Posição do índice vigente em cada mês (-1 antes do início da série)."""
+        return np.searchsorted(self.months, months, side="right") - 1
+
+    def annual_means(self) -> tuple[np.ndarray, np.ndarray]:
+        """(anos, média do índice no ano)."""
+        years = self.months // 12 + 1970
+        first = int(years[0])
+        sums = np.bincount(years - first, weights=self.values)
+        counts = np.bincount(years - first)
+        present = counts > 0
+        return np.arange(first, first + len(sums))[present], sums[present] / counts[present]
+
+
+@dataclass
+class PriceIndexTable:
+    """Séries carregadas de uma versão do arquivo, com deflatores memoizados."""
+
+    version: str
+    series: dict[str, PriceIndex]
+    _memo: OrderedDict = field(default_factory=OrderedDict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _recall(self, key: tuple) -> tuple | None:
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+            return cached
+
+    def _remember(self, key: tuple, value: tuple) -> tuple:
+        with self._lock:
+            self._memo[key] = value
+            self._memo.move_to_end(key)
+            while len(self._memo) > MAX_MEMO:
+                self._memo.popitem(last=False)
+        return value
+
+    def _base_level(self, country: str, base: int) -> tuple[PriceIndex, float]:
+        index = self.series.get(country)
+        if index is None:
+            raise RealModeError(f"Sem índice de preços para {country}")
+        pos = index.positions(np.array([base]))[0]
+        if pos < 0:
+            raise RealModeError(
+                f"Índice de {country} começa em {month_label(index.first)}; "
+                f"base {month_label(base)}"
+            )
+        return index, float(index.values[pos])
+
+    def deflators(self, country: str, base: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vetores memoizados de (país, base): (fator por mês da série, anos, fator por ano).
+
+        O fator leva um valor do mês (ou ano) para reais do mês-base.
+        """
+        key = (country, base)
+        cached = self._recall(key)
+        if cached is not None:
+            return cached
+        index, level = self._base_level(country, base)
+        years, means = index.annual_means()
+        return self._remember(key, (level / index.values, years, level / means))
+
+    def factors(
+        self, country: str, base: int, months: np.ndarray, annual: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Fator de cada referência (mês, ou ano onde `annual`); NaN fora da série."""
+        index = self.series.get(country)
+        if index is None:
+            raise RealModeError(f"Sem índice de preços para {country}")
+        monthly, years, yearly = self.deflators(country, base)
+        months = np.asarray(months, dtype=np.int64)
+        pos = index.positions(months)
+        result = np.where(pos >= 0, monthly[np.maximum(pos, 0)], np.nan)
+        if annual is not None and annual.any():
+            # Ano sem média (fora da série): o do ano mais próximo publicado, ou NaN antes
+            ypos = np.clip(np.searchsorted(years, months[annual]), 0, len(years) - 1)
+            found = years[ypos] == months[annual]
+            after = months[annual] > years[-1]
+            result[annual] = np.where(found, yearly[ypos], np.where(after, yearly[-1], np.nan))
+        return result
+
+    def deflate(
+        self, values: np.ndarray, months: np.ndarray, country: str, base: int
+    ) -> np.ndarray:
+        """Coluna nominal (um mês por valor) → coluna em reais do mês-base."""
+        return np.asarray(values, dtype=np.float64) * self.factors(country, base, months)
+
+    def coverage(self, country: str) -> tuple[str, str] | None:
+        index = self.series.get(country)
+        return None if index is None else (month_label(index.first), month_label(index.last))
+
+
+def load_price_table(path: Path) -> PriceIndexTable:
+    """Lê o arquivo de séries (cópia pequena em arrays NumPy)."""
+    data = Path(path).read_bytes()
+    version = hashlib.sha1(data).hexdigest()[:12]
+    ts = TimeSeriesFile(path)
+    try:
+        series = {}
+        for name in ts.names:
+            s = ts[name]
+            days = np.frombuffer(s.days, dtype="<i4").astype("datetime64[D]")
+            series[name] = PriceIndex(
+                country=name,
+                months=days.astype("datetime64[M]").astype(np.int64),
+                values=np.frombuffer(s.columns[COLUMN], dtype="<f8").copy(),
+            )
+    finally:
+        ts.close()
+    return PriceIndexTable(version=version, series=series)
+
+
+@dataclass
+class _TableState:
+    table: PriceIndexTable | None = None
+    mtime: float | None = None
+    last_check: float = 0.0
+
+
+_state = _TableState()
+
+
+def sync_price_indices(force: bool = False) -> bool:
+    """Carrega o arquivo de índices se ele mudou; True se há índices."""
+    _state.last_check = time.monotonic()
+    path = data_path(PRICE_INDEX_FILE)
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return _state.table is not None
+    if force or mtime != _state.mtime:
+        try:
+            table = load_price_table(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Índices de preço ignorados: %s", e)
+            return _state.table is not None
+        _state.table, _state.mtime = table, mtime
+        set_namespace_version(NAMESPACE, table.version)
+        logger.info("Índices de preço %s carregados: %s", table.version, ", ".join(table.series))
+    return _state.table is not None
+
+
+def _kick_sync() -> None:
+    if time.monotonic() - _state.last_check >= SYNC_INTERVAL_SECONDS:
+        sync_price_indices()
+
+
+register_namespace_hook(NAMESPACE, _kick_sync)
+
+
+def get_price_indices() -> PriceIndexTable | None:
+    """Tabela atual (None antes da primeira carga do ETL)."""
+    return _state.table
+
+
+def get_price_index_status() -> dict:
+    """Séries carregadas e cobertura (para `/internal/status`)."""
+    table = _state.table
+    if table is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "version": table.version,
+        "series": {c: table.coverage(c) for c in table.series},
+    }
+
+
+def real_base(real: str | None) -> int | None:
+    """Parâmetro `?real=AAAA-MM` → mês-base (None = valores nominais).
+
+    Levanta `RealModeError` para mês inválido e `LookupError` se ainda não
+    há índices carregados.
+    """
+    if not real:
+        return None
+    base = parse_month(real)
+    if get_price_indices() is None:
+        raise LookupError("Índices de preço ainda não disponíveis")
+    return base
+
+
+# (versão do dataset, versão dos índices, mês-base) → carreiras em reais do mês-base
+_career_memo: OrderedDict[tuple[str, str, int], CareerIndex] = OrderedDict()
+CAREER_MEMO_SIZE = 32
+
+# Vigência do teto atual (valor do último degrau de `TETO_HISTORICO`)
+TETO_REFERENCE = "{}-{:02d}".format(*TETO_HISTORICO[-1][:2])
+
+
+def real_career_index(base: int) -> CareerIndex:
+    """Índice de carreiras com valores (e teto) em reais do mês-base, pelo IPCA.
+
+    Todas as carreiras são deflacionadas numa chamada, a partir do período de
+    referência de cada uma (`CareerData.reference`); o índice pronto é
+    memoizado por (versão do dataset, versão dos índices, base). Carreira com
+    referência fora da série fica nominal.
+    """
+    index = get_career_index()
+    table = get_price_indices()
+    if table is None:
+        raise LookupError("Índices de preço ainda não disponíveis")
+    key = (index.version, table.version, base)
+    cached = _career_memo.get(key)
+    if cached is not None:
+        return cached
+
+    careers = index.orders["salary"]
+    months, annual = reference_months([*(c.reference for c in careers), TETO_REFERENCE])
+    factors = table.factors("BRA", base, months, annual)
+    factors = np.where(np.isnan(factors), 1.0, factors)
+
+    def scale(value: float | None, factor: float) -> float | None:
+        return None if value is None else round(value * factor, 2)
+
+    real = [
+        replace(
+            c,
+            salary_base=scale(c.salary_base, k),
+            salary_real=scale(c.salary_real, k),
+            salary_max=scale(c.salary_max, k),
+            penduricalhos=scale(c.penduricalhos, k),
+        )
+        for c, k in zip(careers, factors[:-1].tolist())
+    ]
+    facts = replace(index.facts, teto=scale(index.facts.teto, float(factors[-1])))
+    result = build_career_index(real, f"{index.version}-real-{month_label(base)}", facts)
+    _career_memo[key] = result
+    while len(_career_memo) > CAREER_MEMO_SIZE:
+        _career_memo.popitem(last=False)
+    return result
+
+
+def career_index_for(real: str | None) -> CareerIndex:
+    """Índice de carreiras nominal ou, com `real` ("AAAA-MM"), em reais do mês.
+
+    Mesmos erros de `real_base`.
+    """
+    base = real_base(real)
+    return get_career_index() if base is None else real_career_index(base)
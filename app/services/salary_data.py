@@ -11,7 +11,12 @@ Fontes:
 - Policiais: Tabelas remuneratórias federais/estaduais (2025)
 """
 
-from dataclasses import dataclass, field
+import bisect
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field, replace
+from types import MappingProxyType
+from typing import Iterable, Mapping
 
 
 @dataclass
@@ -104,6 +109,7 @@ class CareerData:
     weekly_hours: int
     risk_assessment: RiskAssessment  # Avaliação de risco com metodologia
     color: str  # Cor para gráficos
+    reference: str = "2025"  # Período dos valores: "AAAA" ou "AAAA-MM" (ver `price_index`)
 
     @property
     def risk_level(self) -> str:
@@ -143,6 +149,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#3B82F6",
+        reference="2026-01",
     ),
     CareerData(
         id="enfermeiro",
@@ -172,6 +179,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#8B5CF6",
+        reference="2025",
     ),
     # ── SEGURANÇA PÚBLICA ──
     CareerData(
@@ -203,6 +211,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#06B6D4",
+        reference="2025",
     ),
     CareerData(
         id="agente_pf",
@@ -233,6 +242,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#0EA5E9",
+        reference="2025",
     ),
     CareerData(
         id="delegado_pf",
@@ -262,6 +272,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#2563EB",
+        reference="2025",
     ),
     CareerData(
         id="agente_pc",
@@ -292,6 +303,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#7C3AED",
+        reference="2025",
     ),
     CareerData(
         id="delegado_pc",
@@ -320,6 +332,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#6D28D9",
+        reference="2025",
     ),
     # ── JUSTIÇA ──
     CareerData(
@@ -350,6 +363,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#EF4444",
+        reference="2025",
     ),
     CareerData(
         id="juiz_tjsp",
@@ -378,6 +392,7 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#DC2626",
+        reference="2025",
     ),
     CareerData(
         id="procurador_mp",
@@ -407,55 +422,256 @@ CAREERS: list[CareerData] = [
             ],
         ),
         color="#F97316",
+        reference="2025",
     ),
 ]
 
-# Teto constitucional
-TETO_CONSTITUCIONAL: float = 46366.19
+# Teto constitucional (subsídio de Ministro do STF) e vigência: (ano, mês inicial, valor).
+# Contas de meses passados usam o teto vigente no mês, não o atual.
+TETO_HISTORICO: tuple[tuple[int, int, float], ...] = (
+    (2015, 1, 33763.00),  # Lei 13.091/2015
+    (2019, 1, 39293.32),  # Lei 13.752/2018
+    (2023, 4, 41650.92),  # Lei 14.520/2023
+    (2024, 2, 44008.52),  # Lei 14.520/2023
+    (2025, 2, 46366.19),  # Lei 14.520/2023
+)
+TETO_CONSTITUCIONAL: float = TETO_HISTORICO[-1][2]
 
-# Custo total dos supersalários
+# Custo total dos supersalários (estudo República.org; substituído pelo medido
+# nos contracheques quando houver — ver `install_measured_facts`)
 CUSTO_SUPERSALARIOS_ANUAL: float = 20_000_000_000.00  # R$ 20 bilhões
 SERVIDORES_ACIMA_TETO: int = 53_000
+PERIODO_SUPERSALARIOS = "ago/2024 a jul/2025"
 
-# Dados para a calculadora "O Custo da Desigualdade"
-CUSTO_SOCIAL: dict[str, dict] = {
-    "professores": {
-        "label": "professores com piso",
-        "piso": 5130.63,
-        "total_possivel": int(CUSTO_SUPERSALARIOS_ANUAL / (5130.63 * 13)),  # 13 salários
-    },
-    "enfermeiros": {
-        "label": "enfermeiros com piso",
-        "piso": 4750.00,
-        "total_possivel": int(CUSTO_SUPERSALARIOS_ANUAL / (4750.00 * 13)),
-    },
-    "soldados_pm": {
-        "label": "soldados PM",
-        "piso": 6358.00,
-        "total_possivel": int(CUSTO_SUPERSALARIOS_ANUAL / (6358.00 * 13)),
-    },
-    "bolsas_universidade": {
-        "label": "bolsas universitárias integrais (R$ 1.200/mês)",
-        "piso": 1200.00,
-        "total_possivel": int(CUSTO_SUPERSALARIOS_ANUAL / (1200.00 * 12)),
-    },
+# Calculadora "O Custo da Desigualdade": rótulo, piso mensal e salários por ano
+PISOS_SOCIAIS: dict[str, tuple[str, float, int]] = {
+    "professores": ("professores com piso", 5130.63, 13),
+    "enfermeiros": ("enfermeiros com piso", 4750.00, 13),
+    "soldados_pm": ("soldados PM", 6358.00, 13),
+    "bolsas_universidade": ("bolsas universitárias integrais (R$ 1.200/mês)", 1200.00, 12),
 }
 
 
+def teto_vigente(year: int, month: int) -> float:
+    """Teto constitucional em vigor no mês (o primeiro valor, antes do histórico)."""
+    i = bisect.bisect_right([(y, m) for y, m, _ in TETO_HISTORICO], (year, month)) - 1
+    return TETO_HISTORICO[max(i, 0)][2]
+
+
+def compute_custo_social(custo_anual: float) -> dict[str, dict]:
+    """Quantos profissionais com piso o custo anual dos supersalários pagaria."""
+    return {
+        key: {"label": label, "piso": piso, "total_possivel": int(custo_anual / (piso * salarios))}
+        for key, (label, piso, salarios) in PISOS_SOCIAIS.items()
+    }
+
+
+CUSTO_SOCIAL: dict[str, dict] = compute_custo_social(CUSTO_SUPERSALARIOS_ANUAL)
+
+
+@dataclass(frozen=True)
+class SalaryFacts:
+    """Números de manchete de uma versão do dataset (teto, custo, calculadora)."""
+
+    teto: float
+    custo_anual: float
+    servidores_acima: int
+    custo_social: Mapping[str, dict]
+    periodo: str = PERIODO_SUPERSALARIOS  # Janela do custo anual
+    medido: bool = False  # Calculado dos contracheques (e não do estudo)
+
+
+# Números do dataset estático
+FACTS = SalaryFacts(
+    teto=TETO_CONSTITUCIONAL,
+    custo_anual=CUSTO_SUPERSALARIOS_ANUAL,
+    servidores_acima=SERVIDORES_ACIMA_TETO,
+    custo_social=MappingProxyType(CUSTO_SOCIAL),
+)
+
+
+def compute_dataset_version(careers: Iterable[CareerData], facts: SalaryFacts) -> str:
+    """Hash do conteúdo do dataset: muda quando qualquer número muda."""
+    payload = {
+        "careers": [asdict(c) for c in careers],
+        "teto": facts.teto,
+        "custo_anual": facts.custo_anual,
+        "servidores_acima": facts.servidores_acima,
+        "custo_social": dict(facts.custo_social),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+# Versão do dataset (namespace de cache "salary")
+DATASET_VERSION: str = compute_dataset_version(CAREERS, FACTS)
+
+
+RISK_LEVELS = ("baixo", "medio", "alto", "muito_alto")
+
+# Ordenações pré-computadas: nome → chave de ordenação (sempre crescente)
+SORT_KEYS = {
+    "salary": lambda c: c.salary_real,
+    "gap": lambda c: c.penduricalhos,
+    "risk": lambda c: c.risk_assessment.score,
+}
+
+
+@dataclass(frozen=True)
+class CareerIndex:
+    """Índice imutável das carreiras de uma versão do dataset.
+
+    Montado uma vez por versão: busca por id em O(1), ordenações prontas
+    (salário, penduricalhos, risco), buckets por categoria e consultas top-k
+    e por faixa salarial via bisect. As rotas só fatiam tuplas prontas.
+    """
+
+    version: str
+    by_id: Mapping[str, CareerData]
+    orders: Mapping[str, tuple[CareerData, ...]]  # Crescente, por SORT_KEYS
+    by_category: Mapping[str, tuple[CareerData, ...]]  # Na ordem do dataset
+    salary_keys: tuple[float, ...]  # salary_real de orders["salary"], para bisect
+    max_salary: float
+    facts: SalaryFacts = FACTS
+    # Visões filtradas já calculadas (memo por combinação de filtros)
+    _views: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, career_id: str) -> CareerData | None:
+        return self.by_id.get(career_id)
+
+    def sorted_by(self, key: str = "salary", descending: bool = False) -> tuple[CareerData, ...]:
+        """Carreiras na ordem pedida (chave desconhecida cai em "salary")."""
+        order = self.orders.get(key, self.orders["salary"])
+        return order[::-1] if descending else order
+
+    def category(self, category: str) -> tuple[CareerData, ...]:
+        return self.by_category.get(category, ())
+
+    def top_k(self, k: int, key: str = "salary", descending: bool = True) -> tuple[CareerData, ...]:
+        """As `k` primeiras carreiras na ordenação `key`."""
+        order = self.orders.get(key, self.orders["salary"])
+        if k <= 0:
+            return ()
+        return order[: -k - 1 : -1] if descending else order[:k]
+
+    def salary_range(
+        self, low: float | None = None, high: float | None = None
+    ) -> tuple[CareerData, ...]:
+        """Carreiras com `low <= salary_real <= high`, em ordem crescente."""
+        start = 0 if low is None else bisect.bisect_left(self.salary_keys, low)
+        end = len(self.salary_keys) if high is None else bisect.bisect_right(self.salary_keys, high)
+        return self.orders["salary"][start:end]
+
+    def query(
+        self,
+        key: str = "salary",
+        descending: bool = False,
+        category: str | None = None,
+        risk_level: str | None = None,
+        above_teto: bool | None = None,
+    ) -> tuple[CareerData, ...]:
+        """Ordenação `key` filtrada; cada combinação é calculada uma única vez."""
+        if category is not None and category not in self.by_category:
+            return ()
+        if risk_level is not None and risk_level not in RISK_LEVELS:
+            return ()
+        memo_key = (key, descending, category, risk_level, above_teto)
+        view = self._views.get(memo_key)
+        if view is None:
+            view = self.sorted_by(key, descending)
+            if category is not None:
+                view = tuple(c for c in view if c.category == category)
+            if risk_level is not None:
+                view = tuple(c for c in view if c.risk_level == risk_level)
+            if above_teto is not None:
+                view = tuple(c for c in view if (c.salary_real > self.facts.teto) == above_teto)
+            self._views[memo_key] = view
+        return view
+
+
+def build_career_index(
+    careers: Iterable[CareerData], version: str, facts: SalaryFacts = FACTS
+) -> CareerIndex:
+    """Monta o índice (O(n log n), uma vez por versão do dataset)."""
+    careers = tuple(careers)
+    # Desempate por id: ordem estável entre builds/workers (chaves de cache iguais)
+    orders = {
+        name: tuple(sorted(careers, key=lambda c, key=key: (key(c), c.id)))
+        for name, key in SORT_KEYS.items()
+    }
+    buckets: dict[str, list[CareerData]] = {}
+    for c in careers:
+        buckets.setdefault(c.category, []).append(c)
+    return CareerIndex(
+        version=version,
+        by_id=MappingProxyType({c.id: c for c in careers}),
+        orders=MappingProxyType(orders),
+        by_category=MappingProxyType({cat: tuple(items) for cat, items in buckets.items()}),
+        salary_keys=tuple(c.salary_real for c in orders["salary"]),
+        max_salary=max((c.salary_real for c in careers), default=0.0),
+        facts=facts,
+    )
+
+
+_index: CareerIndex = build_career_index(CAREERS, DATASET_VERSION)
+
+
+def get_career_index() -> CareerIndex:
+    """Índice da versão atual do dataset."""
+    return _index
+
+
+def install_career_index(
+    careers: Iterable[CareerData], version: str, facts: SalaryFacts = FACTS
+) -> CareerIndex:
+    """Troca o dataset ativo (ex.: carga do banco); no-op se a versão não mudou."""
+    global _index
+    if version != _index.version:
+        _index = build_career_index(careers, version, facts)
+    return _index
+
+
+# Custo e servidores acima do teto medidos nos contracheques (None = usa o dataset)
+_measured: tuple[float, int, str] | None = None
+
+
+def install_measured_facts(custo_anual: float, servidores_acima: int, periodo: str) -> None:
+    """Passa a usar os números medidos (`app.services.above_teto`) nas manchetes."""
+    global _measured
+    _measured = (custo_anual, servidores_acima, periodo)
+
+
+def get_salary_facts() -> SalaryFacts:
+    """Teto, custo dos supersalários e calculadora da versão atual do dataset.
+
+    Com agregados de contracheques carregados, custo anual, servidores acima
+    do teto e calculadora vêm deles; o teto continua o do dataset.
+    """
+    if _measured is None:
+        return _index.facts
+    custo_anual, servidores_acima, periodo = _measured
+    return replace(
+        _index.facts,
+        custo_anual=custo_anual,
+        servidores_acima=servidores_acima,
+        custo_social=MappingProxyType(compute_custo_social(custo_anual)),
+        periodo=periodo,
+        medido=True,
+    )
+
 
 def get_career(career_id: str) -> CareerData | None:
     """Retorna dados de uma carreira pelo ID."""
-    for c in CAREERS:
-        if c.id == career_id:
-            return c
-    return None
+    return _index.get(career_id)
 
 
 def get_careers_by_category(category: str) -> list[CareerData]:
-    """Retorna carreiras filtradas por categoria."""
-    return [c for c in CAREERS if c.category == category]
+    """Retorna carreiras filtradas por categoria, na ordem de CAREERS."""
+    return list(_index.category(category))
 
 
-def get_all_careers_sorted() -> list[CareerData]:
-    """Retorna todas as carreiras ordenadas por salário real (crescente)."""
-    return sorted(CAREERS, key=lambda c: c.salary_real)
+def get_all_careers_sorted(key: str = "salary", descending: bool = False) -> list[CareerData]:
+    """Retorna todas as carreiras ordenadas (padrão: salário real crescente)."""
+    return list(_index.sorted_by(key, descending))
@@ -0,0 +1,276 @@
+"""Séries históricas de remuneração para gráficos, reduzidas por LTTB.
+
+Uma série é mês a mês: a média (ou um percentil) de um componente do
+contracheque, mesclando os sketches de um órgão do DadosJusBr ou do grupo
+de órgãos de uma carreira (`CAREER_ORGAOS`), com o teto vigente em cada mês
+ao lado. Só carreiras do sistema de justiça têm contracheques medidos.
+
+Dez anos de meses para dezenas de séries não precisam de mais pontos do que
+o gráfico tem de pixels: `SalaryHistory.downsample(width)` aplica
+Largest-Triangle-Three-Buckets (`app.core.lttb`), que mantém picos e vales.
+A série completa é memoizada por (versão dos sketches, versão dos índices,
+consulta), sob um lock (as rotas chamam em threads); cada largura pedida só
+refaz o LTTB.
+
+Duas codificações da resposta colunar: listas JSON (`columns`) ou arrays
+tipados little-endian em base64 (`packed`), que o navegador lê direto em
+`Float32Array`/`Int32Array`, sem parse de números.
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from app.core.lttb import MIN_THRESHOLD, lttb
+from app.services.analytics import split_csv
+from app.services.payslips import (
+    COMPONENTS,
+    DistributionError,
+    get_payslip_store,
+    parse_period,
+)
+from app.services.price_index import RealModeError, get_price_indices, month_label, real_base
+from app.services.salary_data import get_career_index, teto_vigente
+
+# Carreiras com contracheques medidos → prefixos de id de órgão do DadosJusBr
+CAREER_ORGAOS: dict[str, tuple[str, ...]] = {
+    "juiz_tjsp": ("tjsp",),
+    "juiz_media": ("tj", "trf", "trt", "tre", "stf", "stj", "stm", "tst", "tse"),
+    "procurador_mp": ("mp",),
+}
+
+METRICS: dict[str, str] = {
+    "mean": "Média",
+    "p50": "Mediana",
+    "p90": "P90",
+    "p99": "P99",
+}
+
+DEFAULT_WIDTH = 600
+MAX_WIDTH = 4000
+
+# (versão dos sketches, versão dos índices, consulta) → série completa
+MEMO_SIZE = 64
+_memo: OrderedDict[tuple, "SalaryHistory"] = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+class HistoryError(ValueError):
+    """Parâmetros inválidos para a série histórica."""
+
+
+class SeriesNotFound(LookupError):
+    """Carreira ou órgão sem contracheques medidos."""
+
+
+def _b64(values: np.ndarray, dtype: str) -> str:
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode("ascii")
+
+
+def _round(values: np.ndarray) -> list[float | None]:
+    return [None if np.isnan(v) else round(float(v), 2) for v in values]
+
+
+def _points(x: np.ndarray, y: np.ndarray, top: float, height: int) -> str:
+    """Pontos SVG "x,y …" com y invertido (0 no topo da caixa)."""
+    return " ".join(f"{a:.1f},{height - b / top * height:.1f}" for a, b in zip(x, y))
+
+
+@dataclass(frozen=True)
+class SalaryHistory:
+    """Série mensal de um órgão ou carreira, completa ou reduzida."""
+
+    series: str  # "career:<id>" ou "orgao:<id>"
+    label: str
+    component: str
+    metric: str
+    version: str  # Versão dos sketches
+    periods: np.ndarray  # AAAAMM, crescentes
+    values: np.ndarray
+    teto: np.ndarray  # Teto vigente no mês (na mesma base de `values`)
+    count: np.ndarray  # Contracheques no mês
+    source_points: int  # Meses antes do downsampling
+    real: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.periods)
+
+    @property
+    def months(self) -> np.ndarray:
+        """Meses desde 1970-01 (eixo x contínuo, sem buracos de dezembro → janeiro)."""
+        return (self.periods // 100 - 1970) * 12 + self.periods % 100 - 1
+
+    def downsample(self, width: int) -> "SalaryHistory":
+        """No máximo `width` pontos (um por pixel), escolhidos por LTTB."""
+        keep = lttb(self.months, self.values, max(width, MIN_THRESHOLD))
+        if len(keep) == len(self):
+            return self
+        return replace(
+            self,
+            periods=self.periods[keep],
+            values=self.values[keep],
+            teto=self.teto[keep],
+            count=self.count[keep],
+        )
+
+    def columns(self) -> dict[str, list]:
+        return {
+            "t": [f"{p // 100}-{p % 100:02d}" for p in self.periods.tolist()],
+            "value": _round(self.values),
+            "teto": _round(self.teto),
+            "count": self.count.tolist(),
+        }
+
+    def packed(self) -> dict[str, dict[str, str]]:
+        """Colunas como arrays tipados em base64 (`t` em dias desde 1970-01-01)."""
+        days = self.months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+        return {
+            "t": {"dtype": "int32", "data": _b64(days, "<i4")},
+            "value": {"dtype": "float32", "data": _b64(self.values, "<f4")},
+            "teto": {"dtype": "float32", "data": _b64(self.teto, "<f4")},
+            "count": {"dtype": "uint32", "data": _b64(self.count, "<u4")},
+        }
+
+    def polylines(self, width: int, height: int) -> dict:
+        """Pontos SVG ("x,y …") da série e do teto numa caixa width × height."""
+        months = self.months
+        span = max(int(months[-1] - months[0]), 1)
+        top = float(np.nanmax(np.concatenate([self.values, self.teto]))) * 1.05 or 1.0
+        x = (months - months[0]) / span * width
+        return {
+            "value": _points(x, self.values, top, height),
+            "teto": _points(x, self.teto, top, height),
+            "top": top,
+        }
+
+
+def _metric_percentile(metric: str) -> float | None:
+    """"mean" → None; "pNN" → NN."""
+    if metric == "mean":
+        return None
+    try:
+        q = float(metric.removeprefix("p")) if metric.startswith("p") else None
+    except ValueError:
+        q = None
+    if q is None or not 0 <= q <= 100:
+        raise HistoryError(f"Métrica inválida: {metric!r} (use mean ou p0…p100)")
+    return q
+
+
+def _career_orgaos(career_id: str, available: list[str]) -> tuple[str, list[str]]:
+    """Rótulo e órgãos medidos de uma carreira."""
+    career = get_career_index().get(career_id)
+    if career is None:
+        raise SeriesNotFound(f"Carreira não encontrada: {career_id}")
+    prefixes = CAREER_ORGAOS.get(career_id)
+    orgaos = [o for o in available if prefixes and o.startswith(prefixes)]
+    if not orgaos:
+        raise SeriesNotFound(f"Sem contracheques medidos para {career.name}")
+    return career.name, orgaos
+
+
+def _build(
+    kind: str,
+    ident: str,
+    component: str,
+    metric: str,
+    start: int | None,
+    end: int | None,
+    base: int | None,
+    real: str | None,
+) -> SalaryHistory:
+    store = get_payslip_store()
+    if store is None:
+        raise LookupError("Sketches de contracheques ainda não disponíveis")
+    version = store.version()
+    prices = get_price_indices() if base is not None else None
+    key = (
+        version,
+        prices.version if prices else None,
+        (kind, ident, component, metric, start, end, base),
+    )
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None:
+            _memo.move_to_end(key)
+            return cached
+
+    available = store.orgaos()
+    if kind == "career":
+        label, orgaos = _career_orgaos(ident, available)
+    else:
+        orgaos = split_csv(ident) or []
+        missing = [o for o in orgaos if o not in available]
+        if not orgaos or missing:
+            raise SeriesNotFound(f"Órgão sem contracheques: {', '.join(missing) or ident}")
+        label = ", ".join(o.upper() for o in orgaos)
+
+    q = _metric_percentile(metric)
+    periods, count, means, quantiles = store.monthly(
+        orgaos, component, () if q is None else (q,), start, end
+    )
+    if not len(periods):
+        raise SeriesNotFound(f"Sem contracheques de {label} no período")
+    values = means if q is None else quantiles[0]
+    teto = np.array([teto_vigente(p // 100, p % 100) for p in periods.tolist()])
+    history = SalaryHistory(
+        series=f"{kind}:{ident}",
+        label=label,
+        component=component,
+        metric=metric,
+        version=version,
+        periods=periods,
+        values=values,
+        teto=teto,
+        count=count,
+        source_points=len(periods),
+        real=real,
+    )
+    if prices is not None:
+        factors = prices.factors("BRA", base, history.months)
+        factors = np.where(np.isnan(factors), 1.0, factors)
+        history = replace(history, values=values * factors, teto=teto * factors)
+
+    with _memo_lock:
+        _memo[key] = history
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return history
+
+
+def run_history(
+    kind: str,
+    ident: str,
+    component: str = "bruto",
+    metric: str = "mean",
+    width: int = DEFAULT_WIDTH,
+    start: str | None = None,
+    end: str | None = None,
+    real: str | None = None,
+) -> SalaryHistory:
+    """Série de `kind` ("career" ou "orgao") reduzida a `width` pontos.
+
+    `real` ("AAAA-MM") pede valores em reais do mês, corrigidos pelo IPCA.
+    Levanta `HistoryError` para parâmetros inválidos, `SeriesNotFound` para
+    carreira/órgão sem dados e `LookupError` se ainda não há sketches (ou
+    índices de preço, em modo real).
+    """
+    if component not in COMPONENTS:
+        raise HistoryError(f"Componente desconhecido: {component}")
+    if not MIN_THRESHOLD <= width <= MAX_WIDTH:
+        raise HistoryError(f"Largura deve estar entre {MIN_THRESHOLD} e {MAX_WIDTH}")
+    _metric_percentile(metric)
+    try:
+        first = parse_period(start) if start else None
+        last = parse_period(end) if end else None
+        base = real_base(real)
+        if base is not None:
+            get_price_indices().deflators("BRA", base)
+    except (DistributionError, RealModeError) as e:
+        raise HistoryError(str(e)) from None
+    label = month_label(base) if base is not None else None
+    history = _build(kind, ident, component, metric, first, last, base, label)
+    return history.downsample(width)
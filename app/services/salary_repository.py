@@ -0,0 +1,355 @@
+"""Repositório PostgreSQL do dataset salarial (camada Gold), atrás dos acessores.
+
+As rotas continuam usando `get_career`, `get_all_careers_sorted`,
+`get_careers_by_category` e `get_salary_facts` de `salary_data`, que leem o
+`CareerIndex` em memória. Este módulo mantém esse índice igual ao banco:
+
+- O banco guarda a versão do dataset (`gold.salary_dataset.version`, hash do
+  conteúdo, gravado por `publish_dataset`). Checar se mudou é uma consulta de
+  uma linha, preparada e em cache na conexão.
+- Só quando a versão muda as carreiras e os números são lidos (numa
+  transação REPEATABLE READ, consistentes com a versão) e o índice é trocado
+  via `install_career_index`. O namespace de cache "salary" recebe a mesma
+  versão, então fragmentos e ETags mudam juntos em todos os workers.
+- Datasets já carregados ficam num cache em processo por versão (read-through):
+  voltar a uma versão recente não relê o banco.
+- A checagem é agendada pelo próprio tráfego (gancho do namespace "salary"),
+  no máximo a cada `database_sync_interval_seconds`, em segundo plano. Nenhuma
+  requisição espera o banco; o purge interno força a checagem na hora.
+
+Sem `DATABASE_URL` nada disso roda e o app serve o dataset estático.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Iterable
+
+from app.config import get_settings
+from app.core.cache import register_namespace_hook, set_namespace_version
+from app.core.database import get_pool
+from app.services.salary_data import (
+    CareerData,
+    RiskAssessment,
+    SalaryFacts,
+    compute_dataset_version,
+    get_career_index,
+    install_career_index,
+)
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Versões de dataset mantidas em memória (a atual e as anteriores mais recentes)
+DATASET_CACHE_VERSIONS = 3
+
+DDL = """
+CREATE SCHEMA IF NOT EXISTS gold;
+
+CREATE TABLE IF NOT EXISTS gold.careers (
+    id VARCHAR(50) PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    category VARCHAR(30) NOT NULL,
+    salary_base NUMERIC(12,2) NOT NULL,
+    salary_real NUMERIC(12,2) NOT NULL,
+    salary_max NUMERIC(12,2),
+    penduricalhos NUMERIC(12,2) NOT NULL DEFAULT 0,
+    source VARCHAR(300) NOT NULL,
+    source_url VARCHAR(500) NOT NULL,
+    education VARCHAR(100) NOT NULL,
+    weekly_hours SMALLINT NOT NULL,
+    risk_assessment JSONB NOT NULL,
+    color CHAR(7) NOT NULL,
+    reference VARCHAR(7) NOT NULL DEFAULT '2025',  -- Período dos valores (AAAA ou AAAA-MM)
+    position INTEGER NOT NULL DEFAULT 0  -- Ordem no dataset (a de `CAREERS`)
+);
+ALTER TABLE gold.careers ADD COLUMN IF NOT EXISTS reference VARCHAR(7) NOT NULL DEFAULT '2025';
+ALTER TABLE gold.careers ADD COLUMN IF NOT EXISTS position INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS gold.salary_dataset (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version VARCHAR(40) NOT NULL,
+    teto NUMERIC(12,2) NOT NULL,
+    custo_anual NUMERIC(16,2) NOT NULL,
+    servidores_acima INTEGER NOT NULL,
+    custo_social JSONB NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+VERSION_SQL = "SELECT version FROM gold.salary_dataset WHERE id = 1"
+
+FACTS_SQL = """
+SELECT version, teto, custo_anual, servidores_acima, custo_social
+FROM gold.salary_dataset WHERE id = 1
+"""
+
+CAREERS_SQL = """
+SELECT id, name, category, salary_base, salary_real, salary_max, penduricalhos,
+       source, source_url, education, weekly_hours, risk_assessment, color, reference
+FROM gold.careers ORDER BY position, id
+"""
+
+UPSERT_CAREER_SQL = """
+INSERT INTO gold.careers (id, name, category, salary_base, salary_real, salary_max,
+    penduricalhos, source, source_url, education, weekly_hours, risk_assessment, color, reference,
+    position)
+VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12::jsonb, $13, $14, $15)
+ON CONFLICT (id) DO UPDATE SET
+    name = EXCLUDED.name, category = EXCLUDED.category, salary_base = EXCLUDED.salary_base,
+    salary_real = EXCLUDED.salary_real, salary_max = EXCLUDED.salary_max,
+    penduricalhos = EXCLUDED.penduricalhos, source = EXCLUDED.source,
+    source_url = EXCLUDED.source_url, education = EXCLUDED.education,
+    weekly_hours = EXCLUDED.weekly_hours, risk_assessment = EXCLUDED.risk_assessment,
+    color = EXCLUDED.color, reference = EXCLUDED.reference, position = EXCLUDED.position
+"""
+
+UPSERT_FACTS_SQL = """
+INSERT INTO gold.salary_dataset (id, version, teto, custo_anual, servidores_acima, custo_social)
+VALUES (1, $1, $2, $3, $4, $5::jsonb)
+ON CONFLICT (id) DO UPDATE SET
+    version = EXCLUDED.version, teto = EXCLUDED.teto, custo_anual = EXCLUDED.custo_anual,
+    servidores_acima = EXCLUDED.servidores_acima, custo_social = EXCLUDED.custo_social,
+    updated_at = NOW()
+"""
+
+
+@dataclass
+class _SyncState:
+    """Estado da sincronização banco → índice em memória deste worker."""
+
+    enabled: bool = False
+    task: asyncio.Task | None = None
+    last_check: float = 0.0  # time.monotonic() da última checagem de versão
+    last_check_ms: float | None = None
+    last_error: str | None = None
+    loads: int = 0  # Datasets lidos do banco (cache de versões não tinha)
+
+
+_state = _SyncState()
+
+# Versão → (carreiras, números); LRU pequeno
+_datasets: OrderedDict[str, tuple[tuple[CareerData, ...], SalaryFacts]] = OrderedDict()
+
+
+def _money(value: float | None) -> Decimal | None:
+    """float → Decimal exato em centavos (parâmetro NUMERIC do asyncpg)."""
+    return None if value is None else Decimal(str(round(value, 2)))
+
+
+def _career_from_row(row) -> CareerData:
+    return CareerData(
+        id=row["id"],
+        name=row["name"],
+        category=row["category"],
+        salary_base=float(row["salary_base"]),
+        salary_real=float(row["salary_real"]),
+        salary_max=float(row["salary_max"]) if row["salary_max"] is not None else None,
+        penduricalhos=float(row["penduricalhos"]),
+        source=row["source"],
+        source_url=row["source_url"],
+        education=row["education"],
+        weekly_hours=row["weekly_hours"],
+        risk_assessment=RiskAssessment(**json.loads(row["risk_assessment"])),
+        color=row["color"],
+        reference=row["reference"],
+    )
+
+
+def _facts_from_row(row) -> SalaryFacts:
+    return SalaryFacts(
+        teto=float(row["teto"]),
+        custo_anual=float(row["custo_anual"]),
+        servidores_acima=row["servidores_acima"],
+        custo_social=MappingProxyType(json.loads(row["custo_social"])),
+    )
+
+
+def _remember(version: str, dataset: tuple[tuple[CareerData, ...], SalaryFacts]) -> None:
+    _datasets[version] = dataset
+    _datasets.move_to_end(version)
+    while len(_datasets) > DATASET_CACHE_VERSIONS:
+        _datasets.popitem(last=False)
+
+
+async def _load_dataset(conn) -> tuple[str, tuple[CareerData, ...], SalaryFacts] | None:
+    """Lê carreiras e números de um mesmo snapshot do banco."""
+    async with conn.transaction(isolation="repeatable_read", readonly=True):
+        facts_row = await conn.fetchrow(FACTS_SQL)
+        if facts_row is None:
+            return None
+        career_rows = await conn.fetch(CAREERS_SQL)
+    careers = tuple(_career_from_row(r) for r in career_rows)
+    return facts_row["version"], careers, _facts_from_row(facts_row)
+
+
+async def sync_salary_data(force: bool = False) -> bool:
+    """Instala o dataset do banco se a versão mudou; True se trocou o índice."""
+    started = time.perf_counter()
+    async with get_pool().acquire() as conn:
+        version = await conn.fetchval(VERSION_SQL)
+        _state.last_check = time.monotonic()
+        if version is None:
+            # Banco ainda sem carga: segue com o dataset atual
+            return False
+        if version == get_career_index().version and not force:
+            _state.last_check_ms = (time.perf_counter() - started) * 1000
+            return False
+
+        dataset = _datasets.get(version)
+        if dataset is None:
+            loaded = await _load_dataset(conn)
+            if loaded is None:
+                return False
+            version, careers, facts = loaded
+            dataset = (careers, facts)
+            _state.loads += 1
+        _remember(version, dataset)
+
+    careers, facts = dataset
+    changed = get_career_index().version != version
+    install_career_index(careers, version, facts)
+    set_namespace_version("salary", version)
+    _state.last_check_ms = (time.perf_counter() - started) * 1000
+    logger.info("Dataset salarial %s instalado do banco (%d carreiras)", version, len(careers))
+    return changed
+
+
+def _on_sync_done(task: asyncio.Task) -> None:
+    if _state.task is task:
+        _state.task = None
+    if task.cancelled():
+        return
+    error = task.exception()
+    _state.last_error = None if error is None else str(error)
+    if error is not None:
+        logger.warning("Falha ao sincronizar dataset salarial do banco: %s", error)
+
+
+def _ensure_sync() -> asyncio.Task:
+    """Dispara a checagem em segundo plano, coalescendo chamadas concorrentes."""
+    task = _state.task
+    if task is None or task.done():
+        task = asyncio.create_task(sync_salary_data(), name="salary-data-sync")
+        task.add_done_callback(_on_sync_done)
+        _state.task = task
+    return task
+
+
+def _kick_sync() -> None:
+    """Gancho do namespace "salary": agenda a checagem de versão se já passou do intervalo."""
+    if not _state.enabled:
+        return
+    if time.monotonic() - _state.last_check < settings.database_sync_interval_seconds:
+        return
+    # Marca antes de rodar: falhas no banco não viram uma tarefa por requisição
+    _state.last_check = time.monotonic()
+    try:
+        _ensure_sync()
+    except RuntimeError:
+        # Fora de um event loop (scripts): nada a agendar
+        pass
+
+
+register_namespace_hook("salary", _kick_sync)
+
+
+async def start_salary_sync() -> None:
+    """Carrega o dataset do banco no startup (falha → dataset estático)."""
+    _state.enabled = True
+    try:
+        await sync_salary_data()
+    except Exception as e:
+        _state.last_error = str(e)
+        logger.warning("Dataset salarial do banco indisponível no startup: %s", e)
+
+
+async def shutdown_salary_sync() -> None:
+    """Cancela a checagem em andamento. Chamado no shutdown do lifespan."""
+    _state.enabled = False
+    task = _state.task
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _state.task = None
+
+
+def salary_sync_enabled() -> bool:
+    return _state.enabled
+
+
+def get_salary_sync_status() -> dict:
+    """Métricas da sincronização com o banco."""
+    return {
+        "enabled": _state.enabled,
+        "version": get_career_index().version,
+        "careers": len(get_career_index()),
+        "last_check_age_seconds": (
+            round(time.monotonic() - _state.last_check, 1) if _state.last_check else None
+        ),
+        "last_check_ms": _state.last_check_ms,
+        "last_error": _state.last_error,
+        "loads": _state.loads,
+        "cached_versions": list(_datasets),
+    }
+
+
+async def ensure_schema(conn) -> None:
+    """Cria o schema Gold do dataset salarial se ainda não existir."""
+    await conn.execute(DDL)
+
+
+async def publish_dataset(conn, careers: Iterable[CareerData], facts: SalaryFacts) -> str:
+    """Grava carreiras e números numa transação e publica a nova versão.
+
+    Usado pelo ETL e pelo seed. Workers passam a servir a versão nova na
+    próxima checagem (ou imediatamente, após o purge do namespace "salary").
+    A ordem de `careers` é gravada (`position`) e volta igual na leitura.
+    """
+    careers = tuple(careers)
+    version = compute_dataset_version(careers, facts)
+    async with conn.transaction():
+        await conn.executemany(
+            UPSERT_CAREER_SQL,
+            [
+                (
+                    c.id,
+                    c.name,
+                    c.category,
+                    _money(c.salary_base),
+                    _money(c.salary_real),
+                    _money(c.salary_max),
+                    _money(c.penduricalhos),
+                    c.source,
+                    c.source_url,
+                    c.education,
+                    c.weekly_hours,
+                    json.dumps(asdict(c.risk_assessment), ensure_ascii=False),
+                    c.color,
+                    c.reference,
+                    position,
+                )
+                for position, c in enumerate(careers)
+            ],
+        )
+        await conn.execute(
+            "DELETE FROM gold.careers WHERE NOT (id = ANY($1::text[]))", [c.id for c in careers]
+        )
+        await conn.execute(
+            UPSERT_FACTS_SQL,
+            version,
+            _money(facts.teto),
+            _money(facts.custo_anual),
+            facts.servidores_acima,
+            json.dumps(dict(facts.custo_social), ensure_ascii=False),
+        )
+    return version
@@ -0,0 +1,4 @@
+"""Pipelines de ETL do OctoWage (Bronze → Silver → Gold).
+
+Dependências extras: `pip install -e ".[etl]"`.
+"""
@@ -0,0 +1,208 @@
+"""Exporta o snapshot colunar da Gold para o motor analítico do app.
+
+O app responde percentis por ocupação × região × ano em memória
+(`app.services.analytics`), sem consultar o PostgreSQL. Este módulo gera o
+snapshot que ele carrega, a partir dos mesmos lotes Silver em Parquet que o
+loader envia para `silver.salary_records` (mesmo recorte da view
+`gold.mv_salary_by_occupation_region`: fontes brasileiras, `country_code = 'BRA'`).
+
+- Lê cada lote só com as colunas necessárias e codifica ocupação/região em
+  dicionário por arquivo; os dicionários são unificados no fim (remapeamento
+  por `searchsorted`), então as strings nunca são materializadas linha a linha.
+- A versão é o hash dos lotes usados (rótulo + SHA-256): sem lote novo, não há
+  trabalho.
+- Grava em `DATA_DIR/gold/salary_cube-{versão}/` (diretório temporário
+  renomeado no fim) e só então troca o ponteiro `salary_cube.json`. O snapshot
+  anterior é mantido para workers que ainda o têm mapeado; os mais velhos são
+  apagados.
+
+Uso:
+    python -m etl.gold_snapshot [--force]
+"""
+
+import argparse
+import hashlib
+import logging
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app.core.storage import data_path, read_json
+from app.services.analytics import CUBE_DIR, POINTER_FILE, publish_salary_cube, write_salary_cube
+from etl.loader import SilverBatch, discover_batches, file_sha256
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ["caged", "rais", "transparencia"]
+COLUMNS = [
+    "country_code",
+    "occupation_code",
+    "occupation_name",
+    "region_code",
+    "region_name",
+    "year",
+    "salary",
+]
+SNAPSHOT_PREFIX = "salary_cube-"
+
+# Snapshots mantidos em disco (o atual e o anterior)
+KEEP_SNAPSHOTS = 2
+
+
+def snapshot_version(batches: list[SilverBatch]) -> str:
+    """Hash do conteúdo dos lotes: muda se qualquer lote entrar, sair ou mudar."""
+    digest = hashlib.sha1()
+    for batch in sorted(batches, key=lambda b: b.label):
+        digest.update(f"{batch.label}:{file_sha256(batch.path)}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+class _Dictionary:
+    """Códigos → nome, acumulados entre arquivos."""
+
+    def __init__(self) -> None:
+        self.names: dict[str, str] = {}
+
+    def add(self, codes: pa.Array, names: pa.Array) -> None:
+        table = pa.table({"code": codes, "name": names})
+        table = table.group_by("code").aggregate([("name", "max")])
+        for code, name in zip(table["code"].to_pylist(), table["name_max"].to_pylist()):
+            if name or code not in self.names:
+                self.names[code] = name or code
+
+    def finish(self) -> tuple[list[str], list[str]]:
+        codes = sorted(self.names)
+        return codes, [self.names[c] for c in codes]
+
+
+def _read_batch(batch: SilverBatch) -> pa.Table:
+    table = pq.read_table(batch.path, columns=COLUMNS)
+    keep = pc.and_(
+        pc.equal(table["country_code"], "BRA"),
+        pc.and_(pc.is_valid(table["occupation_code"]), pc.is_valid(table["region_code"])),
+    )
+    keep = pc.and_(keep, pc.is_valid(table["salary"]))
+    return table.filter(keep)
+
+
+def build_snapshot(batches: list[SilverBatch], version: str) -> Path:
+    """Lê os lotes e grava o snapshot em `DATA_DIR/gold/salary_cube-{versão}/`."""
+    occupations, regions = _Dictionary(), _Dictionary()
+    parts = []  # Por arquivo: (dicionário ocup., índices, dicionário reg., índices, ano, salário)
+    for batch in batches:
+        table = _read_batch(batch)
+        if not table.num_rows:
+            continue
+        occupations.add(table["occupation_code"], table["occupation_name"])
+        regions.add(table["region_code"], table["region_name"])
+        occ = pc.dictionary_encode(table["occupation_code"]).combine_chunks()
+        reg = pc.dictionary_encode(table["region_code"]).combine_chunks()
+        parts.append(
+            (
+                occ.dictionary.to_pylist(),
+                occ.indices.to_numpy(),
+                reg.dictionary.to_pylist(),
+                reg.indices.to_numpy(),
+                table["year"].to_numpy(),
+                pc.cast(table["salary"], pa.float64()).to_numpy().astype(np.float32),
+            )
+        )
+        logger.info("%s: %d linhas", batch.label, table.num_rows)
+
+    occupation_codes, occupation_names = occupations.finish()
+    region_codes, region_names = regions.finish()
+    occ_all = np.array(occupation_codes, dtype=object)
+    reg_all = np.array(region_codes, dtype=object)
+
+    def remap(dictionary: list[str], indices: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        mapping = np.searchsorted(codes, np.array(dictionary, dtype=object)).astype(np.int32)
+        return mapping[indices]
+
+    columns = list(zip(*parts)) if parts else [[]] * 6
+    occupation = [remap(d, i, occ_all) for d, i in zip(columns[0], columns[1])]
+    region = [remap(d, i, reg_all) for d, i in zip(columns[2], columns[3])]
+
+    def concat(arrays, dtype):
+        return np.concatenate(arrays).astype(dtype) if arrays else np.empty(0, dtype)
+
+    target = data_path(CUBE_DIR, f"{SNAPSHOT_PREFIX}{version}")
+    tmp = target.with_name(f".{target.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    meta = write_salary_cube(
+        tmp,
+        version,
+        occupation=concat(occupation, np.int32),
+        region=concat(region, np.int32),
+        year=concat(columns[4], np.int32),
+        salary=concat(columns[5], np.float32),
+        occupations=occupation_codes,
+        occupation_names=occupation_names,
+        regions=region_codes,
+        region_names=region_names,
+    )
+    shutil.rmtree(target, ignore_errors=True)
+    tmp.rename(target)
+    logger.info(
+        "Snapshot %s: %d registros, %d ocupações, %d regiões, %d–%d",
+        version,
+        meta["rows"],
+        len(occupation_codes),
+        len(region_codes),
+        meta["year_min"],
+        meta["year_max"],
+    )
+    return target
+
+
+def _prune(keep: Path) -> None:
+    """Apaga snapshots antigos, mantendo os `KEEP_SNAPSHOTS` mais recentes."""
+    snapshots = sorted(
+        (p for p in keep.parent.glob(f"{SNAPSHOT_PREFIX}*") if p.is_dir() and p != keep),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in snapshots[KEEP_SNAPSHOTS - 1 :]:
+        shutil.rmtree(old, ignore_errors=True)
+        logger.info("Snapshot antigo removido: %s", old.name)
+
+
+def export(root: Path | None = None, force: bool = False) -> str | None:
+    """Gera e publica o snapshot se os lotes mudaram. Retorna a versão publicada.
+
+    None se não há lotes ou se o snapshot atual já corresponde a eles.
+    """
+    batches = discover_batches(root, SOURCES)
+    if not batches:
+        logger.info("Nenhum lote Silver encontrado: snapshot não gerado")
+        return None
+    version = snapshot_version(batches)
+    current = read_json(data_path(CUBE_DIR, POINTER_FILE)) or {}
+    if not force and current.get("version") == version:
+        logger.info("Snapshot %s já publicado", version)
+        return None
+
+    started = time.perf_counter()
+    path = build_snapshot(batches, version)
+    publish_salary_cube(path, version)
+    _prune(path)
+    logger.info("Snapshot %s publicado em %.1fs", version, time.perf_counter() - started)
+    return version
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta o snapshot colunar da Gold para o app")
+    parser.add_argument("--root", type=Path, default=None, help="Padrão: DATA_DIR/silver")
+    parser.add_argument("--force", action="store_true", help="Regera mesmo sem lotes novos")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    export(args.root, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Utilitários HTTP dos crawlers de ETL: cliente, limite por host e retry.
+
+Os crawlers fazem milhares de requisições a APIs públicas. Regras comuns:
+
+- Um `httpx.AsyncClient` com pool por execução (conexões reaproveitadas).
+- Limite de requisições simultâneas por host (`HostLimiter`), independente
+  de quantas tarefas estejam na fila.
+- Retry com backoff exponencial e jitter completo para erros de rede, 429 e
+  5xx, respeitando `Retry-After` quando o servidor informa.
+- Para APIs com cota por chave, `AdaptiveTokenBucket` mantém a vazão no teto
+  permitido e recua sozinho quando o servidor responde 429.
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import get_settings
+
+settings = get_settings()
+
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class RetryableStatus(Exception):
+    """Resposta com status que vale nova tentativa."""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code} em {response.request.url}")
+        self.response = response
+
+
+def build_client(timeout: float = 60.0, max_connections: int = 20) -> httpx.AsyncClient:
+    """Cliente com pool para uma execução de ETL (timeouts mais longos que o app)."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        ),
+        headers={"User-Agent": f"{settings.app_title}-etl/0.1 (+https://octowage.com.br)"},
+        follow_redirects=True,
+    )
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Espera antes da tentativa `attempt + 1` (backoff exponencial, jitter completo)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def retry_after(response: httpx.Response | None) -> float | None:
+    """Segundos pedidos pelo servidor em `Retry-After` (número ou data HTTP)."""
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Erros de rede e status transitórios valem nova tentativa."""
+    return isinstance(exc, (httpx.TransportError, RetryableStatus))
+
+
+class HostLimiter:
+    """Semáforo por host: no máximo `per_host` requisições simultâneas a cada um."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def limit(self, url: str | httpx.URL) -> AsyncIterator[None]:
+        host = urlsplit(str(url)).netloc
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        async with semaphore:
+            yield
+
+
+class AdaptiveTokenBucket:
+    """Token bucket com taxa adaptativa (AIMD) para APIs com limite por chave.
+
+    Começa no teto permitido. Um 429 corta a taxa pela metade, zera os tokens
+    e pausa o bucket pelo `Retry-After` (ou um intervalo de token). Cada
+    sucesso devolve um pouco da taxa, até o teto. Assim a vazão fica colada no
+    limite real do servidor, sem rajadas que gerem 429 em cascata.
+
+    `clock` (padrão `time.monotonic`) permite testar com relógio falso.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        min_rate: float = 0.05,
+        increase: float = 0.02,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ceiling = rate  # Requisições/s permitidas
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.min_rate = min_rate
+        self.increase = increase  # Fração do teto recuperada por sucesso
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Segundos até haver um token (sem consumir)."""
+        now = self._clock()
+        self._refill(now)
+        blocked = max(0.0, self._blocked_until - now)
+        # Tolerância: após dormir exatamente `wait`, o refill pode parar em
+        # 0.999…, e um `wait` de 1e-16 não avança um relógio na casa dos milhares.
+        missing = 1 - self.tokens
+        return max(blocked, missing / self.rate if missing > 1e-9 else 0.0)
+
+    async def acquire(self) -> None:
+        """Espera e consome um token (ordem de chegada)."""
+        async with self._lock:
+            while True:
+                wait = self.wait_time()
+                if wait <= 0:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep(wait)
+
+    def set_ceiling(self, rate: float) -> None:
+        """Muda o teto (ex.: limite noturno maior)."""
+        self.ceiling = rate
+        self.capacity = max(1.0, rate)
+        self.rate = min(self.rate, rate)
+
+    def on_success(self) -> None:
+        self.rate = min(self.ceiling, self.rate + self.increase * self.ceiling)
+
+    def on_throttle(self, retry_after_seconds: float | None = None) -> None:
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        pause = retry_after_seconds if retry_after_seconds is not None else 1 / self.rate
+        self._blocked_until = max(self._blocked_until, self._clock() + pause)
@@ -0,0 +1,610 @@
+"""Carga em massa da camada Silver no PostgreSQL (`silver.salary_records`).
+
+Dezenas de milhões de linhas não passam por INSERT/ORM. O loader:
+
+- Lê cada lote Silver (um Parquet por fonte/ano/mês) em streaming e envia por
+  `COPY ... FROM STDIN (FORMAT binary)` do asyncpg (`copy_to_table`), sem
+  montar SQL nem converter para texto. O stream binário é montado direto
+  dos buffers Arrow (`etl.pgcopy`), sem uma tupla Python por linha, numa
+  thread com um bloco adiantado: o event loop só repassa bytes e as
+  partições em paralelo não se serializam na codificação.
+- Grava direto na partição do ano (`silver.salary_records_AAAA`), criada se
+  faltar: o PostgreSQL não precisa rotear tupla a tupla pela tabela pai.
+- Por partição, numa única transação: apaga as linhas dos lotes que serão
+  recarregados, derruba os índices da partição, faz os COPY, recria os
+  índices (um `CREATE INDEX` no fim é bem mais barato que manter o índice
+  linha a linha) e registra os lotes no livro-razão. Se algo falhar, tudo
+  volta — inclusive os índices.
+- É idempotente por lote (fonte, ano, mês): `silver.load_batches` guarda o
+  SHA-256 do Parquet carregado. Lote igual é pulado; lote alterado substitui
+  as linhas anteriores dele, nunca duplica.
+- Anos diferentes são carregados em paralelo (uma conexão por partição).
+- `salary_usd` ausente no Parquet é calculado na carga, lote a lote, com o
+  câmbio médio do mês (ou do ano, em lotes anuais) do histórico PTAX
+  (`etl.sources.bcb_ptax`), via `etl.transformers.currency`. Valores já
+  presentes no Parquet são mantidos; sem cotação, a coluna fica nula.
+
+Enquanto a transação de um ano está aberta, a partição fica bloqueada para
+leitura (o `DROP INDEX` pega lock exclusivo). Para cargas pequenas numa
+partição grande, `drop_indexes=False` mantém os índices.
+
+Layout esperado dos lotes (ver `discover_batches`):
+    DATA_DIR/silver/{fonte}/{ano}/{MM}.parquet   (mensal)
+    DATA_DIR/silver/{fonte}/{ano}/anual.parquet  (anual, ex.: RAIS)
+
+Uso:
+    python -m etl.loader [--sources caged,rais] [--years 2023,2024] [--jobs 4]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import asyncpg
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app.config import get_settings
+from app.core.database import asyncpg_dsn
+from app.core.storage import data_path
+from app.core.timeseries import TimeSeriesFile
+from app.services.exchange_rate import RATE_HISTORY_FILE
+from etl import pgcopy
+from etl.transformers.currency import RateTable, convert
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+SCHEMA = "silver"
+TABLE = "salary_records"
+LEDGER = "load_batches"
+
+# Faixa aceita pela tabela (CHECK na tabela pai)
+MIN_YEAR, MAX_YEAR = 2000, 2030
+
+ANNUAL_FILE = "anual.parquet"
+
+# Linhas por leitura do Parquet (memória do loader ≈ 1 lote de leitura)
+READ_BATCH_ROWS = 50_000
+
+# Moeda de `salary_usd`
+USD = "USD"
+
+# Memória para a reconstrução de índices (por sessão)
+INDEX_MAINTENANCE_WORK_MEM = "512MB"
+
+# Colunas carregadas (sem `id` e `created_at`, preenchidos pelo banco) e o
+# tipo Arrow codificado no tipo da coluna pelo `etl.pgcopy`
+SILVER_SCHEMA = pa.schema(
+    [
+        ("source", pa.string()),
+        ("country_code", pa.string()),
+        ("region_code", pa.string()),
+        ("region_name", pa.string()),
+        ("occupation_code", pa.string()),
+        ("occupation_name", pa.string()),
+        ("sector_code", pa.string()),
+        ("sector_name", pa.string()),
+        ("year", pa.int16()),
+        ("month", pa.int16()),
+        ("salary", pa.decimal128(12, 2)),
+        ("currency", pa.string()),
+        ("salary_usd", pa.decimal128(12, 2)),
+        ("salary_ppp", pa.decimal128(12, 2)),
+        ("employment_type", pa.string()),
+        ("education_level", pa.string()),
+        ("gender", pa.string()),
+        ("age_group", pa.string()),
+        ("hours_weekly", pa.int16()),
+    ]
+)
+COPY_COLUMNS = SILVER_SCHEMA.names
+
+# Índices mantidos por partição (sufixo → definição). Ficam nas partições, e
+# não na tabela pai, para poderem ser derrubados e recriados durante a carga.
+PARTITION_INDEXES = {
+    "country_year": "(country_code, year DESC)",
+    "occupation": "(occupation_code)",
+    "region": "(region_code, year DESC)",
+    "source_month": "(source, month)",  # Usado para substituir um lote
+}
+
+# Id da transação corrente (PostgreSQL 13+), como BIGINT
+XACT_ID = "(pg_current_xact_id()::text::bigint)"
+
+# Schema de `docs/ARCHITECTURE_v1.0.md` §1.3. Em tabela particionada a chave
+# primária teria de incluir `year`; como `id` não é usado em buscas, fica só
+# a sequência.
+DDL = f"""
+CREATE SCHEMA IF NOT EXISTS {SCHEMA};
+
+CREATE TABLE IF NOT EXISTS {SCHEMA}.{TABLE} (
+    id BIGSERIAL,
+    source VARCHAR(20) NOT NULL,
+    country_code CHAR(3) NOT NULL,
+    region_code VARCHAR(20),
+    region_name VARCHAR(100),
+    occupation_code VARCHAR(20) NOT NULL,
+    occupation_name VARCHAR(200),
+    sector_code VARCHAR(20),
+    sector_name VARCHAR(200),
+    year SMALLINT NOT NULL,
+    month SMALLINT,
+    salary NUMERIC(12,2) NOT NULL,
+    currency CHAR(3) NOT NULL,
+    salary_usd NUMERIC(12,2),
+    salary_ppp NUMERIC(12,2),
+    employment_type VARCHAR(20),
+    education_level VARCHAR(50),
+    gender CHAR(1),
+    age_group VARCHAR(20),
+    hours_weekly SMALLINT,
+    created_at TIMESTAMP DEFAULT NOW(),
+    CONSTRAINT pk_salary_year CHECK (year >= {MIN_YEAR} AND year <= {MAX_YEAR})
+) PARTITION BY RANGE (year);
+
+CREATE TABLE IF NOT EXISTS {SCHEMA}.{LEDGER} (
+    source VARCHAR(20) NOT NULL,
+    year SMALLINT NOT NULL,
+    month SMALLINT NOT NULL,  -- 0 = lote anual
+    sha256 CHAR(64) NOT NULL,
+    rows BIGINT NOT NULL,
+    seconds REAL,
+    loaded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    -- Transação da carga: marcador monotônico comparado pelo orquestrador
+    -- com o snapshot de cada refresh (`loaded_at` é o início da transação)
+    xact_id BIGINT NOT NULL DEFAULT {XACT_ID},
+    PRIMARY KEY (source, year, month)
+);
+
+ALTER TABLE {SCHEMA}.{LEDGER} ADD COLUMN IF NOT EXISTS xact_id BIGINT NOT NULL DEFAULT {XACT_ID};
+"""
+
+
+class LoadError(Exception):
+    """Lote inválido para a carga (ano fora da partição, schema incompatível)."""
+
+
+@dataclass(frozen=True)
+class SilverBatch:
+    """Um lote Silver: todas as linhas de uma fonte num mês (ou ano)."""
+
+    source: str
+    year: int
+    month: int | None  # None = dado anual
+    path: Path
+
+    @property
+    def ledger_month(self) -> int:
+        return self.month or 0
+
+    @property
+    def label(self) -> str:
+        if self.month:
+            return f"{self.source}/{self.year}/{self.month:02d}"
+        return f"{self.source}/{self.year}"
+
+
+@dataclass
+class PartitionStats:
+    """Métricas da carga de uma partição (um ano)."""
+
+    year: int
+    batches: int = 0
+    rows: int = 0
+    deleted: int = 0
+    delete_seconds: float = 0.0
+    copy_seconds: float = 0.0
+    index_seconds: float = 0.0
+
+    @property
+    def total_seconds(self) -> float:
+        return self.delete_seconds + self.copy_seconds + self.index_seconds
+
+
+@dataclass
+class LoadReport:
+    """Resumo de uma execução do loader."""
+
+    partitions: list[PartitionStats] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)  # Lotes já carregados (mesmo hash)
+    failed: dict[int, str] = field(default_factory=dict)  # Ano → erro
+    wall_seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(p.rows for p in self.partitions)
+
+    def log(self) -> None:
+        copy = sum(p.copy_seconds for p in self.partitions)
+        index = sum(p.index_seconds for p in self.partitions)
+        logger.info(
+            "%d partição(ões), %d linhas em %.1fs (%.0f l/s; COPY %.0f l/s, índices %.1fs); "
+            "%d lote(s) inalterado(s), %d falha(s)",
+            len(self.partitions),
+            self.rows,
+            self.wall_seconds,
+            self.rows / self.wall_seconds if self.wall_seconds else 0.0,
+            self.rows / copy if copy else 0.0,
+            index,
+            len(self.skipped),
+            len(self.failed),
+        )
+
+
+def partition_name(year: int) -> str:
+    return f"{TABLE}_{year}"
+
+
+def discover_batches(
+    root: Path | None = None,
+    sources: list[str] | None = None,
+    years: list[int] | None = None,
+) -> list[SilverBatch]:
+    """Lotes Silver em disco (`{fonte}/{ano}/{MM|anual}.parquet`)."""
+    root = Path(root or data_path(SCHEMA))
+    batches = []
+    for path in sorted(root.glob("*/*/*.parquet")):
+        source, year_dir = path.parts[-3], path.parts[-2]
+        if not year_dir.isdigit() or (sources and source not in sources):
+            continue
+        year = int(year_dir)
+        if years and year not in years:
+            continue
+        if path.name == ANNUAL_FILE:
+            month = None
+        elif path.stem.isdigit() and 1 <= int(path.stem) <= 12:
+            month = int(path.stem)
+        else:
+            continue
+        batches.append(SilverBatch(source, year, month, path))
+    return batches
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def conform_batch(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """Ajusta um lote lido ao `SILVER_SCHEMA` (colunas ausentes → nulas).
+
+    Valores monetários em float são arredondados a centavos e viram
+    decimal: o asyncpg codifica `Decimal` direto em NUMERIC binário.
+    """
+    arrays = []
+    for target in SILVER_SCHEMA:
+        idx = batch.schema.get_field_index(target.name)
+        if idx < 0:
+            arrays.append(pa.nulls(batch.num_rows, target.type))
+            continue
+        column = batch.column(idx)
+        if pa.types.is_decimal(target.type) and pa.types.is_floating(column.type):
+            column = pc.round(column, target.type.scale)
+        if column.type != target.type:
+            column = column.cast(target.type)
+        arrays.append(column)
+    return pa.RecordBatch.from_arrays(arrays, schema=SILVER_SCHEMA)
+
+
+def _check_batch(batch: SilverBatch, data: pa.RecordBatch) -> None:
+    """Todas as linhas precisam ser do lote declarado (fonte, ano, mês)."""
+    checks = {"source": batch.source, "year": batch.year, "month": batch.month}
+    for name, expected in checks.items():
+        column = data.column(name)
+        if expected is None:
+            ok = column.null_count == len(column)
+        else:
+            ok = column.null_count == 0 and pc.all(pc.equal(column, expected)).as_py()
+        if not ok:
+            raise LoadError(f"{batch.label}: coluna {name} com valores fora do lote ({expected!r})")
+
+
+def load_rate_table(path: Path | None = None) -> RateTable | None:
+    """Cotações diárias do histórico PTAX (None se o arquivo ainda não existe)."""
+    path = Path(path or data_path(RATE_HISTORY_FILE))
+    if not path.exists():
+        logger.warning("%s não encontrado: salary_usd só virá do Parquet", path)
+        return None
+    history = TimeSeriesFile(path)
+    try:
+        return RateTable.from_timeseries(history)
+    finally:
+        history.close()
+
+
+def fill_salary_usd(data: pa.RecordBatch, rates: RateTable) -> pa.RecordBatch:
+    """Preenche `salary_usd` nulo convertendo `salary` com o câmbio do período.
+
+    `rates` já vem agregada no período do lote (`monthly()` ou `yearly()`):
+    a data de referência de cada linha é o 1º dia do mês (ou 1º de janeiro).
+    """
+    usd = data.column("salary_usd")
+    if usd.null_count == 0:
+        return data
+    salary = data.column("salary").cast(pa.float64()).to_numpy(zero_copy_only=False)
+    currency = pc.fill_null(data.column("currency"), "").to_numpy(zero_copy_only=False)
+    year = data.column("year").to_numpy(zero_copy_only=False).astype(np.int64)
+    month = pc.fill_null(data.column("month"), 1).to_numpy(zero_copy_only=False)
+    periods = ((year - 1970) * 12 + month.astype(np.int64) - 1).astype("datetime64[M]")
+
+    converted = convert(salary, currency.astype("U3"), periods.astype("datetime64[D]"), rates, USD)
+    column = pa.array(converted, mask=np.isnan(converted))
+    target = SILVER_SCHEMA.field("salary_usd").type
+    column = pc.round(column, target.scale).cast(target)
+    idx = SILVER_SCHEMA.get_field_index("salary_usd")
+    arrays = list(data.columns)
+    arrays[idx] = pc.if_else(pc.is_null(usd), column, usd)
+    return pa.RecordBatch.from_arrays(arrays, schema=SILVER_SCHEMA)
+
+
+def iter_batches(batch: SilverBatch, rates: RateTable | None = None):
+    """Lotes Arrow do Parquet no `SILVER_SCHEMA`, validados (em streaming).
+
+    Com `rates` (cotações diárias), preenche `salary_usd` ausente.
+    """
+    if rates is not None:
+        rates = rates.yearly() if batch.month is None else rates.monthly()
+    parquet = pq.ParquetFile(batch.path)
+    for data in parquet.iter_batches(batch_size=READ_BATCH_ROWS):
+        data = conform_batch(data)
+        _check_batch(batch, data)
+        if rates is not None:
+            data = fill_salary_usd(data, rates)
+        yield data
+
+
+def iter_records(batch: SilverBatch, rates: RateTable | None = None):
+    """Linhas do Parquet como tuplas na ordem de `COPY_COLUMNS` (INSERT, testes)."""
+    for data in iter_batches(batch, rates):
+        yield from zip(*(column.to_pylist() for column in data.columns))
+
+
+def iter_copy_data(batch: SilverBatch, rates: RateTable | None = None):
+    """Stream `COPY ... (FORMAT binary)` do lote, um bloco de bytes por leitura."""
+    yield pgcopy.HEADER
+    for data in iter_batches(batch, rates):
+        yield pgcopy.encode_batch(data)
+    yield pgcopy.TRAILER
+
+
+async def aiter_copy_data(batch: SilverBatch, rates: RateTable | None = None):
+    """`iter_copy_data` com cada bloco lido e codificado numa thread.
+
+    Um bloco fica adiantado: enquanto o asyncpg envia um, o próximo é
+    montado, e o event loop segue livre para as outras partições.
+    """
+    chunks = iter_copy_data(batch, rates)
+    pending = asyncio.ensure_future(asyncio.to_thread(next, chunks, None))
+    try:
+        while (chunk := await pending) is not None:
+            pending = asyncio.ensure_future(asyncio.to_thread(next, chunks, None))
+            yield chunk
+    finally:
+        if pending.done():
+            chunks.close()
+        else:
+            # COPY abortado: fecha o gerador quando a thread soltá-lo
+            pending.add_done_callback(lambda f: (f.cancelled() or f.exception(), chunks.close()))
+
+
+async def ensure_schema(conn: asyncpg.Connection) -> None:
+    """Cria schema, tabela particionada e livro-razão se ainda não existirem."""
+    await conn.execute(DDL)
+
+
+async def ensure_partition(conn: asyncpg.Connection, year: int) -> str:
+    """Cria a partição do ano (e seus índices) se faltar; devolve o nome."""
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise LoadError(f"ano {year} fora da faixa {MIN_YEAR}–{MAX_YEAR}")
+    name = partition_name(year)
+    await conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA}.{name} PARTITION OF {SCHEMA}.{TABLE} "
+        f"FOR VALUES FROM ({year}) TO ({year + 1})"
+    )
+    await _create_indexes(conn, name)
+    return name
+
+
+async def _drop_indexes(conn: asyncpg.Connection, partition: str) -> None:
+    for suffix in PARTITION_INDEXES:
+        await conn.execute(f"DROP INDEX IF EXISTS {SCHEMA}.{partition}_{suffix}")
+
+
+async def _create_indexes(conn: asyncpg.Connection, partition: str) -> None:
+    for suffix, definition in PARTITION_INDEXES.items():
+        await conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {partition}_{suffix} ON {SCHEMA}.{partition} {definition}"
+        )
+
+
+async def _pending_batches(
+    conn: asyncpg.Connection, batches: list[SilverBatch], force: bool, report: LoadReport
+) -> list[tuple[SilverBatch, str]]:
+    """Lotes a carregar (com o hash), pulando os já carregados sem mudança."""
+    loaded = {
+        (r["source"], r["month"]): r["sha256"]
+        for r in await conn.fetch(
+            f"SELECT source, month, sha256 FROM {SCHEMA}.{LEDGER} WHERE year = $1", batches[0].year
+        )
+    }
+    pending = []
+    for batch in batches:
+        sha256 = await asyncio.to_thread(file_sha256, batch.path)
+        if not force and loaded.get((batch.source, batch.ledger_month)) == sha256:
+            report.skipped.append(batch.label)
+            continue
+        pending.append((batch, sha256))
+    return pending
+
+
+async def load_partition(
+    conn: asyncpg.Connection,
+    year: int,
+    batches: list[SilverBatch],
+    report: LoadReport,
+    drop_indexes: bool = True,
+    force: bool = False,
+    rates: RateTable | None = None,
+) -> PartitionStats | None:
+    """Carrega os lotes de um ano na partição dele, numa única transação."""
+    partition = await ensure_partition(conn, year)
+    pending = await _pending_batches(conn, batches, force, report)
+    if not pending:
+        return None
+
+    stats = PartitionStats(year=year, batches=len(pending))
+    async with conn.transaction():
+        # Remove a carga anterior dos lotes (antes de derrubar o índice que a acha)
+        t = time.perf_counter()
+        for batch, _ in pending:
+            month_filter = "month IS NULL" if batch.month is None else f"month = {batch.month}"
+            status = await conn.execute(
+                f"DELETE FROM {SCHEMA}.{partition} WHERE source = $1 AND {month_filter}",
+                batch.source,
+            )
+            stats.deleted += int(status.split()[-1])
+        stats.delete_seconds = time.perf_counter() - t
+
+        if drop_indexes:
+            await _drop_indexes(conn, partition)
+
+        for batch, sha256 in pending:
+            t = time.perf_counter()
+            status = await conn.copy_to_table(
+                partition,
+                schema_name=SCHEMA,
+                columns=COPY_COLUMNS,
+                source=aiter_copy_data(batch, rates),
+                format="binary",
+            )
+            elapsed = time.perf_counter() - t
+            rows = int(status.split()[-1])
+            stats.rows += rows
+            stats.copy_seconds += elapsed
+            await conn.execute(
+                f"INSERT INTO {SCHEMA}.{LEDGER} (source, year, month, sha256, rows, seconds) "
+                "VALUES ($1, $2, $3, $4, $5, $6) "
+                "ON CONFLICT (source, year, month) DO UPDATE SET sha256 = EXCLUDED.sha256, "
+                "rows = EXCLUDED.rows, seconds = EXCLUDED.seconds, loaded_at = NOW(), "
+                "xact_id = EXCLUDED.xact_id",
+                batch.source,
+                year,
+                batch.ledger_month,
+                sha256,
+                rows,
+                elapsed,
+            )
+            rate = rows / elapsed if elapsed else 0
+            logger.info("%s: %d linhas em %.1fs (%.0f l/s)", batch.label, rows, elapsed, rate)
+
+        if drop_indexes:
+            t = time.perf_counter()
+            await conn.execute(f"SET LOCAL maintenance_work_mem = '{INDEX_MAINTENANCE_WORK_MEM}'")
+            await _create_indexes(conn, partition)
+            stats.index_seconds = time.perf_counter() - t
+
+    # Estatísticas novas para o planner (fora da transação, sem segurar locks)
+    await conn.execute(f"ANALYZE {SCHEMA}.{partition}")
+    return stats
+
+
+async def load(
+    batches: list[SilverBatch],
+    dsn: str | None = None,
+    jobs: int = 4,
+    drop_indexes: bool = True,
+    force: bool = False,
+    rates: RateTable | None = None,
+) -> LoadReport:
+    """Carrega os lotes, uma partição (ano) por conexão, até `jobs` em paralelo.
+
+    `rates` (padrão: o histórico PTAX em disco) preenche `salary_usd` ausente.
+    """
+    report = LoadReport()
+    if not batches:
+        return report
+    dsn = asyncpg_dsn(dsn or settings.database_url)
+    if not dsn:
+        raise LoadError("DATABASE_URL não configurada")
+
+    if rates is None:
+        rates = await asyncio.to_thread(load_rate_table)
+
+    by_year: dict[int, list[SilverBatch]] = {}
+    for batch in batches:
+        by_year.setdefault(batch.year, []).append(batch)
+
+    started = time.perf_counter()
+    async with asyncpg.create_pool(dsn, min_size=1, max_size=jobs) as pool:
+        async with pool.acquire() as conn:
+            await ensure_schema(conn)
+
+        async def run(year: int) -> None:
+            async with pool.acquire() as conn:
+                try:
+                    stats = await load_partition(
+                        conn, year, by_year[year], report, drop_indexes, force, rates
+                    )
+                except Exception as e:
+                    logger.error("Partição %d: carga revertida: %s", year, e)
+                    report.failed[year] = str(e)
+                    return
+            if stats is not None:
+                report.partitions.append(stats)
+                logger.info(
+                    "Partição %d: %d lote(s), %d linhas (%d substituídas), "
+                    "COPY %.1fs, índices %.1fs",
+                    year,
+                    stats.batches,
+                    stats.rows,
+                    stats.deleted,
+                    stats.copy_seconds,
+                    stats.index_seconds,
+                )
+
+        await asyncio.gather(*(run(year) for year in sorted(by_year)))
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def _csv_list(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Carga da camada Silver no PostgreSQL (COPY binário)"
+    )
+    parser.add_argument("--root", type=Path, default=None, help="Padrão: DATA_DIR/silver")
+    parser.add_argument("--sources", type=_csv_list, default=None, help="Ex.: caged,rais")
+    parser.add_argument("--years", type=lambda v: [int(y) for y in _csv_list(v)], default=None)
+    parser.add_argument("--jobs", type=int, default=4, help="Partições carregadas em paralelo")
+    parser.add_argument(
+        "--keep-indexes", action="store_true", help="Não derruba os índices (cargas pequenas)"
+    )
+    parser.add_argument("--force", action="store_true", help="Recarrega lotes já carregados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    batches = discover_batches(args.root, args.sources, args.years)
+    report = asyncio.run(
+        load(batches, jobs=args.jobs, drop_indexes=not args.keep_indexes, force=args.force)
+    )
+    report.log()
+    if report.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
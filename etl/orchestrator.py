@@ -0,0 +1,546 @@
+"""Orquestrador da camada Gold: refresh das materialized views e invalidação.
+
+Depois de uma carga na Silver (`etl.loader`), só as views afetadas são
+atualizadas, e só o cache que depende delas é invalidado:
+
+- Cada view Gold declara de que parte da Silver depende (fontes e anos de
+  `silver.salary_records`) e de quais outras views. O grafo fica em `VIEWS`.
+- O que mudou vem do livro-razão do loader (`silver.load_batches.xact_id`,
+  a transação que gravou o lote) comparado com o snapshot do último refresh
+  de cada view (`gold.view_refreshes.snapshot_xmin`). Um lote cuja transação
+  ainda estava aberta no refresh entra no próximo, mesmo que tenha começado
+  antes dele. Uma carga mensal do CAGED não toca views que só leem RAIS ou
+  dados internacionais.
+- As afetadas (e as que dependem delas, transitivamente) são atualizadas com
+  `REFRESH MATERIALIZED VIEW CONCURRENTLY` — leitores nunca ficam bloqueados.
+  Views sem dependência entre si rodam em paralelo, cada uma na sua conexão;
+  uma view só começa quando as views de que depende terminaram. Falha numa
+  view pula as que dependem dela, sem derrubar as outras.
+- Se a view de ocupação × região foi atualizada, o snapshot colunar do motor
+  analítico do app é regerado (`etl.gold_snapshot`) antes do aviso.
+- No fim, o app recebe um `POST /internal/purge` só com os namespaces e
+  surrogate keys que as views atualizadas alimentam. O resto do cache (e do
+  nginx) continua quente.
+
+Uso:
+    python -m etl.orchestrator [--views mv_caged_monthly] [--all] [--jobs 3] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+import asyncpg
+
+from app.config import get_settings
+from app.core.database import asyncpg_dsn
+from app.services.analytics import NAMESPACE as ANALYTICS_NAMESPACE
+from etl import gold_snapshot, loader
+from etl.http import (
+    RETRYABLE_STATUS,
+    RetryableStatus,
+    backoff_delay,
+    build_client,
+    is_retryable,
+    retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+GOLD = "gold"
+REFRESH_LEDGER = "view_refreshes"
+
+# Tentativas de avisar o app (purge) antes de desistir
+PURGE_RETRIES = 3
+
+# View cujo refresh regera o snapshot do motor analítico (mesmo recorte da Silver)
+SNAPSHOT_VIEW = "mv_salary_by_occupation_region"
+
+
+@dataclass(frozen=True)
+class SilverDependency:
+    """Fatia de `silver.salary_records` lida por uma view."""
+
+    sources: frozenset[str] | None = None  # None = todas as fontes
+    min_year: int | None = None  # None = todos os anos
+
+    def matches(self, source: str, year: int) -> bool:
+        if self.sources is not None and source not in self.sources:
+            return False
+        return self.min_year is None or year >= self.min_year
+
+
+@dataclass(frozen=True)
+class GoldView:
+    """Uma materialized view da camada Gold e o que ela alimenta no app."""
+
+    name: str
+    query: str
+    unique_key: tuple[str, ...]  # Índice único exigido pelo REFRESH CONCURRENTLY
+    silver: SilverDependency | None = None
+    upstream: tuple[str, ...] = ()  # Outras views lidas por esta
+    namespaces: tuple[str, ...] = ()  # Namespaces de cache do app invalidados
+    keys: tuple[str, ...] = ()  # Surrogate keys extras renovadas no nginx
+    indexes: tuple[str, ...] = ()  # Índices adicionais (definição entre parênteses)
+
+    @property
+    def qualified(self) -> str:
+        return f"{GOLD}.{self.name}"
+
+
+VIEWS: tuple[GoldView, ...] = (
+    GoldView(
+        name="mv_salary_by_occupation_region",
+        query="""
+            SELECT
+                occupation_code,
+                region_code,
+                year,
+                COALESCE(month, 0) AS month,
+                MAX(occupation_name) AS occupation_name,
+                MAX(region_name) AS region_name,
+                percentile_cont(0.25) WITHIN GROUP (ORDER BY salary) AS p25,
+                percentile_cont(0.50) WITHIN GROUP (ORDER BY salary) AS p50_median,
+                percentile_cont(0.75) WITHIN GROUP (ORDER BY salary) AS p75,
+                AVG(salary) AS mean_salary,
+                COUNT(*) AS sample_size
+            FROM silver.salary_records
+            WHERE country_code = 'BRA'
+            GROUP BY occupation_code, region_code, year, COALESCE(month, 0)
+        """,
+        unique_key=("occupation_code", "region_code", "year", "month"),
+        silver=SilverDependency(sources=frozenset({"caged", "rais", "transparencia"})),
+        namespaces=(ANALYTICS_NAMESPACE,),
+        indexes=("(occupation_code, region_code, year DESC)",),
+    ),
+    GoldView(
+        name="mv_region_year_summary",
+        query="""
+            SELECT
+                region_code,
+                year,
+                MAX(region_name) AS region_name,
+                SUM(mean_salary * sample_size) / NULLIF(SUM(sample_size), 0) AS mean_salary,
+                SUM(sample_size) AS sample_size,
+                COUNT(DISTINCT occupation_code) AS occupations
+            FROM gold.mv_salary_by_occupation_region
+            GROUP BY region_code, year
+        """,
+        unique_key=("region_code", "year"),
+        upstream=("mv_salary_by_occupation_region",),
+    ),
+    GoldView(
+        name="mv_caged_monthly",
+        query="""
+            SELECT
+                region_code,
+                year,
+                month,
+                COUNT(*) AS records,
+                AVG(salary) AS mean_salary,
+                percentile_cont(0.50) WITHIN GROUP (ORDER BY salary) AS median_salary
+            FROM silver.salary_records
+            WHERE source = 'caged' AND year >= 2020
+            GROUP BY region_code, year, month
+        """,
+        unique_key=("region_code", "year", "month"),
+        # Novo CAGED começa em 2020: cargas anteriores não afetam esta view
+        silver=SilverDependency(sources=frozenset({"caged"}), min_year=2020),
+    ),
+    GoldView(
+        name="mv_international_by_country",
+        query="""
+            SELECT
+                country_code,
+                year,
+                occupation_code,
+                percentile_cont(0.50) WITHIN GROUP (ORDER BY salary_usd) AS median_usd,
+                percentile_cont(0.50) WITHIN GROUP (ORDER BY salary_ppp) AS median_ppp,
+                COUNT(*) AS sample_size
+            FROM silver.salary_records
+            WHERE source IN ('wid', 'oecd', 'ilo')
+            GROUP BY country_code, year, occupation_code
+        """,
+        unique_key=("country_code", "year", "occupation_code"),
+        silver=SilverDependency(sources=frozenset({"wid", "oecd", "ilo"})),
+    ),
+)
+
+LEDGER_DDL = f"""
+CREATE SCHEMA IF NOT EXISTS {GOLD};
+
+CREATE TABLE IF NOT EXISTS {GOLD}.{REFRESH_LEDGER} (
+    view_name VARCHAR(100) PRIMARY KEY,
+    refreshed_at TIMESTAMP NOT NULL,  -- Início do último refresh bem-sucedido
+    -- xmin do snapshot tirado antes do refresh: transações abaixo dele já
+    -- tinham terminado e estão na view
+    snapshot_xmin BIGINT,
+    seconds REAL,
+    row_count BIGINT
+);
+
+ALTER TABLE {GOLD}.{REFRESH_LEDGER} ADD COLUMN IF NOT EXISTS snapshot_xmin BIGINT;
+"""
+
+
+@dataclass
+class ViewResult:
+    """Resultado do refresh de uma view."""
+
+    name: str
+    status: str  # "refreshed", "failed" ou "skipped" (dependência falhou)
+    seconds: float = 0.0
+    rows: int | None = None
+    concurrent: bool = True
+    error: str | None = None
+
+
+@dataclass
+class RefreshReport:
+    """Resumo de uma execução do orquestrador."""
+
+    planned: list[str] = field(default_factory=list)
+    results: dict[str, ViewResult] = field(default_factory=dict)
+    purged_namespaces: list[str] = field(default_factory=list)
+    purged_keys: list[str] = field(default_factory=list)
+    snapshot: str | None = None  # Versão do snapshot analítico publicada
+    wall_seconds: float = 0.0
+
+    @property
+    def refreshed(self) -> list[str]:
+        return [name for name, r in self.results.items() if r.status == "refreshed"]
+
+    @property
+    def failed(self) -> list[str]:
+        return [name for name, r in self.results.items() if r.status != "refreshed"]
+
+
+def _view_map(views: tuple[GoldView, ...]) -> dict[str, GoldView]:
+    by_name = {v.name: v for v in views}
+    for view in views:
+        missing = [u for u in view.upstream if u not in by_name]
+        if missing:
+            raise ValueError(f"{view.name}: depende de views desconhecidas {missing}")
+    _topological_order(by_name)  # Falha cedo se houver ciclo
+    return by_name
+
+
+def _topological_order(by_name: dict[str, GoldView]) -> list[str]:
+    """Ordem em que cada view vem depois das que ela lê (erro se houver ciclo)."""
+    order: list[str] = []
+    state: dict[str, int] = {}  # 1 = visitando, 2 = pronto
+
+    def visit(name: str) -> None:
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise ValueError(f"Ciclo de dependência entre views em {name}")
+        state[name] = 1
+        for upstream in by_name[name].upstream:
+            visit(upstream)
+        state[name] = 2
+        order.append(name)
+
+    for name in by_name:
+        visit(name)
+    return order
+
+
+def with_dependents(names: set[str], by_name: dict[str, GoldView]) -> set[str]:
+    """`names` mais todas as views que dependem delas, transitivamente."""
+    selected = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for view in by_name.values():
+            if view.name not in selected and selected.intersection(view.upstream):
+                selected.add(view.name)
+                changed = True
+    return selected
+
+
+def affected_views(
+    batches: list[tuple[str, int, int]],
+    last_refresh: dict[str, int],
+    by_name: dict[str, GoldView],
+) -> set[str]:
+    """Views cuja fatia da Silver recebeu lotes que o último refresh não viu.
+
+    `batches` são (fonte, ano, xact_id) do livro-razão do loader;
+    `last_refresh` é o `snapshot_xmin` de cada view. Um lote com
+    `xact_id >= snapshot_xmin` pode não ter sido visível no refresh e conta
+    como novo (no pior caso, um refresh a mais). Views nunca atualizadas
+    entram sempre. Views que só leem outras views entram via
+    `with_dependents`.
+    """
+    direct = set()
+    for view in by_name.values():
+        xmin = last_refresh.get(view.name)
+        if view.silver is None or xmin is None:
+            continue
+        if any(
+            xact_id >= xmin and view.silver.matches(source, year)
+            for source, year, xact_id in batches
+        ):
+            direct.add(view.name)
+    never = {name for name in by_name if name not in last_refresh}
+    return with_dependents(direct | never, by_name)
+
+
+async def ensure_views(conn: asyncpg.Connection, views: tuple[GoldView, ...] = VIEWS) -> None:
+    """Cria o livro-razão e as views que faltam (vazias; o 1º refresh as popula)."""
+    await loader.ensure_schema(conn)
+    await conn.execute(LEDGER_DDL)
+    for view in views:
+        await conn.execute(
+            f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view.qualified} AS {view.query} WITH NO DATA"
+        )
+        await conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {view.name}_key ON {view.qualified} "
+            f"({', '.join(view.unique_key)})"
+        )
+        for i, definition in enumerate(view.indexes, 1):
+            await conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {view.name}_idx{i} ON {view.qualified} {definition}"
+            )
+
+
+async def _load_state(
+    conn: asyncpg.Connection,
+) -> tuple[list[tuple[str, int, int]], dict[str, int]]:
+    batches = [
+        (r["source"], r["year"], r["xact_id"])
+        for r in await conn.fetch("SELECT source, year, xact_id FROM silver.load_batches")
+    ]
+    # Refreshes anteriores ao `snapshot_xmin` contam como nunca feitos
+    last_refresh = {
+        r["view_name"]: r["snapshot_xmin"]
+        for r in await conn.fetch(
+            f"SELECT view_name, snapshot_xmin FROM {GOLD}.{REFRESH_LEDGER} "
+            "WHERE snapshot_xmin IS NOT NULL"
+        )
+    }
+    return batches, last_refresh
+
+
+async def refresh_view(conn: asyncpg.Connection, view: GoldView) -> ViewResult:
+    """`REFRESH ... CONCURRENTLY` (ou simples, se a view nunca foi populada)."""
+    populated = await conn.fetchval(
+        "SELECT ispopulated FROM pg_matviews WHERE schemaname = $1 AND matviewname = $2",
+        GOLD,
+        view.name,
+    )
+    concurrent = bool(populated)
+    # Snapshot tirado antes do refresh, que vê tudo o que este já via. Lotes
+    # de transações ainda abertas aqui ficam com xact_id >= xmin e entram no
+    # próximo refresh, mesmo que o COPY tenha começado antes deste.
+    started_at, snapshot_xmin = await conn.fetchrow(
+        "SELECT LOCALTIMESTAMP, pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+    )
+    t = time.perf_counter()
+    await conn.execute(
+        f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrent else ''}{view.qualified}"
+    )
+    seconds = time.perf_counter() - t
+    rows = await conn.fetchval(
+        "SELECT reltuples::bigint FROM pg_class WHERE oid = $1::regclass", view.qualified
+    )
+    await conn.execute(
+        f"INSERT INTO {GOLD}.{REFRESH_LEDGER} "
+        "(view_name, refreshed_at, snapshot_xmin, seconds, row_count) "
+        "VALUES ($1, $2, $3, $4, $5) ON CONFLICT (view_name) DO UPDATE SET "
+        "refreshed_at = EXCLUDED.refreshed_at, snapshot_xmin = EXCLUDED.snapshot_xmin, "
+        "seconds = EXCLUDED.seconds, row_count = EXCLUDED.row_count",
+        view.name,
+        started_at,
+        snapshot_xmin,
+        seconds,
+        rows,
+    )
+    return ViewResult(view.name, "refreshed", seconds, rows, concurrent)
+
+
+async def _run_refreshes(
+    pool: asyncpg.Pool, selected: set[str], by_name: dict[str, GoldView], report: RefreshReport
+) -> None:
+    """Atualiza `selected` respeitando dependências; independentes em paralelo."""
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run(name: str) -> ViewResult:
+        view = by_name[name]
+        upstream = [tasks[u] for u in view.upstream if u in tasks]
+        if upstream:
+            results = await asyncio.gather(*upstream)
+            failed = [r.name for r in results if r.status != "refreshed"]
+            if failed:
+                logger.warning("%s: pulada (dependência falhou: %s)", name, ", ".join(failed))
+                return ViewResult(name, "skipped", error=f"dependência falhou: {', '.join(failed)}")
+        async with pool.acquire() as conn:
+            try:
+                result = await refresh_view(conn, view)
+            except Exception as e:
+                logger.error("%s: refresh falhou: %s", name, e)
+                return ViewResult(name, "failed", error=str(e))
+        logger.info(
+            "%s: atualizada em %.1fs (%s linhas%s)",
+            name,
+            result.seconds,
+            result.rows,
+            "" if result.concurrent else ", primeira carga",
+        )
+        return result
+
+    # Cria na ordem topológica: cada tarefa já encontra as de suas dependências
+    for name in _topological_order(by_name):
+        if name in selected:
+            tasks[name] = asyncio.create_task(run(name), name=f"refresh-{name}")
+    for name, result in zip(tasks, await asyncio.gather(*tasks.values())):
+        report.results[name] = result
+
+
+def invalidation_targets(
+    refreshed: list[str], by_name: dict[str, GoldView]
+) -> tuple[list[str], list[str]]:
+    """Namespaces e surrogate keys alimentados pelas views atualizadas."""
+    namespaces: list[str] = []
+    keys: list[str] = []
+    for name in refreshed:
+        namespaces.extend(by_name[name].namespaces)
+        keys.extend(by_name[name].keys)
+    return list(dict.fromkeys(namespaces)), list(dict.fromkeys(keys))
+
+
+async def notify_app(
+    namespaces: list[str], keys: list[str], base_url: str | None = None
+) -> dict | None:
+    """`POST /internal/purge` no app: invalida só o que as views alimentam."""
+    base_url = (base_url or settings.internal_api_url).rstrip("/")
+    if not base_url or not settings.internal_api_token:
+        logger.warning(
+            "INTERNAL_API_URL/INTERNAL_API_TOKEN não configurados: cache do app não invalidado"
+        )
+        return None
+    async with build_client(timeout=30.0, max_connections=1) as client:
+        for attempt in range(PURGE_RETRIES + 1):
+            try:
+                resp = await client.post(
+                    f"{base_url}/internal/purge",
+                    json={"namespaces": namespaces, "keys": keys},
+                    headers={"Authorization": f"Bearer {settings.internal_api_token}"},
+                )
+                if resp.status_code in RETRYABLE_STATUS:
+                    raise RetryableStatus(resp)
+                resp.raise_for_status()
+                return resp.json()
+            except Exception as e:
+                if not is_retryable(e) or attempt == PURGE_RETRIES:
+                    logger.error("Purge no app falhou: %s", e)
+                    return None
+                delay = retry_after(getattr(e, "response", None))
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                logger.warning("Purge no app: %s; nova tentativa em %.1fs", e, delay)
+                await asyncio.sleep(delay)
+    return None
+
+
+async def run(
+    views: list[str] | None = None,
+    refresh_all: bool = False,
+    jobs: int = 3,
+    dry_run: bool = False,
+    purge: bool = True,
+    snapshot: bool = True,
+    dsn: str | None = None,
+) -> RefreshReport:
+    """Planeja e executa os refreshes; por fim invalida o cache dependente.
+
+    Args:
+        views: Views pedidas explicitamente (e as que dependem delas).
+        refresh_all: Atualiza todas, ignorando o livro-razão.
+        jobs: Refreshes simultâneos (conexões).
+        dry_run: Só calcula o plano.
+        purge: Avisa o app ao fim.
+        snapshot: Regera o snapshot analítico se `SNAPSHOT_VIEW` foi atualizada.
+    """
+    report = RefreshReport()
+    by_name = _view_map(VIEWS)
+    dsn = asyncpg_dsn(dsn or settings.database_url)
+    if not dsn:
+        raise RuntimeError("DATABASE_URL não configurada")
+
+    started = time.perf_counter()
+    async with asyncpg.create_pool(dsn, min_size=1, max_size=jobs) as pool:
+        async with pool.acquire() as conn:
+            await ensure_views(conn)
+            if refresh_all:
+                selected = set(by_name)
+            elif views:
+                unknown = [v for v in views if v not in by_name]
+                if unknown:
+                    raise ValueError(f"Views desconhecidas: {unknown}")
+                selected = with_dependents(set(views), by_name)
+            else:
+                selected = affected_views(*await _load_state(conn), by_name)
+
+        report.planned = [name for name in _topological_order(by_name) if name in selected]
+        logger.info("Views a atualizar: %s", ", ".join(report.planned) or "nenhuma")
+        if dry_run or not selected:
+            report.wall_seconds = time.perf_counter() - started
+            return report
+
+        await _run_refreshes(pool, selected, by_name, report)
+
+    if snapshot and SNAPSHOT_VIEW in report.refreshed:
+        try:
+            report.snapshot = await asyncio.to_thread(gold_snapshot.export)
+        except Exception as e:
+            logger.error("Snapshot analítico falhou: %s", e)
+
+    namespaces, keys = invalidation_targets(report.refreshed, by_name)
+    if purge and (namespaces or keys):
+        result = await notify_app(namespaces, keys)
+        if result is not None:
+            report.purged_namespaces, report.purged_keys = namespaces, keys
+            logger.info("Cache invalidado: namespaces=%s keys=%s", namespaces, keys)
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Refresh das materialized views Gold + invalidação de cache"
+    )
+    parser.add_argument(
+        "--views", default="", help="Views a atualizar (e dependentes), separadas por vírgula"
+    )
+    parser.add_argument("--all", action="store_true", help="Atualiza todas as views")
+    parser.add_argument("--jobs", type=int, default=3, help="Refreshes simultâneos")
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o plano")
+    parser.add_argument("--no-purge", action="store_true", help="Não avisa o app")
+    parser.add_argument(
+        "--no-snapshot", action="store_true", help="Não regera o snapshot analítico"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    views = [v.strip() for v in args.views.split(",") if v.strip()] or None
+    report = asyncio.run(
+        run(views, args.all, args.jobs, args.dry_run, not args.no_purge, not args.no_snapshot)
+    )
+    logger.info(
+        "%d view(s) atualizada(s), %d com falha, em %.1fs",
+        len(report.refreshed),
+        len(report.failed),
+        report.wall_seconds,
+    )
+    if report.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
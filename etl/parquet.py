@@ -0,0 +1,362 @@
+"""Ingestão de microdados CSV (CAGED/RAIS) para Parquet, com memória limitada.
+
+Os arquivos do CAGED/RAIS têm de milhões a dezenas de milhões de linhas em
+CSV `;`, latin-1, com vírgula decimal. Nada aqui carrega um arquivo inteiro:
+
+- O CSV é lido em blocos de `block_size` bytes cortados em fim de linha, e
+  cada bloco é parseado pelo `pyarrow.csv` já com os tipos declarados na
+  `CsvSpec` (só as colunas usadas são decodificadas).
+- Os blocos são acumulados até `row_group_size` linhas e gravados como um row
+  group Parquet (zstd). A memória de pico é ~1 row group, seja o CSV de 100 MB
+  ou de 20 GB.
+- Cada arquivo vai para um processo do pool (`ProcessPoolExecutor`): a
+  conversão é CPU-bound e arquivos diferentes são independentes.
+- O Parquet é escrito num temporário e publicado com rename atômico.
+
+Cada arquivo devolve `FileStats` com o tempo de cada etapa (leitura/parse,
+conversão, escrita) e a vazão em linhas/s, agregada em `IngestReport`.
+"""
+
+import argparse
+import dataclasses
+import logging
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from app.core.storage import data_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 16 << 20  # 16 MB de CSV por bloco lido
+DEFAULT_ROW_GROUP_SIZE = 500_000
+
+# Valores que os microdados usam para "não informado"
+NULL_VALUES = ["", "-1", "{ñ class}", "{ñ", "ñ class", "IGNORADO", "NA"]
+
+
+@dataclass(frozen=True)
+class CsvSpec:
+    """Layout de um tipo de microdado: colunas usadas, tipos e nomes finais."""
+
+    name: str
+    columns: dict[str, tuple[str, pa.DataType]]  # Coluna no CSV → (nome normalizado, tipo)
+    delimiter: str = ";"
+    encoding: str = "latin-1"
+    decimal_point: str = ","
+    null_values: tuple[str, ...] = tuple(NULL_VALUES)
+
+    @property
+    def schema(self) -> pa.Schema:
+        return pa.schema([pa.field(name, dtype) for name, dtype in self.columns.values()])
+
+
+@dataclass
+class FileStats:
+    """Métricas de um arquivo convertido."""
+
+    source: str
+    output: str
+    rows: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    read_seconds: float = 0.0  # Leitura + parse + tipos (pyarrow.csv)
+    convert_seconds: float = 0.0  # Renomear, normalizar, montar row groups
+    write_seconds: float = 0.0  # Codificação Parquet + disco
+    peak_rss_mb: float = 0.0
+
+    def rate(self, seconds: float) -> float:
+        return self.rows / seconds if seconds > 0 else 0.0
+
+    @property
+    def total_seconds(self) -> float:
+        return self.read_seconds + self.convert_seconds + self.write_seconds
+
+
+@dataclass
+class IngestReport:
+    """Resumo de uma execução (vários arquivos)."""
+
+    files: list[FileStats] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(f.rows for f in self.files)
+
+    def stage_rates(self) -> dict[str, float]:
+        """Linhas/s por etapa (tempo somado entre processos) e vazão total."""
+        rows = self.rows
+        read = sum(f.read_seconds for f in self.files)
+        convert = sum(f.convert_seconds for f in self.files)
+        write = sum(f.write_seconds for f in self.files)
+        return {
+            "read": rows / read if read else 0.0,
+            "convert": rows / convert if convert else 0.0,
+            "write": rows / write if write else 0.0,
+            "wall": rows / self.wall_seconds if self.wall_seconds else 0.0,
+        }
+
+    def log(self) -> None:
+        rates = self.stage_rates()
+        logger.info(
+            "%d arquivo(s), %d linhas em %.1fs — leitura %.0f l/s, conversão %.0f l/s, "
+            "escrita %.0f l/s, total %.0f l/s; %d falha(s)",
+            len(self.files),
+            self.rows,
+            self.wall_seconds,
+            rates["read"],
+            rates["convert"],
+            rates["write"],
+            rates["wall"],
+            len(self.failed),
+        )
+
+
+def _normalize_batch(batch: pa.RecordBatch, spec: CsvSpec) -> pa.RecordBatch:
+    """Renomeia para os nomes finais e aplica o schema (colunas ausentes → nulas)."""
+    arrays = []
+    for raw_name, (name, dtype) in spec.columns.items():
+        idx = batch.schema.get_field_index(raw_name)
+        if idx < 0:
+            arrays.append(pa.nulls(batch.num_rows, dtype))
+            continue
+        column = batch.column(idx)
+        if pa.types.is_string(dtype) or pa.types.is_large_string(dtype):
+            column = pc.utf8_trim_whitespace(column)
+        if column.type != dtype:
+            column = column.cast(dtype)
+        arrays.append(column)
+    return pa.RecordBatch.from_arrays(arrays, schema=spec.schema)
+
+
+def _read_blocks(source: Path, spec: CsvSpec, block_size: int):
+    """Lê o CSV em blocos de ~`block_size` bytes terminados em quebra de linha.
+
+    Primeiro item: nomes das colunas (do cabeçalho). Depois, blocos de bytes
+    com linhas inteiras. Só um bloco existe em memória por vez — o leitor em
+    streaming do pyarrow lê adiante em segundo plano e, com escrita mais lenta
+    que leitura, acumula blocos proporcionalmente ao tamanho do arquivo.
+    Campos com quebra de linha entre aspas não são suportados (os microdados
+    do MTE não têm).
+    """
+    with pa.input_stream(str(source), compression="detect") as stream:
+        remainder = b""
+        while b"\n" not in remainder:
+            data = stream.read(block_size)
+            if not data:
+                break
+            remainder += data
+        header, _, remainder = remainder.partition(b"\n")
+        yield header.decode(spec.encoding).rstrip("\r").split(spec.delimiter)
+        while True:
+            data = stream.read(block_size)
+            if not data:
+                if remainder.strip():
+                    yield remainder
+                return
+            data = remainder + data
+            cut = data.rfind(b"\n") + 1
+            if cut == 0:
+                remainder = data
+                continue
+            remainder = data[cut:]
+            yield data[:cut]
+
+
+def convert_file(
+    source: Path,
+    output: Path,
+    spec: CsvSpec,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> FileStats:
+    """Converte um CSV (opcionalmente .gz/.bz2) em Parquet, em streaming."""
+    source, output = Path(source), Path(output)
+    stats = FileStats(source=str(source), output=str(output), bytes_in=source.stat().st_size)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+
+    parse_options = pacsv.ParseOptions(delimiter=spec.delimiter)
+    convert_options = pacsv.ConvertOptions(
+        include_columns=list(spec.columns),
+        include_missing_columns=True,
+        column_types={raw: dtype for raw, (_, dtype) in spec.columns.items()},
+        null_values=list(spec.null_values),
+        strings_can_be_null=True,
+        decimal_point=spec.decimal_point,
+    )
+
+    pending: list[pa.RecordBatch] = []
+    pending_rows = 0
+
+    def flush(writer: pq.ParquetWriter, final: bool = False) -> None:
+        """Grava row groups de exatamente `row_group_size` linhas.
+
+        O que sobra fica em `pending` para o próximo flush; só o fechamento
+        (`final`) grava o resto como um row group menor.
+        """
+        nonlocal pending, pending_rows
+        if not pending:
+            return
+        t = time.perf_counter()
+        table = pa.Table.from_batches(pending, schema=spec.schema)
+        offset = 0
+        while table.num_rows - offset >= row_group_size:
+            writer.write_table(table.slice(offset, row_group_size), row_group_size=row_group_size)
+            offset += row_group_size
+        rest = table.slice(offset)
+        if final and rest.num_rows:
+            writer.write_table(rest, row_group_size=row_group_size)
+            rest = rest.slice(rest.num_rows)
+        pending, pending_rows = rest.to_batches(), rest.num_rows
+        stats.write_seconds += time.perf_counter() - t
+
+    try:
+        with pq.ParquetWriter(tmp, spec.schema, compression="zstd") as writer:
+            blocks = _read_blocks(source, spec, block_size)
+            column_names = next(blocks)
+            read_options = pacsv.ReadOptions(column_names=column_names, encoding=spec.encoding)
+            while True:
+                t = time.perf_counter()
+                block = next(blocks, None)
+                if block is None:
+                    stats.read_seconds += time.perf_counter() - t
+                    break
+                table = pacsv.read_csv(
+                    pa.py_buffer(block),
+                    read_options=read_options,
+                    parse_options=parse_options,
+                    convert_options=convert_options,
+                )
+                del block
+                stats.read_seconds += time.perf_counter() - t
+
+                t = time.perf_counter()
+                for batch in table.to_batches():
+                    batch = _normalize_batch(batch, spec)
+                    pending.append(batch)
+                    pending_rows += batch.num_rows
+                    stats.rows += batch.num_rows
+                del table
+                stats.convert_seconds += time.perf_counter() - t
+
+                if pending_rows >= row_group_size:
+                    flush(writer)
+            flush(writer, final=True)
+        os.replace(tmp, output)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    stats.bytes_out = output.stat().st_size
+    # ru_maxrss: KB no Linux
+    stats.peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return stats
+
+
+def output_path(source: Path, out_dir: Path) -> Path:
+    """`ARQ.csv[.gz]` → `out_dir/ARQ.parquet`."""
+    name = Path(source).name
+    for suffix in (".gz", ".bz2", ".csv", ".txt"):
+        name = name.removesuffix(suffix)
+    return Path(out_dir) / f"{name}.parquet"
+
+
+def ingest(
+    sources: list[Path],
+    out_dir: Path,
+    spec: CsvSpec,
+    workers: int | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    skip_existing: bool = True,
+) -> IngestReport:
+    """Converte vários arquivos em paralelo (um processo por arquivo).
+
+    Com `skip_existing`, arquivos cujo Parquet é mais novo que o CSV são
+    pulados: reexecutar depois de uma falha só refaz o que faltou.
+    """
+    report = IngestReport()
+    jobs = []
+    for source in sources:
+        output = output_path(source, out_dir)
+        fresh = output.exists() and output.stat().st_mtime >= Path(source).stat().st_mtime
+        if skip_existing and fresh:
+            logger.info("%s: já convertido, pulando", source)
+            continue
+        jobs.append((Path(source), output))
+    if not jobs:
+        return report
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(convert_file, src, out, spec, block_size, row_group_size): src
+            for src, out in jobs
+        }
+        for future in as_completed(futures):
+            src = futures[future]
+            try:
+                stats = future.result()
+            except Exception as e:
+                logger.error("%s: falha na conversão: %s", src, e)
+                report.failed[str(src)] = str(e)
+                continue
+            report.files.append(stats)
+            logger.info(
+                "%s: %d linhas, %.1f→%.1f MB, leitura %.0f l/s, conversão %.0f l/s, "
+                "escrita %.0f l/s, pico %.0f MB",
+                src.name,
+                stats.rows,
+                stats.bytes_in / 1e6,
+                stats.bytes_out / 1e6,
+                stats.rate(stats.read_seconds),
+                stats.rate(stats.convert_seconds),
+                stats.rate(stats.write_seconds),
+                stats.peak_rss_mb,
+            )
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def run_cli(spec: CsvSpec, description: str) -> None:
+    """CLI comum das fontes de microdados (`python -m etl.sources.caged ...`)."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("files", nargs="+", type=Path, help="CSV (ou .csv.gz) já extraídos do .7z")
+    parser.add_argument(
+        "--out", type=Path, default=None, help=f"Padrão: DATA_DIR/bronze/{spec.name}"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--block-size-mb", type=int, default=DEFAULT_BLOCK_SIZE >> 20)
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument("--encoding", default=spec.encoding)
+    parser.add_argument("--force", action="store_true", help="Reconverte arquivos já convertidos")
+    args = parser.parse_args()
+
+    if args.encoding != spec.encoding:
+        spec = dataclasses.replace(spec, encoding=args.encoding)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    report = ingest(
+        args.files,
+        args.out or data_path("bronze", spec.name),
+        spec,
+        workers=args.workers,
+        block_size=args.block_size_mb << 20,
+        row_group_size=args.row_group_size,
+        skip_existing=not args.force,
+    )
+    report.log()
+    if report.failed:
+        raise SystemExit(1)
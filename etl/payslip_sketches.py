@@ -0,0 +1,254 @@
+"""Resume os contracheques do DadosJusBr (Bronze) em t-digests por órgão × mês.
+
+Para cada arquivo `DATA_DIR/bronze/dadosjusbr/{orgao}/{ano}/{mes}.json`
+baixado pelo crawler (`etl.sources.dadosjusbr`), soma as verbas de cada
+contracheque por componente e grava um t-digest por componente no store de
+sketches (`app.services.payslips`). Depois disso o app responde percentis de
+qualquer conjunto de órgãos/meses mesclando sketches, sem reler o Bronze.
+
+Componentes de cada contracheque (esquema de coleta do DadosJusBr:
+`folha.contra_cheque[].remuneracoes.remuneracao[]`, cada verba com
+`natureza` R/D e `tipo_receita` B/O):
+
+- base: receitas do tipo B (subsídio/remuneração base)
+- outras: demais receitas (indenizações, gratificações — os penduricalhos)
+- bruto: base + outras
+- descontos: verbas de natureza D, em valor absoluto
+- liquido: bruto − descontos
+
+Contracheques sem receita (bruto ≤ 0) são ignorados. Na mesma passada, conta
+os contracheques com bruto acima do teto vigente no mês e soma o excedente
+(`app.services.above_teto`), gravados na mesma transação dos sketches.
+
+- Incremental: o SHA-256 de cada arquivo (do manifesto do crawler) fica
+  registrado; arquivo igual não é reprocessado — a menos que o teto vigente
+  do mês tenha mudado no histórico (`above_teto.stale_months`).
+- Os arquivos são lidos e resumidos em processos (`ProcessPoolExecutor`);
+  só os blobs dos digests voltam para o processo principal, que grava.
+- No fim, a versão do store (hash de todos os arquivos resumidos) é
+  atualizada; os workers do app a adotam como versão do namespace "payslips".
+
+Uso:
+    python -m etl.payslip_sketches [--orgaos tjsp,tjrj] [--jobs 4] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from app.core.sketch import TDigest
+from app.core.storage import data_path
+from app.services import above_teto
+from app.services.payslips import (
+    COMPONENTS,
+    ingested_sources,
+    open_store,
+    period,
+    publish_version,
+    write_month,
+)
+from app.services.salary_data import teto_vigente
+from etl.sources.dadosjusbr import BRONZE_DIR, MANIFEST_FILE, Manifest, month_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BronzeMonth:
+    """Um arquivo Bronze do DadosJusBr: um órgão num mês."""
+
+    orgao: str
+    year: int
+    month: int
+    path: Path
+    sha256: str
+
+
+@dataclass
+class SketchReport:
+    """Resumo de uma execução."""
+
+    months: int = 0
+    members: int = 0
+    unchanged: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+
+def _first(mapping: dict, *keys: str):
+    """Valor da primeira chave presente (snake_case ou camelCase do JSON)."""
+    for key in keys:
+        if key in mapping:
+            return mapping[key]
+    return None
+
+
+def payslip_components(payload: dict) -> dict[str, np.ndarray]:
+    """Valores por componente, um por contracheque com receita."""
+    folha = _first(payload, "folha") or {}
+    cheques = _first(folha, "contra_cheque", "contraCheque") or []
+    rows = []
+    for cheque in cheques:
+        base = outras = descontos = 0.0
+        remuneracoes = _first(cheque, "remuneracoes") or {}
+        for item in _first(remuneracoes, "remuneracao") or []:
+            try:
+                valor = float(item.get("valor") or 0.0)
+            except (TypeError, ValueError):
+                continue
+            if str(item.get("natureza", "R")).upper().startswith("D"):
+                descontos += abs(valor)
+            elif str(_first(item, "tipo_receita", "tipoReceita") or "").upper().startswith("B"):
+                base += valor
+            else:
+                outras += valor
+        bruto = base + outras
+        if bruto > 0:
+            rows.append((base, outras, bruto, descontos, bruto - descontos))
+    values = np.array(rows, dtype=np.float64).reshape(-1, len(COMPONENTS))
+    return {component: values[:, i] for i, component in enumerate(COMPONENTS)}
+
+
+def count_above_teto(bruto: np.ndarray, teto: float) -> above_teto.MonthAboveTeto:
+    """Contracheques acima do teto e excedente somado (em centavos inteiros)."""
+    excess = bruto[bruto > teto] - teto
+    return above_teto.MonthAboveTeto(
+        payslips=len(bruto),
+        above=len(excess),
+        excess_cents=int(np.round(excess * 100).sum()),
+        teto=teto,
+    )
+
+
+def sketch_month(
+    path: Path, teto: float
+) -> tuple[int, dict[str, bytes], above_teto.MonthAboveTeto]:
+    """Lê um arquivo Bronze: (contracheques, digest serializado por componente, contas do teto)."""
+    with open(path, "rb") as f:
+        payload = json.load(f)
+    components = payslip_components(payload)
+    members = len(components["bruto"])
+    digests = {c: TDigest.from_values(v).to_bytes() for c, v in components.items()}
+    return members, digests, count_above_teto(components["bruto"], teto)
+
+
+def discover_months(orgaos: list[str] | None = None) -> list[BronzeMonth]:
+    """Arquivos Bronze baixados com sucesso, segundo o manifesto do crawler."""
+    root = data_path(*BRONZE_DIR)
+    manifest = Manifest(root / MANIFEST_FILE)
+    months = []
+    for path in sorted(root.glob("*/*/*.json")):
+        orgao, year, month = path.parts[-3], path.parts[-2], path.stem
+        if not (year.isdigit() and month.isdigit()) or (orgaos and orgao not in orgaos):
+            continue
+        entry = manifest.get(month_key(orgao, int(year), int(month)))
+        if entry is not None and entry.status != "ok":
+            continue
+        sha256 = entry.sha256 if entry is not None and entry.sha256 else None
+        if sha256 is None:
+            with open(path, "rb") as f:
+                sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+        months.append(BronzeMonth(orgao, int(year), int(month), path, sha256))
+    return months
+
+
+def store_version(conn) -> str:
+    """Hash de todos os arquivos resumidos no store e do teto usado em cada um.
+
+    O teto entra no hash: corrigir o histórico muda a versão mesmo sem
+    arquivo novo, e os workers recarregam os números de manchete.
+    """
+    digest = hashlib.sha1()
+    rows = conn.execute(
+        "SELECT s.orgao, s.period, s.sha256, a.teto FROM sources s "
+        "LEFT JOIN above_teto a USING (orgao, period) ORDER BY 1, 2"
+    )
+    for orgao, key, sha256, teto in rows:
+        digest.update(f"{orgao}/{key}:{sha256}:{teto}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def ingest(
+    orgaos: list[str] | None = None,
+    jobs: int | None = None,
+    force: bool = False,
+    store: Path | None = None,
+) -> SketchReport:
+    """Resume os meses novos ou alterados e publica a nova versão do store."""
+    report = SketchReport()
+    started = time.perf_counter()
+    conn = open_store(store)
+    try:
+        done = {} if force else ingested_sources(conn)
+        stale = above_teto.stale_months(conn)
+        pending = []
+        for item in discover_months(orgaos):
+            key = (item.orgao, period(item.year, item.month))
+            if done.get(key) == item.sha256 and key not in stale:
+                report.unchanged += 1
+            else:
+                pending.append(item)
+        logger.info("%d mês(es) a resumir, %d inalterado(s)", len(pending), report.unchanged)
+
+        if pending:
+            workers = jobs or min(len(pending), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(sketch_month, item.path, teto_vigente(item.year, item.month)): item
+                    for item in pending
+                }
+                for future in as_completed(futures):
+                    item = futures[future]
+                    label = month_key(item.orgao, item.year, item.month)
+                    try:
+                        members, blobs, above = future.result()
+                    except Exception as e:
+                        logger.error("%s: falha ao resumir: %s", label, e)
+                        report.failed[label] = str(e)
+                        continue
+                    write_month(
+                        conn, item.orgao, item.year, item.month, item.sha256, members, blobs, above
+                    )
+                    report.months += 1
+                    report.members += members
+            publish_version(conn, store_version(conn))
+    finally:
+        conn.close()
+    report.wall_seconds = time.perf_counter() - started
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Sketches de quantis dos contracheques do DadosJusBr"
+    )
+    parser.add_argument("--orgaos", default="", help="Lista separada por vírgula (padrão: todos)")
+    parser.add_argument("--jobs", type=int, default=None, help="Processos (padrão: CPUs)")
+    parser.add_argument("--force", action="store_true", help="Reprocessa meses já resumidos")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    orgaos = [o.strip() for o in args.orgaos.split(",") if o.strip()] or None
+    report = ingest(orgaos, args.jobs, args.force)
+    logger.info(
+        "%d mês(es) resumido(s) (%d contracheques), %d inalterado(s), %d falha(s), em %.1fs",
+        report.months,
+        report.members,
+        report.unchanged,
+        len(report.failed),
+        report.wall_seconds,
+    )
+    if report.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
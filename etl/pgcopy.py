@@ -0,0 +1,144 @@
+"""Codificação vetorizada de lotes Arrow no formato binário do COPY do PostgreSQL.
+
+`copy_records_to_table` do asyncpg precisa de uma tupla Python por linha: o
+custo de criar esses objetos e codificá-los fica no event loop e domina a
+carga. Aqui o stream `COPY ... FROM STDIN (FORMAT binary)` é montado direto
+dos buffers Arrow com NumPy — cada coluna vira alguns `np.repeat`/scatter,
+sem objeto Python por valor — e enviado com `copy_to_table(source=...)`.
+
+Tipos suportados (os de `etl.loader.SILVER_SCHEMA`):
+
+- `string` → TEXT/VARCHAR/CHAR (bytes UTF-8, como estão no Arrow)
+- `int16` → SMALLINT
+- `decimal128(p, 2)` com p ≤ 14 → NUMERIC (dígitos na base 10000)
+
+Formato: https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+"""
+
+import numpy as np
+import pyarrow as pa
+
+# Assinatura, flags e tamanho da extensão do cabeçalho
+HEADER = b"PGCOPY\n\xff\r\n\x00" + b"\x00\x00\x00\x00" + b"\x00\x00\x00\x00"
+# Contagem de campos -1
+TRAILER = b"\xff\xff"
+
+# NUMERIC: 4 grupos base 10000 (3 grupos inteiros, até 10^12 − 1, + 1 de centavos)
+_NUMERIC_DIGITS = 4
+_NUMERIC_WEIGHT = 2
+_NUMERIC_MAX_PRECISION = 2 + 4 * _NUMERIC_WEIGHT + 4
+_NUMERIC_NEG = 0x4000
+_NUMERIC_WIDTH = 8 + 2 * _NUMERIC_DIGITS
+
+
+class UnsupportedType(TypeError):
+    """Coluna com tipo Arrow sem codificação binária aqui."""
+
+
+def _validity(array: pa.Array) -> np.ndarray:
+    """True onde o valor não é nulo."""
+    if array.null_count == 0:
+        return np.ones(len(array), dtype=bool)
+    return array.is_valid().to_numpy(zero_copy_only=False)
+
+
+def _fixed(array: pa.Array, dtype: str) -> np.ndarray:
+    """Valores de um array de largura fixa, respeitando o offset do slice."""
+    buffer = array.buffers()[1]
+    values = np.frombuffer(buffer, dtype=dtype)
+    return values[array.offset : array.offset + len(array)]
+
+
+def _int16_bytes(array: pa.Array) -> np.ndarray:
+    return _fixed(array, "<i2").astype(">i2").view(np.uint8).reshape(-1, 2)
+
+
+def _numeric_bytes(array: pa.Array) -> np.ndarray:
+    """NUMERIC binário (ndigits, weight, sign, dscale, dígitos) de decimais com 2 casas.
+
+    Layout fixo de 4 dígitos: o PostgreSQL remove os zeros à esquerda e à
+    direita ao receber.
+    """
+    dtype = array.type
+    if dtype.scale != 2 or dtype.precision > _NUMERIC_MAX_PRECISION:
+        raise UnsupportedType(
+            f"decimal com escala 2 e até {_NUMERIC_MAX_PRECISION} dígitos, não {dtype}"
+        )
+    # decimal128: inteiro de 16 bytes little-endian; até 14 dígitos cabe na metade baixa
+    raw = np.frombuffer(array.buffers()[1], dtype="<i8").reshape(-1, 2)
+    unscaled = raw[array.offset : array.offset + len(array), 0]
+    magnitude = np.abs(unscaled)
+    integer, cents = np.divmod(magnitude, 100)
+    fields = np.empty((len(array), 4 + _NUMERIC_DIGITS), dtype=np.int64)
+    fields[:, 0] = _NUMERIC_DIGITS
+    fields[:, 1] = _NUMERIC_WEIGHT
+    fields[:, 2] = np.where(unscaled < 0, _NUMERIC_NEG, 0)
+    fields[:, 3] = 2  # dscale
+    fields[:, 4] = integer // 100_000_000
+    fields[:, 5] = integer // 10_000 % 10_000
+    fields[:, 6] = integer % 10_000
+    fields[:, 7] = cents * 100
+    return fields.astype(">i2").view(np.uint8).reshape(-1, _NUMERIC_WIDTH)
+
+
+def _string_parts(array: pa.Array, valid: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(início no buffer de dados, tamanho, buffer de dados) de um array de strings."""
+    raw = np.frombuffer(array.buffers()[1], dtype="<i4")
+    offsets = raw[array.offset : array.offset + len(array) + 1].astype(np.int64)
+    lengths = np.where(valid, np.diff(offsets), 0)
+    data = array.buffers()[2]
+    values = np.frombuffer(data, dtype=np.uint8) if data is not None else np.empty(0, np.uint8)
+    return offsets[:-1], lengths, values
+
+
+def encode_batch(batch: pa.RecordBatch) -> bytes:
+    """Linhas do lote no formato binário do COPY (sem cabeçalho nem trailer)."""
+    n, ncols = batch.num_rows, batch.num_columns
+    if n == 0:
+        return b""
+
+    # Por coluna: (validade, início no buffer, tamanho, buffer) para strings ou
+    # (validade, None, tamanho, None, bytes por linha) para largura fixa
+    columns = []
+    for array in batch.columns:
+        dtype = array.type
+        valid = _validity(array)
+        if pa.types.is_string(dtype):
+            columns.append((valid, *_string_parts(array, valid), None))
+        elif pa.types.is_int16(dtype):
+            columns.append((valid, None, np.where(valid, 2, 0), None, _int16_bytes(array)))
+        elif pa.types.is_decimal(dtype):
+            width = np.where(valid, _NUMERIC_WIDTH, 0)
+            columns.append((valid, None, width, None, _numeric_bytes(array)))
+        else:
+            raise UnsupportedType(f"{batch.schema.field(len(columns)).name}: {dtype}")
+
+    # Cada campo: 4 bytes de tamanho + dados; cada linha: 2 bytes de contagem
+    sizes = np.stack([c[2] for c in columns], axis=1) + 4
+    row_sizes = 2 + sizes.sum(axis=1)
+    row_starts = np.zeros(n, dtype=np.int64)
+    np.cumsum(row_sizes[:-1], out=row_starts[1:])
+    out = np.empty(int(row_starts[-1] + row_sizes[-1]), dtype=np.uint8)
+
+    out[row_starts] = ncols >> 8
+    out[row_starts + 1] = ncols & 0xFF
+    field_starts = row_starts + 2
+    four = np.arange(4)
+    for valid, starts, lengths, values, fixed in columns:
+        header = np.where(valid, lengths, -1).astype(">i4").view(np.uint8).reshape(-1, 4)
+        out[field_starts[:, None] + four] = header
+        data_starts = field_starts + 4
+        if fixed is not None:
+            width = fixed.shape[1]
+            rows = np.flatnonzero(valid)
+            out[data_starts[rows, None] + np.arange(width)] = fixed[rows]
+        else:
+            total = int(lengths.sum())
+            if total:
+                # Intervalos [início, início + tamanho) de cada valor, concatenados
+                shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+                source = np.arange(total) + shift
+                target = source + np.repeat(data_starts - starts, lengths)
+                out[target] = values[source]
+        field_starts = data_starts + lengths
+    return out.tobytes()
@@ -0,0 +1,350 @@
+"""Carga histórica do câmbio PTAX (BCB/Olinda) para série temporal binária.
+
+O serviço de câmbio da aplicação só pergunta a cotação de hoje. Aqui baixamos
+anos de cotações diárias pelo endpoint de período (`CotacaoMoedaPeriodo`):
+
+- O intervalo pedido é quebrado em janelas (padrão: 1 ano) por moeda; cada
+  janela é uma requisição e as janelas rodam em paralelo, limitadas por um
+  semáforo para não sobrecarregar a Olinda.
+- Cada janela concluída vira um checkpoint JSON em
+  `DATA_DIR/etl/ptax/<MOEDA>/<inicio>_<fim>.json`. Reexecutar o backfill pula
+  as janelas já baixadas; só a janela que contém hoje é sempre rebuscada.
+- Ao final, os checkpoints são consolidados em `DATA_DIR/ptax_history.bin`
+  (ver `app.core.timeseries`), mapeado em memória pela aplicação no startup.
+  O arquivo é mesclado com o anterior: rodar só `--currencies USD` (ou um
+  período mais curto) não apaga as outras moedas nem os dias já gravados.
+  Janelas sem checkpoint mas já cobertas por esse arquivo (ex.: outra
+  máquina, checkpoints apagados) são lidas dele, sem nova requisição.
+- Status transitórios (`etl.http.RETRYABLE_STATUS`) e erros de rede têm retry
+  com backoff, respeitando `Retry-After`.
+
+Só o boletim de fechamento de cada dia é usado; a taxa é a média entre
+compra e venda, como no serviço de câmbio.
+
+Uso:
+    python -m etl.sources.bcb_ptax --start 2010-01-01 --currencies USD,EUR
+"""
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+from app.core.storage import atomic_write_json, data_path, read_json
+from app.core.timeseries import TimeSeriesFile, to_day, write_timeseries
+from app.services.exchange_rate import RATE_HISTORY_FILE
+from etl.http import (
+    RETRYABLE_STATUS,
+    RetryableStatus,
+    backoff_delay,
+    is_retryable,
+    retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+OLINDA_BASE_URL = "https://olinda.bcb.gov.br/olinda/servico/PTAX/versao/v1/odata"
+PERIOD_RESOURCE = (
+    "CotacaoMoedaPeriodo(moeda=@moeda,dataInicial=@dataInicial,dataFinalCotacao=@dataFinalCotacao)"
+)
+
+# Moedas com boletim PTAX (recurso `Moedas` da Olinda)
+PTAX_CURRENCIES = ("USD", "EUR", "JPY", "GBP", "CHF", "CAD", "AUD", "DKK", "NOK", "SEK")
+DEFAULT_CURRENCIES = ("USD", "EUR", "JPY")
+
+# Início da série PTAX no formato atual
+PTAX_START = date(1984, 11, 28)
+
+COLUMNS = ("buy", "sell", "rate")
+CHECKPOINT_DIR = ("etl", "ptax")
+CHECKPOINT_SCHEMA = 1
+
+
+@dataclass(frozen=True)
+class Window:
+    """Uma requisição do backfill: uma moeda, um intervalo de datas."""
+
+    currency: str
+    start: date
+    end: date
+
+    @property
+    def checkpoint(self) -> Path:
+        return data_path(
+            *CHECKPOINT_DIR, self.currency, f"{self.start:%Y%m%d}_{self.end:%Y%m%d}.json"
+        )
+
+
+def plan_windows(
+    currencies: list[str], start: date, end: date, window_days: int = 365
+) -> list[Window]:
+    """Quebra [start, end] em janelas de até `window_days` por moeda."""
+    windows = []
+    for currency in currencies:
+        cursor = start
+        while cursor <= end:
+            stop = min(cursor + timedelta(days=window_days - 1), end)
+            windows.append(Window(currency, cursor, stop))
+            cursor = stop + timedelta(days=1)
+    return windows
+
+
+def _period_url(base_url: str, window: Window) -> str:
+    return (
+        f"{base_url}/{PERIOD_RESOURCE}?@moeda='{window.currency}'"
+        f"&@dataInicial='{window.start:%m-%d-%Y}'&@dataFinalCotacao='{window.end:%m-%d-%Y}'"
+        "&$format=json&$select=cotacaoCompra,cotacaoVenda,dataHoraCotacao,tipoBoletim"
+    )
+
+
+def parse_period(items: list[dict]) -> list[tuple[str, float, float]]:
+    """Itens OData → [(data ISO, compra, venda)], um por dia (fechamento)."""
+    by_day: dict[str, tuple[float, float]] = {}
+    fallback: dict[str, tuple[float, float]] = {}
+    for item in items:
+        day = item["dataHoraCotacao"][:10]
+        quote = (float(item["cotacaoCompra"]), float(item["cotacaoVenda"]))
+        if item.get("tipoBoletim", "Fechamento") == "Fechamento":
+            by_day[day] = quote
+        else:
+            # Dia sem fechamento publicado: fica com o último boletim do dia
+            fallback[day] = quote
+    for day, quote in fallback.items():
+        by_day.setdefault(day, quote)
+    return [(day, buy, sell) for day, (buy, sell) in sorted(by_day.items())]
+
+
+async def _fetch_window(
+    client: httpx.AsyncClient,
+    base_url: str,
+    window: Window,
+    semaphore: asyncio.Semaphore,
+    retries: int,
+) -> list[tuple[str, float, float]]:
+    """Baixa uma janela, com retry exponencial para status transitórios e erros de rede.
+
+    Um `Retry-After` do servidor substitui o backoff calculado.
+    """
+    url = _period_url(base_url, window)
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                resp = await client.get(url)
+            if resp.status_code in RETRYABLE_STATUS:
+                raise RetryableStatus(resp)
+            resp.raise_for_status()
+            return parse_period(resp.json().get("value", []))
+        except (httpx.TransportError, RetryableStatus) as e:
+            if not is_retryable(e) or attempt == retries:
+                raise
+            delay = retry_after(getattr(e, "response", None))
+            if delay is None:
+                delay = backoff_delay(attempt, cap=30.0)
+            logger.warning(
+                "PTAX %s %s→%s: %s; nova tentativa em %.1fs",
+                window.currency,
+                window.start,
+                window.end,
+                e,
+                delay,
+            )
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+def _from_history(history: TimeSeriesFile, window: Window) -> list[tuple[str, float, float]]:
+    """Linhas da janela já gravadas no arquivo consolidado ([] se não cobertas).
+
+    Só vale se o arquivo cobre a janela inteira; janela coberta mas sem
+    nenhum boletim (buraco de um backfill anterior que falhou) é rebuscada.
+    """
+    series = history.get(window.currency)
+    if series is None or not len(series):
+        return []
+    if window.start < series.first_day or window.end > series.last_day:
+        return []
+    days, buys = series.between(window.start, window.end, "buy")
+    _, sells = series.between(window.start, window.end, "sell")
+    return [(day.isoformat(), buy, sell) for day, buy, sell in zip(days, buys, sells)]
+
+
+async def backfill(
+    currencies: list[str],
+    start: date,
+    end: date | None = None,
+    *,
+    concurrency: int = 4,
+    window_days: int = 365,
+    retries: int = 4,
+    base_url: str = OLINDA_BASE_URL,
+    client: httpx.AsyncClient | None = None,
+    history: TimeSeriesFile | None = None,
+) -> dict[str, list[tuple[str, float, float]]]:
+    """Baixa (ou retoma) o histórico e devolve {moeda: [(data, compra, venda)]}.
+
+    Janelas com checkpoint, ou cobertas pelo arquivo consolidado `history`,
+    são lidas do disco; as demais são buscadas com no máximo `concurrency`
+    requisições simultâneas. Uma janela que falha não derruba as outras: o
+    erro é registrado e o próximo backfill a retoma.
+    """
+    end = end or date.today()
+    today = date.today()
+    windows = plan_windows(currencies, start, end, window_days)
+    own_client = client is None
+    if own_client:
+        client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+    semaphore = asyncio.Semaphore(concurrency)
+    results: dict[Window, list[tuple[str, float, float]]] = {}
+
+    async def run(window: Window) -> None:
+        cached = read_json(window.checkpoint)
+        if cached and cached.get("schema") == CHECKPOINT_SCHEMA and window.end < today:
+            results[window] = [tuple(row) for row in cached["rows"]]
+            return
+        if history is not None and window.end < today:
+            rows = _from_history(history, window)
+            if rows:
+                results[window] = rows
+                return
+        try:
+            rows = await _fetch_window(client, base_url, window, semaphore, retries)
+        except Exception as e:
+            logger.error("PTAX %s %s→%s falhou: %s", window.currency, window.start, window.end, e)
+            return
+        atomic_write_json(
+            window.checkpoint,
+            {
+                "schema": CHECKPOINT_SCHEMA,
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+                "rows": rows,
+            },
+        )
+        results[window] = rows
+
+    try:
+        await asyncio.gather(*(run(w) for w in windows))
+    finally:
+        if own_client:
+            await client.aclose()
+
+    missing = [w for w in windows if w not in results]
+    if missing:
+        logger.warning(
+            "Backfill PTAX incompleto: %d de %d janela(s) pendente(s)", len(missing), len(windows)
+        )
+
+    merged: dict[str, dict[str, tuple[float, float]]] = {c: {} for c in currencies}
+    for window, rows in results.items():
+        for day, buy, sell in rows:
+            merged[window.currency][day] = (buy, sell)
+    return {
+        currency: [(day, buy, sell) for day, (buy, sell) in sorted(days.items())]
+        for currency, days in merged.items()
+    }
+
+
+def _previous_quotes(path: Path) -> dict[str, dict[int, tuple[float, float]]]:
+    """{moeda: {dia: (compra, venda)}} do arquivo consolidado atual ({} se não houver)."""
+    previous = _open_history(path)
+    if previous is None:
+        return {}
+    try:
+        return {
+            name: dict(
+                zip(
+                    previous[name].days,
+                    zip(previous[name].columns["buy"], previous[name].columns["sell"]),
+                )
+            )
+            for name in previous.names
+        }
+    finally:
+        previous.close()
+
+
+def build_history_file(
+    history: dict[str, list[tuple[str, float, float]]], path: Path | None = None
+) -> Path:
+    """Consolida o histórico no arquivo binário lido pela aplicação.
+
+    Mescla com o arquivo atual: moedas fora desta execução e dias fora do
+    período pedido continuam lá; dias rebaixados agora substituem os antigos.
+    """
+    path = path or data_path(RATE_HISTORY_FILE)
+    quotes = _previous_quotes(path)
+    for currency, rows in history.items():
+        days = quotes.setdefault(currency, {})
+        for day, buy, sell in rows:
+            days[to_day(date.fromisoformat(day))] = (buy, sell)
+    series = {}
+    for currency, days in quotes.items():
+        if not days:
+            continue
+        ordered = sorted(days.items())
+        series[currency] = (
+            [day for day, _ in ordered],
+            {
+                "buy": [buy for _, (buy, _) in ordered],
+                "sell": [sell for _, (_, sell) in ordered],
+                "rate": [round((buy + sell) / 2, 6) for _, (buy, sell) in ordered],
+            },
+        )
+    size = write_timeseries(path, COLUMNS, series)
+    logger.info("Histórico PTAX gravado em %s (%d moedas, %.1f KB)", path, len(series), size / 1024)
+    return path
+
+
+def _open_history(path: Path) -> TimeSeriesFile | None:
+    """Arquivo consolidado anterior, se existir e for legível."""
+    if not path.exists():
+        return None
+    try:
+        return TimeSeriesFile(path)
+    except (OSError, ValueError) as e:
+        logger.warning("Histórico anterior ignorado: %s", e)
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill do câmbio PTAX (BCB/Olinda)")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2010, 1, 1))
+    parser.add_argument("--end", type=date.fromisoformat, default=None)
+    parser.add_argument("--currencies", default=",".join(DEFAULT_CURRENCIES))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--window-days", type=int, default=365)
+    parser.add_argument("--base-url", default=OLINDA_BASE_URL)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    currencies = [c.strip().upper() for c in args.currencies.split(",") if c.strip()]
+    unknown = set(currencies) - set(PTAX_CURRENCIES)
+    if unknown:
+        parser.error(f"Moedas sem boletim PTAX: {', '.join(sorted(unknown))}")
+
+    # O arquivo atual é substituído atomicamente: o mmap antigo segue válido
+    path = data_path(RATE_HISTORY_FILE)
+    previous = _open_history(path)
+    try:
+        history = asyncio.run(
+            backfill(
+                currencies,
+                max(args.start, PTAX_START),
+                args.end,
+                concurrency=args.concurrency,
+                window_days=args.window_days,
+                base_url=args.base_url,
+                history=previous,
+            )
+        )
+        build_history_file(history, path)
+    finally:
+        if previous is not None:
+            previous.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Microdados do Novo CAGED (movimentações mensais) → Parquet (Bronze).
+
+Os arquivos `CAGEDMOVAAAAMM.txt` do FTP do MTE vêm compactados em .7z; extraia
+antes (ex.: `7z x CAGEDMOV202601.7z`). A conversão em si está em `etl.parquet`.
+
+Uso:
+    python -m etl.sources.caged CAGEDMOV202601.txt CAGEDMOV202602.txt --workers 4
+"""
+
+import pyarrow as pa
+
+from etl.parquet import CsvSpec, run_cli
+
+# Coluna do CSV → (nome normalizado, tipo). Códigos com zeros à esquerda
+# (CBO, CNAE) ficam como texto.
+CAGED_SPEC = CsvSpec(
+    name="caged",
+    columns={
+        "competênciamov": ("competencia", pa.int32()),  # AAAAMM
+        "uf": ("uf", pa.int8()),
+        "município": ("municipio", pa.int32()),
+        "seção": ("cnae_secao", pa.string()),
+        "subclasse": ("cnae_subclasse", pa.string()),
+        "saldomovimentação": ("saldo", pa.int8()),  # +1 admissão, -1 desligamento
+        "cbo2002ocupação": ("cbo", pa.string()),
+        "categoria": ("categoria", pa.int16()),
+        "graudeinstrução": ("grau_instrucao", pa.int8()),
+        "idade": ("idade", pa.int16()),
+        "horascontratuais": ("horas_contratuais", pa.float32()),
+        "sexo": ("sexo", pa.int8()),
+        "tipoempregador": ("tipo_empregador", pa.int8()),
+        "tipomovimentação": ("tipo_movimentacao", pa.int16()),
+        "salário": ("salario", pa.float64()),
+        "valorsaláriofixo": ("salario_fixo", pa.float64()),
+        "unidadesaláriocódigo": ("unidade_salario", pa.int8()),
+        "indicadordeforadoprazo": ("fora_do_prazo", pa.int8()),
+    },
+    # "-1" é valor legítimo de saldomovimentação: não tratar como nulo
+    null_values=("", "{ñ class}", "{ñ", "ñ class", "IGNORADO", "NA"),
+)
+
+
+def main() -> None:
+    run_cli(CAGED_SPEC, "Novo CAGED (microdados) → Parquet")
+
+
+if __name__ == "__main__":
+    main()
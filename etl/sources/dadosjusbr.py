@@ -0,0 +1,358 @@
+"""Crawler do DadosJusBr: remunerações mensais de todos os órgãos (Bronze).
+
+Percorre `GET /v1/orgao/{orgao}/{ano}/{mes}` para cada órgão de
+`GET /v1/orgaos` e grava a resposta bruta, sem transformação, em
+`DATA_DIR/bronze/dadosjusbr/{orgao}/{ano}/{mes}.json`.
+
+- Concorrência limitada por host (`HostLimiter`) sobre um cliente com pool.
+- Retry com backoff exponencial e jitter; respeita `Retry-After`.
+- Download em streaming: o corpo vai em pedaços para um temporário (com
+  SHA-256 calculado no caminho) e só é publicado se completo. Resposta de
+  dezenas de MB não fica inteira em memória.
+- Manifesto local (`manifest.json`) com ETag, Last-Modified, hash e status
+  de cada mês. Re-sync usa requisição condicional (`If-None-Match` /
+  `If-Modified-Since`): mês sem mudança volta 304 e não é baixado de novo.
+  Sem validadores do servidor, o hash aponta o que de fato mudou.
+- Meses já consolidados (mais antigos que `recheck_months`) nem são
+  consultados em re-syncs, a menos que `full=True`.
+- O manifesto é salvo a cada lote de meses: uma execução interrompida
+  retoma de onde parou.
+
+Uso:
+    python -m etl.sources.dadosjusbr --start 2018-01 [--orgaos tjsp,tjrj] [--full]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+
+import httpx
+
+from app.config import get_settings
+from app.core.storage import atomic_open, atomic_write_json, data_path, read_json
+from etl.http import (
+    RETRYABLE_STATUS,
+    HostLimiter,
+    RetryableStatus,
+    backoff_delay,
+    build_client,
+    is_retryable,
+    retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+BRONZE_DIR = ("bronze", "dadosjusbr")
+MANIFEST_FILE = "manifest.json"
+MANIFEST_SCHEMA = 1
+
+# Primeiro ano com cobertura ampla no DadosJusBr
+DEFAULT_START = (2018, 1)
+
+# Meses recentes ainda podem ser republicados pelos órgãos
+RECHECK_MONTHS = 3
+
+# Salva o manifesto a cada N meses processados
+MANIFEST_FLUSH_EVERY = 50
+
+_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class MonthEntry:
+    """Estado de um (órgão, ano, mês) no manifesto."""
+
+    status: str  # "ok", "missing" (404) ou "failed"
+    fetched_at: str
+    etag: str | None = None
+    last_modified: str | None = None
+    sha256: str | None = None
+    size: int = 0
+    error: str | None = None
+
+
+@dataclass
+class SyncReport:
+    """Resumo de uma execução do crawler."""
+
+    downloaded: int = 0  # Conteúdo novo ou alterado gravado
+    not_modified: int = 0  # 304
+    unchanged: int = 0  # 200 com o mesmo hash já gravado
+    missing: int = 0  # 404: órgão sem dados no mês
+    failed: int = 0
+    skipped: int = 0  # Meses consolidados, nem consultados
+    bytes: int = 0
+    changed: list[str] = field(default_factory=list)  # Chaves "orgao/ano/mes" alteradas
+
+
+class Manifest:
+    """Manifesto em disco do que já foi baixado (escrita atômica)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        raw = read_json(path) or {}
+        if raw.get("schema") != MANIFEST_SCHEMA:
+            raw = {}
+        self.entries: dict[str, MonthEntry] = {
+            key: MonthEntry(**value) for key, value in raw.get("months", {}).items()
+        }
+        self._dirty = 0
+
+    def get(self, key: str) -> MonthEntry | None:
+        return self.entries.get(key)
+
+    def put(self, key: str, entry: MonthEntry) -> None:
+        self.entries[key] = entry
+        self._dirty += 1
+        if self._dirty >= MANIFEST_FLUSH_EVERY:
+            self.save()
+
+    def save(self) -> None:
+        atomic_write_json(
+            self.path,
+            {
+                "schema": MANIFEST_SCHEMA,
+                "months": {k: asdict(v) for k, v in sorted(self.entries.items())},
+            },
+        )
+        self._dirty = 0
+
+
+def month_key(orgao: str, year: int, month: int) -> str:
+    return f"{orgao}/{year}/{month:02d}"
+
+
+def raw_path(orgao: str, year: int, month: int) -> Path:
+    """Arquivo bruto (Bronze) de um mês de um órgão."""
+    return data_path(*BRONZE_DIR, orgao, str(year), f"{month:02d}.json")
+
+
+def iter_months(start: tuple[int, int], end: tuple[int, int]) -> list[tuple[int, int]]:
+    """Meses (ano, mês) de `start` a `end`, inclusive."""
+    months = []
+    year, month = start
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _months_ago(year: int, month: int, today: date) -> int:
+    return (today.year - year) * 12 + today.month - month
+
+
+def _needs_check(
+    entry: MonthEntry | None, year: int, month: int, today: date, recheck_months: int
+) -> bool:
+    """Se o mês deve ser consultado neste sync."""
+    if entry is None or entry.status == "failed":
+        return True
+    return _months_ago(year, month, today) <= recheck_months
+
+
+class DadosJusBrCrawler:
+    """Crawler assíncrono do DadosJusBr com manifesto e requisições condicionais."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        base_url: str = settings.dadosjusbr_base_url,
+        per_host: int = 4,
+        retries: int = 5,
+        recheck_months: int = RECHECK_MONTHS,
+    ):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.limiter = HostLimiter(per_host)
+        self.retries = retries
+        self.recheck_months = recheck_months
+        self.manifest = Manifest(data_path(*BRONZE_DIR, MANIFEST_FILE))
+        self.report = SyncReport()
+
+    async def _with_retry(self, label: str, attempt_fn):
+        """Executa `attempt_fn` com retry para erros transitórios."""
+        for attempt in range(self.retries + 1):
+            try:
+                return await attempt_fn()
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.retries:
+                    raise
+                delay = retry_after(getattr(e, "response", None))
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                logger.warning("DadosJusBr %s: %s; nova tentativa em %.1fs", label, e, delay)
+                await asyncio.sleep(delay)
+
+    async def list_orgaos(self) -> list[str]:
+        """IDs de todos os órgãos cobertos (`GET /v1/orgaos`)."""
+        url = f"{self.base_url}/v1/orgaos"
+
+        async def attempt() -> list[str]:
+            async with self.limiter.limit(url):
+                resp = await self.client.get(url)
+            if resp.status_code in RETRYABLE_STATUS:
+                raise RetryableStatus(resp)
+            resp.raise_for_status()
+            items = resp.json()
+            return sorted({item.get("id_orgao") or item["aid"] for item in items})
+
+        return await self._with_retry("órgãos", attempt)
+
+    async def _fetch_month(self, orgao: str, year: int, month: int) -> None:
+        key = month_key(orgao, year, month)
+        previous = self.manifest.get(key)
+        url = f"{self.base_url}/v1/orgao/{orgao}/{year}/{month}"
+        headers = {}
+        if previous is not None and previous.status == "ok":
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        async def attempt() -> MonthEntry | None:
+            now = datetime.now().isoformat(timespec="seconds")
+            async with self.limiter.limit(url):
+                async with self.client.stream("GET", url, headers=headers) as resp:
+                    if resp.status_code == 304:
+                        self.report.not_modified += 1
+                        return None
+                    if resp.status_code == 404:
+                        self.report.missing += 1
+                        return MonthEntry(status="missing", fetched_at=now)
+                    if resp.status_code in RETRYABLE_STATUS:
+                        raise RetryableStatus(resp)
+                    resp.raise_for_status()
+
+                    # Streaming para temporário; o arquivo anterior só é
+                    # substituído quando o download termina inteiro
+                    digest = hashlib.sha256()
+                    size = 0
+                    with atomic_open(raw_path(orgao, year, month)) as f:
+                        async for chunk in resp.aiter_bytes(_CHUNK_SIZE):
+                            digest.update(chunk)
+                            size += len(chunk)
+                            f.write(chunk)
+                    sha256 = digest.hexdigest()
+                    if previous is not None and previous.sha256 == sha256:
+                        self.report.unchanged += 1
+                    else:
+                        self.report.downloaded += 1
+                        self.report.bytes += size
+                        self.report.changed.append(key)
+                    return MonthEntry(
+                        status="ok",
+                        fetched_at=now,
+                        etag=resp.headers.get("etag"),
+                        last_modified=resp.headers.get("last-modified"),
+                        sha256=sha256,
+                        size=size,
+                    )
+
+        try:
+            entry = await self._with_retry(key, attempt)
+        except Exception as e:
+            logger.error("DadosJusBr %s falhou: %s", key, e)
+            self.report.failed += 1
+            # Mantém o estado anterior (e seus validadores) para a próxima tentativa
+            if previous is not None:
+                return
+            entry = MonthEntry(
+                status="failed",
+                fetched_at=datetime.now().isoformat(timespec="seconds"),
+                error=str(e),
+            )
+        if entry is not None:
+            self.manifest.put(key, entry)
+
+    async def sync(
+        self,
+        orgaos: list[str] | None = None,
+        start: tuple[int, int] = DEFAULT_START,
+        end: tuple[int, int] | None = None,
+        full: bool = False,
+    ) -> SyncReport:
+        """Sincroniza os meses de `start` a `end` (padrão: mês atual)."""
+        today = date.today()
+        end = end or (today.year, today.month)
+        orgaos = orgaos or await self.list_orgaos()
+
+        jobs = []
+        for orgao in orgaos:
+            for year, month in iter_months(start, end):
+                entry = self.manifest.get(month_key(orgao, year, month))
+                if full or _needs_check(entry, year, month, today, self.recheck_months):
+                    jobs.append(self._fetch_month(orgao, year, month))
+                else:
+                    self.report.skipped += 1
+
+        logger.info(
+            "DadosJusBr: %d órgão(s), %d mês(es) a consultar, %d consolidados",
+            len(orgaos),
+            len(jobs),
+            self.report.skipped,
+        )
+        try:
+            await asyncio.gather(*jobs)
+        finally:
+            self.manifest.save()
+        return self.report
+
+
+async def sync(
+    orgaos: list[str] | None = None,
+    start: tuple[int, int] = DEFAULT_START,
+    end: tuple[int, int] | None = None,
+    full: bool = False,
+    per_host: int = 4,
+    base_url: str = settings.dadosjusbr_base_url,
+    client: httpx.AsyncClient | None = None,
+) -> SyncReport:
+    """Executa um sync completo, criando (e fechando) o cliente se preciso."""
+    own_client = client is None
+    client = client or build_client(max_connections=per_host)
+    try:
+        crawler = DadosJusBrCrawler(client, base_url=base_url, per_host=per_host)
+        return await crawler.sync(orgaos, start, end, full)
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+def _parse_month(value: str) -> tuple[int, int]:
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawler do DadosJusBr (camada Bronze)")
+    parser.add_argument("--start", type=_parse_month, default=DEFAULT_START, help="AAAA-MM")
+    parser.add_argument("--end", type=_parse_month, default=None, help="AAAA-MM")
+    parser.add_argument("--orgaos", default="", help="Lista separada por vírgula (padrão: todos)")
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--full", action="store_true", help="Reconsulta também meses consolidados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    orgaos = [o.strip() for o in args.orgaos.split(",") if o.strip()] or None
+    report = asyncio.run(sync(orgaos, args.start, args.end, args.full, args.per_host))
+    logger.info(
+        "DadosJusBr: %d baixado(s), %d sem mudança (304), %d iguais, %d ausentes, "
+        "%d falha(s), %d pulado(s), %.1f MB",
+        report.downloaded,
+        report.not_modified,
+        report.unchanged,
+        report.missing,
+        report.failed,
+        report.skipped,
+        report.bytes / 1e6,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Índices de preço ao consumidor (IPCA e CPI-U) para o modo real.
+
+Baixa as séries mensais e grava `DATA_DIR/price_indices.bin` (ver
+`app.core.timeseries`), lido por `app.services.price_index`:
+
+- IPCA (Brasil): série SGS 433 do BCB, variação mensal em %. O SGS limita
+  cada consulta a 10 anos, então o período é quebrado em janelas. As
+  variações são encadeadas num número-índice (base 100 no mês anterior ao
+  primeiro); só as razões entre meses importam para deflacionar.
+- CPI-U (EUA): série CUUR0000SA0 do BLS, já em número-índice (1982-84=100).
+  Sem chave, a API pública devolve até 10 anos por consulta; a média anual
+  (`M13`) é descartada — o app calcula as suas a partir dos meses.
+
+Cada série é gravada com a data do primeiro dia do mês e uma coluna
+`index`. Depois do ETL, `/internal/purge` com o namespace "prices" faz a
+aplicação reler o arquivo.
+
+Uso:
+    python -m etl.sources.price_indices --start 1994-07
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+from app.core.storage import data_path
+from app.core.timeseries import to_day, write_timeseries
+from app.services.price_index import COLUMN, MIN_BASE, PRICE_INDEX_FILE
+from etl.http import (
+    RETRYABLE_STATUS,
+    RetryableStatus,
+    backoff_delay,
+    build_client,
+    is_retryable,
+    retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+SGS_URL = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{series}/dados"
+IPCA_SERIES = 433
+BLS_URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+CPI_SERIES = "CUUR0000SA0"
+
+WINDOW_YEARS = 10
+RETRIES = 4
+
+
+async def _request(
+    client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs
+) -> httpx.Response:
+    """Requisição com retry (rede e status transitórios, ver `etl.http.RETRYABLE_STATUS`)."""
+    for attempt in range(RETRIES + 1):
+        try:
+            resp = await client.request(method, url, **kwargs)
+            if resp.status_code in RETRYABLE_STATUS:
+                raise RetryableStatus(resp)
+            resp.raise_for_status()
+            return resp
+        except (httpx.TransportError, RetryableStatus) as e:
+            if not is_retryable(e) or attempt == RETRIES:
+                raise
+            delay = retry_after(getattr(e, "response", None))
+            if delay is None:
+                delay = backoff_delay(attempt)
+            logger.warning("%s: %s; nova tentativa em %.1fs", label, e, delay)
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+def _windows(start: int, end: int) -> list[tuple[int, int]]:
+    """Anos [start, end] em janelas de até `WINDOW_YEARS` anos."""
+    return [(y, min(y + WINDOW_YEARS - 1, end)) for y in range(start, end + 1, WINDOW_YEARS)]
+
+
+def chain_index(changes: list[tuple[date, float]]) -> list[tuple[date, float]]:
+    """Variações mensais em % → número-índice (base 100 antes do primeiro mês)."""
+    level = 100.0
+    out = []
+    for month, pct in changes:
+        level *= 1 + pct / 100
+        out.append((month, round(level, 8)))
+    return out
+
+
+async def fetch_ipca(client: httpx.AsyncClient, start: date, end: date) -> list[tuple[date, float]]:
+    """IPCA mensal (SGS 433) encadeado em número-índice."""
+    url = SGS_URL.format(series=IPCA_SERIES)
+    changes: dict[date, float] = {}
+    for first, last in _windows(start.year, end.year):
+        params = {
+            "formato": "json",
+            "dataInicial": f"01/01/{first}",
+            "dataFinal": f"31/12/{last}",
+        }
+        label = f"SGS {IPCA_SERIES} {first}-{last}"
+        resp = await _request(client, label, "GET", url, params=params)
+        for item in resp.json():
+            _, month, year = (int(part) for part in item["data"].split("/"))
+            changes[date(year, month, 1)] = float(item["valor"])
+    return chain_index([(m, v) for m, v in sorted(changes.items()) if start <= m <= end])
+
+
+async def fetch_cpi(client: httpx.AsyncClient, start: date, end: date) -> list[tuple[date, float]]:
+    """CPI-U mensal, sem ajuste sazonal (BLS CUUR0000SA0)."""
+    values: dict[date, float] = {}
+    for first, last in _windows(start.year, end.year):
+        body = {"seriesid": [CPI_SERIES], "startyear": str(first), "endyear": str(last)}
+        label = f"BLS {CPI_SERIES} {first}-{last}"
+        resp = await _request(client, label, "POST", BLS_URL, json=body)
+        payload = resp.json()
+        if payload.get("status") != "REQUEST_SUCCEEDED":
+            raise RuntimeError(f"BLS {CPI_SERIES}: {payload.get('message')}")
+        for item in payload["Results"]["series"][0]["data"]:
+            period = item["period"]
+            if not period.startswith("M") or period == "M13" or item["value"] == "-":
+                continue
+            values[date(int(item["year"]), int(period[1:]), 1)] = float(item["value"])
+    return [(m, v) for m, v in sorted(values.items()) if start <= m <= end]
+
+
+def build_price_file(
+    series: dict[str, list[tuple[date, float]]], path: Path | None = None
+) -> Path:
+    """Grava as séries (país → [(mês, índice)]) no arquivo lido pela aplicação."""
+    path = path or data_path(PRICE_INDEX_FILE)
+    data = {
+        country: ([to_day(month) for month, _ in rows], {COLUMN: [value for _, value in rows]})
+        for country, rows in series.items()
+        if rows
+    }
+    size = write_timeseries(path, (COLUMN,), data)
+    logger.info(
+        "Índices de preço gravados em %s (%s; %.1f KB)",
+        path,
+        ", ".join(sorted(data)),
+        size / 1024,
+    )
+    return path
+
+
+async def fetch_all(start: date, end: date) -> dict[str, list[tuple[date, float]]]:
+    """Baixa IPCA e CPI em paralelo.
+
+    Qualquer falha aborta a carga: o arquivo anterior, completo, continua
+    valendo (gravar só uma das séries tiraria o outro país do modo real).
+    """
+    async with build_client() as client:
+        ipca, cpi = await asyncio.gather(
+            fetch_ipca(client, start, end), fetch_cpi(client, start, end)
+        )
+    return {"BRA": ipca, "USA": cpi}
+
+
+def _month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Carga dos índices de preço (IPCA, CPI-U)")
+    parser.add_argument("--start", type=_month, default=_month(MIN_BASE), help="AAAA-MM")
+    parser.add_argument("--end", type=_month, default=None, help="AAAA-MM (padrão: mês atual)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    end = args.end or date.today().replace(day=1)
+    build_price_file(asyncio.run(fetch_all(args.start, end)))
+
+
+if __name__ == "__main__":
+    main()
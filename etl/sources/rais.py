@@ -0,0 +1,41 @@
+"""Microdados da RAIS Vínculos (anual) → Parquet (Bronze).
+
+Os arquivos `RAIS_VINC_PUB_*.txt` do FTP do MTE vêm em .7z; extraia antes. A
+conversão em si está em `etl.parquet`.
+
+Uso:
+    python -m etl.sources.rais RAIS_VINC_PUB_SP.txt RAIS_VINC_PUB_NORDESTE.txt
+"""
+
+import pyarrow as pa
+
+from etl.parquet import CsvSpec, run_cli
+
+RAIS_SPEC = CsvSpec(
+    name="rais",
+    columns={
+        "CBO Ocupação 2002": ("cbo", pa.string()),
+        "CNAE 2.0 Subclasse": ("cnae_subclasse", pa.string()),
+        "Natureza Jurídica": ("natureza_juridica", pa.int16()),
+        "Município": ("municipio", pa.int32()),
+        "Vínculo Ativo 31/12": ("ativo_31_12", pa.int8()),
+        "Tipo Vínculo": ("tipo_vinculo", pa.int16()),
+        "Escolaridade após 2005": ("escolaridade", pa.int8()),
+        "Idade": ("idade", pa.int16()),
+        "Sexo Trabalhador": ("sexo", pa.int8()),
+        "Raça Cor": ("raca_cor", pa.int8()),
+        "Qtd Hora Contr": ("horas_contratuais", pa.int16()),
+        "Tempo Emprego": ("tempo_emprego_meses", pa.float32()),
+        "Vl Remun Média Nom": ("remuneracao_media", pa.float64()),
+        "Vl Remun Dezembro Nom": ("remuneracao_dezembro", pa.float64()),
+        "Tamanho Estabelecimento": ("tamanho_estabelecimento", pa.int8()),
+    },
+)
+
+
+def main() -> None:
+    run_cli(RAIS_SPEC, "RAIS Vínculos (microdados) → Parquet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""Coleta de servidores federais e remunerações do Portal da Transparência.
+
+Fluxo por órgão (`orgaoServidorExercicio`) e mês de referência:
+
+1. Pagina `GET /servidores?orgaoServidorExercicio=…&pagina=N` até vir vazio.
+2. Para cada servidor da página, busca `GET /servidores/{id}/remuneracao`
+   em paralelo, dentro do orçamento de requisições.
+3. Normaliza (sem nome/CPF — ver análise LGPD) e grava a página inteira como
+   um lote JSON Lines em `DATA_DIR/bronze/transparencia/{mesAno}/{orgao}/`.
+4. Só então avança o cursor da página no checkpoint. Reexecutar retoma da
+   primeira página não gravada; regravar uma página é idempotente.
+
+Limite de requisições: a API limita por chave (90 req/min de dia, 300 req/min
+de 0h a 6h). Cada chave tem um `AdaptiveTokenBucket` no teto do horário; um 429
+reduz a taxa daquela chave e respeita `Retry-After`. Várias chaves (separadas
+por vírgula em `PORTAL_TRANSPARENCIA_API_KEY`) somam cotas: cada requisição usa
+a chave com token disponível mais cedo. Chave recusada (401/403) é descartada.
+
+Uso:
+    python -m etl.sources.transparency --mes-ano 202601 --orgaos 26246,20101
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+
+from app.config import get_settings
+from app.core.storage import atomic_write_bytes, atomic_write_json, data_path, read_json
+from etl.http import AdaptiveTokenBucket, backoff_delay, build_client, retry_after
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+BASE_URL = "https://api.portaldatransparencia.gov.br/api-de-dados"
+
+BRONZE_DIR = ("bronze", "transparencia")
+CHECKPOINT_DIR = ("etl", "transparencia")
+CHECKPOINT_SCHEMA = 1
+
+# Limites documentados da API, por chave (requisições por minuto)
+DAY_LIMIT_PER_MINUTE = 90
+NIGHT_LIMIT_PER_MINUTE = 300  # 00:00–05:59
+# Margem para não encostar no limite exato (relógios e janelas do servidor)
+RATE_SAFETY = 0.95
+
+# Remunerações em voo ao mesmo tempo (o bucket controla a taxa; isto, a memória)
+MAX_IN_FLIGHT = 32
+
+# 429 seguidos tolerados numa mesma requisição antes de desistir
+MAX_THROTTLES_PER_REQUEST = 20
+
+
+class KeyRejected(Exception):
+    """A API recusou a chave (401/403)."""
+
+
+def allowed_rate(now: datetime | None = None) -> float:
+    """Requisições por segundo permitidas por chave no horário `now`."""
+    now = now or datetime.now()
+    per_minute = NIGHT_LIMIT_PER_MINUTE if now.hour < 6 else DAY_LIMIT_PER_MINUTE
+    return per_minute / 60 * RATE_SAFETY
+
+
+class KeyPool:
+    """Chaves de API, cada uma com seu token bucket."""
+
+    def __init__(self, keys: list[str], clock: Callable[[], float] = time.monotonic):
+        if not keys:
+            raise ValueError("Nenhuma chave do Portal da Transparência configurada")
+        rate = allowed_rate()
+        self.buckets = {key: AdaptiveTokenBucket(rate, clock=clock) for key in keys}
+
+    async def acquire(self) -> str:
+        """Reserva uma requisição na chave que libera token mais cedo."""
+        if not self.buckets:
+            raise KeyRejected("Todas as chaves foram recusadas")
+        ceiling = allowed_rate()
+        for bucket in self.buckets.values():
+            if bucket.ceiling != ceiling:
+                bucket.set_ceiling(ceiling)
+        key = min(self.buckets, key=lambda k: self.buckets[k].wait_time())
+        await self.buckets[key].acquire()
+        return key
+
+    def on_success(self, key: str) -> None:
+        if key in self.buckets:
+            self.buckets[key].on_success()
+
+    def on_throttle(self, key: str, retry_after_seconds: float | None) -> None:
+        if key in self.buckets:
+            self.buckets[key].on_throttle(retry_after_seconds)
+
+    def reject(self, key: str) -> None:
+        if self.buckets.pop(key, None) is not None:
+            logger.error("Chave do Portal da Transparência recusada (…%s)", key[-4:])
+
+    @property
+    def total_rate(self) -> float:
+        return sum(b.rate for b in self.buckets.values())
+
+
+@dataclass
+class RemuneracaoRecord:
+    """Remuneração mensal normalizada de um servidor (sem dados pessoais)."""
+
+    servidor_id: int
+    orgao_codigo: str
+    mes_ano: str  # AAAAMM
+    cargo: str | None
+    funcao: str | None
+    remuneracao_basica: float
+    remuneracao_eventual: float
+    verbas_indenizatorias: float
+    deducoes_obrigatorias: float
+    total_bruto: float
+    total_liquido: float | None
+
+
+def parse_money(value: Any) -> float:
+    """Valor monetário da API ("12.345,67", "12345.67" ou número) → float."""
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r"[^\d,.-]", "", str(value))
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def _first(data: dict, *names: str) -> Any:
+    for name in names:
+        if data.get(name) not in (None, ""):
+            return data[name]
+    return None
+
+
+def normalize(servidor: dict, payload: Any, orgao: str, mes_ano: str) -> list[RemuneracaoRecord]:
+    """Converte a resposta de remuneração em registros do mês pedido."""
+    items = payload if isinstance(payload, list) else [payload]
+    cargo = _first(servidor, "cargo", "descricaoCargo")
+    if isinstance(cargo, dict):
+        cargo = _first(cargo, "descricao", "nome")
+    funcao = _first(servidor, "funcao", "descricaoFuncao")
+    if isinstance(funcao, dict):
+        funcao = _first(funcao, "descricao", "nome")
+
+    records = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        # A resposta pode trazer vários meses (lista de DTOs) ou um só
+        for rem in item.get("remuneracoesDTO") or [item]:
+            ref = str(_first(rem, "mesAno", "mes_referencia") or mes_ano).replace("/", "")
+            if (
+                len(ref) == 6
+                and ref[:2].isdigit()
+                and int(ref[:2]) <= 12
+                and not ref.startswith("20")
+            ):
+                ref = ref[2:] + ref[:2]  # MMAAAA → AAAAMM
+            if ref != mes_ano:
+                continue
+            basica = parse_money(_first(rem, "remuneracaoBasicaBruta", "remuneracao_basica"))
+            eventual = parse_money(_first(rem, "remuneracaoEventual", "remuneracao_eventual"))
+            verbas = parse_money(_first(rem, "verbasIndenizatorias", "verbas_indenizatorias"))
+            deducoes = parse_money(_first(rem, "deducoesObrigatorias", "deducoes_obrigatorias"))
+            total = parse_money(_first(rem, "valorTotalRemuneracao", "total_remuneracao"))
+            liquido = _first(
+                rem, "valorTotalRemuneracaoAposDeducoes", "normalizado_total_remuneracao"
+            )
+            records.append(
+                RemuneracaoRecord(
+                    servidor_id=int(servidor["id"]),
+                    orgao_codigo=orgao,
+                    mes_ano=mes_ano,
+                    cargo=cargo,
+                    funcao=funcao,
+                    remuneracao_basica=basica,
+                    remuneracao_eventual=eventual,
+                    verbas_indenizatorias=verbas,
+                    deducoes_obrigatorias=deducoes,
+                    total_bruto=total or basica + eventual + verbas,
+                    total_liquido=parse_money(liquido) if liquido is not None else None,
+                )
+            )
+    return records
+
+
+class TransparencyHarvester:
+    """Coletor paginado com orçamento de requisições e checkpoint por página."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        keys: list[str],
+        mes_ano: str,
+        base_url: str = BASE_URL,
+        retries: int = 6,
+        max_in_flight: int = MAX_IN_FLIGHT,
+    ):
+        self.client = client
+        self.keys = KeyPool(keys)
+        self.mes_ano = mes_ano
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.checkpoint_path = data_path(*CHECKPOINT_DIR, f"{mes_ano}.json")
+        raw = read_json(self.checkpoint_path) or {}
+        self.checkpoint: dict[str, dict] = (
+            raw.get("orgaos", {}) if raw.get("schema") == CHECKPOINT_SCHEMA else {}
+        )
+        self.requests = 0
+        self.throttled = 0
+
+    def _save_checkpoint(self) -> None:
+        atomic_write_json(
+            self.checkpoint_path, {"schema": CHECKPOINT_SCHEMA, "orgaos": self.checkpoint}
+        )
+
+    async def _get(self, path: str, params: dict | None = None) -> Any:
+        """GET com chave do pool, adaptando a taxa a 429 e com retry."""
+        url = f"{self.base_url}{path}"
+        failures = throttles = 0
+        while True:
+            key = await self.keys.acquire()
+            self.requests += 1
+            try:
+                resp = await self.client.get(
+                    url,
+                    params=params,
+                    headers={"chave-api-dados": key, "Accept": "application/json"},
+                )
+            except httpx.TransportError as e:
+                failures += 1
+                if failures > self.retries:
+                    raise
+                logger.warning("Portal %s: %s (tentativa %d)", path, e, failures)
+                await asyncio.sleep(backoff_delay(failures))
+                continue
+
+            if resp.status_code == 429:
+                # O bucket da chave já recua e espera; não conta como falha
+                self.throttled += 1
+                throttles += 1
+                if throttles > MAX_THROTTLES_PER_REQUEST:
+                    resp.raise_for_status()
+                self.keys.on_throttle(key, retry_after(resp))
+                continue
+            if resp.status_code in (401, 403):
+                self.keys.reject(key)
+                continue
+            if resp.status_code >= 500:
+                failures += 1
+                if failures > self.retries:
+                    resp.raise_for_status()
+                await asyncio.sleep(backoff_delay(failures))
+                continue
+            resp.raise_for_status()
+            self.keys.on_success(key)
+            return resp.json()
+
+    async def _remuneracao(self, servidor: dict, orgao: str) -> list[RemuneracaoRecord]:
+        async with self._in_flight:
+            payload = await self._get(
+                f"/servidores/{servidor['id']}/remuneracao", {"mesAno": self.mes_ano}
+            )
+        return normalize(servidor, payload, orgao, self.mes_ano)
+
+    def _batch_path(self, orgao: str, page: int) -> Path:
+        return data_path(*BRONZE_DIR, self.mes_ano, orgao, f"page-{page:05d}.jsonl")
+
+    async def harvest_orgao(self, orgao: str) -> int:
+        """Coleta um órgão a partir do cursor salvo. Retorna registros gravados."""
+        state = self.checkpoint.setdefault(orgao, {"next_page": 1, "done": False, "records": 0})
+        if state["done"]:
+            return 0
+        written = 0
+        while True:
+            page = state["next_page"]
+            servidores = await self._get(
+                "/servidores", {"orgaoServidorExercicio": orgao, "pagina": page}
+            )
+            if not servidores:
+                state["done"] = True
+                self._save_checkpoint()
+                break
+
+            results = await asyncio.gather(*(self._remuneracao(s, orgao) for s in servidores))
+            records = [r for batch in results for r in batch]
+            payload = "".join(json.dumps(asdict(r), ensure_ascii=False) + "\n" for r in records)
+            atomic_write_bytes(self._batch_path(orgao, page), payload.encode("utf-8"))
+
+            written += len(records)
+            state["records"] += len(records)
+            state["next_page"] = page + 1
+            self._save_checkpoint()
+            logger.info(
+                "Portal %s p.%d: %d registro(s) (%.2f req/s, %d 429)",
+                orgao,
+                page,
+                len(records),
+                self.keys.total_rate,
+                self.throttled,
+            )
+        return written
+
+    async def harvest(self, orgaos: list[str]) -> dict[str, int]:
+        """Coleta vários órgãos em paralelo (o orçamento de requisições é comum)."""
+        results = await asyncio.gather(
+            *(self.harvest_orgao(o) for o in orgaos), return_exceptions=True
+        )
+        summary = {}
+        for orgao, result in zip(orgaos, results):
+            if isinstance(result, BaseException):
+                logger.error(
+                    "Portal %s interrompido: %s (retoma na página %d)",
+                    orgao,
+                    result,
+                    self.checkpoint[orgao]["next_page"],
+                )
+                summary[orgao] = -1
+            else:
+                summary[orgao] = result
+        return summary
+
+
+def configured_keys() -> list[str]:
+    """Chaves em `PORTAL_TRANSPARENCIA_API_KEY` (uma ou várias, por vírgula)."""
+    return [k.strip() for k in settings.portal_transparencia_api_key.split(",") if k.strip()]
+
+
+async def harvest(
+    orgaos: list[str],
+    mes_ano: str,
+    keys: list[str] | None = None,
+    base_url: str = BASE_URL,
+    client: httpx.AsyncClient | None = None,
+) -> dict[str, int]:
+    """Executa a coleta, criando (e fechando) o cliente se preciso."""
+    own_client = client is None
+    client = client or build_client()
+    try:
+        harvester = TransparencyHarvester(
+            client, keys or configured_keys(), mes_ano, base_url=base_url
+        )
+        return await harvester.harvest(orgaos)
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Coleta de remunerações do Portal da Transparência"
+    )
+    parser.add_argument("--mes-ano", required=True, help="AAAAMM")
+    parser.add_argument("--orgaos", required=True, help="Códigos SIAPE separados por vírgula")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not re.fullmatch(r"\d{6}", args.mes_ano):
+        parser.error("--mes-ano deve ser AAAAMM")
+    orgaos = [o.strip() for o in args.orgaos.split(",") if o.strip()]
+    summary = asyncio.run(harvest(orgaos, args.mes_ano))
+    for orgao, count in summary.items():
+        logger.info("Portal %s: %s", orgao, "interrompido" if count < 0 else f"{count} registro(s)")
+
+
+if __name__ == "__main__":
+    main()
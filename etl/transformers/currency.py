@@ -0,0 +1,223 @@
+"""Conversão monetária em lote, com câmbio da data de cada registro.
+
+Substitui, no ETL, a conversão escalar (uma cotação, a de hoje, por
+chamada). Aqui a entrada são colunas NumPy de (valor, moeda, data) e a saída é
+a coluna convertida inteira, sem laço Python por linha. O loader
+(`etl.loader.fill_salary_usd`) usa isto para preencher `salary_usd`:
+
+1. As cotações históricas (o arquivo PTAX de `etl.sources.bcb_ptax`) ficam
+   numa `RateTable`: um único array ordenado pela chave composta (moeda, dia).
+2. Cada linha vira a mesma chave composta e um único `np.searchsorted` acha,
+   para todas as linhas de uma vez, a última cotação da moeda até aquela data
+   (semântica "as-of": fim de semana e feriado usam o último dia útil).
+3. A conversão é uma multiplicação/divisão vetorizada.
+
+Cotações são sempre "unidades da moeda base (BRL) por 1 unidade da moeda",
+como em `ExchangeRate.rate`. Converter para USD é `valor × taxa_X / taxa_USD`.
+
+Uso:
+    table = RateTable.from_timeseries(TimeSeriesFile(path))
+    salary_usd = convert(salary, currency, ref_date, table.monthly(), to="USD")
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+
+from app.core.timeseries import TimeSeriesFile
+
+BASE_CURRENCY = "BRL"
+
+# Chave composta: código da moeda nos bits altos, dia (desde 1970, com
+# deslocamento para datas antigas) nos 32 bits baixos
+_DAY_OFFSET = 1 << 31
+
+
+def _as_days(dates) -> np.ndarray:
+    """Datas (date, str ISO, datetime64) → dias desde 1970 (int64)."""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def _composite(codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+    return (codes.astype(np.int64) << 32) | (days + _DAY_OFFSET)
+
+
+@dataclass(frozen=True)
+class RateTable:
+    """Tabela de câmbio histórica, indexada por (moeda, data), imutável.
+
+    Os arrays são paralelos e ordenados por `keys`. Construa com
+    `from_records` ou `from_arrays`.
+    """
+
+    currencies: np.ndarray  # Moedas distintas, ordenadas (o índice é o código)
+    keys: np.ndarray  # Chave composta (código, dia), crescente
+    days: np.ndarray  # Dia de cada cotação (int64, dias desde 1970)
+    rates: np.ndarray  # BRL por unidade da moeda (float64)
+    base: str = BASE_CURRENCY
+
+    @classmethod
+    def from_arrays(cls, dates, currencies, rates, base: str = BASE_CURRENCY) -> "RateTable":
+        """Monta a tabela a partir de colunas (data, moeda, taxa).
+
+        Duplicatas de (moeda, data) ficam com a última ocorrência.
+        """
+        days = _as_days(dates)
+        currencies = np.asarray(currencies, dtype="U3")
+        rates = np.asarray(rates, dtype=np.float64)
+        if not (len(days) == len(currencies) == len(rates)):
+            raise ValueError("Colunas de câmbio com tamanhos diferentes")
+        if np.any(~np.isfinite(rates) | (rates <= 0)):
+            raise ValueError("Cotação inválida (não positiva ou não finita)")
+
+        uniq, codes = np.unique(currencies, return_inverse=True)
+        keys = _composite(codes, days)
+        # Ordenação estável + manter a última de cada chave repetida
+        order = np.argsort(keys, kind="stable")
+        keys, days, rates = keys[order], days[order], rates[order]
+        last = np.append(keys[1:] != keys[:-1], True) if len(keys) else np.array([], dtype=bool)
+        return cls(currencies=uniq, keys=keys[last], days=days[last], rates=rates[last], base=base)
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[tuple[date | str, str, float]], base: str = BASE_CURRENCY
+    ) -> "RateTable":
+        """Monta a tabela a partir de tuplas (data, moeda, taxa)."""
+        rows = list(records)
+        if not rows:
+            return cls.from_arrays([], [], [], base=base)
+        dates, currencies, rates = zip(*rows)
+        return cls.from_arrays(dates, currencies, rates, base=base)
+
+    @classmethod
+    def from_timeseries(
+        cls, history: TimeSeriesFile, column: str = "rate", base: str = BASE_CURRENCY
+    ) -> "RateTable":
+        """Monta a tabela a partir de um arquivo de séries (uma série por moeda).
+
+        Os arrays são copiados: a tabela continua válida depois de fechar o arquivo.
+        """
+        names = history.names
+        days = [np.asarray(history[name].days, dtype=np.int64) for name in names]
+        rates = [np.asarray(history[name].columns[column], dtype=np.float64) for name in names]
+        if not names:
+            return cls.from_arrays([], [], [], base=base)
+        return cls.from_arrays(
+            np.concatenate(days).astype("datetime64[D]"),
+            np.repeat(np.asarray(names, dtype="U3"), [len(d) for d in days]),
+            np.concatenate(rates),
+            base=base,
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _codes(self, currencies: np.ndarray) -> np.ndarray:
+        """Moeda → código na tabela; -1 para moeda desconhecida."""
+        if len(self.currencies) == 0:
+            return np.full(currencies.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self.currencies, currencies)
+        pos = np.minimum(pos, len(self.currencies) - 1)
+        return np.where(self.currencies[pos] == currencies, pos, -1)
+
+    def rates_for(self, currencies, dates, max_age_days: int | None = None) -> np.ndarray:
+        """Cotação vigente (as-of) de cada linha, em BRL por unidade.
+
+        A moeda base vale 1.0. Sem cotação até a data, moeda desconhecida ou
+        cotação mais velha que `max_age_days` → NaN.
+        """
+        currencies = np.asarray(currencies, dtype="U3")
+        days = _as_days(dates)
+        if days.shape != currencies.shape:
+            days = np.broadcast_to(days, currencies.shape)
+
+        out = np.full(currencies.shape, np.nan)
+        codes = self._codes(currencies)
+        known = codes >= 0
+        if len(self.keys) and known.any():
+            idx = (
+                np.searchsorted(self.keys, _composite(codes[known], days[known]), side="right") - 1
+            )
+            safe = np.maximum(idx, 0)
+            # A cotação achada precisa ser da mesma moeda (senão não há histórico até a data)
+            ok = (idx >= 0) & ((self.keys[safe] >> 32) == codes[known])
+            if max_age_days is not None:
+                ok &= days[known] - self.days[safe] <= max_age_days
+            out[known] = np.where(ok, self.rates[safe], np.nan)
+        out[currencies == self.base] = 1.0
+        return out
+
+    def _average(self, unit: str) -> "RateTable":
+        """Médias por período (`unit` do datetime64: "M" ou "Y"), datadas no início dele."""
+        if len(self.keys) == 0:
+            return self
+        codes = self.keys >> 32
+        periods = self.days.astype("datetime64[D]").astype(f"datetime64[{unit}]")
+        # Grupos contíguos: a tabela já está ordenada por (moeda, dia)
+        boundary = np.ones(len(self.keys), dtype=bool)
+        boundary[1:] = (codes[1:] != codes[:-1]) | (periods[1:] != periods[:-1])
+        starts = np.flatnonzero(boundary)
+        sums = np.add.reduceat(self.rates, starts)
+        counts = np.diff(np.append(starts, len(self.keys)))
+        period_days = periods[starts].astype("datetime64[D]").astype(np.int64)
+        return RateTable(
+            currencies=self.currencies,
+            keys=_composite(codes[starts], period_days),
+            days=period_days,
+            rates=sums / counts,
+            base=self.base,
+        )
+
+    def monthly(self) -> "RateTable":
+        """Tabela de médias mensais (câmbio médio do período), datada no dia 1º.
+
+        Com ela, a consulta as-of de qualquer dia do mês devolve a média do mês.
+        """
+        return self._average("M")
+
+    def yearly(self) -> "RateTable":
+        """Tabela de médias anuais, datada em 1º de janeiro (dados anuais, ex.: RAIS)."""
+        return self._average("Y")
+
+
+def convert(
+    amounts,
+    currencies,
+    dates,
+    table: RateTable,
+    to: str = BASE_CURRENCY,
+    max_age_days: int | None = None,
+    strict: bool = False,
+) -> np.ndarray:
+    """Converte uma coluna de valores para `to` com o câmbio de cada data.
+
+    Args:
+        amounts: Valores na moeda original.
+        currencies: Código ISO 4217 de cada valor (ou um único código).
+        dates: Data de referência de cada valor (ou uma única data).
+        table: Cotações históricas (use `table.monthly()` para média do mês).
+        to: Moeda de destino.
+        max_age_days: Idade máxima aceita para a cotação encontrada.
+        strict: Se True, linha sem cotação levanta ValueError em vez de NaN.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    currencies = np.broadcast_to(np.asarray(currencies, dtype="U3"), amounts.shape)
+    days = np.broadcast_to(np.asarray(dates, dtype="datetime64[D]"), amounts.shape)
+
+    factor = table.rates_for(currencies, days, max_age_days)
+    if to != table.base:
+        target = table.rates_for(np.full(amounts.shape, to, dtype="U3"), days, max_age_days)
+        factor = factor / target
+
+    result = amounts * factor
+    if strict:
+        missing = np.isnan(factor) & ~np.isnan(amounts)
+        if missing.any():
+            first = int(np.flatnonzero(missing)[0])
+            raise ValueError(
+                f"{int(missing.sum())} valor(es) sem cotação; primeiro: "
+                f"{currencies[first]} em {days[first]}"
+            )
+    return result
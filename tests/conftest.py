@@ -0,0 +1,14 @@
+"""Fixtures comuns: diretório de dados isolado por teste."""
+
+from pathlib import Path
+
+import pytest
+
+from app.config import get_settings
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """`DATA_DIR` apontando para um diretório temporário."""
+    monkeypatch.setattr(get_settings(), "data_dir", str(tmp_path))
+    return tmp_path
@@ -0,0 +1,34 @@
+"""Fixtures dos testes de ETL: relógio falso para rate limiting e retry."""
+
+import asyncio
+
+import pytest
+
+
+class FakeClock:
+    """Relógio monotônico controlado pelo teste; `sleep` só avança o tempo."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Relógio falso; `asyncio.sleep` avança esse relógio em vez de esperar."""
+    fake = FakeClock()
+    monkeypatch.setattr(asyncio, "sleep", fake.sleep)
+    return fake
+
+
+@pytest.fixture
+def sleeps(clock: FakeClock) -> list[float]:
+    """Esperas pedidas (retry, backoff), registradas em vez de dormidas."""
+    return clock.sleeps
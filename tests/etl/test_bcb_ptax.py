@@ -0,0 +1,219 @@
+"""Backfill PTAX contra uma Olinda local (`httpx.MockTransport`)."""
+
+from datetime import date, datetime, timedelta
+
+import httpx
+import pytest
+
+from app.core.timeseries import TimeSeriesFile
+from app.services import exchange_rate
+from etl.sources import bcb_ptax
+
+BASE_URL = "http://olinda.test/odata"
+
+
+def _day(value: str) -> date:
+    return datetime.strptime(value.strip("'"), "%m-%d-%Y").date()
+
+
+def quote(currency: str, d: date) -> tuple[float, float]:
+    """Cotação determinística (compra, venda) de um dia útil."""
+    buy = {"USD": 5.0, "EUR": 5.5}.get(currency, 1.0) + d.toordinal() % 100 / 1000
+    return round(buy, 4), round(buy + 0.001, 4)
+
+
+class FakeOlinda:
+    """`CotacaoMoedaPeriodo` com boletins de dias úteis, falhas programáveis."""
+
+    def __init__(self, empty: tuple[str, ...] = ()):
+        self.empty = empty
+        self.requests: list[tuple[str, date, date]] = []
+        self.failures: list[httpx.Response] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        currency = params["@moeda"].strip("'")
+        start, end = _day(params["@dataInicial"]), _day(params["@dataFinalCotacao"])
+        self.requests.append((currency, start, end))
+        if self.failures:
+            return self.failures.pop(0)
+        items = []
+        d = start
+        while d <= end and currency not in self.empty:
+            if d.weekday() < 5:
+                buy, sell = quote(currency, d)
+                stamp = f"{d.isoformat()} 13:04:00.0"
+                items.append(
+                    {
+                        "cotacaoCompra": buy - 0.01,
+                        "cotacaoVenda": sell - 0.01,
+                        "dataHoraCotacao": stamp,
+                        "tipoBoletim": "Intermediário",
+                    }
+                )
+                items.append(
+                    {
+                        "cotacaoCompra": buy,
+                        "cotacaoVenda": sell,
+                        "dataHoraCotacao": stamp,
+                        "tipoBoletim": "Fechamento",
+                    }
+                )
+            d += timedelta(days=1)
+        return httpx.Response(200, json={"value": items})
+
+
+@pytest.fixture
+def olinda() -> FakeOlinda:
+    return FakeOlinda()
+
+
+async def run_backfill(olinda: FakeOlinda, currencies: list[str], start: date, end: date, **kwargs):
+    async with httpx.AsyncClient(transport=httpx.MockTransport(olinda)) as client:
+        return await bcb_ptax.backfill(
+            currencies, start, end, base_url=BASE_URL, client=client, **kwargs
+        )
+
+
+async def test_backfill_keeps_closing_quote_per_business_day(data_dir, olinda):
+    history = await run_backfill(olinda, ["USD"], date(2024, 1, 1), date(2024, 1, 14))
+
+    days = [day for day, _, _ in history["USD"]]
+    assert len(days) == 10  # Dois fins de semana fora
+    assert history["USD"][0] == ("2024-01-01", *quote("USD", date(2024, 1, 1)))
+
+
+async def test_checkpoints_skip_downloaded_windows(data_dir, olinda):
+    first = await run_backfill(olinda, ["USD"], date(2023, 1, 1), date(2023, 3, 31), window_days=30)
+    assert len(olinda.requests) == 3
+
+    again = await run_backfill(olinda, ["USD"], date(2023, 1, 1), date(2023, 3, 31), window_days=30)
+    assert again == first
+    assert len(olinda.requests) == 3
+
+
+async def test_resume_from_history_file(data_dir, olinda):
+    covered = await run_backfill(olinda, ["USD"], date(2023, 1, 2), date(2023, 12, 29))
+    path = bcb_ptax.build_history_file(covered, data_dir / "ptax.bin")
+    for checkpoint in (data_dir / "etl").rglob("*.json"):
+        checkpoint.unlink()
+    olinda.requests.clear()
+
+    history = TimeSeriesFile(path)
+    try:
+        resumed = await run_backfill(
+            olinda, ["USD"], date(2023, 1, 2), date(2024, 3, 31), window_days=180, history=history
+        )
+    finally:
+        history.close()
+
+    # Só a janela que passa do fim do arquivo vai à rede
+    assert [(c, end) for c, _, end in olinda.requests] == [("USD", date(2024, 3, 31))]
+    assert resumed["USD"][: len(covered["USD"])] == covered["USD"]
+    assert resumed["USD"][-1][0] == "2024-03-29"
+
+
+async def test_history_file_keeps_currencies_and_days_outside_the_run(data_dir, olinda):
+    path = data_dir / "ptax.bin"
+    first = await run_backfill(olinda, ["USD", "EUR"], date(2024, 1, 1), date(2024, 1, 31))
+    bcb_ptax.build_history_file(first, path)
+
+    # Só USD, só fevereiro (como `--currencies USD --start 2024-02-01`)
+    second = await run_backfill(olinda, ["USD"], date(2024, 2, 1), date(2024, 2, 29))
+    bcb_ptax.build_history_file(second, path)
+
+    history = TimeSeriesFile(path)
+    try:
+        assert history.names == ["EUR", "USD"]
+        assert len(history["EUR"]) == len(first["EUR"])
+        assert len(history["USD"]) == len(first["USD"]) + len(second["USD"])
+        assert history["USD"].first_day == date(2024, 1, 1)
+        assert history["USD"].last_day == date(2024, 2, 29)
+        day, buy, sell = second["USD"][0]
+        assert history["USD"].asof(date.fromisoformat(day)) == round((buy + sell) / 2, 6)
+    finally:
+        history.close()
+
+
+async def test_retry_honours_retry_after(data_dir, olinda, sleeps):
+    olinda.failures = [
+        httpx.Response(503, headers={"Retry-After": "7"}),
+        httpx.Response(429),
+    ]
+    history = await run_backfill(olinda, ["USD"], date(2024, 1, 1), date(2024, 1, 5))
+
+    assert len(olinda.requests) == 3
+    assert sleeps[0] == 7.0
+    assert 0 <= sleeps[1] <= 2.0  # Sem Retry-After: backoff com jitter
+    assert len(history["USD"]) == 5
+
+
+@pytest.mark.parametrize("status", [408, 425])
+async def test_transient_client_errors_are_retried(data_dir, olinda, sleeps, status):
+    olinda.failures = [httpx.Response(status)]
+    history = await run_backfill(olinda, ["USD"], date(2024, 1, 1), date(2024, 1, 5))
+
+    assert len(olinda.requests) == 2
+    assert len(sleeps) == 1
+    assert len(history["USD"]) == 5
+
+
+async def test_client_error_is_not_retried(data_dir, olinda, sleeps):
+    olinda.failures = [httpx.Response(400)]
+    history = await run_backfill(olinda, ["USD"], date(2024, 1, 1), date(2024, 1, 5))
+
+    assert len(olinda.requests) == 1
+    assert sleeps == []
+    assert history == {"USD": []}
+    assert not list((data_dir / "etl").rglob("*.json"))  # Sem checkpoint: retomada depois
+
+
+async def test_gives_up_after_retries(data_dir, olinda, sleeps):
+    olinda.failures = [httpx.Response(502)] * 3
+    history = await run_backfill(olinda, ["USD"], date(2024, 1, 1), date(2024, 1, 5), retries=2)
+
+    assert len(olinda.requests) == 3
+    assert len(sleeps) == 2
+    assert history == {"USD": []}
+
+
+async def test_empty_currency_is_left_out_of_the_file(data_dir):
+    olinda = FakeOlinda(empty=("EUR",))
+    history = await run_backfill(olinda, ["USD", "EUR"], date(2024, 1, 1), date(2024, 1, 31))
+    assert history["EUR"] == []
+
+    bcb_ptax.build_history_file(history)
+    assert exchange_rate.load_rate_history()
+    try:
+        assert exchange_rate.get_rate_series("EUR") is None
+        assert exchange_rate.get_historical_rate("EUR", date(2024, 1, 15)) is None
+        assert exchange_rate.get_historical_rate("USD", date(2024, 1, 15)) is not None
+    finally:
+        exchange_rate.close_rate_history()
+
+
+async def test_asof_lookup_on_weekend_and_holiday(data_dir):
+    friday, monday, christmas_eve, thursday = (
+        date(2024, 12, 20),
+        date(2024, 12, 23),
+        date(2024, 12, 24),
+        date(2024, 12, 26),
+    )
+    rows = [(d.isoformat(), *quote("USD", d)) for d in (friday, monday, christmas_eve, thursday)]
+    bcb_ptax.build_history_file({"USD": rows})
+    assert exchange_rate.load_rate_history()
+
+    def rate(d: date) -> float:
+        buy, sell = quote("USD", d)
+        return round((buy + sell) / 2, 6)
+
+    try:
+        lookup = exchange_rate.get_historical_rate
+        assert lookup("USD", date(2024, 12, 21)) == rate(friday)  # Sábado
+        assert lookup("USD", date(2024, 12, 22)) == rate(friday)  # Domingo
+        assert lookup("USD", date(2024, 12, 25)) == rate(christmas_eve)  # Natal
+        assert lookup("USD", date(2025, 1, 10)) == rate(thursday)  # Depois do último boletim
+        assert lookup("USD", date(2024, 12, 19)) is None  # Antes do primeiro
+        assert lookup("BRL", date(2024, 12, 25)) == 1.0
+    finally:
+        exchange_rate.close_rate_history()
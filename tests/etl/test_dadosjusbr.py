@@ -0,0 +1,207 @@
+"""Crawler do DadosJusBr contra uma API local (`httpx.MockTransport`)."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from etl.http import HostLimiter
+from etl.sources import dadosjusbr
+
+BASE_URL = "http://dadosjusbr.test"
+
+# Meses antigos (consolidados): re-syncs só os consultam se falharam
+START, END = (2020, 1), (2020, 6)
+
+
+class FakeDadosJusBr:
+    """`/v1/orgao/{orgao}/{ano}/{mes}` com ETag e falhas programáveis por mês."""
+
+    def __init__(self, delay: float = 0.0, etag: bool = True):
+        self.delay = delay
+        self.etag = etag
+        self.version = 1
+        self.requests: list[httpx.Request] = []
+        self.failures: dict[str, list[httpx.Response]] = {}
+        self.missing: set[str] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def body(self, path: str) -> bytes:
+        return json.dumps({"path": path, "version": self.version}).encode()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            path = request.url.path
+            if path == "/v1/orgaos":
+                return httpx.Response(200, json=[{"id_orgao": "tjsp"}, {"aid": "mpsp"}])
+            key = path.removeprefix("/v1/orgao/")
+            if self.failures.get(key):
+                return self.failures[key].pop(0)
+            if key in self.missing:
+                return httpx.Response(404)
+            etag = f'"{key}-v{self.version}"'
+            if self.etag and request.headers.get("if-none-match") == etag:
+                return httpx.Response(304)
+            headers = {"ETag": etag} if self.etag else {}
+            return httpx.Response(200, content=self.body(path), headers=headers)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def api() -> FakeDadosJusBr:
+    return FakeDadosJusBr()
+
+
+async def run_sync(api: FakeDadosJusBr, orgaos=("tjsp",), **kwargs) -> dadosjusbr.SyncReport:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(api)) as client:
+        crawler = dadosjusbr.DadosJusBrCrawler(
+            client,
+            base_url=BASE_URL,
+            per_host=kwargs.pop("per_host", 4),
+            retries=kwargs.pop("retries", 3),
+        )
+        return await crawler.sync(list(orgaos) if orgaos else None, START, END, **kwargs)
+
+
+def manifest(data_dir) -> dict:
+    path = data_dir.joinpath(*dadosjusbr.BRONZE_DIR, dadosjusbr.MANIFEST_FILE)
+    return json.loads(path.read_text())["months"]
+
+
+async def test_downloads_raw_months_and_lists_orgaos(data_dir, api):
+    report = await run_sync(api, orgaos=None)
+
+    assert report.downloaded == 12
+    assert sorted({key.split("/")[0] for key in report.changed}) == ["mpsp", "tjsp"]
+    raw = dadosjusbr.raw_path("tjsp", 2020, 3).read_bytes()
+    assert raw == api.body("/v1/orgao/tjsp/2020/3")
+    entry = manifest(data_dir)["tjsp/2020/03"]
+    assert entry["status"] == "ok"
+    assert entry["etag"] == '"tjsp/2020/3-v1"'
+    assert entry["size"] == len(raw)
+
+
+async def test_per_host_concurrency_limit(data_dir):
+    api = FakeDadosJusBr(delay=0.01)
+    await run_sync(api, orgaos=("tjsp", "mpsp"), per_host=2)
+
+    assert len(api.requests) == 12
+    assert api.max_in_flight == 2
+
+
+async def test_host_limiter_is_per_host():
+    limiter = HostLimiter(1)
+    entered = []
+
+    async def hold(url: str) -> None:
+        async with limiter.limit(url):
+            entered.append(url)
+            await asyncio.sleep(0.01)
+
+    task = asyncio.gather(hold("http://a.test/1"), hold("http://b.test/1"), hold("http://a.test/2"))
+    await asyncio.sleep(0.005)
+    # Um por host ao mesmo tempo: b entra sem esperar a, o segundo de a espera
+    assert entered == ["http://a.test/1", "http://b.test/1"]
+    await task
+    assert len(entered) == 3
+
+
+async def test_conditional_refetch_returns_not_modified(data_dir, api):
+    await run_sync(api)
+    before = dadosjusbr.raw_path("tjsp", 2020, 1).stat().st_mtime_ns
+    api.requests.clear()
+
+    report = await run_sync(api, full=True)
+
+    assert report.not_modified == 6
+    assert report.downloaded == 0
+    assert api.requests[0].headers["if-none-match"] == '"tjsp/2020/1-v1"'
+    assert dadosjusbr.raw_path("tjsp", 2020, 1).stat().st_mtime_ns == before
+
+    # Mês republicado: ETag nova, conteúdo novo
+    api.version = 2
+    report = await run_sync(api, full=True)
+    assert report.downloaded == 6
+    assert manifest(data_dir)["tjsp/2020/01"]["etag"] == '"tjsp/2020/1-v2"'
+
+
+async def test_same_content_without_validators_counts_as_unchanged(data_dir):
+    api = FakeDadosJusBr(etag=False)
+    await run_sync(api)
+    report = await run_sync(api, full=True)
+
+    assert report.unchanged == 6
+    assert report.downloaded == 0
+    assert report.changed == []
+
+
+async def test_manifest_resume_skips_consolidated_months(data_dir, api, sleeps):
+    api.failures["tjsp/2020/4"] = [httpx.Response(500)]
+    api.missing.add("tjsp/2020/5")
+    report = await run_sync(api, retries=0)
+
+    assert (report.downloaded, report.failed, report.missing) == (4, 1, 1)
+    assert manifest(data_dir)["tjsp/2020/04"]["status"] == "failed"
+    api.requests.clear()
+
+    # Novo processo: só o mês que falhou volta à fila
+    report = await run_sync(api, retries=0)
+
+    assert [r.url.path for r in api.requests] == ["/v1/orgao/tjsp/2020/4"]
+    assert report.skipped == 5
+    assert report.downloaded == 1
+    assert manifest(data_dir)["tjsp/2020/04"]["status"] == "ok"
+
+
+async def test_failure_keeps_previous_entry(data_dir, api, sleeps):
+    await run_sync(api)
+    api.failures["tjsp/2020/2"] = [httpx.Response(503)]
+
+    report = await run_sync(api, full=True, retries=0)
+
+    assert report.failed == 1
+    entry = manifest(data_dir)["tjsp/2020/02"]
+    assert entry["status"] == "ok"
+    assert entry["etag"] == '"tjsp/2020/2-v1"'
+
+
+async def test_retry_on_429_and_5xx(data_dir, api, sleeps):
+    api.failures["tjsp/2020/1"] = [
+        httpx.Response(429, headers={"Retry-After": "3"}),
+        httpx.Response(503),
+        httpx.Response(502, headers={"Retry-After": "0"}),
+    ]
+    report = await run_sync(api, retries=3)
+
+    assert report.failed == 0
+    assert report.downloaded == 6
+    assert len([r for r in api.requests if r.url.path.endswith("/2020/1")]) == 4
+    assert sleeps[0] == 3.0
+    assert 0 <= sleeps[1] <= 2.0  # Sem Retry-After: backoff com jitter
+    assert sleeps[2] == 0.0
+
+
+async def test_retry_on_408_and_425(data_dir, api, sleeps):
+    api.failures["tjsp/2020/1"] = [httpx.Response(408), httpx.Response(425)]
+    report = await run_sync(api, retries=3)
+
+    assert report.failed == 0
+    assert len([r for r in api.requests if r.url.path.endswith("/2020/1")]) == 3
+    assert len(sleeps) == 2
+
+
+async def test_client_errors_are_not_retried(data_dir, api, sleeps):
+    api.failures["tjsp/2020/1"] = [httpx.Response(403)]
+    report = await run_sync(api)
+
+    assert report.failed == 1
+    assert sleeps == []
+    assert manifest(data_dir)["tjsp/2020/01"]["status"] == "failed"
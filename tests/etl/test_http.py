@@ -0,0 +1,96 @@
+"""`AdaptiveTokenBucket` com relógio falso (sem esperas reais)."""
+
+import httpx
+import pytest
+
+from etl.http import AdaptiveTokenBucket, retry_after
+
+
+async def test_burst_then_one_token_per_interval(clock):
+    bucket = AdaptiveTokenBucket(2.0, clock=clock)
+
+    await bucket.acquire()
+    await bucket.acquire()
+    assert clock.sleeps == []
+
+    await bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+async def test_throttle_halves_rate_and_honours_retry_after(clock):
+    bucket = AdaptiveTokenBucket(2.0, clock=clock)
+
+    bucket.on_throttle(10.0)
+
+    assert bucket.rate == 1.0
+    assert bucket.tokens == 0.0
+    assert bucket.wait_time() == pytest.approx(10.0)
+    await bucket.acquire()
+    assert sum(clock.sleeps) == pytest.approx(10.0)
+
+    # Sem Retry-After: pausa de um intervalo de token na taxa nova
+    bucket.on_throttle(None)
+    assert bucket.rate == 0.5
+    assert bucket.wait_time() == pytest.approx(2.0)
+
+
+async def test_throttle_pause_does_not_shrink(clock):
+    bucket = AdaptiveTokenBucket(2.0, clock=clock)
+    bucket.on_throttle(30.0)
+    bucket.on_throttle(1.0)
+    assert bucket.wait_time() == pytest.approx(30.0)
+
+
+def test_rate_never_drops_below_minimum(clock):
+    bucket = AdaptiveTokenBucket(1.0, min_rate=0.2, clock=clock)
+    for _ in range(10):
+        bucket.on_throttle(0)
+    assert bucket.rate == 0.2
+
+
+def test_success_ramps_rate_back_to_ceiling(clock):
+    bucket = AdaptiveTokenBucket(1.5, increase=0.02, clock=clock)
+    bucket.on_throttle(0)
+    assert bucket.rate == 0.75
+
+    # Cada sucesso devolve 2% do teto: 25 sucessos recuperam a metade perdida
+    for _ in range(24):
+        bucket.on_success()
+    assert bucket.rate == pytest.approx(1.47)
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(1.5)
+    for _ in range(10):
+        bucket.on_success()
+    assert bucket.rate == 1.5
+
+
+def test_set_ceiling_lowers_rate_and_capacity(clock):
+    bucket = AdaptiveTokenBucket(5.0, clock=clock)
+
+    bucket.set_ceiling(1.5)
+
+    assert (bucket.ceiling, bucket.rate, bucket.capacity) == (1.5, 1.5, 1.5)
+    clock.now += 60
+    bucket.wait_time()
+    assert bucket.tokens == 1.5  # Reabastece só até a capacidade nova
+
+
+def test_raised_ceiling_is_reached_by_successes(clock):
+    bucket = AdaptiveTokenBucket(1.5, clock=clock)
+
+    bucket.set_ceiling(5.0)
+
+    assert bucket.rate == 1.5  # Sobe aos poucos, sem rajada
+    for _ in range(40):
+        bucket.on_success()
+    assert bucket.rate == 5.0
+
+
+def test_retry_after_seconds_and_http_date():
+    request = httpx.Request("GET", "http://api.test/")
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "12"}, request=request)) == 12
+    assert retry_after(httpx.Response(429, request=request)) is None
+    past = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert retry_after(httpx.Response(429, headers={"Retry-After": past}, request=request)) == 0
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "x"}, request=request)) is None
+    assert retry_after(None) is None
@@ -0,0 +1,36 @@
+"""Plano do orquestrador Gold: lotes novos pelo xact_id contra o snapshot do refresh."""
+
+from etl.orchestrator import VIEWS, _view_map, affected_views
+
+BY_NAME = _view_map(VIEWS)
+ALL_REFRESHED = {name: 500 for name in BY_NAME}
+
+
+def test_batch_committed_before_the_refresh_snapshot_is_not_new():
+    assert affected_views([("caged", 2024, 499)], ALL_REFRESHED, BY_NAME) == set()
+
+
+def test_batch_still_open_at_the_refresh_snapshot_is_picked_up():
+    # COPY começou antes do refresh e terminou depois: xact_id >= snapshot_xmin
+    assert affected_views([("caged", 2024, 500)], ALL_REFRESHED, BY_NAME) == {
+        "mv_salary_by_occupation_region",
+        "mv_region_year_summary",
+        "mv_caged_monthly",
+    }
+
+
+def test_batch_outside_the_view_slice_is_ignored():
+    # CAGED anterior a 2020 não alimenta mv_caged_monthly
+    assert affected_views([("caged", 2019, 900)], ALL_REFRESHED, BY_NAME) == {
+        "mv_salary_by_occupation_region",
+        "mv_region_year_summary",
+    }
+    assert affected_views([("oecd", 2024, 900)], ALL_REFRESHED, BY_NAME) == {
+        "mv_international_by_country"
+    }
+
+
+def test_views_never_refreshed_are_always_planned():
+    last_refresh = dict(ALL_REFRESHED)
+    del last_refresh["mv_international_by_country"]
+    assert affected_views([], last_refresh, BY_NAME) == {"mv_international_by_country"}
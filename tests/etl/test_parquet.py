@@ -0,0 +1,57 @@
+"""Conversão CSV → Parquet: row groups de tamanho fixo e tipos da `CsvSpec`."""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from etl.parquet import CsvSpec, convert_file
+
+SPEC = CsvSpec(
+    name="teste",
+    columns={
+        "Competência": ("competencia", pa.int32()),
+        "Salário": ("salario", pa.float64()),
+        "CBO": ("cbo", pa.string()),
+    },
+)
+
+
+def write_csv(path, rows: int) -> None:
+    lines = ["Competência;Salário;CBO"]
+    lines += [f"2026{i % 12 + 1:02d};{i},50; 2521{i % 10:02d} " for i in range(rows)]
+    path.write_bytes(("\n".join(lines) + "\n").encode("latin-1"))
+
+
+@pytest.mark.parametrize(
+    ("rows", "expected_groups"),
+    [(30_000, [10_000, 10_000, 10_000]), (25_000, [10_000, 10_000, 5_000]), (700, [700])],
+)
+def test_row_groups_have_exactly_row_group_size_rows(tmp_path, rows, expected_groups):
+    source = tmp_path / "MOV.csv"
+    write_csv(source, rows)
+    output = tmp_path / "MOV.parquet"
+
+    # Blocos pequenos: o pendente cruza várias vezes o limite do row group
+    stats = convert_file(source, output, SPEC, block_size=7_000, row_group_size=10_000)
+
+    metadata = pq.ParquetFile(output).metadata
+    assert stats.rows == rows
+    assert metadata.num_rows == rows
+    assert metadata.num_row_groups == len(expected_groups)
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == (
+        expected_groups
+    )
+
+
+def test_types_names_and_order_are_kept(tmp_path):
+    source = tmp_path / "MOV.csv"
+    write_csv(source, 12_345)
+    output = tmp_path / "MOV.parquet"
+    convert_file(source, output, SPEC, block_size=4_096, row_group_size=1_000)
+
+    table = pq.read_table(output)
+    assert table.schema == SPEC.schema
+    assert table["salario"].to_pylist()[:3] == [0.5, 1.5, 2.5]
+    assert table["salario"].to_pylist()[-1] == 12_344.5
+    assert table["cbo"][0].as_py() == "252100"
+    assert not list(tmp_path.glob(".*.tmp"))
@@ -0,0 +1,95 @@
+"""COPY binário montado dos buffers Arrow, conferido com um decodificador de referência."""
+
+import struct
+from decimal import Decimal
+
+import pyarrow as pa
+import pytest
+
+from etl import pgcopy
+from etl.loader import SILVER_SCHEMA, conform_batch
+
+
+def decode(stream: bytes, schema: pa.Schema) -> list[tuple]:
+    """Decodificador linha a linha do formato binário (só os tipos do loader)."""
+    assert stream.startswith(pgcopy.HEADER) and stream.endswith(pgcopy.TRAILER)
+    pos, end = len(pgcopy.HEADER), len(stream) - len(pgcopy.TRAILER)
+    rows = []
+    while pos < end:
+        (count,) = struct.unpack_from(">h", stream, pos)
+        assert count == len(schema)
+        pos += 2
+        row = []
+        for field in schema:
+            (size,) = struct.unpack_from(">i", stream, pos)
+            pos += 4
+            if size == -1:
+                row.append(None)
+                continue
+            raw = stream[pos : pos + size]
+            pos += size
+            if pa.types.is_string(field.type):
+                row.append(raw.decode())
+            elif pa.types.is_int16(field.type):
+                row.append(struct.unpack(">h", raw)[0])
+            else:
+                ndigits, weight, sign, dscale = struct.unpack_from(">hhHh", raw)
+                digits = struct.unpack_from(f">{ndigits}h", raw, 8)
+                value = sum(
+                    Decimal(d) * Decimal(10_000) ** (weight - i) for i, d in enumerate(digits)
+                )
+                value = -value if sign == 0x4000 else value
+                row.append(value.quantize(Decimal(1).scaleb(-dscale)))
+        rows.append(tuple(row))
+    assert pos == end
+    return rows
+
+
+def silver_batch() -> pa.RecordBatch:
+    table = pa.table(
+        {
+            "source": ["caged", "rais", None, "", "ção ü ✓", "wid"],
+            "country_code": ["BRA"] * 6,
+            "occupation_code": ["252105", "1", "2", "3", "4", "5"],
+            "year": [2024, None, -5, 32767, -32768, 0],
+            "salary": [0.0, 0.01, -0.01, 12_345_678.99, -9_999_999_999.99, 9_999_999_999.99],
+            "salary_usd": [None, 1.0, 100.0, 10_000.0, 0.99, 123_456.78],
+            "currency": ["BRL"] * 6,
+        }
+    )
+    return conform_batch(table.to_batches()[0])
+
+
+@pytest.mark.parametrize(("offset", "length"), [(0, 6), (2, 3), (5, 1)])
+def test_encode_matches_arrow_values(offset, length):
+    batch = silver_batch().slice(offset, length)
+    stream = pgcopy.HEADER + pgcopy.encode_batch(batch) + pgcopy.TRAILER
+
+    expected = list(zip(*(column.to_pylist() for column in batch.columns), strict=True))
+    assert decode(stream, SILVER_SCHEMA) == expected
+
+
+def test_numeric_at_the_layout_limit():
+    # 3 grupos inteiros na base 10000: até 10^12 − 1 (decimal128(14, 2))
+    values = [Decimal("999999999999.99"), Decimal("-999999999999.99"), Decimal("0.01")]
+    batch = pa.record_batch({"x": pa.array(values, pa.decimal128(14, 2))})
+    stream = pgcopy.HEADER + pgcopy.encode_batch(batch) + pgcopy.TRAILER
+    assert decode(stream, batch.schema) == [(v,) for v in values]
+
+    # 10^12 precisaria de um quarto grupo inteiro (o dígito sairia 10000)
+    batch = pa.record_batch({"x": pa.array([Decimal("1000000000000.00")], pa.decimal128(15, 2))})
+    with pytest.raises(pgcopy.UnsupportedType, match="14"):
+        pgcopy.encode_batch(batch)
+
+
+def test_empty_batch_encodes_to_nothing():
+    assert pgcopy.encode_batch(silver_batch().slice(0, 0)) == b""
+
+
+def test_unsupported_types_are_rejected():
+    batch = pa.record_batch({"x": pa.array([1.5])})
+    with pytest.raises(pgcopy.UnsupportedType, match="x"):
+        pgcopy.encode_batch(batch)
+    batch = pa.record_batch({"x": pa.array([Decimal("1.5")], pa.decimal128(12, 1))})
+    with pytest.raises(pgcopy.UnsupportedType):
+        pgcopy.encode_batch(batch)
@@ -0,0 +1,176 @@
+"""Coletor do Portal da Transparência: chaves, 429 e checkpoint (relógio falso)."""
+
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from etl.sources import transparency
+from etl.sources.transparency import KeyPool, KeyRejected, TransparencyHarvester
+
+BASE_URL = "http://portal.test/api-de-dados"
+MES_ANO = "202601"
+DAY_RATE = transparency.DAY_LIMIT_PER_MINUTE / 60 * transparency.RATE_SAFETY
+
+
+class FakePortal:
+    """`/servidores` paginado e `/servidores/{id}/remuneracao`, com respostas forçadas."""
+
+    def __init__(self, pages: int = 2, per_page: int = 3):
+        self.pages = pages
+        self.per_page = per_page
+        self.requests: list[httpx.Request] = []
+        self.queued: list[httpx.Response] = []
+        self.rejected_keys: set[str] = set()
+        self.fail_page: int | None = None
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers["chave-api-dados"] in self.rejected_keys:
+            return httpx.Response(401)
+        if self.queued:
+            return self.queued.pop(0)
+        path = request.url.path.removeprefix("/api-de-dados")
+        if path == "/servidores":
+            page = int(request.url.params["pagina"])
+            if page == self.fail_page:
+                return httpx.Response(400)
+            if page > self.pages:
+                return httpx.Response(200, json=[])
+            first = (page - 1) * self.per_page
+            return httpx.Response(
+                200,
+                json=[
+                    {"id": first + i, "cargo": {"descricao": "ANALISTA"}}
+                    for i in range(self.per_page)
+                ],
+            )
+        servidor = int(path.split("/")[2])
+        return httpx.Response(
+            200,
+            json=[
+                {
+                    "remuneracoesDTO": [
+                        {
+                            "mesAno": "01/2026",
+                            "remuneracaoBasicaBruta": "10.000,00",
+                            "remuneracaoEventual": f"{servidor},00",
+                            "valorTotalRemuneracaoAposDeducoes": "8.000,00",
+                        }
+                    ]
+                }
+            ],
+        )
+
+
+@pytest.fixture(autouse=True)
+def daytime(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Teto diurno fixo, independente da hora em que o teste roda."""
+    monkeypatch.setattr(transparency, "allowed_rate", lambda now=None: DAY_RATE)
+
+
+def harvester(client: httpx.AsyncClient, keys: list[str], clock) -> TransparencyHarvester:
+    h = TransparencyHarvester(client, keys, MES_ANO, base_url=BASE_URL, retries=2)
+    h.keys = KeyPool(keys, clock=clock)
+    return h
+
+
+def client_for(portal: FakePortal) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(portal))
+
+
+def test_allowed_rate_by_hour(monkeypatch):
+    monkeypatch.undo()
+    assert transparency.allowed_rate(datetime(2026, 1, 5, 3)) == pytest.approx(300 / 60 * 0.95)
+    assert transparency.allowed_rate(datetime(2026, 1, 5, 6)) == pytest.approx(90 / 60 * 0.95)
+
+
+async def test_pool_follows_hourly_ceiling(clock, monkeypatch):
+    pool = KeyPool(["k1"], clock=clock)
+    bucket = pool.buckets["k1"]
+    assert bucket.ceiling == pytest.approx(DAY_RATE)
+
+    night = transparency.NIGHT_LIMIT_PER_MINUTE / 60 * transparency.RATE_SAFETY
+    monkeypatch.setattr(transparency, "allowed_rate", lambda now=None: night)
+    await pool.acquire()
+    assert bucket.ceiling == pytest.approx(night)
+
+
+async def test_429_halves_key_rate_and_waits_retry_after(data_dir, clock):
+    portal = FakePortal()
+    portal.queued = [httpx.Response(429, headers={"Retry-After": "20"})]
+    async with client_for(portal) as client:
+        h = harvester(client, ["k1"], clock)
+        await h._get("/servidores", {"orgaoServidorExercicio": "1", "pagina": 1})
+
+    bucket = h.keys.buckets["k1"]
+    assert h.throttled == 1
+    assert len(portal.requests) == 2
+    assert sum(clock.sleeps) == pytest.approx(20.0)
+    # Metade da taxa, mais o passo de recuperação do sucesso seguinte
+    assert bucket.rate == pytest.approx(DAY_RATE / 2 + bucket.increase * DAY_RATE)
+
+
+async def test_429_moves_traffic_to_the_other_key(data_dir, clock):
+    portal = FakePortal()
+    portal.queued = [httpx.Response(429, headers={"Retry-After": "60"})]
+    async with client_for(portal) as client:
+        h = harvester(client, ["k1", "k2"], clock)
+        await h._get("/servidores", {"orgaoServidorExercicio": "1", "pagina": 1})
+
+    keys = [r.headers["chave-api-dados"] for r in portal.requests]
+    assert keys == ["k1", "k2"]
+    assert clock.sleeps == []  # k2 tinha token: nada de esperar o Retry-After de k1
+
+
+async def test_rejected_key_is_dropped(data_dir, clock):
+    portal = FakePortal()
+    portal.rejected_keys = {"bad"}
+    async with client_for(portal) as client:
+        h = harvester(client, ["bad", "good"], clock)
+        await h._get("/servidores", {"orgaoServidorExercicio": "1", "pagina": 1})
+        assert list(h.keys.buckets) == ["good"]
+
+        portal.rejected_keys = {"good"}
+        with pytest.raises(KeyRejected):
+            await h._get("/servidores", {"orgaoServidorExercicio": "1", "pagina": 1})
+
+
+async def test_server_errors_are_retried_then_raised(data_dir, clock):
+    portal = FakePortal()
+    portal.queued = [httpx.Response(503)] * 3
+    async with client_for(portal) as client:
+        h = harvester(client, ["k1"], clock)
+        with pytest.raises(httpx.HTTPStatusError):
+            await h._get("/servidores", {"orgaoServidorExercicio": "1", "pagina": 1})
+
+    assert len(portal.requests) == 3  # retries=2
+
+
+async def test_harvest_writes_pages_and_resumes_from_checkpoint(data_dir, clock):
+    portal = FakePortal(pages=3)
+    portal.fail_page = 2
+    async with client_for(portal) as client:
+        summary = await harvester(client, ["k1"], clock).harvest(["26246"])
+    assert summary == {"26246": -1}
+
+    checkpoint = json.loads((data_dir / "etl/transparencia" / f"{MES_ANO}.json").read_text())
+    assert checkpoint["orgaos"]["26246"]["next_page"] == 2
+
+    portal.fail_page = None
+    portal.requests.clear()
+    async with client_for(portal) as client:
+        summary = await harvester(client, ["k1"], clock).harvest(["26246"])
+    assert summary == {"26246": 6}
+
+    listing = [
+        r.url.params["pagina"] for r in portal.requests if r.url.path.endswith("/servidores")
+    ]
+    assert listing == ["2", "3", "4"]
+    pages = sorted((data_dir / "bronze/transparencia" / MES_ANO / "26246").glob("*.jsonl"))
+    assert [p.name for p in pages] == ["page-00001.jsonl", "page-00002.jsonl", "page-00003.jsonl"]
+    record = json.loads(pages[0].read_text().splitlines()[1])
+    assert record["servidor_id"] == 1
+    assert record["total_bruto"] == 10_001.0
+    assert record["total_liquido"] == 8_000.0
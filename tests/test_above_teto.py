@@ -0,0 +1,95 @@
+"""Totais acima do teto mantidos por delta: iguais a recalcular tudo, em qualquer ordem."""
+
+import numpy as np
+import pytest
+
+from app.services import above_teto, salary_data
+from app.services.payslips import open_store, write_month
+from app.services.salary_data import teto_vigente
+from etl.payslip_sketches import count_above_teto
+
+ORGAOS = ["tjsp", "tjrj", "mpsp", "trf1"]
+# Atravessa a troca de teto de fev/2024
+PERIODS = [202312, 202401, 202402, 202403]
+
+
+def brutos(rng: np.random.Generator) -> np.ndarray:
+    return np.round(rng.lognormal(10.4, 0.35, int(rng.integers(50, 400))), 2)
+
+
+def load(conn, orgao: str, key: int, bruto: np.ndarray) -> None:
+    teto = teto_vigente(key // 100, key % 100)
+    write_month(
+        conn, orgao, key // 100, key % 100, "sha", len(bruto), {}, count_above_teto(bruto, teto)
+    )
+
+
+def recomputed(data: dict[tuple[str, int], np.ndarray]) -> list[tuple]:
+    """Totais por mês calculados do zero a partir dos contracheques."""
+    totals: dict[int, list[int]] = {}
+    for (_, key), bruto in data.items():
+        month = count_above_teto(bruto, teto_vigente(key // 100, key % 100))
+        row = totals.setdefault(key, [0, 0, 0, 0])
+        for i, value in enumerate((1, month.payslips, month.above, month.excess_cents)):
+            row[i] += value
+    return [(key, *row) for key, row in sorted(totals.items())]
+
+
+def maintained(conn) -> list[tuple]:
+    return conn.execute(
+        "SELECT period, orgaos, payslips, above, excess_cents FROM above_teto_totals "
+        "ORDER BY period"
+    ).fetchall()
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = open_store(tmp_path / "payslip_sketches.sqlite3")
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_out_of_order_loads_and_reloads_match_recomputation(conn, seed):
+    rng = np.random.default_rng(seed)
+    data = {(orgao, key): brutos(rng) for orgao in ORGAOS for key in PERIODS}
+    order = list(data)
+    rng.shuffle(order)
+    for orgao, key in order:
+        load(conn, orgao, key, data[(orgao, key)])
+    assert maintained(conn) == recomputed(data)
+
+    # Reaplica alguns meses com contracheques corrigidos (e um repetido igual)
+    for i in rng.choice(len(order), 6, replace=False):
+        orgao, key = order[i]
+        data[(orgao, key)] = brutos(rng)
+        load(conn, orgao, key, data[(orgao, key)])
+    orgao, key = order[0]
+    load(conn, orgao, key, data[(orgao, key)])
+
+    assert maintained(conn) == recomputed(data)
+    assert above_teto.monthly(conn)[0][1:] == tuple(recomputed(data)[0][2:])
+
+
+def test_teto_history_change_marks_only_affected_months(conn, monkeypatch):
+    rng = np.random.default_rng(9)
+    data = {(orgao, key): brutos(rng) for orgao in ORGAOS for key in PERIODS}
+    for (orgao, key), bruto in data.items():
+        load(conn, orgao, key, bruto)
+    assert above_teto.stale_months(conn) == set()
+
+    # Correção do histórico: o teto de fev/2024 passa a valer a partir de jan/2024
+    history = tuple(
+        (2024, 1, value) if (year, month) == (2024, 2) else (year, month, value)
+        for year, month, value in salary_data.TETO_HISTORICO
+    )
+    monkeypatch.setattr(salary_data, "TETO_HISTORICO", history)
+
+    stale = above_teto.stale_months(conn)
+    assert stale == {(orgao, 202401) for orgao in ORGAOS}
+    assert maintained(conn) != recomputed(data)
+
+    for orgao, key in sorted(stale):
+        load(conn, orgao, key, data[(orgao, key)])
+    assert above_teto.stale_months(conn) == set()
+    assert maintained(conn) == recomputed(data)
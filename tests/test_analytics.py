@@ -0,0 +1,163 @@
+"""Motor analítico: percentis, média e desigualdade conferidos por força bruta."""
+
+import numpy as np
+import pytest
+
+from app.services import analytics
+from app.services.analytics import QueryError, SalaryCube, write_salary_cube
+
+OCCUPATIONS = ["252105", "317110", "411010"]
+REGIONS = ["SP", "RJ", "MG", "BA"]
+YEARS = np.arange(2020, 2024)
+PERCENTILES = (0, 10, 25, 50, 75, 90, 100)
+
+
+@pytest.fixture(scope="module")
+def rows() -> dict[str, np.ndarray]:
+    """Linhas sintéticas, com alguns salários inválidos que o snapshot descarta."""
+    rng = np.random.default_rng(7)
+    n = 3_000
+    salary = rng.lognormal(8.0, 0.7, n).astype(np.float32)
+    salary[:5] = [0.0, -10.0, np.nan, np.inf, 0.0]
+    return {
+        "occupation": rng.integers(0, len(OCCUPATIONS), n),
+        "region": rng.integers(0, len(REGIONS), n),
+        "year": rng.choice(YEARS, n),
+        "salary": salary,
+    }
+
+
+@pytest.fixture(scope="module")
+def cube(rows, tmp_path_factory) -> SalaryCube:
+    path = tmp_path_factory.mktemp("cube") / "salary_cube-test"
+    write_salary_cube(
+        path,
+        "test",
+        rows["occupation"],
+        rows["region"],
+        rows["year"],
+        rows["salary"],
+        OCCUPATIONS,
+        [f"Ocupação {code}" for code in OCCUPATIONS],
+        REGIONS,
+        [f"UF {code}" for code in REGIONS],
+    )
+    return SalaryCube.load(path)
+
+
+def expected_groups(rows, group_by, occupations=None, regions=None, factors=None) -> dict:
+    """Salários de cada grupo, filtrados e agrupados linha a linha."""
+    labels = {
+        "occupation": np.asarray(OCCUPATIONS)[rows["occupation"]],
+        "region": np.asarray(REGIONS)[rows["region"]],
+        "year": rows["year"],
+    }
+    salary = rows["salary"].astype(np.float64)
+    keep = np.isfinite(salary) & (salary > 0)
+    if occupations is not None:
+        keep &= np.isin(labels["occupation"], occupations)
+    if regions is not None:
+        keep &= np.isin(labels["region"], regions)
+    if factors is not None:
+        salary = salary * factors[rows["year"] - YEARS[0]]
+    groups: dict[tuple, list[float]] = {}
+    for i in np.flatnonzero(keep):
+        key = tuple(labels[dim][i].item() for dim in group_by)
+        groups.setdefault(key, []).append(salary[i])
+    return {key: np.sort(values) for key, values in sorted(groups.items())}
+
+
+def brute_gini(values: np.ndarray) -> float:
+    """Diferença absoluta média entre todos os pares / (2 · média)."""
+    return np.abs(values[:, None] - values[None, :]).mean() / (2 * values.mean())
+
+
+def positions(result, expected: dict) -> dict[tuple, int]:
+    """Posição de cada grupo esperado no resultado (grupos na ordem dos códigos)."""
+    keys = [tuple(result.keys[dim][i] for dim in result.group_by) for i in range(len(result))]
+    assert sorted(keys) == list(expected)
+    return {key: i for i, key in enumerate(keys)}
+
+
+def assert_matches(result, expected: dict, rtol: float = 1e-6) -> None:
+    index = positions(result, expected)
+    for key, values in expected.items():
+        i = index[key]
+        assert result.count[i] == len(values)
+        assert result.mean[i] == pytest.approx(values.mean(), rel=rtol)
+        for q, column in result.percentiles.items():
+            assert column[i] == pytest.approx(np.percentile(values, q), rel=rtol)
+
+
+def test_single_cell_groups_read_sorted_slices(cube, rows):
+    group_by = ("occupation", "region", "year")
+    result = cube.query(group_by=group_by, percentiles=PERCENTILES)
+    assert len(result) == len(OCCUPATIONS) * len(REGIONS) * len(YEARS)
+    assert_matches(result, expected_groups(rows, group_by))
+    assert result.names["region"][0] == f"UF {result.keys['region'][0]}"
+
+
+@pytest.mark.parametrize(
+    ("group_by", "occupations", "regions"),
+    [
+        (("year",), ["252105", "411010"], ["SP", "BA"]),  # Células finas reunidas
+        (("occupation",), None, None),  # Vários anos por grupo
+        ((), None, ["RJ", "MG", "XX"]),  # Grupo único; código desconhecido ignorado
+    ],
+)
+def test_multi_cell_groups_are_merged(cube, rows, group_by, occupations, regions):
+    result = cube.query(
+        occupations=occupations, regions=regions, group_by=group_by, percentiles=PERCENTILES
+    )
+    assert_matches(result, expected_groups(rows, group_by, occupations, regions))
+
+
+def test_year_range_filter(cube, rows):
+    result = cube.query(year_from=2021, year_to=2022, group_by=("year", "region"))
+    expected = {
+        key: values
+        for key, values in expected_groups(rows, ("year", "region")).items()
+        if 2021 <= key[0] <= 2022
+    }
+    assert_matches(result, expected)
+
+
+@pytest.mark.parametrize("group_by", [("occupation", "region", "year"), ("region",)])
+def test_year_factors_scale_each_year(cube, rows, group_by):
+    factors = np.array([1.30, 1.20, 1.05, 1.0])
+    result = cube.query(group_by=group_by, percentiles=PERCENTILES, year_factors=factors)
+    # Caminho de fusão reordena em float32 depois de deflacionar
+    assert_matches(result, expected_groups(rows, group_by, factors=factors), rtol=1e-5)
+
+
+@pytest.mark.parametrize("group_by", [("occupation", "region", "year"), ("year",), ()])
+def test_inequality_matches_brute_force(cube, rows, group_by):
+    result = cube.inequality(group_by=group_by)
+    expected = expected_groups(rows, group_by)
+    index = positions(result, expected)
+    for key, values in expected.items():
+        i = index[key]
+        assert result.count[i] == len(values)
+        assert result.gini[i] == pytest.approx(brute_gini(values), rel=1e-6)
+        theil = np.mean(values / values.mean() * np.log(values / values.mean()))
+        assert result.theil[i] == pytest.approx(theil, rel=1e-5)
+        p90, p50, p10 = np.percentile(values, [90, 50, 10])
+        assert result.ratios["p90_p10"][i] == pytest.approx(p90 / p10, rel=1e-6)
+        assert result.ratios["p50_p10"][i] == pytest.approx(p50 / p10, rel=1e-6)
+
+
+def test_merge_above_limit_is_refused(cube, monkeypatch):
+    monkeypatch.setattr(analytics, "MAX_MERGE_ROWS", 100)
+    with pytest.raises(QueryError, match="sem agregado pronto"):
+        cube.query(group_by=("occupation",))
+    with pytest.raises(QueryError, match="sem agregado pronto"):
+        cube.inequality(regions=["SP", "RJ"], group_by=())
+    # Uma célula por grupo não passa pela fusão: sem limite
+    assert len(cube.query(group_by=("occupation", "year"))) == len(OCCUPATIONS) * len(YEARS)
+
+
+def test_invalid_queries(cube):
+    with pytest.raises(QueryError):
+        cube.query(group_by=("country",))
+    with pytest.raises(QueryError):
+        cube.query(percentiles=(50, 101))
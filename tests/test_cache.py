@@ -0,0 +1,72 @@
+"""Cache em dois níveis: versões de namespace e limpeza entre workers."""
+
+import pytest
+
+from app.core.cache import SQLiteStore, TwoTierCache
+
+
+def worker(path) -> TwoTierCache:
+    return TwoTierCache(maxsize=100, ttl=60, l2=SQLiteStore(path), sync_interval=0)
+
+
+def drain(cache: TwoTierCache) -> None:
+    """Espera a thread do L2 esvaziar a fila."""
+    cache.write(lambda: None).result()
+
+
+def synced(cache: TwoTierCache) -> TwoTierCache:
+    """Enfileira uma leitura de sincronização e a aplica."""
+    cache._sync()
+    drain(cache)
+    cache._sync()
+    return cache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "cache.sqlite3"
+
+
+def test_namespace_version_is_local_at_once_and_reaches_other_workers(path):
+    a, b = worker(path), worker(path)
+    assert a.namespace_token("rates") == ""
+    assert b.namespace_token("rates") == ""
+
+    assert a.set_namespace("rates", "v1")
+    assert a.namespace_token("rates") == "v1"  # Sem esperar o L2
+    assert not a.set_namespace("rates", "v1")
+
+    drain(a)
+    assert synced(b).namespace_token("rates") == "v1"
+    assert not b.set_namespace("rates", "v1")
+
+
+def test_sync_read_queued_before_the_write_does_not_revert_it(path):
+    a = worker(path)
+    a.namespace_token("rates")
+    a._sync()  # Leitura na fila, antes da gravação
+    a.set_namespace("rates", "v2")
+    drain(a)
+    a._sync()  # Aplica a leitura antiga
+    assert a.namespace_token("rates") == "v2"
+    assert synced(a).namespace_token("rates") == "v2"
+    assert a._pending_namespaces == {}
+
+
+async def test_clear_drops_l1_in_other_workers_once(path):
+    a, b = worker(path), worker(path)
+    b.set("k", "html")
+    drain(b)
+    assert await a.get("k") == "html"
+
+    a.clear()
+    assert a.l1.currsize == 0
+    drain(a)
+    synced(b)
+    assert b.l1.currsize == 0
+    assert await b.get("k") is None
+
+    # A própria limpeza não conta como invalidação vinda de outro worker
+    a.set("k2", "html")
+    synced(a)
+    assert "k2" in {key.split(":", 1)[1] for key in a.l1}
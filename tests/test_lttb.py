@@ -0,0 +1,64 @@
+"""LTTB: extremos mantidos, tamanho exato e picos isolados preservados."""
+
+import numpy as np
+import pytest
+
+from app.core.lttb import lttb
+
+
+def series(n: int, seed: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.float64)
+    return x, 10_000 + np.cumsum(rng.normal(0, 50, n))
+
+
+@pytest.mark.parametrize(("n", "threshold"), [(1_000, 50), (1_000, 3), (101, 10), (240, 239)])
+def test_keeps_endpoints_and_exactly_threshold_points(n, threshold):
+    x, y = series(n)
+    keep = lttb(x, y, threshold)
+
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert np.all(np.diff(keep) > 0)
+
+
+@pytest.mark.parametrize("n", [4, 5, 6, 10])
+def test_small_series_one_point_dropped(n):
+    # threshold == n - 1: cada balde do miolo tem um ou dois pontos
+    x, y = series(n)
+    keep = lttb(x, y, n - 1)
+    assert len(keep) == n - 1
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert len(set(keep.tolist())) == n - 1
+
+
+def test_isolated_spike_survives():
+    # Salário mensal estável com um 13º em dezembro de um ano
+    x = np.arange(1_200, dtype=np.float64)
+    y = np.full(len(x), 10_000.0)
+    y[613] = 25_000
+    keep = lttb(x, y, 24)
+    assert 613 in keep
+
+    # Amostragem a passo fixo perderia o pico
+    assert 613 not in np.linspace(0, len(x) - 1, 24).astype(int)
+
+
+def test_valley_survives_in_noisy_series():
+    x, y = series(2_000)
+    y[1_337] = y.min() - 5_000
+    assert 1_337 in lttb(x, y, 40)
+
+
+def test_threshold_at_or_above_size_keeps_everything():
+    x, y = series(30)
+    assert lttb(x, y, 30).tolist() == list(range(30))
+    assert lttb(x, y, 500).tolist() == list(range(30))
+
+
+def test_invalid_arguments():
+    x, y = series(30)
+    with pytest.raises(ValueError, match="threshold"):
+        lttb(x, y, 2)
+    with pytest.raises(ValueError, match="tamanhos"):
+        lttb(x, y[:-1], 10)
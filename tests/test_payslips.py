@@ -0,0 +1,108 @@
+"""Store de sketches de contracheques: mescla por órgão × mês conferida com as linhas."""
+
+import numpy as np
+import pytest
+
+from app.core.sketch import TDigest
+from app.services.payslips import DistributionError, PayslipStore, open_store, period, write_month
+
+ORGAOS = ["tjsp", "tjrj", "mpsp"]
+MONTHS = [(2024, 1), (2024, 2), (2024, 3)]
+
+
+@pytest.fixture(scope="module")
+def payslips(tmp_path_factory) -> tuple[PayslipStore, dict]:
+    """Store com três meses de cada órgão e as linhas que geraram cada sketch."""
+    rng = np.random.default_rng(11)
+    path = tmp_path_factory.mktemp("payslips") / "payslip_sketches.sqlite3"
+    conn = open_store(path)
+    rows: dict[tuple[str, int, str], np.ndarray] = {}
+    for i, orgao in enumerate(ORGAOS):
+        for year, month in MONTHS:
+            base = rng.lognormal(10 + 0.2 * i, 0.3, 4_000)
+            outras = rng.lognormal(8.5, 1.2, 4_000)
+            values = {"base": base, "outras": outras, "bruto": base + outras}
+            for component, v in values.items():
+                rows[(orgao, period(year, month), component)] = v
+            digests = {c: TDigest.from_values(v).to_bytes() for c, v in values.items()}
+            write_month(conn, orgao, year, month, f"sha-{orgao}-{month}", 4_000, digests)
+    conn.close()
+    return PayslipStore(path), rows
+
+
+def select(rows: dict, component: str, orgaos=None, start=0, end=999999) -> np.ndarray:
+    return np.concatenate(
+        [
+            v
+            for (orgao, key, c), v in rows.items()
+            if c == component and (orgaos is None or orgao in orgaos) and start <= key <= end
+        ]
+    )
+
+
+def rank_error(estimate: float, values: np.ndarray, q: float) -> float:
+    return abs(np.searchsorted(np.sort(values), estimate) / len(values) - q)
+
+
+@pytest.mark.parametrize(
+    ("orgaos", "start", "end"),
+    [(None, None, None), (["tjsp", "mpsp"], 202402, None), (["tjrj"], 202401, 202402)],
+)
+def test_distribution_merges_selected_sketches(payslips, orgaos, start, end):
+    store, rows = payslips
+    result = store.distribution(orgaos, start, end, components=["base", "bruto"])
+
+    assert result.components == ["base", "bruto"]
+    assert result.sketches == sum(
+        1
+        for orgao, key, c in rows
+        if c in result.components
+        and (orgaos is None or orgao in orgaos)
+        and (start or 0) <= key <= (end or 999999)
+    )
+    for i, component in enumerate(result.components):
+        values = select(rows, component, orgaos, start or 0, end or 999999)
+        assert result.count[i] == len(values)
+        assert result.mean[i] == pytest.approx(values.mean(), abs=0.01)
+        for q, column in result.percentiles.items():
+            assert rank_error(column[i], values, q / 100) < 2e-3
+
+
+def test_components_without_sketches_are_empty(payslips):
+    store, _ = payslips
+    result = store.distribution(components=["liquido"])
+    assert result.count == [0]
+    assert result.mean == [None]
+    assert result.gini == [None]
+
+
+def test_invalid_distribution_parameters(payslips):
+    store, _ = payslips
+    with pytest.raises(DistributionError):
+        store.distribution(components=["salario"])
+    with pytest.raises(DistributionError):
+        store.distribution(percentiles=(50, 120))
+    with pytest.raises(DistributionError):
+        store.monthly(None, "salario")
+
+
+def test_monthly_merges_each_month(payslips):
+    store, rows = payslips
+    periods, counts, means, quantiles = store.monthly(
+        ["tjsp", "tjrj"], "outras", percentiles=(50, 90), start=202402
+    )
+
+    assert periods.tolist() == [202402, 202403]
+    assert quantiles.shape == (2, 2)
+    for j, key in enumerate(periods):
+        values = select(rows, "outras", ["tjsp", "tjrj"], key, key)
+        assert counts[j] == len(values)
+        assert means[j] == pytest.approx(values.mean())
+        assert rank_error(quantiles[0, j], values, 0.5) < 2e-3
+        assert rank_error(quantiles[1, j], values, 0.9) < 2e-3
+
+
+def test_store_metadata(payslips):
+    store, _ = payslips
+    assert store.orgaos() == sorted(ORGAOS)
+    assert store.version() is None
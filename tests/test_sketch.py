@@ -0,0 +1,97 @@
+"""t-digest: serialização, mescla de blobs (com e sem deflator) e erro dos quantis."""
+
+import numpy as np
+import pytest
+
+from app.core.sketch import TDigest
+
+QS = np.array([0.001, 0.01, 0.1, 0.5, 0.9, 0.99, 0.999])
+
+
+@pytest.fixture(scope="module")
+def parts() -> list[np.ndarray]:
+    """Seis "órgãos × meses" com distribuições deslocadas entre si."""
+    rng = np.random.default_rng(3)
+    return [rng.lognormal(9 + 0.3 * i, 0.8, 20_000) for i in range(6)]
+
+
+def rank_error(digest: TDigest, values: np.ndarray) -> np.ndarray:
+    """|posto empírico do quantil estimado − quantil pedido|."""
+    ordered = np.sort(values)
+    ranks = np.searchsorted(ordered, digest.quantile(QS)) / len(ordered)
+    return np.abs(ranks - QS)
+
+
+def test_round_trip_keeps_header_and_centroids(parts):
+    digest = TDigest.from_values(parts[0])
+    data = digest.to_bytes()
+    loaded = TDigest.from_bytes(data)
+
+    assert (loaded.count, loaded.total, loaded.min, loaded.max) == (
+        digest.count,
+        digest.total,
+        digest.min,
+        digest.max,
+    )
+    # Centroides gravados em float32
+    np.testing.assert_allclose(loaded.means, digest.means, rtol=1e-6)
+    np.testing.assert_allclose(loaded.weights, digest.weights, rtol=1e-6)
+    assert loaded.to_bytes() == data
+    assert len(data) < 2_000
+
+
+def test_empty_digest_round_trip():
+    loaded = TDigest.from_bytes(TDigest.from_values([np.nan]).to_bytes())
+    assert loaded.count == 0
+    assert np.isnan(loaded.quantile([0.5])).all()
+    assert TDigest.merge_bytes([loaded.to_bytes()]).count == 0
+
+
+def test_invalid_blob_is_rejected():
+    with pytest.raises(ValueError, match="Digest inválido"):
+        TDigest.from_bytes(b"XXXX" + TDigest.empty().to_bytes()[4:])
+
+
+def test_quantile_error_against_exact(parts):
+    values = np.concatenate(parts)
+    digest = TDigest.from_values(values)
+
+    assert len(digest.means) <= 100  # ~δ/2 centroides
+    assert rank_error(digest, values).max() < 1e-3
+    inner = slice(1, -1)  # p1 a p99
+    np.testing.assert_allclose(
+        digest.quantile(QS[inner]), np.quantile(values, QS[inner]), rtol=0.01
+    )
+    assert digest.quantile([0, 1]).tolist() == [values.min(), values.max()]
+
+
+def test_merge_bytes_matches_rows(parts):
+    values = np.concatenate(parts)
+    merged = TDigest.merge_bytes(TDigest.from_values(p).to_bytes() for p in parts)
+
+    assert merged.count == len(values)
+    assert merged.total == pytest.approx(values.sum())
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    assert rank_error(merged, values).max() < 1e-3
+    # Mesmo resultado da mescla dos objetos (a menos do float32 dos blobs)
+    objects = TDigest.merge(TDigest.from_values(p) for p in parts)
+    np.testing.assert_allclose(merged.quantile(QS), objects.quantile(QS), rtol=1e-3)
+
+
+def test_merge_bytes_with_scales(parts):
+    scales = [1.5, 1.4, 1.3, 1.2, 1.1, 1.0]
+    values = np.concatenate([p * k for p, k in zip(parts, scales)])
+    merged = TDigest.merge_bytes((TDigest.from_values(p).to_bytes() for p in parts), scales=scales)
+
+    assert merged.count == len(values)
+    assert merged.total == pytest.approx(values.sum())
+    assert merged.min == pytest.approx(values.min())
+    assert merged.max == pytest.approx(values.max())
+    assert rank_error(merged, values).max() < 1e-3
+
+
+def test_merge_bytes_skips_empty_blobs(parts):
+    blobs = [TDigest.empty().to_bytes(), TDigest.from_values(parts[0]).to_bytes()]
+    merged = TDigest.merge_bytes(blobs, scales=[10.0, 2.0])
+    assert merged.count == len(parts[0])
+    assert merged.min == pytest.approx(parts[0].min() * 2)